@@ -2,6 +2,9 @@ from flask import Flask
 from aegis.routes import main_bp, init_scan_worker
 from aegis.api.routes_models import models_bp
 from aegis.api.routes_credentials import bp as credentials_bp
+from aegis.api.routes_workers import workers_bp
+from aegis.distributed.coordinator import init_coordinator
+from aegis.tools.rulepack import init_rule_packs
 from aegis.config import Config
 
 
@@ -12,7 +15,10 @@ def create_app() -> Flask:
     app.register_blueprint(main_bp)
     app.register_blueprint(models_bp)  # Model management API
     app.register_blueprint(credentials_bp)  # Credential management API
+    app.register_blueprint(workers_bp)  # Remote scan workers (coordinator mode)
+    init_coordinator(app)
     init_scan_worker(app)
+    init_rule_packs(app)
 
     return app
 
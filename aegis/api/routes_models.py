@@ -7,11 +7,9 @@ from flask import Blueprint, jsonify, request, current_app
 
 from aegis.models.schema import ModelType, ModelRole, ModelStatus, ModelAvailability
 from aegis.models.registry import ModelRegistryV2
-from aegis.models.discovery.ollama import OllamaDiscoveryClient
 from aegis.models.engine import ModelExecutionEngine
 from aegis.models.runtime_manager import DEFAULT_RUNTIME_MANAGER
 from aegis.providers.hf_local import create_hf_provider, CODEBERT_INSECURE, CODEASTRA_7B
-from aegis.connectors.ollama_connector import OllamaConnector
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +68,8 @@ def discover_ollama_models() -> Any:
         base_url = current_app.config.get("OLLAMA_BASE_URL", "http://localhost:11434")
         force_refresh = request.args.get("refresh", "false").lower() == "true"
 
+        from aegis.models.discovery.ollama import OllamaDiscoveryClient
+
         client = OllamaDiscoveryClient(base_url)
         models = client.discover_models_sync(force_refresh=force_refresh)
 
@@ -103,6 +103,8 @@ def pull_ollama_model() -> Any:
 
     base_url = data.get("base_url") or current_app.config.get("OLLAMA_BASE_URL", "http://localhost:11434")
     try:
+        from aegis.connectors.ollama_connector import OllamaConnector
+
         connector = OllamaConnector(base_url=base_url)
         result = connector.pull_model(model_name)
         return jsonify({"success": True, "result": result})
@@ -660,12 +662,13 @@ def health_check_all_models() -> Any:
 
         # Run health checks concurrently
         import asyncio
+        from aegis.models.event_loop import run_sync
 
         async def check_all():
             tasks = [engine.health_check_model(model, timeout) for model in models]
             return await asyncio.gather(*tasks, return_exceptions=True)
 
-        results = asyncio.run(check_all())
+        results = run_sync(check_all())
 
         # Filter out exceptions and build response
         health_results = []
@@ -0,0 +1,156 @@
+"""API routes for remote scan workers (coordinator mode)."""
+
+import hmac
+import logging
+from typing import Any
+
+from flask import Blueprint, current_app, jsonify, request
+
+from aegis.distributed.coordinator import get_coordinator
+
+logger = logging.getLogger(__name__)
+
+workers_bp = Blueprint("workers", __name__, url_prefix="/api/workers")
+
+
+@workers_bp.before_request
+def _check_coordinator() -> Any:
+    """Reject calls outside coordinator mode or without the shared worker token."""
+    if get_coordinator() is None:
+        return jsonify({"error": "Coordinator mode is disabled (set AEGIS_COORDINATOR=true)"}), 503
+    token = current_app.config.get("WORKER_TOKEN")
+    if not token:
+        return jsonify({"error": "Worker token is not configured (set AEGIS_WORKER_TOKEN)"}), 503
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied, f"Bearer {token}"):
+        return jsonify({"error": "Invalid worker token"}), 401
+    return None
+
+
+@workers_bp.route("", methods=["GET"])
+def list_workers() -> Any:
+    """
+    Registered workers and work unit counts.
+
+    Returns:
+        200: Workers, pending/leased units and re-dispatch count
+    """
+    return jsonify(get_coordinator().stats()), 200
+
+
+@workers_bp.route("/register", methods=["POST"])
+def register_worker() -> Any:
+    """
+    Register a worker and the models it has loaded.
+
+    Body:
+        {
+            "worker_id": "optional stable ID",
+            "host": "gpu-01",
+            "models": ["hf:codeastra", "ollama:qwen2.5-coder"],
+            "slots": 2
+        }
+
+    Returns:
+        200: Assigned worker ID and heartbeat timeout
+        400: Invalid request
+    """
+    data = request.get_json(silent=True) or {}
+    models = data.get("models")
+    if not isinstance(models, list) or not models:
+        return jsonify({"error": "models must be a non-empty list"}), 400
+    try:
+        slots = int(data.get("slots") or 1)
+    except (TypeError, ValueError):
+        return jsonify({"error": "slots must be an integer"}), 400
+
+    coordinator = get_coordinator()
+    node = coordinator.register(
+        host=str(data.get("host") or request.remote_addr or "unknown"),
+        model_ids=[str(model_id) for model_id in models],
+        slots=slots,
+        worker_id=data.get("worker_id"),
+    )
+    return jsonify({
+        "worker_id": node.worker_id,
+        "heartbeat_timeout": coordinator.heartbeat_timeout,
+    }), 200
+
+
+@workers_bp.route("/<worker_id>/heartbeat", methods=["POST"])
+def worker_heartbeat(worker_id: str) -> Any:
+    """
+    Keep a worker registered.
+
+    Returns:
+        200: Heartbeat recorded
+        404: Unknown worker (register again)
+    """
+    if not get_coordinator().heartbeat(worker_id):
+        return jsonify({"error": "Unknown worker"}), 404
+    return jsonify({"ok": True}), 200
+
+
+@workers_bp.route("/<worker_id>/unregister", methods=["POST"])
+def unregister_worker(worker_id: str) -> Any:
+    """
+    Remove a worker that is shutting down; its leased units are re-dispatched.
+
+    Returns:
+        200: Worker removed
+        404: Unknown worker
+    """
+    if not get_coordinator().unregister(worker_id):
+        return jsonify({"error": "Unknown worker"}), 404
+    return jsonify({"ok": True}), 200
+
+
+@workers_bp.route("/<worker_id>/pull", methods=["POST"])
+def pull_units(worker_id: str) -> Any:
+    """
+    Lease work units for the worker's models (long poll).
+
+    Body:
+        {"max_units": 2, "wait": 20}
+
+    Returns:
+        200: {"units": [...]} (empty when nothing arrived within ``wait``)
+        404: Unknown worker (register again)
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        max_units = int(data.get("max_units") or 1)
+        wait = float(data.get("wait") or 0)
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_units and wait must be numbers"}), 400
+
+    units = get_coordinator().pull(worker_id, max_units=max_units, wait=wait)
+    if units is None:
+        return jsonify({"error": "Unknown worker"}), 404
+    return jsonify({"units": units}), 200
+
+
+@workers_bp.route("/<worker_id>/units/<unit_id>/result", methods=["POST"])
+def post_unit_result(worker_id: str, unit_id: str) -> Any:
+    """
+    Report the outcome of a leased unit.
+
+    Body:
+        {"results": [ParserResult, ...], "executions": [ChunkExecution, ...]}
+        or {"error": "message"}
+
+    Returns:
+        200: Result accepted
+        409: The worker no longer holds the unit (it was re-dispatched)
+    """
+    data = request.get_json(silent=True) or {}
+    accepted = get_coordinator().complete(
+        worker_id,
+        unit_id,
+        results=data.get("results"),
+        executions=data.get("executions"),
+        error=data.get("error"),
+    )
+    if not accepted:
+        return jsonify({"error": "Unit is not leased to this worker"}), 409
+    return jsonify({"ok": True}), 200
@@ -0,0 +1,58 @@
+"""Command-line entry point (``aegis``)."""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+from typing import List, Optional
+
+
+def _worker(args: argparse.Namespace) -> int:
+    from aegis.distributed.worker import RemoteWorker
+
+    worker = RemoteWorker(
+        coordinator_url=args.coordinator,
+        model_ids=[model_id for model_id in (args.models or "").split(",") if model_id] or None,
+        slots=args.slots,
+        token=args.token,
+        worker_id=args.worker_id,
+        heartbeat_interval=args.heartbeat_interval,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    print(f"Serving {', '.join(worker.model_ids) or 'no models'} for {worker.coordinator_url}")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="aegis", description="Aegis security scanner")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker = commands.add_parser("worker", help="Run scan work units for a coordinator")
+    worker.add_argument(
+        "--coordinator",
+        default=os.environ.get("AEGIS_COORDINATOR_URL"),
+        required=not os.environ.get("AEGIS_COORDINATOR_URL"),
+        help="Coordinator base URL (default: $AEGIS_COORDINATOR_URL)",
+    )
+    worker.add_argument("--models", default=None, help="Comma-separated model IDs to serve (default: all registered)")
+    worker.add_argument("--slots", type=int, default=1, help="Work units to run at once")
+    worker.add_argument("--token", default=os.environ.get("AEGIS_WORKER_TOKEN"), help="Shared worker token")
+    worker.add_argument("--worker-id", default=None, help="Stable worker ID (default: assigned by the coordinator)")
+    worker.add_argument("--heartbeat-interval", type=float, default=10.0, help="Seconds between heartbeats")
+    worker.set_defaults(handler=_worker)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
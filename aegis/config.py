@@ -13,6 +13,38 @@ class Config:
     OLLAMA_BASE_URL: str = os.environ.get("OLLAMA_BASE_URL") or "http://localhost:11434"
     OLLAMA_MODEL: str = os.environ.get("OLLAMA_MODEL") or "gpt-oss:120b-cloud"
 
+    # Async SSE server for scan progress streams (aegis.sse.server)
+    SSE_SERVER_ENABLED: bool = (os.environ.get("AEGIS_SSE_SERVER") or "true").lower() == "true"
+    SSE_SERVER_HOST: str = os.environ.get("AEGIS_SSE_HOST") or ""
+    SSE_SERVER_PORT: int = int(os.environ.get("AEGIS_SSE_PORT") or 5001)
+    # Base URL browsers reach that server at (e.g. http://localhost:5001). The
+    # Flask stream route redirects there only when set; otherwise it serves
+    # the stream itself, which works behind any proxy
+    SSE_PUBLIC_URL: str = os.environ.get("AEGIS_SSE_PUBLIC_URL") or ""
+    # Comma-separated page origins allowed to open streams on that server
+    # (e.g. http://localhost:5000). Empty allows only pages served from the
+    # same host, i.e. the Flask app on its own port
+    SSE_ALLOWED_ORIGINS: str = os.environ.get("AEGIS_SSE_ALLOWED_ORIGINS") or ""
+
+    # Scan worker pool (aegis.services.scan_worker): threads, and concurrent
+    # scans per model unless the model sets settings["scan_slots"]
+    SCAN_WORKERS: int = int(os.environ.get("AEGIS_SCAN_WORKERS") or 4)
+    SCAN_MODEL_SLOTS: int = int(os.environ.get("AEGIS_SCAN_MODEL_SLOTS") or 1)
+    # Durable scan_jobs queue: lease (visibility timeout) and claims per job
+    SCAN_JOB_LEASE_SECONDS: float = float(os.environ.get("AEGIS_SCAN_JOB_LEASE") or 60)
+    SCAN_JOB_MAX_ATTEMPTS: int = int(os.environ.get("AEGIS_SCAN_JOB_ATTEMPTS") or 3)
+
+    # Coordinator mode (aegis.distributed): remote `aegis worker` nodes run
+    # chunk batches for the models they register. Requires WORKER_TOKEN.
+    COORDINATOR_ENABLED: bool = (os.environ.get("AEGIS_COORDINATOR") or "false").lower() == "true"
+    WORKER_TOKEN: str = os.environ.get("AEGIS_WORKER_TOKEN") or ""
+    WORKER_HEARTBEAT_TIMEOUT: float = float(os.environ.get("AEGIS_WORKER_HEARTBEAT_TIMEOUT") or 30)
+    WORKER_UNIT_TIMEOUT: float = float(os.environ.get("AEGIS_WORKER_UNIT_TIMEOUT") or 600)
+    WORKER_MAX_ATTEMPTS: int = int(os.environ.get("AEGIS_WORKER_MAX_ATTEMPTS") or 3)
+
+    # Load the rule_pack tool's YAML rules (aegis.tools.rulepack) at startup
+    RULE_PACK_PRELOAD: bool = (os.environ.get("AEGIS_RULE_PACK_PRELOAD") or "true").lower() == "true"
+
     @staticmethod
     def init_app(app: Any) -> None:
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
@@ -46,6 +46,31 @@ class TokenBucket:
         self.last_update = time.time()
         return wait_time
 
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """
+        Acquire tokens without blocking the event loop.
+
+        Args:
+            tokens: Number of tokens to acquire
+
+        Returns:
+            float: Time waited in seconds
+        """
+        now = time.time()
+        elapsed = now - self.last_update
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_update = now
+
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+
+        # Reserve the deficit before sleeping so concurrent callers queue behind us
+        wait_time = (tokens - self.tokens) / self.rate
+        self.tokens -= tokens
+        await asyncio.sleep(wait_time)
+        return wait_time
+
 
 class BaseConnector(ABC):
     """Base connector for LLM providers."""
@@ -122,7 +122,7 @@ class OllamaConnector(BaseConnector):
             payload["options"][key] = value
 
         # Apply rate limiting
-        self.rate_limiter.acquire()
+        await self.rate_limiter.acquire_async()
 
         async with aiohttp.ClientSession() as session:
             async with session.post(
@@ -170,7 +170,7 @@ class OllamaConnector(BaseConnector):
             payload["options"][key] = value
 
         # Apply rate limiting
-        self.rate_limiter.acquire()
+        await self.rate_limiter.acquire_async()
 
         async with aiohttp.ClientSession() as session:
             async with session.post(
@@ -157,7 +157,7 @@ class OpenAIConnector(BaseConnector):
         payload = self._format_request(prompt, model, temperature, max_tokens, **kwargs)
 
         # Apply rate limiting
-        self.rate_limiter.acquire()
+        await self.rate_limiter.acquire_async()
 
         async with aiohttp.ClientSession() as session:
             async with session.post(
@@ -182,7 +182,7 @@ class OpenAIConnector(BaseConnector):
         payload["stream"] = True
 
         # Apply rate limiting
-        self.rate_limiter.acquire()
+        await self.rate_limiter.acquire_async()
 
         async with aiohttp.ClientSession() as session:
             async with session.post(
@@ -0,0 +1,304 @@
+"""Sort-and-sweep clustering of findings by file, CWE and line range.
+
+Findings from all models are laid out as columns (file, CWE, start, end,
+model), sorted by ``(file, CWE, start)`` and swept once: a finding joins the
+current cluster when it shares the file and CWE and starts within
+``line_gap`` lines of the furthest end seen so far in that cluster. Sorting
+dominates, so clustering is O(n log n), and overlapping reports such as
+lines 4 and 6 always meet regardless of fixed bucket boundaries.
+
+CWEs are normalized first (``CWE-089``, ``89`` and ``sql_injection`` agree).
+With a similarity threshold, clusters at the same place whose messages are
+near-duplicates (MinHash/LSH, see aegis.consensus.similarity) are joined too,
+which catches models that leave the CWE out. Clusters with two different
+known CWEs are never joined: they are distinct issues at the same place.
+
+Vote counts (distinct models per cluster) and vote weights are computed over
+the columns with NumPy when it is installed; a pure-Python path produces the
+same clusters without it.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aegis.consensus.similarity import has_numpy, normalize_cwe, similar_pairs
+from aegis.data_models import Finding, ModelResponse
+
+# Findings whose ranges are at most this many lines apart are clustered
+DEFAULT_LINE_GAP = 2
+
+
+@dataclass
+class FindingClusters:
+    """Clusters over a flat list of findings."""
+
+    findings: List[Finding]
+    # Indices into ``findings`` per cluster, ordered by (file, CWE, start line)
+    members: List[List[int]] = field(default_factory=list)
+    # Distinct models that reported each cluster
+    votes: List[int] = field(default_factory=list)
+    # Sum of the weights of those models
+    weights: List[float] = field(default_factory=list)
+    # Normalized CWE per finding ("" if unknown)
+    cwes: List[str] = field(default_factory=list)
+    # Line-range clusters joined because their messages matched
+    similarity_merges: int = 0
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def groups(self) -> Iterable[List[Finding]]:
+        """Findings of each cluster, in input order."""
+        for member in self.members:
+            yield [self.findings[idx] for idx in sorted(member)]
+
+    def cluster_cwe(self, cluster: int) -> str:
+        """First known normalized CWE in a cluster, in input order."""
+        for idx in sorted(self.members[cluster]):
+            if self.cwes[idx]:
+                return self.cwes[idx]
+        return ""
+
+
+def _factorize(values: Sequence[str]) -> List[int]:
+    """Map values to dense integer codes in order of first appearance."""
+    codes: Dict[str, int] = {}
+    return [codes.setdefault(value, len(codes)) for value in values]
+
+
+def cluster_responses(
+    responses: Sequence[ModelResponse],
+    weights: Optional[Dict[str, float]] = None,
+    line_gap: int = DEFAULT_LINE_GAP,
+    similarity_threshold: Optional[float] = None,
+) -> FindingClusters:
+    """
+    Cluster the findings of several model responses.
+
+    Args:
+        responses: Model responses (each model counts once per cluster)
+        weights: Optional model_id -> vote weight (default 1.0)
+        line_gap: Maximum line distance between ranges in one cluster
+        similarity_threshold: Also join clusters at the same place whose
+            messages reach this estimated Jaccard similarity, unless their
+            CWEs are both known and differ (None disables)
+
+    Returns:
+        FindingClusters over the concatenated findings
+    """
+    weights = weights or {}
+    findings: List[Finding] = []
+    model_idx: List[int] = []
+    model_weights: List[float] = []
+    for idx, response in enumerate(responses):
+        findings.extend(response.findings)
+        model_idx.extend([idx] * len(response.findings))
+        model_weights.append(float(weights.get(response.model_id, 1.0)))
+    return cluster_findings(findings, model_idx, model_weights, line_gap, similarity_threshold)
+
+
+def cluster_findings(
+    findings: List[Finding],
+    model_idx: Optional[Sequence[int]] = None,
+    model_weights: Optional[Sequence[float]] = None,
+    line_gap: int = DEFAULT_LINE_GAP,
+    similarity_threshold: Optional[float] = None,
+) -> FindingClusters:
+    """
+    Cluster findings by (file, CWE) and overlapping or nearby line ranges.
+
+    Args:
+        findings: Findings to cluster
+        model_idx: Reporting model index per finding (default: all model 0)
+        model_weights: Vote weight per model index (default 1.0 each)
+        line_gap: Maximum line distance between ranges in one cluster
+        similarity_threshold: Also join clusters at the same place whose
+            messages reach this estimated Jaccard similarity, unless their
+            CWEs are both known and differ (None disables)
+
+    Returns:
+        FindingClusters with members, distinct-model votes and weights
+    """
+    if not findings:
+        return FindingClusters(findings=findings)
+
+    count = len(findings)
+    model_idx = list(model_idx) if model_idx is not None else [0] * count
+    n_models = max(model_idx) + 1
+    if model_weights is None:
+        model_weights = [1.0] * n_models
+
+    cwes = [normalize_cwe(f.cwe, f.name) for f in findings]
+    file_codes = _factorize([f.file for f in findings])
+    cwe_codes = _factorize(cwes)
+    n_cwes = max(cwe_codes) + 1
+    groups = [file_code * n_cwes + cwe_code for file_code, cwe_code in zip(file_codes, cwe_codes)]
+    starts = [int(f.start_line or 0) for f in findings]
+    ends = [max(int(f.end_line or 0), start) for f, start in zip(findings, starts)]
+
+    sweep = _sweep_numpy if has_numpy() else _sweep_python
+    order, labels = sweep(groups, starts, ends, line_gap)
+
+    merges = 0
+    if similarity_threshold:
+        labels, merges = _join_similar(findings, cwes, starts, ends, labels, similarity_threshold, line_gap)
+
+    tally = _tally_numpy if has_numpy() else _tally_python
+    members, votes, weights = tally(order, labels, model_idx, model_weights, n_models)
+    return FindingClusters(
+        findings=findings,
+        members=members,
+        votes=votes,
+        weights=weights,
+        cwes=cwes,
+        similarity_merges=merges,
+    )
+
+
+def _sweep_numpy(
+    groups: List[int], starts: List[int], ends: List[int], line_gap: int
+) -> Tuple[List[int], List[int]]:
+    import numpy as np
+
+    group = np.asarray(groups, dtype=np.int64)
+    start = np.asarray(starts, dtype=np.int64)
+    end = np.asarray(ends, dtype=np.int64)
+
+    order = np.lexsort((end, start, group))
+    g, s, e = group[order], start[order], end[order]
+
+    # Shift each group into its own line range so one running maximum of the
+    # end line never carries over from the previous group
+    span = int(e.max()) - min(int(s.min()), 0) + line_gap + 1
+    offset = g * span
+    reach = np.maximum.accumulate(e + offset)
+
+    breaks = np.empty(len(order), dtype=bool)
+    breaks[0] = True
+    breaks[1:] = (g[1:] != g[:-1]) | (s[1:] + offset[1:] > reach[:-1] + line_gap)
+
+    labels = np.empty(len(order), dtype=np.int64)
+    labels[order] = np.cumsum(breaks) - 1
+    return order.tolist(), labels.tolist()
+
+
+def _sweep_python(
+    groups: List[int], starts: List[int], ends: List[int], line_gap: int
+) -> Tuple[List[int], List[int]]:
+    order = sorted(range(len(groups)), key=lambda i: (groups[i], starts[i], ends[i]))
+    labels = [0] * len(groups)
+    label = -1
+    current_group = None
+    reach = 0
+    for idx in order:
+        if groups[idx] != current_group or starts[idx] > reach + line_gap:
+            label += 1
+            current_group = groups[idx]
+            reach = ends[idx]
+        labels[idx] = label
+        reach = max(reach, ends[idx])
+    return order, labels
+
+
+def _join_similar(
+    findings: List[Finding],
+    cwes: List[str],
+    starts: List[int],
+    ends: List[int],
+    labels: List[int],
+    threshold: float,
+    line_gap: int,
+) -> Tuple[List[int], int]:
+    """Union clusters that contain near-duplicate messages at the same place."""
+    parent = list(range(max(labels) + 1))
+    # Known CWE per root; a cluster without one takes its partner's
+    root_cwes = [""] * len(parent)
+    for idx, label in enumerate(labels):
+        root_cwes[label] = root_cwes[label] or cwes[idx]
+
+    def find(label: int) -> int:
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    merges = 0
+    locations = [(f.file, start, end) for f, start, end in zip(findings, starts, ends)]
+    for left, right in similar_pairs(
+        [f.message or f.name or "" for f in findings],
+        locations,
+        threshold=threshold,
+        line_gap=line_gap,
+    ):
+        root_left, root_right = find(labels[left]), find(labels[right])
+        if root_left == root_right:
+            continue
+        cwe_left, cwe_right = root_cwes[root_left], root_cwes[root_right]
+        if cwe_left and cwe_right and cwe_left != cwe_right:
+            continue
+        root, child = min(root_left, root_right), max(root_left, root_right)
+        parent[child] = root
+        root_cwes[root] = cwe_left or cwe_right
+        merges += 1
+
+    if not merges:
+        return labels, 0
+    return [find(label) for label in labels], merges
+
+
+def _tally_numpy(
+    order: List[int],
+    labels: List[int],
+    model_idx: List[int],
+    model_weights: Sequence[float],
+    n_models: int,
+) -> Tuple[List[List[int]], List[int], List[float]]:
+    import numpy as np
+
+    order_arr = np.asarray(order, dtype=np.int64)
+    label_arr = np.asarray(labels, dtype=np.int64)
+
+    # Renumber clusters densely in order of first appearance along the sort
+    _, first_pos, inverse = np.unique(label_arr[order_arr], return_index=True, return_inverse=True)
+    rank = np.empty(len(first_pos), dtype=np.int64)
+    rank[np.argsort(first_pos)] = np.arange(len(first_pos))
+    sorted_ids = rank[inverse.reshape(-1)]
+    n_clusters = len(first_pos)
+
+    ids = np.empty(len(order_arr), dtype=np.int64)
+    ids[order_arr] = sorted_ids
+
+    # One vote per (cluster, model) pair
+    pairs = np.unique(ids * n_models + np.asarray(model_idx, dtype=np.int64))
+    pair_cluster = pairs // n_models
+    pair_model = pairs % n_models
+    votes = np.bincount(pair_cluster, minlength=n_clusters)
+    weight_by_model = np.asarray(model_weights, dtype=np.float64)
+    weights = np.bincount(pair_cluster, weights=weight_by_model[pair_model], minlength=n_clusters)
+
+    by_cluster = order_arr[np.argsort(sorted_ids, kind="stable")]
+    bounds = np.cumsum(np.bincount(sorted_ids, minlength=n_clusters))[:-1]
+    members = [chunk.tolist() for chunk in np.split(by_cluster, bounds)]
+    return members, votes.tolist(), weights.tolist()
+
+
+def _tally_python(
+    order: List[int],
+    labels: List[int],
+    model_idx: List[int],
+    model_weights: Sequence[float],
+    n_models: int,
+) -> Tuple[List[List[int]], List[int], List[float]]:
+    index: Dict[int, int] = {}
+    members: List[List[int]] = []
+    models: List[set] = []
+    for idx in order:
+        cluster = index.setdefault(labels[idx], len(members))
+        if cluster == len(members):
+            members.append([])
+            models.append(set())
+        members[cluster].append(idx)
+        models[cluster].add(model_idx[idx])
+    votes = [len(m) for m in models]
+    weights = [sum(model_weights[i] for i in m) for m in models]
+    return members, votes, weights
@@ -1,16 +1,64 @@
 """Consensus engine for merging findings from multiple models."""
-import hashlib
+import asyncio
+import json
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Literal, Optional, Any
+from aegis.consensus.clustering import DEFAULT_LINE_GAP, FindingClusters, cluster_findings, cluster_responses
+from aegis.consensus.similarity import DEFAULT_SIMILARITY_THRESHOLD, normalize_cwe
+from aegis.consensus.snippets import build_code_windows
 from aegis.data_models import Finding, ModelResponse
+from aegis.models.usage import estimate_tokens
 from aegis.prompt_builder import PromptBuilder
 
+logger = logging.getLogger(__name__)
+
+# Candidate JSON and code windows per judge call; small files are packed
+# together up to this
+DEFAULT_JUDGE_TOKEN_BUDGET = 6000
+# A file whose only candidate is at least this confident skips the judge
+DEFAULT_JUDGE_SKIP_CONFIDENCE = 0.9
+
+
+def _normalize_path(path: Optional[str]) -> str:
+    path = (path or "").strip().replace("\\", "/")
+    return posixpath.normpath(path).lstrip("/") if path else ""
+
 
 class ConsensusEngine:
     """Engine for merging findings from multiple models."""
 
-    def __init__(self, prompt_builder: Optional[PromptBuilder] = None):
-        """Initialize consensus engine."""
+    def __init__(
+        self,
+        prompt_builder: Optional[PromptBuilder] = None,
+        line_gap: int = DEFAULT_LINE_GAP,
+        similarity_threshold: Optional[float] = DEFAULT_SIMILARITY_THRESHOLD,
+        judge_token_budget: int = DEFAULT_JUDGE_TOKEN_BUDGET,
+        judge_skip_confidence: Optional[float] = DEFAULT_JUDGE_SKIP_CONFIDENCE,
+    ):
+        """
+        Initialize consensus engine.
+
+        Args:
+            prompt_builder: Prompt builder for the judge strategy
+            line_gap: Findings on the same file and CWE whose line ranges are at
+                most this far apart are treated as the same issue
+            similarity_threshold: Findings at the same place whose messages
+                reach this estimated Jaccard similarity are treated as the same
+                issue when at most one of them has a CWE (None or 0 disables)
+            judge_token_budget: Estimated candidate tokens per judge call
+            judge_skip_confidence: Files with a single finding at or above this
+                confidence keep it without a judge call (None disables)
+        """
         self.prompt_builder = prompt_builder or PromptBuilder()
+        self.line_gap = line_gap
+        self.similarity_threshold = similarity_threshold
+        self._threshold = similarity_threshold
+        self.judge_token_budget = judge_token_budget
+        self.judge_skip_confidence = judge_skip_confidence
+        # Cluster counts of the last merge, for findings_merged events
+        self.last_merge_stats: Dict[str, int] = {}
 
     def merge(
         self,
@@ -19,8 +67,17 @@ class ConsensusEngine:
         weights: Optional[Dict[str, float]] = None,
         judge_model: Optional[Any] = None,
         judge_request_params: Optional[Dict[str, Any]] = None,
+        similarity_threshold: Optional[float] = None,
     ) -> List[Finding]:
-        """Merge findings from multiple models using specified strategy."""
+        """
+        Merge findings from multiple models using specified strategy.
+
+        ``similarity_threshold`` overrides the engine default for this call;
+        cluster counts are left in ``last_merge_stats``.
+        """
+        self.last_merge_stats = {"input_findings": 0, "clusters": 0, "similarity_merges": 0}
+        self._threshold = self.similarity_threshold if similarity_threshold is None else similarity_threshold
+
         if not model_responses:
             return []
 
@@ -47,38 +104,22 @@ class ConsensusEngine:
 
     def _union_strategy(self, responses: List[ModelResponse]) -> List[Finding]:
         """Union strategy: merge all findings and deduplicate."""
-        all_findings = []
-        for response in responses:
-            all_findings.extend(response.findings)
-
-        return self._deduplicate_findings(all_findings)
+        clusters = self._cluster(responses)
+        return [self._merge_cluster(clusters, idx) for idx in range(len(clusters))]
 
     def _majority_vote_strategy(self, responses: List[ModelResponse]) -> List[Finding]:
         """Majority vote: require >50% model agreement."""
         if len(responses) == 1:
             return responses[0].findings
 
-        # Group findings by normalized key
-        finding_groups: Dict[str, List[Finding]] = {}
-
-        for response in responses:
-            for finding in response.findings:
-                key = self._normalize_finding_key(finding)
-                if key not in finding_groups:
-                    finding_groups[key] = []
-                finding_groups[key].append(finding)
-
-        # Keep only findings with majority agreement
+        # Each model votes at most once per cluster
+        clusters = self._cluster(responses)
         threshold = len(responses) / 2
-        consensus_findings = []
-
-        for key, findings in finding_groups.items():
-            if len(findings) > threshold:
-                # Merge findings: take max confidence, most informative message
-                merged = self._merge_finding_group(findings)
-                consensus_findings.append(merged)
-
-        return consensus_findings
+        return [
+            self._merge_cluster(clusters, idx)
+            for idx, votes in enumerate(clusters.votes)
+            if votes > threshold
+        ]
 
     def _weighted_vote_strategy(
         self, responses: List[ModelResponse], weights: Dict[str, float]
@@ -87,29 +128,32 @@ class ConsensusEngine:
         if len(responses) == 1:
             return responses[0].findings
 
-        # Group findings by normalized key
-        finding_groups: Dict[str, List[Finding]] = {}
-
-        for response in responses:
-            weight = weights.get(response.model_id, 1.0)
-            for finding in response.findings:
-                key = self._normalize_finding_key(finding)
-                if key not in finding_groups:
-                    finding_groups[key] = []
-                finding_groups[key].append((finding, weight))
-
-        # Calculate weighted scores
-        consensus_findings = []
+        clusters = self._cluster(responses, weights)
         total_weight = sum(weights.get(r.model_id, 1.0) for r in responses)
+        return [
+            self._merge_cluster(clusters, idx)
+            for idx, weight in enumerate(clusters.weights)
+            if weight > (total_weight / 2)  # Majority by weight
+        ]
 
-        for key, weighted_findings in finding_groups.items():
-            weighted_sum = sum(weight for _, weight in weighted_findings)
-            if weighted_sum > (total_weight / 2):  # Majority by weight
-                findings = [f for f, _ in weighted_findings]
-                merged = self._merge_finding_group(findings)
-                consensus_findings.append(merged)
+    def _cluster(
+        self, responses: List[ModelResponse], weights: Optional[Dict[str, float]] = None
+    ) -> FindingClusters:
+        """Cluster response findings and record the counts in last_merge_stats."""
+        clusters = cluster_responses(
+            responses,
+            weights=weights,
+            line_gap=self.line_gap,
+            similarity_threshold=self._threshold,
+        )
+        self._record_stats(clusters)
+        return clusters
 
-        return consensus_findings
+    def _record_stats(self, clusters: FindingClusters) -> None:
+        stats = self.last_merge_stats
+        stats["input_findings"] = stats.get("input_findings", 0) + len(clusters.findings)
+        stats["clusters"] = stats.get("clusters", 0) + len(clusters)
+        stats["similarity_merges"] = stats.get("similarity_merges", 0) + clusters.similarity_merges
 
     def _judge_strategy(
         self,
@@ -117,7 +161,23 @@ class ConsensusEngine:
         judge_model: Any,
         request_params: Dict[str, Any],
     ) -> List[Finding]:
-        """Judge strategy: use a judge model to merge findings."""
+        """
+        Judge strategy: use a judge model to merge findings.
+
+        Files whose only candidate is already high-confidence skip the judge.
+        The rest are packed, several small files per prompt up to a token
+        budget, and the packs are judged concurrently up to the judge model's
+        concurrency limit. A pack whose judge call fails falls back to union,
+        as does a pack with a judged finding that cannot be attributed to one
+        of its files.
+
+        With ``source_files`` (the scan's file contents) each call also carries
+        merged code windows around its candidates, counted against the same
+        budget.
+
+        Recognized request_params: language, repo_name, scan_id, source_files,
+        skip_confidence, token_budget, max_concurrency.
+        """
         # Collect all findings
         all_findings = []
         for response in responses:
@@ -133,107 +193,244 @@ class ConsensusEngine:
                 findings_by_file[finding.file] = []
             findings_by_file[finding.file].append(finding)
 
-        # Process each file with judge
-        consensus_findings = []
+        skip_confidence = request_params.get("skip_confidence", self.judge_skip_confidence)
+        results_by_file: Dict[str, List[Finding]] = {}
+        pending: Dict[str, List[Finding]] = {}
+        for file_path, findings in findings_by_file.items():
+            if skip_confidence is not None and len(findings) == 1 and findings[0].confidence >= skip_confidence:
+                results_by_file[file_path] = findings
+            else:
+                pending[file_path] = findings
 
-        # Support legacy judge adapters with .predict(), or ModelRecord (new registry).
-        def _run_judge_predict(prompt: str, file_path: str, candidate_data: List[Dict[str, Any]]):
-            from aegis.data_models import ModelRequest
+        # Legacy judge adapters (.predict()) attribute findings to the request's
+        # file, so they get one file per call
+        has_predict = hasattr(judge_model, "predict")
+        budget = 0 if has_predict else int(request_params.get("token_budget") or self.judge_token_budget)
+
+        # Candidate JSON plus code windows per file, all within the call budget
+        costs = {
+            file_path: estimate_tokens(json.dumps([f.to_dict() for f in findings]))
+            for file_path, findings in pending.items()
+        }
+        code_windows: Dict[str, str] = {}
+        source_files = request_params.get("source_files") or {}
+        if source_files and not has_predict:
+            for file_path, findings in pending.items():
+                code = build_code_windows(file_path, source_files.get(file_path), findings, budget - costs[file_path])
+                if code:
+                    code_windows[file_path] = code
+                    costs[file_path] += estimate_tokens(code)
+        packs = self._pack_judge_candidates(costs, budget)
+
+        if has_predict:
+            judged = self._run_judge_predict(packs, pending, judge_model, request_params)
+        else:
+            judged = self._run_judge_runtime(packs, pending, code_windows, judge_model, request_params)
 
-            judge_request = ModelRequest(
-                code_context=prompt,
-                file_path=file_path,
-                language=request_params.get("language", "unknown"),
-                prompt_template_id="judge_consensus",
-            )
-            return judge_model.predict(judge_request)
+        for pack, pack_findings in zip(packs, judged):
+            if pack_findings is None:
+                # Fallback to union if judge fails
+                for file_path in pack:
+                    results_by_file[file_path] = self._deduplicate_findings(pending[file_path])
+                continue
+            owners = [self._judged_file(finding, pack, pending) for finding in pack_findings]
+            if None in owners:
+                # Can't tell which packed file a finding belongs to; keep the
+                # candidates rather than lose it
+                for file_path in pack:
+                    results_by_file[file_path] = self._deduplicate_findings(pending[file_path])
+                continue
+            for file_path in pack:
+                results_by_file.setdefault(file_path, [])
+            for finding, file_path in zip(pack_findings, owners):
+                finding.file = file_path
+                results_by_file[file_path].append(finding)
+
+        # Keep file order stable regardless of which calls finished first
+        consensus_findings = []
+        for file_path in findings_by_file:
+            consensus_findings.extend(results_by_file.get(file_path, []))
+        return consensus_findings
 
-        def _run_judge_runtime(file_path: str, candidate_data: List[Dict[str, Any]]):
-            import asyncio
-            import json
-            from aegis.models.runtime_manager import DEFAULT_RUNTIME_MANAGER
-            from aegis.models.schema import ModelRole
-            from aegis.models.engine import _candidate_to_finding
+    def _judged_file(self, finding: Finding, pack: List[str], pending: Dict[str, List[Finding]]) -> Optional[str]:
+        """
+        The packed file a judged finding belongs to, or None if that is unclear.
+
+        Judges may omit or rewrite the path, so a finding that does not name a
+        packed file is matched to the file whose candidates it agrees with
+        most (same name, overlapping lines, same CWE).
+        """
+        if finding.file in pack:
+            return finding.file
+        if len(pack) == 1:
+            return pack[0]
+
+        reported = _normalize_path(finding.file)
+        if reported:
+            suffix_matches = [
+                file_path for file_path in pack
+                if ("/" + _normalize_path(file_path)).endswith("/" + reported)
+                or ("/" + reported).endswith("/" + _normalize_path(file_path))
+            ]
+            if len(suffix_matches) == 1:
+                return suffix_matches[0]
+
+        name = (finding.name or "").strip().lower()
+        cwe = normalize_cwe(finding.cwe)
+        scores: Dict[str, int] = {}
+        for file_path in pack:
+            best = 0
+            for candidate in pending[file_path]:
+                score = 0
+                if name and name == (candidate.name or "").strip().lower():
+                    score += 1
+                if (
+                    finding.start_line <= candidate.end_line + self.line_gap
+                    and candidate.start_line <= finding.end_line + self.line_gap
+                ):
+                    score += 1
+                if cwe and cwe == normalize_cwe(candidate.cwe):
+                    score += 1
+                best = max(best, score)
+            scores[file_path] = best
+        top = max(scores.values())
+        winners = [file_path for file_path, score in scores.items() if score == top]
+        return winners[0] if top > 0 and len(winners) == 1 else None
+
+    @staticmethod
+    def _judge_candidates(pack: List[str], pending: Dict[str, List[Finding]]) -> List[Dict[str, Any]]:
+        return [finding.to_dict() for file_path in pack for finding in pending[file_path]]
+
+    def _pack_judge_candidates(self, costs: Dict[str, int], token_budget: int) -> List[List[str]]:
+        """
+        Group files into judge calls whose estimated prompt payload fits the budget.
+
+        Files are packed greedily in order; a file that alone exceeds the budget
+        gets its own call rather than being split, so the judge always sees all
+        candidates for a file together.
+        """
+        packs: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for file_path, tokens in costs.items():
+            if current and current_tokens + tokens > token_budget:
+                packs.append(current)
+                current, current_tokens = [], 0
+            current.append(file_path)
+            current_tokens += tokens
+        if current:
+            packs.append(current)
+        return packs
+
+    def _run_judge_runtime(
+        self,
+        packs: List[List[str]],
+        pending: Dict[str, List[Finding]],
+        code_windows: Dict[str, str],
+        judge_model: Any,
+        request_params: Dict[str, Any],
+    ) -> List[Optional[List[Finding]]]:
+        """Judge packs concurrently through the model runtime (None marks a failed pack)."""
+        from aegis.models.event_loop import run_sync
+        from aegis.models.runtime_manager import DEFAULT_RUNTIME_MANAGER
+        from aegis.models.schema import ModelRole
+        from aegis.models.engine import _candidate_to_finding
+
+        if not packs:
+            return []
+        runtime = DEFAULT_RUNTIME_MANAGER.get_runtime(judge_model)
+        # The runtime throttle enforces the live (adaptive) limit; this only
+        # caps how many calls are queued on it at once
+        limit = int(request_params.get("max_concurrency") or runtime.concurrency.max_limit)
+        scan_id = request_params.get("scan_id")
 
-            runtime = DEFAULT_RUNTIME_MANAGER.get_runtime(judge_model)
+        async def judge_pack(semaphore: asyncio.Semaphore, pack: List[str]) -> Optional[List[Finding]]:
             context = {
-                "file_path": file_path,
-                "findings_json": json.dumps(candidate_data, indent=2),
+                "file_path": ", ".join(pack),
+                "findings_json": json.dumps(self._judge_candidates(pack, pending), indent=2),
+                "code_context": "\n\n".join(code_windows[f] for f in pack if f in code_windows),
             }
-            result = asyncio.run(runtime.run("", context, role=ModelRole.JUDGE))
+            try:
+                async with semaphore:
+                    result = await runtime.run("", context, role=ModelRole.JUDGE, scan_id=scan_id)
+            except Exception as e:
+                logger.warning(f"Judge call failed for {', '.join(pack)}, using union: {e}")
+                return None
             return [_candidate_to_finding(c) for c in result.findings]
 
-        has_predict = hasattr(judge_model, "predict")
+        async def judge_all() -> List[Optional[List[Finding]]]:
+            semaphore = asyncio.Semaphore(max(1, limit))
+            return list(await asyncio.gather(*(judge_pack(semaphore, pack) for pack in packs)))
 
-        for file_path, findings in findings_by_file.items():
-            # Convert findings to dict for judge
-            candidate_data = [f.to_dict() for f in findings]
+        try:
+            return run_sync(judge_all())
+        except Exception as e:
+            files = [file_path for pack in packs for file_path in pack]
+            logger.warning(f"Judge failed for {len(files)} files ({', '.join(files)}), using union: {e}")
+            return [None] * len(packs)
 
-            # Build judge prompt
-            language = request_params.get("language", "unknown")
-            repo_name = request_params.get("repo_name")
+    def _run_judge_predict(
+        self,
+        packs: List[List[str]],
+        pending: Dict[str, List[Finding]],
+        judge_model: Any,
+        request_params: Dict[str, Any],
+    ) -> List[Optional[List[Finding]]]:
+        """Judge packs through a legacy .predict() adapter on a thread pool."""
+        from aegis.data_models import ModelRequest
 
+        if not packs:
+            return []
+        language = request_params.get("language", "unknown")
+        repo_name = request_params.get("repo_name")
+
+        def judge_pack(pack: List[str]) -> Optional[List[Finding]]:
+            file_path = ", ".join(pack)
             prompt = self.prompt_builder.build_judge_prompt(
-                candidate_findings=candidate_data,
+                candidate_findings=self._judge_candidates(pack, pending),
                 file_path=file_path,
                 language=language,
                 repo_name=repo_name,
             )
+            judge_request = ModelRequest(
+                code_context=prompt,
+                file_path=file_path,
+                language=language,
+                prompt_template_id="judge_consensus",
+            )
             try:
-                if has_predict:
-                    judge_response = _run_judge_predict(prompt, file_path, candidate_data)
-                    if not judge_response.error:
-                        consensus_findings.extend(judge_response.findings)
-                    else:
-                        consensus_findings.extend(self._deduplicate_findings(findings))
-                else:
-                    consensus_findings.extend(_run_judge_runtime(file_path, candidate_data))
-            except Exception:
-                # Fallback to union if judge fails
-                consensus_findings.extend(self._deduplicate_findings(findings))
-
-        return consensus_findings
-
-    def _normalize_finding_key(self, finding: Finding) -> str:
-        """Create normalized key for finding deduplication."""
-        # Normalize line ranges to buckets (±2 lines)
-        line_bucket_start = (finding.start_line // 5) * 5
-        line_bucket_end = ((finding.end_line + 4) // 5) * 5
-
-        # Normalize message (lowercase, remove extra whitespace)
-        normalized_message = " ".join(finding.message.lower().split())
-
-        # Create key
-        key_parts = [
-            finding.cwe,
-            finding.file,
-            str(line_bucket_start),
-            str(line_bucket_end),
-            normalized_message[:50],  # First 50 chars
-        ]
-
-        key_string = "|".join(key_parts)
-        return hashlib.sha1(key_string.encode()).hexdigest()
+                judge_response = judge_model.predict(judge_request)
+            except Exception as e:
+                logger.warning(f"Judge call failed for {file_path}, using union: {e}")
+                return None
+            if judge_response.error:
+                logger.warning(f"Judge call failed for {file_path}, using union: {judge_response.error}")
+                return None
+            return judge_response.findings
+
+        workers = int(request_params.get("max_concurrency") or getattr(judge_model, "max_concurrency", 0) or 4)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(packs)))) as executor:
+            return list(executor.map(judge_pack, packs))
 
     def _deduplicate_findings(self, findings: List[Finding]) -> List[Finding]:
-        """Deduplicate findings based on normalized keys."""
-        seen_keys: Dict[str, Finding] = {}
-
-        for finding in findings:
-            key = self._normalize_finding_key(finding)
-
-            if key not in seen_keys:
-                seen_keys[key] = finding
-            else:
-                # Merge: keep the one with higher confidence or more informative message
-                existing = seen_keys[key]
-                if (
-                    finding.confidence > existing.confidence
-                    or len(finding.message) > len(existing.message)
-                ):
-                    seen_keys[key] = finding
-
-        return list(seen_keys.values())
+        """Collapse findings on the same file, CWE and overlapping lines."""
+        clusters = cluster_findings(
+            findings,
+            line_gap=self.line_gap,
+            similarity_threshold=self._threshold,
+        )
+        self._record_stats(clusters)
+        return [self._merge_cluster(clusters, idx) for idx in range(len(clusters))]
+
+    def _merge_cluster(self, clusters: FindingClusters, idx: int) -> Finding:
+        """Merge one cluster, keeping the first known CWE if the base has none."""
+        members = sorted(clusters.members[idx])
+        merged = self._merge_finding_group([clusters.findings[i] for i in members])
+        if len(members) > 1 and not normalize_cwe(merged.cwe):
+            cwe = clusters.cluster_cwe(idx)
+            if cwe:
+                merged.cwe = cwe
+        return merged
 
     def _merge_finding_group(self, findings: List[Finding]) -> Finding:
         """Merge a group of similar findings into one."""
@@ -0,0 +1,270 @@
+"""Finding similarity for consensus: CWE normalization and MinHash/LSH.
+
+Models label the same issue differently ("CWE-089", "89", "sql_injection")
+and describe it in different words. ``normalize_cwe`` maps identifiers and
+category names onto one ``CWE-<n>`` form, and ``similar_pairs`` finds findings
+with near-duplicate messages without comparing every pair: each message is
+reduced to a MinHash signature over word shingles, signatures are split into
+LSH bands, and only findings that share a band bucket (and a file and nearby
+line range) are compared.
+"""
+
+import importlib.util
+import json
+import re
+import zlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Estimated Jaccard similarity at which two messages count as the same issue
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+NUM_PERM = 64
+
+_CWE_ID = re.compile(r"^(?:cwe)?[\s_:-]*0*(\d+)$", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_PARENS = re.compile(r"\([^)]*\)")
+_STEM_LEN = 5
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could for from has have in into is it its may of on or "
+    "that the this to via was which with without".split()
+)
+
+# Largest prime below 2**32: (a * x + b) stays below 2**64 for 32-bit x
+_PRIME = 4294967291
+
+# Category names models use instead of (or alongside) a CWE id
+CATEGORY_CWES: Dict[str, str] = {
+    "sql_injection": "CWE-89",
+    "sqli": "CWE-89",
+    "xss": "CWE-79",
+    "cross_site_scripting": "CWE-79",
+    "command_injection": "CWE-78",
+    "os_command_injection": "CWE-78",
+    "shell_injection": "CWE-78",
+    "code_injection": "CWE-94",
+    "eval_injection": "CWE-95",
+    "path_traversal": "CWE-22",
+    "directory_traversal": "CWE-22",
+    "ssrf": "CWE-918",
+    "server_side_request_forgery": "CWE-918",
+    "xxe": "CWE-611",
+    "xml_external_entity": "CWE-611",
+    "deserialization": "CWE-502",
+    "insecure_deserialization": "CWE-502",
+    "hardcoded_secret": "CWE-798",
+    "hardcoded_secrets": "CWE-798",
+    "hardcoded_credentials": "CWE-798",
+    "hardcoded_password": "CWE-798",
+    "csrf": "CWE-352",
+    "open_redirect": "CWE-601",
+    "weak_crypto": "CWE-327",
+    "weak_cryptography": "CWE-327",
+    "insecure_randomness": "CWE-330",
+    "weak_random": "CWE-330",
+    "ldap_injection": "CWE-90",
+    "xpath_injection": "CWE-643",
+    "template_injection": "CWE-1336",
+    "ssti": "CWE-1336",
+    "log_injection": "CWE-117",
+    "redos": "CWE-1333",
+    "buffer_overflow": "CWE-120",
+    "integer_overflow": "CWE-190",
+    "use_after_free": "CWE-416",
+    "null_pointer_dereference": "CWE-476",
+    "race_condition": "CWE-362",
+    "missing_authentication": "CWE-306",
+    "missing_authorization": "CWE-862",
+    "information_disclosure": "CWE-200",
+    "information_exposure": "CWE-200",
+    "sensitive_data_exposure": "CWE-200",
+    "unrestricted_file_upload": "CWE-434",
+    "file_upload": "CWE-434",
+    "cleartext_transmission": "CWE-319",
+    "prototype_pollution": "CWE-1321",
+    "mass_assignment": "CWE-915",
+}
+
+
+def _slug(text: str) -> str:
+    return _NON_WORD.sub("_", _PARENS.sub("", text.lower())).strip("_")
+
+
+@lru_cache(maxsize=1)
+def _catalog_names() -> Dict[str, str]:
+    """Slugified CWE names from data/cwe.json (e.g. "sql_injection" -> CWE-89)."""
+    path = Path(__file__).resolve().parents[2] / "data" / "cwe.json"
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            catalog = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return {_slug(entry.get("name", "")): cwe_id for cwe_id, entry in catalog.items() if entry.get("name")}
+
+
+def normalize_cwe(cwe: Optional[str], category: Optional[str] = None) -> str:
+    """
+    Normalize a CWE identifier, falling back to the finding's category name.
+
+    Args:
+        cwe: CWE as reported ("CWE-089", "cwe 89", "89", ...)
+        category: Category or finding name ("sql_injection", "SQL Injection")
+
+    Returns:
+        "CWE-<n>", or "" when neither identifies a CWE
+    """
+    match = _CWE_ID.match((cwe or "").strip())
+    if match and int(match.group(1)) > 0:
+        return f"CWE-{int(match.group(1))}"
+    if category:
+        slug = _slug(category)
+        return CATEGORY_CWES.get(slug) or _catalog_names().get(slug, "")
+    return ""
+
+
+def shingles(message: str) -> List[str]:
+    """
+    Word shingles of a finding message.
+
+    Words are lowercased, stopwords dropped and truncated to a short stem so
+    "concatenation" and "concatenated" match; unigrams and bigrams are used
+    because finding messages are only a sentence or two long.
+    """
+    words = [w[:_STEM_LEN] for w in _NON_WORD.split(message.lower()) if w and w not in _STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+@lru_cache(maxsize=8)
+def _permutations(num_perm: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    # Fixed seed: signatures must be comparable across calls and processes
+    import random
+
+    rng = random.Random(0x5EED)
+    return (
+        tuple(rng.randrange(1, _PRIME) for _ in range(num_perm)),
+        tuple(rng.randrange(0, _PRIME) for _ in range(num_perm)),
+    )
+
+
+@lru_cache(maxsize=None)
+def has_numpy() -> bool:
+    """Whether NumPy is installed; checked without importing it (it is slow to import)."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+def _shingle_hashes(message: str) -> List[int]:
+    return sorted({zlib.crc32(s.encode("utf-8")) for s in shingles(message)}) or [0]
+
+
+def minhash_signatures(messages: Sequence[str], num_perm: int = NUM_PERM) -> List[Tuple[int, ...]]:
+    """
+    MinHash signature per message (``num_perm`` values each).
+
+    Uses universal hashing ``(a * x + b) mod p`` over CRC32 shingle hashes;
+    vectorized with NumPy when available.
+    """
+    a_values, b_values = _permutations(num_perm)
+    hashed = [_shingle_hashes(message) for message in messages]
+    if not has_numpy():
+        return [
+            tuple(min((a * x + b) % _PRIME for x in values) for a, b in zip(a_values, b_values))
+            for values in hashed
+        ]
+
+    import numpy as np
+
+    a = np.asarray(a_values, dtype=np.uint64)[:, None]
+    b = np.asarray(b_values, dtype=np.uint64)[:, None]
+    prime = np.uint64(_PRIME)
+
+    lengths = np.fromiter((len(values) for values in hashed), dtype=np.int64, count=len(hashed))
+    flat = np.fromiter((x for values in hashed for x in values), dtype=np.uint64, count=int(lengths.sum()))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    signatures: List[Tuple[int, ...]] = []
+    batch = 4096  # findings per block, bounds the (num_perm, shingles) matrix
+    for first in range(0, len(hashed), batch):
+        last = min(first + batch, len(hashed))
+        lo, hi = int(starts[first]), int(starts[last - 1] + lengths[last - 1])
+        x = flat[lo:hi][None, :]
+        values = (a * x + b) % prime
+        mins = np.minimum.reduceat(values, starts[first:last] - lo, axis=1)
+        signatures.extend(tuple(int(v) for v in column) for column in mins.T)
+    return signatures
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) so the LSH S-curve crosses ``threshold``.
+
+    Candidate probability is ``1 - (1 - s^rows)^bands``; its midpoint is about
+    ``(1 / bands) ** (1 / rows)``.
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def estimated_similarity(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity: fraction of equal signature slots."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def similar_pairs(
+    messages: Sequence[str],
+    locations: Sequence[Tuple[str, int, int]],
+    threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+    line_gap: int = 2,
+    num_perm: int = NUM_PERM,
+) -> Iterable[Tuple[int, int]]:
+    """
+    Yield index pairs of findings with near-duplicate messages at the same place.
+
+    Only findings sharing an LSH bucket are compared, and only if they are in
+    the same file with line ranges at most ``line_gap`` apart. Within a bucket
+    every pair is compared, in start-line order and stopping at the first
+    finding that starts beyond ``line_gap`` of the current one's end, so a
+    bucket of a message repeated across a file stays cheap.
+
+    Args:
+        messages: Finding messages
+        locations: (file, start_line, end_line) per finding
+        threshold: Minimum estimated Jaccard similarity
+        line_gap: Maximum line distance between the two ranges
+        num_perm: MinHash signature length
+    """
+    if len(messages) < 2:
+        return
+    signatures = minhash_signatures(messages, num_perm)
+    bands, rows = lsh_params(threshold, num_perm)
+
+    buckets: Dict[Tuple[str, int, Tuple[int, ...]], List[int]] = {}
+    for idx, signature in enumerate(signatures):
+        file_path = locations[idx][0]
+        for band in range(bands):
+            key = (file_path, band, signature[band * rows : (band + 1) * rows])
+            buckets.setdefault(key, []).append(idx)
+
+    seen = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda i: (locations[i][1], locations[i][2]))
+        for pos, first in enumerate(members):
+            for other in members[pos + 1:]:
+                if locations[other][1] > locations[first][2] + line_gap:
+                    break
+                pair = (first, other) if first < other else (other, first)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                if estimated_similarity(signatures[first], signatures[other]) >= threshold:
+                    yield pair
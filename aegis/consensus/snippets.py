@@ -0,0 +1,95 @@
+"""Compact source windows around candidate findings for the judge.
+
+The judge decides far better with the code in front of it, but re-sending
+whole files is expensive. ``build_code_windows`` cuts a few lines of context
+around each candidate's line range, merges windows that overlap or touch,
+and shrinks the result until it fits a token budget: first by narrowing the
+context, then by clipping long ranges, then by dropping the windows of the
+least confident candidates.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from aegis.data_models import Finding
+from aegis.models.usage import estimate_tokens
+
+DEFAULT_CONTEXT_LINES = 3
+# Longest range shown in full; longer findings show their first lines only
+MAX_WINDOW_LINES = 40
+
+
+def merge_ranges(ranges: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge 1-based inclusive line ranges that overlap or are adjacent."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _windows(
+    findings: Sequence[Finding], line_count: int, context_lines: int, max_lines: int
+) -> List[Tuple[int, int]]:
+    ranges = []
+    for finding in findings:
+        start = max(1, int(finding.start_line or 1))
+        end = max(start, int(finding.end_line or start))
+        end = min(end, start + max_lines - 1)
+        ranges.append((max(1, start - context_lines), min(line_count, end + context_lines)))
+    return merge_ranges([r for r in ranges if r[0] <= r[1]])
+
+
+def _render(file_path: str, lines: List[str], windows: List[Tuple[int, int]]) -> str:
+    width = len(str(windows[-1][1])) if windows else 1
+    blocks = []
+    for start, end in windows:
+        body = "\n".join(f"{n:>{width}} | {lines[n - 1]}" for n in range(start, end + 1))
+        blocks.append(f"--- {file_path} lines {start}-{end}\n{body}")
+    return "\n".join(blocks)
+
+
+def build_code_windows(
+    file_path: str,
+    source: Optional[str],
+    findings: Sequence[Finding],
+    token_budget: int,
+    context_lines: int = DEFAULT_CONTEXT_LINES,
+) -> str:
+    """
+    Render deduplicated code windows for one file's candidates.
+
+    Args:
+        file_path: File the findings belong to (used in window headers)
+        source: File content from the scan's source store
+        findings: Candidate findings in the file
+        token_budget: Estimated tokens the rendered windows may use
+        context_lines: Lines of context around each candidate's range
+
+    Returns:
+        Numbered source windows, or "" if there is no source or no budget
+    """
+    if not source or not findings or token_budget <= 0:
+        return ""
+    lines = source.splitlines()
+
+    # Narrow the context, then clip long ranges, before dropping anything
+    attempts = [(ctx, MAX_WINDOW_LINES) for ctx in sorted({context_lines, context_lines // 2, 0}, reverse=True)]
+    attempts.append((0, 5))
+    for ctx, max_lines in attempts:
+        rendered = _render(file_path, lines, _windows(findings, len(lines), ctx, max_lines))
+        if estimate_tokens(rendered) <= token_budget:
+            return rendered
+
+    # Keep windows of the most confident candidates that still fit
+    kept: List[Finding] = []
+    rendered = ""
+    for finding in sorted(findings, key=lambda f: f.confidence, reverse=True):
+        candidate = _render(file_path, lines, _windows(kept + [finding], len(lines), 0, 5))
+        if estimate_tokens(candidate) > token_budget:
+            continue
+        kept.append(finding)
+        rendered = candidate
+    return rendered
+
@@ -1,10 +1,13 @@
 """Database initialization and connection management for Aegis."""
 from pathlib import Path
 import sqlite3
+import time
 from typing import Optional
 from contextlib import contextmanager
 import logging
 
+from aegis import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +45,10 @@ class Database:
                 with open(schema_path, 'r', encoding='utf-8') as f:
                     schema_sql = f.read()
                 conn.executescript(schema_sql)
+                # Older databases predate queue-wait telemetry
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(model_executions)")}
+                if "queue_wait_ms" not in columns:
+                    conn.execute("ALTER TABLE model_executions ADD COLUMN queue_wait_ms INTEGER DEFAULT 0")
                 conn.commit()
             logger.info("Database schema initialized successfully")
         except Exception as e:
@@ -61,6 +68,7 @@ class Database:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM models")
         """
+        started = time.perf_counter()
         conn = sqlite3.connect(str(self.db_path))
         conn.row_factory = sqlite3.Row  # Enable dict-like access to rows
         try:
@@ -70,6 +78,8 @@ class Database:
             logger.error(f"Database error: {e}")
             raise
         finally:
+            if conn.total_changes:
+                metrics.DB_WRITE_LATENCY.observe(time.perf_counter() - started)
             conn.close()
 
 
@@ -3,6 +3,7 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 import json
 import logging
+import time
 
 from aegis.database import get_db
 from aegis.data_models import Finding
@@ -411,11 +412,206 @@ class ScanRepository:
             cursor = conn.cursor()
             # Delete scan files first
             cursor.execute("DELETE FROM scan_files WHERE scan_id = ?", (scan_id,))
+            cursor.execute("DELETE FROM scan_profiles WHERE scan_id = ?", (scan_id,))
+            cursor.execute("DELETE FROM scan_jobs WHERE scan_id = ?", (scan_id,))
             # Delete scan record
             cursor.execute("DELETE FROM scans WHERE scan_id = ?", (scan_id,))
             conn.commit()
 
 
+    def save_profile(self, scan_id: str, sampler: Optional[str], summary: Dict[str, Any],
+                     folded_spans: str, capture_data: Optional[bytes]):
+        """Store (or replace) the profile of a scan."""
+        db = get_db()
+        with db.get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO scan_profiles
+                (scan_id, sampler, summary_json, folded_spans, capture_data)
+                VALUES (?, ?, ?, ?, ?)
+            """, (scan_id, sampler, json.dumps(summary), folded_spans, capture_data))
+            conn.commit()
+
+    def get_profile(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        """Get a stored scan profile (summary decoded, capture as bytes)."""
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT sampler, summary_json, folded_spans, capture_data, created_at
+                FROM scan_profiles WHERE scan_id = ?
+            """, (scan_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            profile = dict(row)
+            profile['summary'] = json.loads(profile.pop('summary_json'))
+            return profile
+
+
+class ScanJobRepository:
+    """Durable scan job queue with leases.
+
+    A job is claimable while it is queued and past its ``available_at``, or
+    while its lease has expired (the worker holding it died or stalled).
+    Claims are a single conditional UPDATE, so worker threads and processes
+    sharing the database never run the same job twice at once.
+    """
+
+    def enqueue(self, scan_id: str, payload: Dict[str, Any], priority: int = 0,
+                max_attempts: int = 3) -> None:
+        """Queue a scan job (replacing any previous job for the scan)."""
+        now = time.time()
+        db = get_db()
+        with db.get_connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO scan_jobs
+                (scan_id, status, priority, job_json, attempts, max_attempts,
+                 available_at, enqueued_at, updated_at)
+                VALUES (?, 'queued', ?, ?, 0, ?, ?, ?, ?)
+            """, (scan_id, priority, json.dumps(payload), max_attempts, now, now, datetime.now()))
+            conn.commit()
+
+    def list_claimable(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Jobs that could be claimed now, in priority and submission order."""
+        now = time.time()
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT * FROM scan_jobs
+                WHERE (status = 'queued' AND available_at <= ?)
+                   OR (status = 'leased' AND lease_expires_at < ? AND attempts < max_attempts)
+                ORDER BY priority, enqueued_at
+                LIMIT ?
+            """, (now, now, limit))
+            return [self._row_to_job(row) for row in cursor.fetchall()]
+
+    def claim(self, scan_id: str, owner: str, lease_seconds: float) -> bool:
+        """Take the lease on a claimable job. Returns False if someone else got it."""
+        now = time.time()
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE scan_jobs
+                SET status = 'leased', lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE scan_id = ?
+                  AND ((status = 'queued' AND available_at <= ?)
+                       OR (status = 'leased' AND lease_expires_at < ? AND attempts < max_attempts))
+            """, (owner, now + lease_seconds, now, datetime.now(), scan_id, now, now))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def heartbeat(self, scan_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend a lease. Returns False if the lease is no longer ``owner``'s."""
+        now = time.time()
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE scan_jobs
+                SET lease_expires_at = ?, heartbeat_at = ?
+                WHERE scan_id = ? AND status = 'leased' AND lease_owner = ?
+            """, (now + lease_seconds, now, scan_id, owner))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def complete(self, scan_id: str, owner: str, status: str = "done",
+                 error: Optional[str] = None) -> bool:
+        """Finish a leased job ('done', 'failed' or 'cancelled')."""
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE scan_jobs
+                SET status = ?, lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = COALESCE(?, last_error), updated_at = ?
+                WHERE scan_id = ? AND status = 'leased' AND lease_owner = ?
+            """, (status, error, datetime.now(), scan_id, owner))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def retry(self, scan_id: str, owner: str, error: str, delay_seconds: float = 0.0) -> Optional[str]:
+        """
+        Give a leased job back after a failure.
+
+        Returns:
+            The job's new status: 'queued' (claimable after the delay), 'failed'
+            (attempts exhausted), or None if ``owner`` no longer held the lease
+        """
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.execute("""
+                UPDATE scan_jobs
+                SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                    available_at = ?, lease_owner = NULL, lease_expires_at = NULL,
+                    last_error = ?, updated_at = ?
+                WHERE scan_id = ? AND status = 'leased' AND lease_owner = ?
+            """, (time.time() + delay_seconds, error, datetime.now(), scan_id, owner))
+            conn.commit()
+            if cursor.rowcount != 1:
+                return None
+            row = conn.execute("SELECT status FROM scan_jobs WHERE scan_id = ?", (scan_id,)).fetchone()
+            return row['status'] if row else None
+
+    def fail_expired(self) -> List[str]:
+        """Fail jobs whose lease expired after their last allowed attempt; returns their scan IDs."""
+        now = time.time()
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT scan_id FROM scan_jobs
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= max_attempts
+            """, (now,))
+            scan_ids = [row['scan_id'] for row in cursor.fetchall()]
+            if scan_ids:
+                placeholders = ",".join(["?"] * len(scan_ids))
+                conn.execute(f"""
+                    UPDATE scan_jobs
+                    SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL,
+                        last_error = COALESCE(last_error, 'Lease expired'), updated_at = ?
+                    WHERE status = 'leased' AND lease_expires_at < ? AND scan_id IN ({placeholders})
+                """, (datetime.now(), now, *scan_ids))
+                conn.commit()
+            return scan_ids
+
+    def get(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by scan_id."""
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM scan_jobs WHERE scan_id = ?", (scan_id,))
+            row = cursor.fetchone()
+            return self._row_to_job(row) if row else None
+
+    def list_by_statuses(self, statuses: List[str], limit: int = 100) -> List[Dict[str, Any]]:
+        """List jobs in any of the given statuses, in claim order."""
+        if not statuses:
+            return []
+        placeholders = ",".join(["?"] * len(statuses))
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT * FROM scan_jobs
+                WHERE status IN ({placeholders})
+                ORDER BY priority, enqueued_at
+                LIMIT ?
+            """, (*statuses, limit))
+            return [self._row_to_job(row) for row in cursor.fetchall()]
+
+    def count_by_status(self, status: str) -> int:
+        """Number of jobs in a status."""
+        db = get_db()
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM scan_jobs WHERE status = ?", (status,)).fetchone()
+            return int(row[0])
+
+    def _row_to_job(self, row) -> Dict[str, Any]:
+        job = dict(row)
+        job['payload'] = json.loads(job.pop('job_json') or '{}')
+        return job
+
+
 class FindingRepository:
     """Repository for finding CRUD operations."""
 
@@ -491,6 +687,10 @@ class FindingRepository:
             conn.commit()
 
 
+def _round_ms(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
+
+
 class TelemetryRepository:
     """Repository for model execution telemetry."""
 
@@ -513,6 +713,102 @@ class TelemetryRepository:
             ))
             conn.commit()
 
+    def record_executions(self, scan_id: str, executions: List[Any]):
+        """Record a batch of ChunkExecution rows in one transaction."""
+        if not executions:
+            return
+        db = get_db()
+        with db.get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO model_executions
+                (scan_id, model_id, file_path, chunk_index, status, latency_ms,
+                 retry_count, queue_wait_ms, token_usage_json, error_message, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (
+                    scan_id, e.model_id, e.file_path, e.chunk_index, e.status,
+                    int(round(e.latency_ms)), e.retry_count, int(round(e.queue_wait_ms)),
+                    json.dumps(e.token_usage()), e.error, e.finished_at,
+                )
+                for e in executions
+            ])
+            conn.commit()
+
+    def get_latency_stats(self, scan_id: str) -> List[Dict[str, Any]]:
+        """
+        Get per-model latency percentiles and throughput for a scan.
+
+        Returns:
+            One dict per model: call/error/retry counts, p50/p95/p99 latency
+            and queue wait (ms), token totals, output tokens per second of
+            call time and chunks per second of wall-clock time
+        """
+        from aegis.models.telemetry import percentile
+
+        db = get_db()
+        with db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT model_id, status, latency_ms, retry_count, queue_wait_ms,
+                       token_usage_json, created_at
+                FROM model_executions
+                WHERE scan_id = ?
+                ORDER BY model_id, id
+            """, (scan_id,))
+            rows = cursor.fetchall()
+
+        by_model: Dict[str, List[Any]] = {}
+        for row in rows:
+            by_model.setdefault(row["model_id"], []).append(row)
+
+        stats = []
+        for model_id, model_rows in by_model.items():
+            latencies = sorted(float(r["latency_ms"] or 0) for r in model_rows)
+            waits = sorted(float(r["queue_wait_ms"] or 0) for r in model_rows)
+            input_tokens = output_tokens = 0
+            estimated = False
+            first_start = last_end = None
+            for r in model_rows:
+                usage = json.loads(r["token_usage_json"]) if r["token_usage_json"] else {}
+                input_tokens += int(usage.get("prompt_tokens") or 0)
+                output_tokens += int(usage.get("completion_tokens") or 0)
+                estimated = estimated or bool(usage.get("estimated"))
+                try:
+                    end = datetime.fromisoformat(r["created_at"]).timestamp()
+                except (TypeError, ValueError):
+                    continue
+                start = end - float(r["latency_ms"] or 0) / 1000.0
+                first_start = start if first_start is None else min(first_start, start)
+                last_end = end if last_end is None else max(last_end, end)
+
+            call_seconds = sum(latencies) / 1000.0
+            wall_seconds = (last_end - first_start) if first_start is not None else 0.0
+            stats.append({
+                "model_id": model_id,
+                "total_calls": len(model_rows),
+                "error_count": sum(1 for r in model_rows if r["status"] != "success"),
+                "retry_count": sum(int(r["retry_count"] or 0) for r in model_rows),
+                "latency_ms": {
+                    "p50": _round_ms(percentile(latencies, 50)),
+                    "p95": _round_ms(percentile(latencies, 95)),
+                    "p99": _round_ms(percentile(latencies, 99)),
+                    "max": latencies[-1],
+                    "avg": _round_ms(sum(latencies) / len(latencies)),
+                },
+                "queue_wait_ms": {
+                    "p50": _round_ms(percentile(waits, 50)),
+                    "p95": _round_ms(percentile(waits, 95)),
+                    "p99": _round_ms(percentile(waits, 99)),
+                },
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "tokens_estimated": estimated,
+                "tokens_per_sec": round(output_tokens / call_seconds, 2) if call_seconds > 0 else 0.0,
+                "chunks_per_sec": round(len(model_rows) / wall_seconds, 3) if wall_seconds > 0 else 0.0,
+                "wall_seconds": round(wall_seconds, 3),
+            })
+        return stats
+
     def get_model_stats(self, scan_id: str, model_id: str) -> Dict[str, Any]:
         """Get aggregated stats for a model in a scan."""
         db = get_db()
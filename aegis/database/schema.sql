@@ -95,6 +95,7 @@ CREATE TABLE IF NOT EXISTS model_executions (
     status TEXT NOT NULL,                -- 'success', 'error', 'retried'
     latency_ms INTEGER,
     retry_count INTEGER DEFAULT 0,
+    queue_wait_ms INTEGER DEFAULT 0,     -- time queued for rate-limit budget / concurrency slot
     token_usage_json TEXT,               -- JSON blob: {prompt_tokens, completion_tokens, total_tokens}
     cost_usd REAL,
     error_message TEXT,
@@ -103,6 +104,35 @@ CREATE TABLE IF NOT EXISTS model_executions (
     FOREIGN KEY (model_id) REFERENCES models(model_id) ON DELETE SET NULL
 );
 
+-- Scan profiles (opt-in per-stage timings and worker thread capture)
+CREATE TABLE IF NOT EXISTS scan_profiles (
+    scan_id TEXT PRIMARY KEY,
+    sampler TEXT,                        -- 'stack', 'cprofile', 'pyinstrument' or NULL (spans only)
+    summary_json TEXT NOT NULL,          -- JSON blob: per-stage wall/CPU milliseconds
+    folded_spans TEXT,                   -- stage spans as folded stacks
+    capture_data BLOB,                   -- sampler output (folded stacks, pstats or speedscope)
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (scan_id) REFERENCES scans(scan_id) ON DELETE CASCADE
+);
+
+-- Durable scan job queue (leased by scan workers; see aegis.services.scan_worker)
+CREATE TABLE IF NOT EXISTS scan_jobs (
+    scan_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'queued', -- 'queued', 'leased', 'done', 'failed', 'cancelled'
+    priority INTEGER NOT NULL DEFAULT 0, -- lower runs first
+    job_json TEXT NOT NULL,              -- JSON blob: models, consensus, scan mode, profiling
+    attempts INTEGER NOT NULL DEFAULT 0, -- claims so far (a lease that expires counts)
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    lease_owner TEXT,                    -- worker holding the lease
+    lease_expires_at REAL,               -- unix time; claimable again after this
+    heartbeat_at REAL,
+    available_at REAL NOT NULL,          -- unix time; not claimable before (retry backoff)
+    enqueued_at REAL NOT NULL,
+    last_error TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (scan_id) REFERENCES scans(scan_id) ON DELETE CASCADE
+);
+
 -- Pipelines (user-configurable scan workflows)
 CREATE TABLE IF NOT EXISTS pipelines (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -124,5 +154,6 @@ CREATE INDEX IF NOT EXISTS idx_findings_consensus ON findings(is_consensus);
 CREATE INDEX IF NOT EXISTS idx_findings_fingerprint ON findings(fingerprint);
 CREATE INDEX IF NOT EXISTS idx_model_executions_scan_id ON model_executions(scan_id);
 CREATE INDEX IF NOT EXISTS idx_scan_files_scan_id ON scan_files(scan_id);
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_claim ON scan_jobs(status, priority, enqueued_at);
 CREATE INDEX IF NOT EXISTS idx_models_role ON models(role);
 CREATE INDEX IF NOT EXISTS idx_models_enabled ON models(enabled);
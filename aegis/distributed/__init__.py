@@ -0,0 +1,10 @@
+"""Distributed scanning: a coordinator in the web app and remote ``aegis worker`` nodes."""
+
+from aegis.distributed.coordinator import Coordinator, RemoteWorkError, get_coordinator, init_coordinator
+
+__all__ = [
+    "Coordinator",
+    "RemoteWorkError",
+    "get_coordinator",
+    "init_coordinator",
+]
@@ -0,0 +1,485 @@
+"""Coordinator side of distributed scanning.
+
+The web app keeps scanning as usual, but a chunk batch for a model that a
+registered remote worker serves becomes a work unit instead of a local model
+call. Workers (``aegis worker``) register the models they have loaded, pull
+units over HTTP, run them through their own ModelRuntimeManager and post the
+ParserResults (and chunk telemetry) back. The scan thread that submitted the
+unit waits for that result as it would for a local call.
+
+Workers send heartbeats. A worker that misses them for ``heartbeat_timeout``
+is dropped and its leased units go back to the queue for another worker; so
+do units leased for longer than ``unit_timeout``. A unit is given up (and the
+batch fails like a local batch would) after ``max_attempts`` leases, or when
+no live worker has served its model for ``unit_timeout``.
+
+The scan thread waiting for a unit does not rely on the reaper alone: it
+polls, withdraws the unit when the scan is cancelled, re-dispatches an
+expired lease itself and gives up once the unit has outlived every lease
+it could get.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from aegis.models.schema import ModelRecord, ModelRole, ParserResult
+from aegis.models.telemetry import ChunkExecution
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT_TIMEOUT = 30.0
+DEFAULT_UNIT_TIMEOUT = 600.0
+DEFAULT_MAX_ATTEMPTS = 3
+# Longest a pull request is held open waiting for work
+MAX_PULL_WAIT = 30.0
+# How often a scan thread waiting for a unit checks cancellation and its lease
+RESULT_POLL_INTERVAL = 1.0
+
+
+class RemoteWorkError(RuntimeError):
+    """A work unit could not be completed by any remote worker."""
+
+
+@dataclass
+class WorkerNode:
+    """A registered remote worker."""
+
+    worker_id: str
+    host: str
+    model_ids: List[str]
+    slots: int = 1
+    registered_at: float = field(default_factory=time.time)
+    last_heartbeat: float = field(default_factory=time.time)
+    # unit_id -> lease time
+    leased: Dict[str, float] = field(default_factory=dict)
+    completed: int = 0
+    failed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "host": self.host,
+            "model_ids": self.model_ids,
+            "slots": self.slots,
+            "registered_at": self.registered_at,
+            "last_heartbeat": self.last_heartbeat,
+            "leased_units": len(self.leased),
+            "completed_units": self.completed,
+            "failed_units": self.failed,
+        }
+
+
+@dataclass
+class WorkUnit:
+    """One chunk batch for one model, waiting for or leased to a worker."""
+
+    unit_id: str
+    scan_id: Optional[str]
+    model_id: str
+    role: str
+    chunks: List[Dict[str, Any]]
+    future: Future = field(default_factory=Future)
+    created_at: float = field(default_factory=time.time)
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    leased_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def to_message(self) -> Dict[str, Any]:
+        return {
+            "unit_id": self.unit_id,
+            "scan_id": self.scan_id,
+            "model_id": self.model_id,
+            "role": self.role,
+            "chunks": self.chunks,
+            "attempt": self.attempts,
+        }
+
+
+class Coordinator:
+    """Registry of remote workers and queue of work units."""
+
+    def __init__(
+        self,
+        heartbeat_timeout: float = DEFAULT_HEARTBEAT_TIMEOUT,
+        unit_timeout: float = DEFAULT_UNIT_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        """
+        Args:
+            heartbeat_timeout: Seconds without a heartbeat before a worker is dropped
+            unit_timeout: Seconds a unit may stay leased, or wait without any worker for its model
+            max_attempts: Leases per unit before it fails
+        """
+        self.heartbeat_timeout = heartbeat_timeout
+        self.unit_timeout = unit_timeout
+        self.max_attempts = max(1, int(max_attempts))
+        self._workers: Dict[str, WorkerNode] = {}
+        self._pending: List[WorkUnit] = []
+        self._leased: Dict[str, WorkUnit] = {}
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        self.redispatched = 0
+        self.failed_units = 0
+
+    def start(self) -> None:
+        """Start the thread that drops silent workers and re-dispatches their units."""
+        if self._reaper is not None:
+            return
+        self._reaper = threading.Thread(target=self._reap_loop, name="aegis-coordinator-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    # Worker API (called from the HTTP routes)
+
+    def register(
+        self,
+        host: str,
+        model_ids: List[str],
+        slots: int = 1,
+        worker_id: Optional[str] = None,
+    ) -> WorkerNode:
+        """Register (or re-register) a worker and the models it serves."""
+        worker_id = worker_id or uuid.uuid4().hex
+        with self._condition:
+            previous = self._workers.get(worker_id)
+            if previous is not None:
+                # Re-registration after a restart: whatever it held is gone
+                self._requeue_units(previous, "Worker re-registered")
+            node = WorkerNode(worker_id=worker_id, host=host, model_ids=list(model_ids), slots=max(1, int(slots)))
+            self._workers[worker_id] = node
+            self._condition.notify_all()
+        logger.info(f"Worker {worker_id} registered from {host} with models {model_ids}")
+        return node
+
+    def heartbeat(self, worker_id: str) -> bool:
+        """Record a heartbeat. Returns False for unknown (dropped) workers."""
+        with self._condition:
+            node = self._workers.get(worker_id)
+            if node is None:
+                return False
+            node.last_heartbeat = time.time()
+            return True
+
+    def unregister(self, worker_id: str) -> bool:
+        """Remove a worker that is shutting down; its units are re-dispatched."""
+        with self._condition:
+            node = self._workers.pop(worker_id, None)
+            if node is None:
+                return False
+            self._requeue_units(node, "Worker shut down")
+            self._condition.notify_all()
+        return True
+
+    def pull(self, worker_id: str, max_units: int = 1, wait: float = 0.0) -> Optional[List[Dict[str, Any]]]:
+        """
+        Lease pending units for the worker's models.
+
+        Holds the request open for up to ``wait`` seconds when nothing is pending.
+
+        Returns:
+            Unit messages (possibly empty), or None for unknown workers
+        """
+        deadline = time.time() + min(max(0.0, wait), MAX_PULL_WAIT)
+        with self._condition:
+            while True:
+                node = self._workers.get(worker_id)
+                if node is None:
+                    return None
+                node.last_heartbeat = time.time()
+                free = min(max(1, int(max_units)), node.slots - len(node.leased))
+                units = self._lease_units(node, free) if free > 0 else []
+                remaining = deadline - time.time()
+                if units or remaining <= 0 or self._stop_event.is_set():
+                    return [unit.to_message() for unit in units]
+                self._condition.wait(timeout=remaining)
+
+    def complete(
+        self,
+        worker_id: str,
+        unit_id: str,
+        results: Optional[List[Dict[str, Any]]] = None,
+        executions: Optional[List[Dict[str, Any]]] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """
+        Accept a worker's result for a unit it holds.
+
+        Returns:
+            False if the worker no longer holds the unit (it was re-dispatched)
+        """
+        with self._condition:
+            node = self._workers.get(worker_id)
+            unit = self._leased.get(unit_id)
+            if node is None or unit is None or unit.worker_id != worker_id:
+                return False
+            del self._leased[unit_id]
+            node.leased.pop(unit_id, None)
+            node.last_heartbeat = time.time()
+            if error is None:
+                try:
+                    parsed = [ParserResult(**result) for result in results or []]
+                    if len(parsed) != len(unit.chunks):
+                        raise ValueError(f"expected {len(unit.chunks)} results, got {len(parsed)}")
+                except Exception as e:
+                    error = f"Invalid result: {e}"
+            if error is not None:
+                node.failed += 1
+                self._retry_unit(unit, error)
+            else:
+                node.completed += 1
+                unit.future.set_result((parsed, executions or []))
+            self._condition.notify_all()
+        return True
+
+    # Scan API
+
+    def serves(self, model_id: str) -> bool:
+        """True if a live worker has registered ``model_id``."""
+        with self._condition:
+            return any(model_id in node.model_ids for node in self._workers.values())
+
+    def submit(
+        self,
+        model_id: str,
+        chunks: List[Dict[str, Any]],
+        role: Optional[str] = None,
+        scan_id: Optional[str] = None,
+    ) -> Future:
+        """Queue a work unit; the future resolves to (ParserResults, execution dicts)."""
+        return self._enqueue(model_id, chunks, role, scan_id).future
+
+    def _enqueue(
+        self,
+        model_id: str,
+        chunks: List[Dict[str, Any]],
+        role: Optional[str],
+        scan_id: Optional[str],
+    ) -> WorkUnit:
+        unit = WorkUnit(
+            unit_id=uuid.uuid4().hex,
+            scan_id=scan_id,
+            model_id=model_id,
+            role=role or ModelRole.DEEP_SCAN.value,
+            chunks=[_unit_chunk(chunk) for chunk in chunks],
+        )
+        with self._condition:
+            self._pending.append(unit)
+            self._condition.notify_all()
+        return unit
+
+    def run_model_batch_sync(
+        self,
+        model: ModelRecord,
+        chunks: List[Dict[str, Any]],
+        role: Optional[ModelRole] = None,
+        recorder: Optional[Any] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ) -> List[ParserResult]:
+        """
+        Run a chunk batch on a remote worker and wait for its results.
+
+        Same contract as ModelExecutionEngine.run_model_batch_sync; remote chunk
+        executions are recorded on ``recorder``. The wait is bounded: a lease
+        older than ``unit_timeout`` is re-dispatched, and the unit fails once it
+        has existed for ``unit_timeout`` per allowed attempt (plus one for
+        queueing) or when ``cancel_check`` returns True.
+
+        Raises:
+            RemoteWorkError: If no worker completed the unit
+        """
+        if not chunks:
+            return []
+        target_role = role or (model.roles[0] if model.roles else ModelRole.DEEP_SCAN)
+        unit = self._enqueue(
+            model.model_id,
+            chunks,
+            getattr(target_role, "value", target_role),
+            recorder.scan_id if recorder is not None else None,
+        )
+        results, executions = self._wait_for_unit(unit, cancel_check)
+        if recorder is not None:
+            for idx, execution in enumerate(executions):
+                try:
+                    chunk_execution = ChunkExecution(**execution)
+                except TypeError as e:
+                    logger.warning(f"Ignoring malformed remote execution: {e}")
+                    continue
+                if idx < len(chunks):
+                    chunk_execution.file_path = chunks[idx].get("file_path")
+                    chunk_execution.chunk_index = chunks[idx].get("chunk_index")
+                recorder.record(chunk_execution)
+        return results
+
+    def _wait_for_unit(self, unit: WorkUnit, cancel_check: Optional[Callable[[], bool]]) -> Any:
+        deadline = unit.created_at + self.unit_timeout * (self.max_attempts + 1)
+        poll = min(RESULT_POLL_INTERVAL, self.unit_timeout)
+        while True:
+            try:
+                return unit.future.result(timeout=poll)
+            except FutureTimeoutError:
+                pass
+            if cancel_check is not None and cancel_check():
+                self._withdraw(unit, "Scan cancelled")
+            else:
+                now = time.time()
+                with self._condition:
+                    if not unit.future.done() and unit.unit_id in self._leased:
+                        self._expire_lease(unit, now)
+                if now > deadline:
+                    self._withdraw(unit, f"No result after {now - unit.created_at:.0f}s")
+
+    def _withdraw(self, unit: WorkUnit, reason: str) -> None:
+        """Remove a unit from the queue (or its worker) and fail its future."""
+        with self._condition:
+            if unit.future.done():
+                return
+            if unit in self._pending:
+                self._pending.remove(unit)
+            if self._leased.pop(unit.unit_id, None) is not None:
+                node = self._workers.get(unit.worker_id or "")
+                if node is not None:
+                    node.leased.pop(unit.unit_id, None)
+            self.failed_units += 1
+            logger.warning(f"Giving up on unit {unit.unit_id} for model {unit.model_id}: {reason}")
+            unit.future.set_exception(RemoteWorkError(
+                f"Work unit for model {unit.model_id} abandoned: {reason}"
+                + (f" (last error: {unit.last_error})" if unit.last_error else "")
+            ))
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "workers": [node.to_dict() for node in self._workers.values()],
+                "pending_units": len(self._pending),
+                "leased_units": len(self._leased),
+                "redispatched_units": self.redispatched,
+                "failed_units": self.failed_units,
+            }
+
+    # Internals (condition held)
+
+    def _lease_units(self, node: WorkerNode, limit: int) -> List[WorkUnit]:
+        units: List[WorkUnit] = []
+        now = time.time()
+        for unit in list(self._pending):
+            if len(units) >= limit:
+                break
+            if unit.model_id not in node.model_ids:
+                continue
+            self._pending.remove(unit)
+            unit.attempts += 1
+            unit.worker_id = node.worker_id
+            unit.leased_at = now
+            self._leased[unit.unit_id] = unit
+            node.leased[unit.unit_id] = now
+            units.append(unit)
+        return units
+
+    def _retry_unit(self, unit: WorkUnit, error: str) -> None:
+        unit.worker_id = None
+        unit.leased_at = None
+        unit.last_error = error
+        if unit.attempts >= self.max_attempts:
+            self.failed_units += 1
+            unit.future.set_exception(RemoteWorkError(
+                f"Work unit for model {unit.model_id} failed after {unit.attempts} attempts: {error}"
+            ))
+            return
+        self.redispatched += 1
+        # Ahead of newer units: it has waited longest
+        self._pending.insert(0, unit)
+
+    def _expire_lease(self, unit: WorkUnit, now: float) -> None:
+        """Re-dispatch a leased unit whose lease is older than ``unit_timeout``."""
+        if unit.leased_at is None or now - unit.leased_at <= self.unit_timeout:
+            return
+        del self._leased[unit.unit_id]
+        node = self._workers.get(unit.worker_id or "")
+        if node is not None:
+            node.leased.pop(unit.unit_id, None)
+        self._retry_unit(unit, "Unit timed out")
+        self._condition.notify_all()
+
+    def _requeue_units(self, node: WorkerNode, reason: str) -> None:
+        for unit_id in list(node.leased):
+            unit = self._leased.pop(unit_id, None)
+            if unit is not None:
+                logger.warning(f"Re-dispatching unit {unit_id} from worker {node.worker_id}: {reason}")
+                self._retry_unit(unit, reason)
+        node.leased.clear()
+
+    def reap(self) -> None:
+        """Drop silent workers, re-dispatch stuck units and fail orphaned ones."""
+        now = time.time()
+        with self._condition:
+            for worker_id, node in list(self._workers.items()):
+                if now - node.last_heartbeat > self.heartbeat_timeout:
+                    logger.warning(f"Worker {worker_id} ({node.host}) missed heartbeats; dropping it")
+                    del self._workers[worker_id]
+                    self._requeue_units(node, "Worker lost")
+            for unit in list(self._leased.values()):
+                self._expire_lease(unit, now)
+            served = {model_id for node in self._workers.values() for model_id in node.model_ids}
+            for unit in list(self._pending):
+                if unit.model_id not in served and now - unit.created_at > self.unit_timeout:
+                    self._pending.remove(unit)
+                    self.failed_units += 1
+                    unit.future.set_exception(RemoteWorkError(
+                        f"No worker serves model {unit.model_id}" + (f" (last error: {unit.last_error})" if unit.last_error else "")
+                    ))
+            self._condition.notify_all()
+
+    def _reap_loop(self) -> None:
+        interval = max(0.5, self.heartbeat_timeout / 3)
+        while not self._stop_event.wait(interval):
+            try:
+                self.reap()
+            except Exception as e:
+                logger.warning(f"Coordinator reaper failed: {e}")
+
+
+def _unit_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """The chunk fields a worker needs to build its prompt."""
+    keys = ("code", "file_path", "line_start", "line_end", "snippet", "chunk_index")
+    return {key: chunk[key] for key in keys if key in chunk}
+
+
+_coordinator: Optional[Coordinator] = None
+
+
+def init_coordinator(app) -> Optional[Coordinator]:
+    """
+    Create and start the coordinator when ``COORDINATOR_ENABLED`` is set.
+
+    Coordinator mode stays off without ``WORKER_TOKEN``: workers receive
+    source code and report findings, so the worker API is never open.
+    """
+    global _coordinator
+    if not app.config.get("COORDINATOR_ENABLED"):
+        return None
+    if not app.config.get("WORKER_TOKEN"):
+        logger.error("Coordinator mode not enabled: set AEGIS_WORKER_TOKEN to authenticate remote workers")
+        return None
+    if _coordinator is None:
+        _coordinator = Coordinator(
+            heartbeat_timeout=app.config.get("WORKER_HEARTBEAT_TIMEOUT", DEFAULT_HEARTBEAT_TIMEOUT),
+            unit_timeout=app.config.get("WORKER_UNIT_TIMEOUT", DEFAULT_UNIT_TIMEOUT),
+            max_attempts=app.config.get("WORKER_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS),
+        )
+        _coordinator.start()
+    return _coordinator
+
+
+def get_coordinator() -> Optional[Coordinator]:
+    """The running coordinator, or None outside coordinator mode."""
+    return _coordinator
@@ -0,0 +1,205 @@
+"""Remote scan worker node (``aegis worker``).
+
+Registers the models loaded in this node's registry with a coordinator,
+then pulls work units over HTTP, runs each through the local
+ModelExecutionEngine (and so this node's ModelRuntimeManager) and posts the
+ParserResults and chunk telemetry back. A heartbeat thread keeps the
+registration alive; if the coordinator has forgotten the node (it restarted,
+or dropped the node after missed heartbeats) the worker registers again.
+"""
+
+import logging
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from aegis.models.engine import ModelExecutionEngine
+from aegis.models.registry import ModelRegistryV2
+from aegis.models.schema import ModelRole, ModelStatus
+from aegis.models.telemetry import ChunkExecution, ExecutionRecorder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+DEFAULT_PULL_WAIT = 20.0
+
+
+class _UnitRecorder(ExecutionRecorder):
+    """Keeps a unit's chunk executions so they can be sent back."""
+
+    def __init__(self, model_id: str):
+        super().__init__(None, model_id)
+        self.collected: List[ChunkExecution] = []
+
+    def record(self, execution: ChunkExecution) -> None:
+        super().record(execution)
+        self.collected.append(execution)
+
+
+class RemoteWorker:
+    """Pulls work units from a coordinator and runs them on local models."""
+
+    def __init__(
+        self,
+        coordinator_url: str,
+        model_ids: Optional[List[str]] = None,
+        slots: int = 1,
+        token: Optional[str] = None,
+        worker_id: Optional[str] = None,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+        pull_wait: float = DEFAULT_PULL_WAIT,
+        engine: Optional[ModelExecutionEngine] = None,
+    ):
+        """
+        Args:
+            coordinator_url: Base URL of the Aegis web app (e.g. http://front:5000)
+            model_ids: Models to serve (default: all registered models)
+            slots: Units run at once
+            token: Shared secret (``AEGIS_WORKER_TOKEN`` on the coordinator)
+            worker_id: Stable ID to reuse across restarts (default: assigned)
+            heartbeat_interval: Seconds between heartbeats
+            pull_wait: Seconds a pull may wait on the coordinator for work
+            engine: Execution engine (default: one over the local registry)
+        """
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.registry = ModelRegistryV2()
+        self.model_ids = model_ids or [
+            model.model_id for model in self.registry.list_models(status=ModelStatus.REGISTERED)
+        ]
+        self.slots = max(1, int(slots))
+        self.worker_id = worker_id
+        self.heartbeat_interval = heartbeat_interval
+        self.pull_wait = pull_wait
+        self.engine = engine or ModelExecutionEngine(self.registry)
+        self._session = requests.Session()
+        if token:
+            self._session.headers["Authorization"] = f"Bearer {token}"
+        self._stop_event = threading.Event()
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def _url(self, path: str) -> str:
+        return f"{self.coordinator_url}/api/workers{path}"
+
+    def register(self) -> str:
+        """Register with the coordinator (retrying until it answers)."""
+        while not self._stop_event.is_set():
+            try:
+                response = self._session.post(self._url("/register"), json={
+                    "worker_id": self.worker_id,
+                    "host": socket.gethostname(),
+                    "models": self.model_ids,
+                    "slots": self.slots,
+                }, timeout=10)
+                response.raise_for_status()
+                body = response.json()
+                self.worker_id = body["worker_id"]
+                timeout = body.get("heartbeat_timeout")
+                if timeout:
+                    # At least three heartbeats per coordinator timeout
+                    self.heartbeat_interval = min(self.heartbeat_interval, float(timeout) / 3)
+                logger.info(f"Registered with {self.coordinator_url} as {self.worker_id}: {self.model_ids}")
+                return self.worker_id
+            except Exception as e:
+                logger.warning(f"Failed to register with coordinator: {e}")
+                self._stop_event.wait(self.heartbeat_interval)
+        raise RuntimeError("Worker stopped before registering")
+
+    def run(self) -> None:
+        """Serve units until stop() (blocks)."""
+        if not self.model_ids:
+            raise RuntimeError("No models to serve; register models on this node first")
+        self.register()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name="aegis-worker-heartbeat", daemon=True)
+        heartbeat.start()
+        with ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix="aegis-worker-unit") as executor:
+            while not self._stop_event.is_set():
+                with self._busy_lock:
+                    free = self.slots - self._busy
+                if free <= 0:
+                    self._stop_event.wait(0.05)
+                    continue
+                units = self._pull(free)
+                for unit in units:
+                    with self._busy_lock:
+                        self._busy += 1
+                    executor.submit(self._process, unit)
+        self._unregister()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _pull(self, max_units: int) -> List[Dict[str, Any]]:
+        try:
+            response = self._session.post(
+                self._url(f"/{self.worker_id}/pull"),
+                json={"max_units": max_units, "wait": self.pull_wait},
+                timeout=self.pull_wait + 10,
+            )
+            if response.status_code == 404:
+                self.register()
+                return []
+            response.raise_for_status()
+            return response.json().get("units", [])
+        except Exception as e:
+            logger.warning(f"Failed to pull work: {e}")
+            self._stop_event.wait(1.0)
+            return []
+
+    def _process(self, unit: Dict[str, Any]) -> None:
+        try:
+            payload = self._execute(unit)
+        except Exception as e:
+            logger.warning(f"Unit {unit.get('unit_id')} failed: {e}")
+            payload = {"error": str(e)}
+        try:
+            response = self._session.post(
+                self._url(f"/{self.worker_id}/units/{unit['unit_id']}/result"), json=payload, timeout=30,
+            )
+            if response.status_code == 409:
+                logger.warning(f"Unit {unit['unit_id']} was re-dispatched; result discarded")
+            else:
+                response.raise_for_status()
+            if "error" in payload:
+                self.failed += 1
+            else:
+                self.completed += 1
+        except Exception as e:
+            logger.warning(f"Failed to post result for unit {unit.get('unit_id')}: {e}")
+        finally:
+            with self._busy_lock:
+                self._busy -= 1
+
+    def _execute(self, unit: Dict[str, Any]) -> Dict[str, Any]:
+        model = self.registry.get_model(unit["model_id"])
+        if model is None:
+            raise RuntimeError(f"Model {unit['model_id']} is not registered on this worker")
+        role = ModelRole(unit["role"]) if unit.get("role") else None
+        recorder = _UnitRecorder(model.model_id)
+        results = self.engine.run_model_batch_sync(model, unit.get("chunks", []), role, recorder=recorder)
+        return {
+            "results": [result.model_dump() for result in results],
+            "executions": [asdict(execution) for execution in recorder.collected],
+        }
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop_event.wait(self.heartbeat_interval):
+            try:
+                response = self._session.post(self._url(f"/{self.worker_id}/heartbeat"), timeout=10)
+                if response.status_code == 404:
+                    logger.warning("Coordinator no longer knows this worker; registering again")
+                    self.register()
+            except Exception as e:
+                logger.warning(f"Heartbeat failed: {e}")
+
+    def _unregister(self) -> None:
+        try:
+            self._session.post(self._url(f"/{self.worker_id}/unregister"), timeout=5)
+        except Exception:
+            pass
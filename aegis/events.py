@@ -8,12 +8,16 @@ model execution, and findings discovery. Events can be consumed by:
 - Telemetry collectors
 """
 
+from collections import OrderedDict, deque
+from contextlib import nullcontext
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+import itertools
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +58,18 @@ class EventType(str, Enum):
     CANCELLED = "cancelled"
 
 
+# High-frequency events where only the latest one matters: queued duplicates
+# for the same scan are collapsed into the newest before delivery
+COALESCED_EVENT_TYPES = frozenset({EventType.PROGRESS_UPDATE})
+# Events that may be dropped (never findings or lifecycle events) when the
+# dispatch queue is over its limit
+DROPPABLE_EVENT_TYPES = frozenset({
+    EventType.PROGRESS_UPDATE,
+    EventType.CHUNK_STARTED,
+    EventType.CHUNK_COMPLETED,
+})
+
+
 @dataclass
 class Event:
     """Base event class."""
@@ -62,10 +78,13 @@ class Event:
     scan_id: str
     timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     data: Dict[str, Any] = field(default_factory=dict)
+    # Sequence number assigned by the EventBus (increasing across all scans)
+    id: int = 0
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert event to dictionary for serialization."""
         return {
+            "id": self.id,
             "type": self.type.value,
             "scan_id": self.scan_id,
             "timestamp": self.timestamp,
@@ -84,6 +103,7 @@ class Event:
             scan_id=data["scan_id"],
             timestamp=data.get("timestamp", datetime.utcnow().isoformat()),
             data=data.get("data", {}),
+            id=int(data.get("id", 0)),
         )
 
 
@@ -92,16 +112,57 @@ class EventBus:
 
     Thread-safe event broadcasting system with support for:
     - Multiple subscribers per event type
-    - Wildcard subscriptions (all events)
-    - Synchronous and asynchronous delivery (sync only for Phase B)
+    - Wildcard subscriptions (all events) and batch subscriptions
+    - Per-scan history in bounded ring buffers
+    - Asynchronous delivery: ``publish`` only records the event and queues it;
+      a dispatcher thread delivers queued events in batches to subscribers and
+      SSE connections, off the scan worker thread
+
+    Under load, queued progress updates for a scan are coalesced into the
+    latest one, and droppable high-frequency events are discarded once the
+    queue holds ``max_pending`` events. Findings and lifecycle events are
+    always delivered.
     """
 
-    def __init__(self):
-        """Initialize event bus."""
+    def __init__(
+        self,
+        max_history_per_scan: int = 2000,
+        max_scans: int = 256,
+        async_dispatch: bool = True,
+        max_pending: int = 10000,
+        batch_size: int = 256,
+    ):
+        """
+        Initialize event bus.
+
+        Args:
+            max_history_per_scan: Events kept per scan for replay (at least
+                the SSE lag threshold, so a lagging client can resume)
+            max_scans: Scans whose history is kept (least recently active evicted)
+            async_dispatch: Deliver on a dispatcher thread (False delivers inline)
+            max_pending: Queue length above which droppable events are dropped
+            batch_size: Most events delivered per dispatcher batch
+        """
         self._subscribers: Dict[EventType, List[Callable]] = {}
         self._wildcard_subscribers: List[Callable] = []
-        self._event_history: List[Event] = []
-        self._max_history = 1000  # Keep last 1000 events
+        self._batch_subscribers: List[Callable[[List[Event]], None]] = []
+        self._history: "OrderedDict[str, Deque[Event]]" = OrderedDict()
+        # Id of the newest event pushed out of each scan's history
+        self._evicted: Dict[str, int] = {}
+        self._max_history = max_history_per_scan
+        self._max_scans = max_scans
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self.async_dispatch = async_dispatch
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: Deque[Tuple[Event, Any]] = deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._dispatching = False
+        self._dispatcher: Optional[threading.Thread] = None
+        self._sse_manager: Any = None
+        self.stats = {"published": 0, "delivered": 0, "coalesced": 0, "dropped": 0}
 
     def subscribe(self, event_type: Optional[EventType], callback: Callable[[Event], None]):
         """
@@ -119,6 +180,15 @@ class EventBus:
                 self._subscribers[event_type] = []
             self._subscribers[event_type].append(callback)
 
+    def subscribe_batch(self, callback: Callable[[List[Event]], None]):
+        """
+        Subscribe to all events, delivered as lists in publish order.
+
+        Args:
+            callback: Function called once per dispatcher batch
+        """
+        self._batch_subscribers.append(callback)
+
     def unsubscribe(self, event_type: Optional[EventType], callback: Callable[[Event], None]):
         """
         Unsubscribe from events.
@@ -127,6 +197,8 @@ class EventBus:
             event_type: Type of event to unsubscribe from
             callback: Callback function to remove
         """
+        if callback in self._batch_subscribers:
+            self._batch_subscribers.remove(callback)
         if event_type is None:
             if callback in self._wildcard_subscribers:
                 self._wildcard_subscribers.remove(callback)
@@ -134,63 +206,160 @@ class EventBus:
             if event_type in self._subscribers and callback in self._subscribers[event_type]:
                 self._subscribers[event_type].remove(callback)
 
+    def attach_sse_manager(self, sse_manager: Any) -> None:
+        """Forward events to this SSE manager instead of looking one up per event."""
+        self._sse_manager = sse_manager
+
     def publish(self, event: Event):
         """
         Publish event to all subscribers.
 
+        Records the event in its scan's history and queues it for delivery;
+        with ``async_dispatch=False`` it is delivered before returning.
+
         Args:
             event: Event to publish
         """
-        # Store in history
-        self._event_history.append(event)
-        if len(self._event_history) > self._max_history:
-            self._event_history.pop(0)
+        with self._lock:
+            event.id = next(self._ids)
+            self._record(event)
+            self.stats["published"] += 1
+
+        sse_manager = self._sse_manager or self._lookup_sse_manager()
+        if not self.async_dispatch:
+            self._deliver([(event, sse_manager)])
+            return
+
+        with self._cond:
+            if len(self._pending) >= self.max_pending and event.type in DROPPABLE_EVENT_TYPES:
+                self.stats["dropped"] += 1
+                return
+            self._pending.append((event, sse_manager))
+            self._ensure_dispatcher()
+            self._cond.notify()
+
+    def _record(self, event: Event) -> None:
+        """Append to the scan's ring buffer (caller holds the lock)."""
+        history = self._history.get(event.scan_id)
+        if history is None:
+            history = self._history[event.scan_id] = deque(maxlen=self._max_history)
+            while len(self._history) > self._max_scans:
+                evicted_scan, _ = self._history.popitem(last=False)
+                self._evicted.pop(evicted_scan, None)
+        else:
+            self._history.move_to_end(event.scan_id)
 
-        # Log event
-        logger.debug(f"Event published: {event.type.value} for scan {event.scan_id}")
+        # Replay only needs the latest progress, not every step of it
+        if event.type in COALESCED_EVENT_TYPES and history and history[-1].type == event.type:
+            history[-1] = event
+        else:
+            if len(history) == history.maxlen:
+                self._evicted[event.scan_id] = history[0].id
+            history.append(event)
 
-        # Forward to SSE (if manager is available)
-        self._forward_to_sse(event)
+    def _lookup_sse_manager(self) -> Any:
+        """SSE manager of the current Flask app, if there is one."""
+        try:
+            from flask import current_app
 
-        # Notify wildcard subscribers
-        for callback in self._wildcard_subscribers:
+            return getattr(current_app, "sse_manager", None)
+        except Exception:
+            # SSE forwarding is optional (no app context, Flask not installed)
+            return None
+
+    def _ensure_dispatcher(self) -> None:
+        """Start the dispatcher thread (caller holds the condition)."""
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="aegis-event-dispatch", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._dispatching = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                self._dispatching = True
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
             try:
-                callback(event)
+                self._deliver(self._coalesce(batch))
             except Exception as e:
-                logger.error(f"Error in wildcard event callback: {e}")
-
-        # Notify type-specific subscribers
-        if event.type in self._subscribers:
-            for callback in self._subscribers[event.type]:
+                logger.error(f"Event dispatch failed: {e}")
+
+    def _coalesce(self, batch: List[Tuple[Event, Any]]) -> List[Tuple[Event, Any]]:
+        """Keep only the last coalesced-type event per (scan, type) in a batch."""
+        latest: Dict[Tuple[str, EventType], int] = {}
+        for idx, (event, _) in enumerate(batch):
+            if event.type in COALESCED_EVENT_TYPES:
+                latest[(event.scan_id, event.type)] = idx
+        if len(latest) == sum(1 for event, _ in batch if event.type in COALESCED_EVENT_TYPES):
+            return batch
+        kept = [
+            item for idx, item in enumerate(batch)
+            if item[0].type not in COALESCED_EVENT_TYPES or latest[(item[0].scan_id, item[0].type)] == idx
+        ]
+        self.stats["coalesced"] += len(batch) - len(kept)
+        return kept
+
+    def _deliver(self, batch: List[Tuple[Event, Any]]) -> None:
+        events = [event for event, _ in batch]
+        for event, sse_manager in batch:
+            logger.debug(f"Event published: {event.type.value} for scan {event.scan_id}")
+            if sse_manager is not None:
+                self._forward_to_sse(event, sse_manager)
+
+            # Notify wildcard subscribers
+            for callback in self._wildcard_subscribers:
                 try:
                     callback(event)
                 except Exception as e:
-                    logger.error(f"Error in event callback for {event.type.value}: {e}")
+                    logger.error(f"Error in wildcard event callback: {e}")
+
+            # Notify type-specific subscribers
+            if event.type in self._subscribers:
+                for callback in self._subscribers[event.type]:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        logger.error(f"Error in event callback for {event.type.value}: {e}")
+
+        for callback in self._batch_subscribers:
+            try:
+                callback(events)
+            except Exception as e:
+                logger.error(f"Error in batch event callback: {e}")
+        self.stats["delivered"] += len(events)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event has been delivered.
+
+        Returns:
+            False if the timeout expired first
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._dispatching, timeout)
 
-    def _forward_to_sse(self, event: Event):
+    def _forward_to_sse(self, event: Event, sse_manager: Any):
         """
-        Forward event to SSE connections (if SSE manager is available).
+        Forward event to SSE connections.
 
         Args:
             event: Event to forward
+            sse_manager: SSEManager of the app that published the event
         """
         try:
-            # Try to import and get SSE manager
-            from aegis.sse.stream import SSEManager
-            from flask import current_app
-
-            if hasattr(current_app, 'sse_manager'):
-                sse_manager: SSEManager = current_app.sse_manager
-
-                # Map event type to SSE event name
-                sse_event_type = self._map_event_to_sse(event.type)
-
-                # Broadcast to SSE connections for this scan
-                sse_manager.broadcast(
-                    scan_id=event.scan_id,
-                    event_type=sse_event_type,
-                    data=event.data
-                )
+            # Map event type to SSE event name
+            sse_event_type = self._map_event_to_sse(event.type)
+
+            # Broadcast to SSE connections for this scan
+            sse_manager.broadcast(
+                scan_id=event.scan_id,
+                event_type=sse_event_type,
+                data=event.data,
+                event_id=event.id,
+            )
         except Exception as e:
             # SSE forwarding is optional, don't fail if it's not available
             logger.debug(f"Could not forward event to SSE: {e}")
@@ -238,18 +407,24 @@ class EventBus:
             event_type: Filter by event type (optional)
 
         Returns:
-            List of events matching filters
+            List of events matching filters, oldest first
         """
-        events = self._event_history
-
-        if scan_id:
-            events = [e for e in events if e.scan_id == scan_id]
+        with self._lock:
+            if scan_id:
+                events = list(self._history.get(scan_id, ()))
+            else:
+                events = sorted((e for history in self._history.values() for e in history), key=lambda e: e.id)
 
         if event_type:
             events = [e for e in events if e.type == event_type]
 
         return events
 
+    def evicted_through(self, scan_id: str) -> int:
+        """Id of the newest event of a scan no longer in its history (0 if none)."""
+        with self._lock:
+            return self._evicted.get(scan_id, 0)
+
     def clear_history(self, scan_id: Optional[str] = None):
         """
         Clear event history.
@@ -257,10 +432,13 @@ class EventBus:
         Args:
             scan_id: Clear only events for this scan (optional)
         """
-        if scan_id:
-            self._event_history = [e for e in self._event_history if e.scan_id != scan_id]
-        else:
-            self._event_history.clear()
+        with self._lock:
+            if scan_id:
+                self._history.pop(scan_id, None)
+                self._evicted.pop(scan_id, None)
+            else:
+                self._history.clear()
+                self._evicted.clear()
 
 
 # Global event bus instance
@@ -283,16 +461,33 @@ def get_event_bus() -> EventBus:
 class EventEmitter:
     """Helper class for emitting events from executors and runners."""
 
-    def __init__(self, scan_id: str, event_bus: Optional[EventBus] = None):
+    def __init__(self, scan_id: str, event_bus: Optional[EventBus] = None, profile: Any = None):
         """
         Initialize event emitter.
 
         Args:
             scan_id: Scan ID for all events
             event_bus: EventBus to use (defaults to global)
+            profile: ScanProfile recording stage spans (None when not profiling)
         """
         self.scan_id = scan_id
         self.event_bus = event_bus or get_event_bus()
+        self.profile = profile
+
+    def span(self, stage: str, label: Optional[str] = None):
+        """
+        Time a scan stage when the scan is profiled.
+
+        Args:
+            stage: Stage name (see aegis.profiling.STAGES)
+            label: Optional breakdown within the stage (model, step)
+
+        Returns:
+            Context manager; a no-op when the scan is not profiled
+        """
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.span(stage, label)
 
     def emit(self, event_type, data: Optional[Dict[str, Any]] = None):
         """
@@ -367,7 +562,8 @@ class EventEmitter:
 
     def model_started(self, model_id: str, model_name: str, model_type: Optional[str] = None,
                       device: Optional[str] = None, vram_mb: int = 0, load_time_ms: int = 0,
-                      quantization: Optional[str] = None, precision: Optional[str] = None):
+                      quantization: Optional[str] = None, precision: Optional[str] = None,
+                      concurrency_limit: Optional[int] = None):
         """Emit model started event with detailed telemetry."""
         data = {
             "model_id": model_id,
@@ -387,6 +583,8 @@ class EventEmitter:
             data["quantization"] = quantization
         if precision:
             data["precision"] = precision
+        if concurrency_limit:
+            data["concurrency_limit"] = concurrency_limit
 
         self.emit(EventType.MODEL_STARTED, data)
 
@@ -423,12 +621,26 @@ class EventEmitter:
             "model_id": model_id,
         })
 
-    def findings_merged(self, strategy: str, total_findings: int):
-        """Emit findings merged event."""
-        self.emit(EventType.FINDINGS_MERGED, {
+    def findings_merged(
+        self,
+        strategy: str,
+        total_findings: int,
+        clusters: Optional[int] = None,
+        input_findings: Optional[int] = None,
+        similarity_merges: Optional[int] = None,
+    ):
+        """Emit findings merged event, with consensus cluster counts when known."""
+        data: Dict[str, Any] = {
             "strategy": strategy,
             "total_findings": total_findings,
-        })
+        }
+        if clusters is not None:
+            data["clusters"] = clusters
+        if input_findings is not None:
+            data["input_findings"] = input_findings
+        if similarity_merges is not None:
+            data["similarity_merges"] = similarity_merges
+        self.emit(EventType.FINDINGS_MERGED, data)
 
     def progress_update(self, progress_pct: float, current: int, total: int, message: str):
         """Emit progress update event."""
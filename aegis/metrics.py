@@ -0,0 +1,271 @@
+"""Process metrics in the Prometheus text exposition format.
+
+Counters and histograms are updated in place by the code they describe (a
+dict lookup and an add under a per-metric lock); gauges that mirror existing
+state (runtime cache size, scan queue depth, open SSE connections) are read
+from callbacks only when ``/metrics`` is scraped, so nothing is sampled
+while nobody is looking. ``AEGIS_METRICS=false`` turns every update into a
+no-op.
+
+Metric names follow Prometheus conventions (``_total`` counters, ``_seconds``
+histograms) and are rendered by ``render_metrics()`` without needing
+prometheus_client.
+"""
+
+import bisect
+import math
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = (os.environ.get("AEGIS_METRICS") or "true").lower() == "true"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SCAN_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 300.0, 900.0, 1800.0, 3600.0, 7200.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines) + "\n"
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Current value, either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Read the (unlabelled) value from ``function`` on every scrape."""
+        self._function = function
+
+    def samples(self) -> List[str]:
+        function = self._function
+        if function is not None:
+            try:
+                return [f"{self.name} {_format_value(float(function()))}"]
+            except Exception:
+                return []
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text format."""
+    return REGISTRY.render()
+
+
+# Model execution (ModelRuntime.run / run_batch)
+CHUNKS_PROCESSED = REGISTRY.register(Counter(
+    "aegis_chunks_processed_total", "Chunks run through a model, by outcome.", ("model_id", "status"),
+))
+CHUNK_RETRIES = REGISTRY.register(Counter(
+    "aegis_chunk_retries_total", "Chunk retries after rate-limit or timeout errors.", ("model_id",),
+))
+PARSE_ERRORS = REGISTRY.register(Counter(
+    "aegis_parse_errors_total", "Chunks whose model output could not be fully parsed.", ("model_id",),
+))
+CHUNK_LATENCY = REGISTRY.register(Histogram(
+    "aegis_chunk_latency_seconds", "End-to-end time per chunk, including queueing and retries.", ("model_id",),
+))
+PROVIDER_LATENCY = REGISTRY.register(Histogram(
+    "aegis_provider_latency_seconds", "Time spent inside provider calls per chunk.", ("model_id",),
+))
+RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "aegis_rate_limit_wait_seconds", "Time chunks waited for rate-limit budget and a concurrency slot.",
+    ("model_id",),
+))
+
+# Runtime cache (ModelRuntimeManager)
+RUNTIME_CACHE_SIZE = REGISTRY.register(Gauge(
+    "aegis_runtime_cache_size", "Model runtimes currently cached.",
+))
+RUNTIME_CACHE_LOADS = REGISTRY.register(Counter(
+    "aegis_runtime_cache_loads_total", "Model runtimes created on a cache miss.",
+))
+RUNTIME_CACHE_EVICTIONS = REGISTRY.register(Counter(
+    "aegis_runtime_cache_evictions_total", "Model runtimes closed and dropped from the cache.", ("reason",),
+))
+
+# Scan worker
+SCAN_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "aegis_scan_queue_depth", "Scan jobs waiting for the scan worker.",
+))
+SCANS_RUNNING = REGISTRY.register(Gauge(
+    "aegis_scans_running", "Scans currently running on scan worker threads.",
+))
+SCANS_FINISHED = REGISTRY.register(Counter(
+    "aegis_scans_finished_total", "Scans run by the scan worker, by final status.", ("status",),
+))
+SCAN_DURATION = REGISTRY.register(Histogram(
+    "aegis_scan_duration_seconds", "Wall time of scans run by the scan worker.", buckets=SCAN_BUCKETS,
+))
+
+# Server-Sent Events
+SSE_CONNECTIONS = REGISTRY.register(Gauge(
+    "aegis_sse_connections", "Open SSE connections.",
+))
+SSE_CONNECTIONS_OPENED = REGISTRY.register(Counter(
+    "aegis_sse_connections_opened_total", "SSE connections accepted.",
+))
+SSE_LAGGING_DISCONNECTS = REGISTRY.register(Counter(
+    "aegis_sse_lagging_disconnects_total", "SSE connections dropped for falling too far behind.",
+))
+
+# Database
+DB_WRITE_LATENCY = REGISTRY.register(Histogram(
+    "aegis_db_write_seconds", "Time per database connection that wrote rows.", buckets=DB_BUCKETS,
+))
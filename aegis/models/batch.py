@@ -0,0 +1,628 @@
+"""Offline batch execution through provider-native batch APIs.
+
+Nightly full-repository scans do not need interactive latency, so instead of
+one request per chunk the prompts are written to a JSONL file, submitted as
+a single batch job and polled until the provider finishes. Results are fed
+back through the model's normal parser so consensus sees ordinary findings.
+
+Backends are pluggable (see ``BATCH_BACKENDS``):
+
+- ``openai``: OpenAI Batch API (files + /v1/batches)
+- ``anthropic``: Anthropic Message Batches API
+- ``file``: a directory-based fake batch server for offline/local runs
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from aegis.models.provider_factory import detect_provider_capabilities
+from aegis.models.schema import ModelRecord, ModelType, ParserResult
+from aegis.models.usage import report_usage
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_BATCH_DIR = os.path.join(PROJECT_ROOT, "data", "batches")
+
+
+class BatchError(RuntimeError):
+    """Raised when a batch job cannot be submitted or fails remotely."""
+
+
+@dataclass
+class BatchItem:
+    """One prompt in a batch job."""
+
+    custom_id: str
+    prompt: str
+    system_prompt: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class BatchItemResult:
+    """Provider output for one batch item."""
+
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+@dataclass
+class BatchJobStatus:
+    """Snapshot of a submitted batch job."""
+
+    job_id: str
+    state: str  # queued | running | completed | failed
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("completed", "failed")
+
+
+class BatchBackend(ABC):
+    """Submits JSONL batch jobs to a provider and retrieves their results."""
+
+    name = "base"
+
+    @abstractmethod
+    def format_request(self, item: BatchItem, model_name: str) -> Dict[str, Any]:
+        """Render one item as a provider-native JSONL line."""
+
+    @abstractmethod
+    async def submit(self, jsonl_path: str, total: int) -> str:
+        """Submit a JSONL file and return the provider job id."""
+
+    @abstractmethod
+    async def poll(self, job_id: str) -> BatchJobStatus:
+        """Return the current job status."""
+
+    @abstractmethod
+    async def results(self, job_id: str) -> Dict[str, BatchItemResult]:
+        """Fetch results for a finished job keyed by custom_id."""
+
+    @abstractmethod
+    async def cancel(self, job_id: str) -> None:
+        """Stop a job that is no longer wanted, so the provider stops billing it."""
+
+    def write_jsonl(self, items: List[BatchItem], model_name: str, path: str) -> str:
+        """Write items to ``path`` in this backend's request format."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            for item in items:
+                handle.write(json.dumps(self.format_request(item, model_name)) + "\n")
+        return path
+
+
+class OpenAIBatchBackend(BatchBackend):
+    """OpenAI Batch API (chat completions endpoint, 24h completion window)."""
+
+    name = "openai"
+    ENDPOINT = "/v1/chat/completions"
+
+    def __init__(self, provider: Any, completion_window: str = "24h"):
+        """
+        Args:
+            provider: OpenAIProvider (its AsyncOpenAI client is reused)
+            completion_window: Batch completion window accepted by the API
+        """
+        self.client = provider.client
+        self.completion_window = completion_window
+
+    def format_request(self, item: BatchItem, model_name: str) -> Dict[str, Any]:
+        messages = []
+        if item.system_prompt:
+            messages.append({"role": "system", "content": item.system_prompt})
+        messages.append({"role": "user", "content": item.prompt})
+        return {
+            "custom_id": item.custom_id,
+            "method": "POST",
+            "url": self.ENDPOINT,
+            "body": {"model": model_name, "messages": messages, **item.params},
+        }
+
+    async def submit(self, jsonl_path: str, total: int) -> str:
+        with open(jsonl_path, "rb") as handle:
+            upload = await self.client.files.create(file=handle, purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint=self.ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    async def poll(self, job_id: str) -> BatchJobStatus:
+        batch = await self.client.batches.retrieve(job_id)
+        counts = getattr(batch, "request_counts", None)
+        if batch.status == "completed":
+            state = "completed"
+        elif batch.status in ("failed", "expired", "cancelled"):
+            state = "failed"
+        elif batch.status == "validating":
+            state = "queued"
+        else:
+            state = "running"
+        return BatchJobStatus(
+            job_id=job_id,
+            state=state,
+            total=getattr(counts, "total", 0) or 0,
+            completed=getattr(counts, "completed", 0) or 0,
+            failed=getattr(counts, "failed", 0) or 0,
+        )
+
+    async def results(self, job_id: str) -> Dict[str, BatchItemResult]:
+        batch = await self.client.batches.retrieve(job_id)
+        out: Dict[str, BatchItemResult] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                custom_id = record.get("custom_id")
+                response = record.get("response") or {}
+                body = response.get("body") or {}
+                error = record.get("error") or body.get("error")
+                if error or response.get("status_code", 200) >= 400:
+                    out[custom_id] = BatchItemResult(custom_id=custom_id, error=json.dumps(error or body))
+                    continue
+                choices = body.get("choices") or [{}]
+                usage = body.get("usage") or {}
+                out[custom_id] = BatchItemResult(
+                    custom_id=custom_id,
+                    text=(choices[0].get("message") or {}).get("content", ""),
+                    input_tokens=usage.get("prompt_tokens", 0),
+                    output_tokens=usage.get("completion_tokens", 0),
+                )
+        return out
+
+    async def cancel(self, job_id: str) -> None:
+        await self.client.batches.cancel(job_id)
+
+
+class AnthropicBatchBackend(BatchBackend):
+    """Anthropic Message Batches API."""
+
+    name = "anthropic"
+
+    def __init__(self, provider: Any, default_max_tokens: int = 4096):
+        """
+        Args:
+            provider: AnthropicProvider (its AsyncAnthropic client is reused)
+            default_max_tokens: max_tokens when the item does not set one
+        """
+        self.client = provider.client
+        self.default_max_tokens = default_max_tokens
+
+    def format_request(self, item: BatchItem, model_name: str) -> Dict[str, Any]:
+        params = dict(item.params)
+        params.setdefault("max_tokens", self.default_max_tokens)
+        params.update({
+            "model": model_name,
+            "messages": [{"role": "user", "content": item.prompt}],
+        })
+        if item.system_prompt:
+            params["system"] = item.system_prompt
+        return {"custom_id": item.custom_id, "params": params}
+
+    async def submit(self, jsonl_path: str, total: int) -> str:
+        with open(jsonl_path, "r", encoding="utf-8") as handle:
+            requests = [json.loads(line) for line in handle if line.strip()]
+        batch = await self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    async def poll(self, job_id: str) -> BatchJobStatus:
+        batch = await self.client.messages.batches.retrieve(job_id)
+        counts = batch.request_counts
+        finished = counts.succeeded + counts.errored + counts.canceled + counts.expired
+        return BatchJobStatus(
+            job_id=job_id,
+            state="completed" if batch.processing_status == "ended" else "running",
+            total=finished + counts.processing,
+            completed=counts.succeeded,
+            failed=counts.errored + counts.canceled + counts.expired,
+        )
+
+    async def results(self, job_id: str) -> Dict[str, BatchItemResult]:
+        out: Dict[str, BatchItemResult] = {}
+        async for entry in await self.client.messages.batches.results(job_id):
+            result = entry.result
+            if result.type != "succeeded":
+                error = getattr(result, "error", None)
+                out[entry.custom_id] = BatchItemResult(
+                    custom_id=entry.custom_id,
+                    error=str(error) if error else result.type,
+                )
+                continue
+            message = result.message
+            out[entry.custom_id] = BatchItemResult(
+                custom_id=entry.custom_id,
+                text="".join(getattr(block, "text", "") for block in message.content),
+                input_tokens=message.usage.input_tokens,
+                output_tokens=message.usage.output_tokens,
+            )
+        return out
+
+    async def cancel(self, job_id: str) -> None:
+        await self.client.messages.batches.cancel(job_id)
+
+
+class FileBatchBackend(BatchBackend):
+    """
+    Directory-based batch backend, the client half of ``FileBatchServer``.
+
+    Layout per job: ``<root>/<job_id>/input.jsonl``, ``status.json`` and,
+    once processed, ``output.jsonl``. Works without network access.
+    """
+
+    name = "file"
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    def format_request(self, item: BatchItem, model_name: str) -> Dict[str, Any]:
+        return {
+            "custom_id": item.custom_id,
+            "model": model_name,
+            "prompt": item.prompt,
+            "system_prompt": item.system_prompt,
+            "params": item.params,
+        }
+
+    async def submit(self, jsonl_path: str, total: int) -> str:
+        job_id = f"batch_{uuid.uuid4().hex[:12]}"
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        os.replace(jsonl_path, os.path.join(job_dir, "input.jsonl"))
+        _write_status(job_dir, {"state": "queued", "total": total, "completed": 0, "failed": 0})
+        return job_id
+
+    async def poll(self, job_id: str) -> BatchJobStatus:
+        status = _read_status(self._job_dir(job_id))
+        if status is None:
+            raise BatchError(f"Unknown batch job: {job_id}")
+        return BatchJobStatus(
+            job_id=job_id,
+            state=status.get("state", "queued"),
+            total=status.get("total", 0),
+            completed=status.get("completed", 0),
+            failed=status.get("failed", 0),
+        )
+
+    async def results(self, job_id: str) -> Dict[str, BatchItemResult]:
+        path = os.path.join(self._job_dir(job_id), "output.jsonl")
+        out: Dict[str, BatchItemResult] = {}
+        if not os.path.exists(path):
+            return out
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                usage = record.get("usage") or {}
+                out[record["custom_id"]] = BatchItemResult(
+                    custom_id=record["custom_id"],
+                    text=record.get("text"),
+                    error=record.get("error"),
+                    input_tokens=usage.get("input_tokens", 0),
+                    output_tokens=usage.get("output_tokens", 0),
+                )
+        return out
+
+    async def cancel(self, job_id: str) -> None:
+        job_dir = self._job_dir(job_id)
+        status = _read_status(job_dir)
+        if status is not None and status.get("state") not in ("completed", "failed"):
+            # The server checks this between requests and stops the job
+            _write_status(job_dir, {**status, "state": "failed", "cancelled": True})
+
+
+def _write_status(job_dir: str, status: Dict[str, Any]) -> None:
+    tmp_path = os.path.join(job_dir, "status.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(status, handle)
+    os.replace(tmp_path, os.path.join(job_dir, "status.json"))
+
+
+def _read_status(job_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(job_dir, "status.json"), "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+class FileBatchServer:
+    """
+    Fake batch server that processes jobs written by ``FileBatchBackend``.
+
+    Each request line is handed to ``responder`` (request dict -> text). The
+    default responder returns an empty findings payload, which is enough to
+    exercise the submit/poll/parse path end to end.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+        poll_interval: float = 0.5,
+    ):
+        self.root = root
+        self.responder = responder or (lambda request: '{"findings": []}')
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def process_job(self, job_id: str) -> None:
+        """Run every request of a queued job and mark it completed."""
+        job_dir = os.path.join(self.root, job_id)
+        status = _read_status(job_dir) or {}
+        status.update({"state": "running", "completed": 0, "failed": 0})
+        _write_status(job_dir, status)
+
+        with open(os.path.join(job_dir, "input.jsonl"), "r", encoding="utf-8") as src, \
+                open(os.path.join(job_dir, "output.jsonl"), "w", encoding="utf-8") as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                if (_read_status(job_dir) or {}).get("cancelled"):
+                    logger.info(f"Fake batch job {job_id} cancelled")
+                    return
+                request = json.loads(line)
+                record: Dict[str, Any] = {"custom_id": request["custom_id"]}
+                try:
+                    record["text"] = self.responder(request)
+                    status["completed"] += 1
+                except Exception as e:
+                    record["error"] = str(e)
+                    status["failed"] += 1
+                dst.write(json.dumps(record) + "\n")
+
+        if (_read_status(job_dir) or {}).get("cancelled"):
+            return
+        status["state"] = "completed"
+        _write_status(job_dir, status)
+
+    def process_pending(self) -> int:
+        """Process all queued jobs once; returns how many were handled."""
+        if not os.path.isdir(self.root):
+            return 0
+        handled = 0
+        for job_id in sorted(os.listdir(self.root)):
+            status = _read_status(os.path.join(self.root, job_id))
+            if status and status.get("state") == "queued":
+                try:
+                    self.process_job(job_id)
+                except Exception as e:
+                    logger.error(f"Fake batch server failed on {job_id}: {e}")
+                    _write_status(os.path.join(self.root, job_id), {**status, "state": "failed"})
+                handled += 1
+        return handled
+
+    def start(self) -> None:
+        """Process queued jobs in a background thread until stop()."""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="aegis-fake-batch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.process_pending()
+            self._stop_event.wait(self.poll_interval)
+
+
+def provider_responder(provider: Any) -> Callable[[Dict[str, Any]], str]:
+    """Responder that answers fake-batch requests with a real (local) provider."""
+    capabilities = detect_provider_capabilities(provider)
+
+    def _respond(request: Dict[str, Any]) -> str:
+        kwargs = dict(request.get("params") or {})
+        if request.get("system_prompt") and capabilities.system_prompt:
+            kwargs["system_prompt"] = request["system_prompt"]
+        if capabilities.generate:
+            return provider.generate(request["prompt"], **kwargs)
+        raise BatchError("Provider has no synchronous generate() for the fake batch server")
+
+    return _respond
+
+
+_FILE_SERVERS: Dict[str, FileBatchServer] = {}
+_FILE_SERVERS_LOCK = threading.Lock()
+
+
+def _file_backend(model: ModelRecord, provider: Any, cfg: Dict[str, Any]) -> BatchBackend:
+    root = cfg.get("root") or os.path.join(DEFAULT_BATCH_DIR, "file_server")
+    if cfg.get("autoserve"):
+        # Run the fake server in-process, answering with the model's own provider
+        with _FILE_SERVERS_LOCK:
+            if root not in _FILE_SERVERS:
+                server = FileBatchServer(root, responder=provider_responder(provider))
+                server.start()
+                _FILE_SERVERS[root] = server
+    return FileBatchBackend(root)
+
+
+def _unwrap(provider: Any) -> Any:
+    # CloudProviderAdapter keeps the SDK-backed provider on .provider
+    return getattr(provider, "provider", provider)
+
+
+BATCH_BACKENDS: Dict[str, Callable[[ModelRecord, Any, Dict[str, Any]], BatchBackend]] = {
+    "openai": lambda model, provider, cfg: OpenAIBatchBackend(
+        _unwrap(provider), completion_window=cfg.get("completion_window", "24h")
+    ),
+    "anthropic": lambda model, provider, cfg: AnthropicBatchBackend(
+        _unwrap(provider), default_max_tokens=cfg.get("max_tokens", 4096)
+    ),
+    "file": _file_backend,
+}
+
+_DEFAULT_BACKEND_BY_TYPE = {
+    ModelType.OPENAI_CLOUD: "openai",
+    ModelType.ANTHROPIC_CLOUD: "anthropic",
+}
+
+
+def register_batch_backend(
+    name: str,
+    factory: Callable[[ModelRecord, Any, Dict[str, Any]], BatchBackend],
+) -> None:
+    """Register a batch backend factory under ``name``."""
+    BATCH_BACKENDS[name] = factory
+
+
+def batch_backend_name(model: ModelRecord) -> Optional[str]:
+    """
+    Name of the model's batch backend, without building it.
+
+    settings.batch.backend when set, otherwise the provider-native backend for
+    the model type; None when the model has no batch API.
+    """
+    cfg = (model.settings or {}).get("batch") or {}
+    return cfg.get("backend") or _DEFAULT_BACKEND_BY_TYPE.get(model.model_type)
+
+
+def get_batch_backend(model: ModelRecord, provider: Any) -> Optional[BatchBackend]:
+    """
+    Build the batch backend for a model (see batch_backend_name).
+
+    The file backend may start its fake server here, so capability checks
+    should use batch_backend_name instead. Returns None when the model has
+    no batch API.
+    """
+    cfg = (model.settings or {}).get("batch") or {}
+    name = batch_backend_name(model)
+    if not name:
+        return None
+    factory = BATCH_BACKENDS.get(name)
+    if factory is None:
+        raise BatchError(f"Unknown batch backend: {name}")
+    return factory(model, provider, cfg)
+
+
+async def _cancel_job(backend: BatchBackend, job_id: str) -> None:
+    try:
+        await backend.cancel(job_id)
+        logger.info(f"Cancelled {backend.name} batch {job_id}")
+    except Exception as e:
+        logger.warning(f"Could not cancel {backend.name} batch {job_id}: {e}")
+
+
+async def run_offline_batch(
+    backend: BatchBackend,
+    runner: Any,
+    model: ModelRecord,
+    chunks: List[Dict[str, Any]],
+    poll_interval: float = 30.0,
+    timeout: Optional[float] = None,
+    on_status: Optional[Callable[[BatchJobStatus], None]] = None,
+    cancel_check: Optional[Callable[[], bool]] = None,
+    work_dir: str = DEFAULT_BATCH_DIR,
+) -> List[ParserResult]:
+    """
+    Run chunk contexts as one provider batch job and parse the results.
+
+    Args:
+        backend: Batch backend to submit through
+        runner: Role runner providing build_prompt(), the system prompt and parser
+        model: Model being executed
+        chunks: Chunk contexts (code, file_path, line_start, line_end, snippet)
+        poll_interval: Seconds between status polls
+        timeout: Give up after this many seconds (None = wait for the provider)
+        on_status: Callback invoked with every polled status
+        cancel_check: Returns True to abandon the wait
+        work_dir: Directory for the request JSONL (deleted once submitted:
+            it holds the source of every chunk)
+
+    Returns:
+        ParserResult per chunk, in input order
+    """
+    if not chunks:
+        return []
+
+    system_prompt = getattr(runner, "DEFAULT_SYSTEM_PROMPT", None)
+    settings = model.settings or {}
+    params = {
+        key: settings[key]
+        for key in ("temperature", "max_tokens", "top_p")
+        if settings.get(key) is not None
+    }
+
+    items: List[BatchItem] = []
+    contexts: List[Dict[str, Any]] = []
+    for index, chunk in enumerate(chunks):
+        context = {
+            "code": chunk.get("code"),
+            "file_path": chunk.get("file_path"),
+            "line_start": chunk.get("line_start"),
+            "line_end": chunk.get("line_end"),
+            "snippet": chunk.get("snippet") or chunk.get("code"),
+        }
+        prompt = runner.build_prompt(chunk.get("code", ""), context)
+        items.append(BatchItem(custom_id=f"chunk-{index}", prompt=prompt, system_prompt=system_prompt, params=params))
+        contexts.append(context)
+
+    jsonl_path = os.path.join(work_dir, f"{model.model_id}-{uuid.uuid4().hex[:8]}.jsonl")
+    try:
+        backend.write_jsonl(items, model.model_name, jsonl_path)
+        job_id = await backend.submit(jsonl_path, len(items))
+    finally:
+        try:
+            os.remove(jsonl_path)
+        except FileNotFoundError:
+            pass  # Moved by the backend (file) or never written
+    logger.info(f"Submitted {backend.name} batch {job_id} with {len(items)} requests for {model.model_id}")
+
+    started = time.monotonic()
+    while True:
+        status = await backend.poll(job_id)
+        if on_status:
+            on_status(status)
+        if status.done:
+            break
+        if cancel_check and cancel_check():
+            await _cancel_job(backend, job_id)
+            raise BatchError(f"Batch {job_id} abandoned: scan cancelled")
+        if timeout is not None and time.monotonic() - started > timeout:
+            await _cancel_job(backend, job_id)
+            raise BatchError(f"Batch {job_id} did not finish within {timeout}s")
+        await asyncio.sleep(poll_interval)
+
+    if status.state == "failed":
+        raise BatchError(f"Batch {job_id} failed")
+
+    outputs = await backend.results(job_id)
+    results: List[ParserResult] = []
+    for item, context in zip(items, contexts):
+        output = outputs.get(item.custom_id)
+        if output is None:
+            results.append(ParserResult(findings=[], parse_errors=["Missing batch result"], raw_output=None))
+            continue
+        if output.error:
+            results.append(ParserResult(findings=[], parse_errors=[f"Batch request failed: {output.error}"], raw_output=None))
+            continue
+        report_usage(output.input_tokens, output.output_tokens)
+        results.append(await runner.parse_output(output.text or "", context))
+    return results
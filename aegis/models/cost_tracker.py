@@ -24,6 +24,8 @@ class UsageRecord:
     total_tokens: int
     cost_usd: float
     request_id: Optional[str] = None
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
 
 
 class CostTracker:
@@ -44,6 +46,7 @@ class CostTracker:
         # In-memory cache for current session
         self.session_usage: Dict[str, float] = {}
         self.session_tokens: Dict[str, int] = {}
+        self.session_cached_tokens: Dict[str, int] = {}
 
     def _init_database(self):
         """Initialize cost tracking table."""
@@ -60,10 +63,18 @@ class CostTracker:
                     total_tokens INTEGER NOT NULL,
                     cost_usd REAL NOT NULL,
                     request_id TEXT,
+                    cached_tokens INTEGER NOT NULL DEFAULT 0,
+                    cache_write_tokens INTEGER NOT NULL DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
 
+            # Older databases predate prompt-cache accounting
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(api_usage)")}
+            for column in ("cached_tokens", "cache_write_tokens"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE api_usage ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+
             # Create indexes for faster queries
             conn.execute("""
                 CREATE INDEX IF NOT EXISTS idx_api_usage_scan_id
@@ -87,6 +98,8 @@ class CostTracker:
         cost_usd: float,
         scan_id: Optional[str] = None,
         request_id: Optional[str] = None,
+        cached_tokens: int = 0,
+        cache_write_tokens: int = 0,
     ):
         """
         Log API usage and cost.
@@ -94,11 +107,13 @@ class CostTracker:
         Args:
             provider: Provider name (openai, anthropic, google)
             model_name: Model name
-            input_tokens: Number of input tokens
+            input_tokens: Number of input tokens (including cached)
             output_tokens: Number of output tokens
             cost_usd: Cost in USD
             scan_id: Associated scan ID
             request_id: API request ID
+            cached_tokens: Input tokens served from the provider prompt cache
+            cache_write_tokens: Input tokens written to the provider prompt cache
         """
         timestamp = datetime.utcnow().isoformat()
         total_tokens = input_tokens + output_tokens
@@ -108,6 +123,9 @@ class CostTracker:
         with self.lock:
             self.session_usage[provider_key] = self.session_usage.get(provider_key, 0.0) + cost_usd
             self.session_tokens[provider_key] = self.session_tokens.get(provider_key, 0) + total_tokens
+            self.session_cached_tokens[provider_key] = (
+                self.session_cached_tokens.get(provider_key, 0) + cached_tokens
+            )
 
         # Insert into database
         try:
@@ -116,8 +134,9 @@ class CostTracker:
                     """
                     INSERT INTO api_usage (
                         timestamp, provider, model_name, scan_id,
-                        input_tokens, output_tokens, total_tokens, cost_usd, request_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        input_tokens, output_tokens, total_tokens, cost_usd, request_id,
+                        cached_tokens, cache_write_tokens
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     (
                         timestamp,
@@ -129,12 +148,14 @@ class CostTracker:
                         total_tokens,
                         cost_usd,
                         request_id,
+                        cached_tokens,
+                        cache_write_tokens,
                     ),
                 )
 
             logger.info(
                 f"API usage logged: {provider}/{model_name} - "
-                f"tokens={total_tokens} (in={input_tokens}, out={output_tokens}), "
+                f"tokens={total_tokens} (in={input_tokens}, out={output_tokens}, cached={cached_tokens}), "
                 f"cost=${cost_usd:.6f}, scan={scan_id}"
             )
 
@@ -160,6 +181,8 @@ class CostTracker:
                     SUM(input_tokens) as total_input,
                     SUM(output_tokens) as total_output,
                     SUM(total_tokens) as total_tokens,
+                    SUM(cached_tokens) as total_cached,
+                    SUM(cache_write_tokens) as total_cache_write,
                     SUM(cost_usd) as total_cost,
                     COUNT(*) as request_count
                 FROM api_usage
@@ -186,6 +209,8 @@ class CostTracker:
                     "input_tokens": row["total_input"],
                     "output_tokens": row["total_output"],
                     "total_tokens": row["total_tokens"],
+                    "cached_tokens": row["total_cached"] or 0,
+                    "cache_write_tokens": row["total_cache_write"] or 0,
                     "cost_usd": row["total_cost"],
                     "request_count": row["request_count"],
                 }
@@ -224,6 +249,8 @@ class CostTracker:
                 SUM(input_tokens) as total_input,
                 SUM(output_tokens) as total_output,
                 SUM(total_tokens) as total_tokens,
+                SUM(cached_tokens) as total_cached,
+                SUM(cache_write_tokens) as total_cache_write,
                 SUM(cost_usd) as total_cost,
                 COUNT(*) as request_count
             FROM api_usage
@@ -265,6 +292,8 @@ class CostTracker:
                     "input_tokens": row["total_input"],
                     "output_tokens": row["total_output"],
                     "total_tokens": row["total_tokens"],
+                    "cached_tokens": row["total_cached"] or 0,
+                    "cache_write_tokens": row["total_cache_write"] or 0,
                     "cost_usd": row["total_cost"],
                     "request_count": row["request_count"],
                 }
@@ -325,6 +354,7 @@ class CostTracker:
                 provider_key: {
                     "cost_usd": self.session_usage.get(provider_key, 0.0),
                     "total_tokens": self.session_tokens.get(provider_key, 0),
+                    "cached_tokens": self.session_cached_tokens.get(provider_key, 0),
                 }
                 for provider_key in set(list(self.session_usage.keys()) + list(self.session_tokens.keys()))
             }
@@ -334,6 +364,7 @@ class CostTracker:
         with self.lock:
             self.session_usage.clear()
             self.session_tokens.clear()
+            self.session_cached_tokens.clear()
 
     def get_budget_status(self, budget_usd: float, start_date: Optional[str] = None) -> Dict[str, any]:
         """
@@ -3,9 +3,12 @@
 import asyncio
 import hashlib
 import time
+from contextlib import nullcontext
 from typing import Any, Dict, List, Optional, Callable
 
 from aegis.data_models import Finding
+from aegis.distributed.coordinator import get_coordinator
+from aegis.models.event_loop import run_sync
 from aegis.models.provider_factory import ProviderCreationError
 from aegis.models.registry import ModelRegistryV2
 from aegis.models.schema import (
@@ -15,6 +18,7 @@ from aegis.models.schema import (
     FindingCandidate,
 )
 from aegis.models.runtime_manager import DEFAULT_RUNTIME_MANAGER, ModelRuntimeManager
+from aegis.models.telemetry import ChunkExecution, ExecutionRecorder
 
 
 def _candidate_to_finding(candidate: FindingCandidate) -> Finding:
@@ -154,37 +158,111 @@ class ModelExecutionEngine:
         }
         prompt = code  # Triage runner uses it directly; deep scan builds template internally
         runtime = self.runtime_manager.get_runtime(model)
-        return asyncio.run(runtime.run(prompt, context, role=role))
+        return run_sync(runtime.run(prompt, context, role=role))
 
     def run_model_batch_sync(
         self,
         model: ModelRecord,
         chunks: List[Dict[str, Any]],
         role: Optional[ModelRole] = None,
+        on_finding: Optional[Callable[[FindingCandidate], None]] = None,
+        recorder: Optional[ExecutionRecorder] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
     ) -> List[ParserResult]:
-        """Run a model synchronously on a batch of chunk contexts."""
+        """
+        Run a model synchronously on a batch of chunk contexts.
+
+        With ``on_finding``, streaming-capable providers are streamed and each
+        finding is reported as soon as the model finishes writing it (called
+        from the model event loop thread). Findings are still returned in the
+        parsed results.
+
+        With ``recorder``, one ChunkExecution per chunk (latency, queue wait,
+        retries, tokens, status) is recorded. Chunks are retried up to
+        ``max_retries`` times on rate-limit and timeout errors.
+
+        In coordinator mode, batches for models that a remote worker serves
+        run on that worker (without streaming) instead of locally; the wait
+        for the worker ends early when ``cancel_check`` returns True.
+        """
         if not chunks:
             return []
 
+        coordinator = get_coordinator()
+        if coordinator is not None and coordinator.serves(model.model_id):
+            return coordinator.run_model_batch_sync(model, chunks, role, recorder=recorder, cancel_check=cancel_check)
+
         runtime = self.runtime_manager.get_runtime(model)
         target_role = role or (model.roles[0] if model.roles else ModelRole.DEEP_SCAN)
         runner = runtime.get_runner(target_role)
 
         prompts: List[str] = []
         contexts: List[Dict[str, Any]] = []
-        for chunk in chunks:
-            context = {
-                "code": chunk.get("code"),
-                "file_path": chunk.get("file_path"),
-                "line_start": chunk.get("line_start"),
-                "line_end": chunk.get("line_end"),
-                "snippet": chunk.get("snippet") or chunk.get("code"),
-            }
-            prompt = runner.build_prompt(chunk.get("code", ""), context)
-            prompts.append(prompt)
-            contexts.append(context)
+        with recorder.span("prompt_build") if recorder is not None else nullcontext():
+            for chunk in chunks:
+                context = {
+                    "code": chunk.get("code"),
+                    "file_path": chunk.get("file_path"),
+                    "line_start": chunk.get("line_start"),
+                    "line_end": chunk.get("line_end"),
+                    "snippet": chunk.get("snippet") or chunk.get("code"),
+                }
+                prompt = runner.build_prompt(chunk.get("code", ""), context)
+                prompts.append(prompt)
+                contexts.append(context)
+
+        extra: Dict[str, Any] = {}
+        if on_finding is not None:
+            extra["on_finding"] = on_finding
+        if recorder is not None:
+            def on_execution(idx: int, execution: ChunkExecution) -> None:
+                execution.file_path = chunks[idx].get("file_path")
+                execution.chunk_index = chunks[idx].get("chunk_index")
+                recorder.record(execution)
+
+            extra["on_execution"] = on_execution
+        return run_sync(
+            runtime.run_batch(
+                prompts,
+                contexts,
+                role=target_role,
+                scan_id=recorder.scan_id if recorder is not None else None,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay,
+                **extra,
+            )
+        )
+
+    def run_model_offline_batch_sync(
+        self,
+        model: ModelRecord,
+        chunks: List[Dict[str, Any]],
+        role: Optional[ModelRole] = None,
+        scan_id: Optional[str] = None,
+        on_status: Optional[Callable[[Any], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ) -> List[ParserResult]:
+        """Submit all chunks as one provider batch job and wait for parsed results."""
+        if not chunks:
+            return []
+
+        runtime = self.runtime_manager.get_runtime(model)
+        return run_sync(
+            runtime.run_offline_batch(
+                chunks,
+                role=role,
+                scan_id=scan_id,
+                on_status=on_status,
+                cancel_check=cancel_check,
+            )
+        )
+
+    def supports_offline_batch(self, model: ModelRecord) -> bool:
+        """True when the model names a registered batch backend (nothing is built or started)."""
+        from aegis.models.batch import BATCH_BACKENDS, batch_backend_name
 
-        return asyncio.run(runtime.run_batch(prompts, contexts, role=target_role))
+        name = batch_backend_name(model)
+        return name is not None and name in BATCH_BACKENDS
 
     def run_model_batch_to_findings(
         self,
@@ -313,7 +391,7 @@ class ModelExecutionEngine:
         Returns:
             Dictionary mapping model_id to list of findings
         """
-        return asyncio.run(
+        return run_sync(
             self.run_models_concurrent(
                 models=models,
                 code=code,
@@ -399,4 +477,4 @@ class ModelExecutionEngine:
 
     def health_check_model_sync(self, model: ModelRecord, timeout: int = 30) -> Dict[str, Any]:
         """Synchronous wrapper for model health check."""
-        return asyncio.run(self.health_check_model(model, timeout))
+        return run_sync(self.health_check_model(model, timeout))
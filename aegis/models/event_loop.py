@@ -0,0 +1,67 @@
+"""Shared background event loop for async model execution.
+
+Async provider clients (AsyncOpenAI, AsyncAnthropic, aiohttp sessions) keep
+connection pools bound to the loop they were first used on. Running every
+call through one long-lived loop lets worker threads submit coroutines and
+wait on the result without spinning up a fresh loop (or thread) per request.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Optional
+
+logger = logging.getLogger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+
+
+def _serve(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_shared_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared loop, starting its daemon thread on first use."""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed() or not (_thread and _thread.is_alive()):
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_serve,
+                args=(loop,),
+                name="aegis-model-loop",
+                daemon=True,
+            )
+            thread.start()
+            _loop, _thread = loop, thread
+            logger.debug("Started shared model event loop")
+        return _loop
+
+
+def in_shared_loop() -> bool:
+    """True when called from the shared loop's own thread."""
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def submit(coro: Awaitable[Any]) -> "concurrent.futures.Future[Any]":
+    """Schedule a coroutine on the shared loop and return a thread-safe future."""
+    return asyncio.run_coroutine_threadsafe(coro, get_shared_loop())
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run a coroutine on the shared loop and block until it finishes.
+
+    Raises:
+        RuntimeError: If called from the shared loop thread (would deadlock)
+    """
+    if in_shared_loop():
+        close = getattr(coro, "close", None)
+        if callable(close):
+            close()
+        raise RuntimeError("run_sync() cannot be called from the shared model event loop")
+    return submit(coro).result(timeout)
@@ -0,0 +1,292 @@
+"""Single-pass JSON span extraction for noisy model outputs.
+
+Models wrap their JSON in prose, markdown fences, or echo half-finished
+attempts before the real answer. Instead of re-scanning from every ``{``
+and re-parsing, ``iter_json_spans`` walks the text once (jumping between
+structural characters with a regex), tracks string state inside containers,
+and records every balanced object span. Candidates are then validated in
+preference order, each distinct candidate at most once.
+
+``orjson`` is used for validation when installed; it is optional.
+"""
+
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator
+    orjson = None
+
+# Characters the scanner has to look at; everything else is skipped in C
+_STRUCTURAL = re.compile(r'[{}\[\]"\\]')
+_JSON_FENCE = re.compile(r"```json\s*([\s\S]*?)```", re.IGNORECASE)
+_ANY_FENCE = re.compile(r"```(?:[a-zA-Z0-9_-]+)?\s*([\s\S]*?)```")
+# Inputs the stdlib accepts but orjson rejects (non-finite floats, >64-bit ints)
+_STDLIB_ONLY = re.compile(r"NaN|Infinity|\d{19,}")
+# Array body opening of ``[]`` or ``[{...``, so prose like ``[1]`` is not a candidate
+_ARRAY_OF_OBJECTS = re.compile(r"\s*[{\]]")
+
+_CLOSERS = {"}": "{", "]": "["}
+_MAX_RESYNCS = 16
+# An opener at the start of a line: a likely place for a fresh JSON document
+_LINE_OPENER = re.compile(r"^[ \t]*[{\[]", re.MULTILINE)
+
+
+def loads(text: str) -> Any:
+    """Decode JSON, preferring orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            if not _STDLIB_ONLY.search(text):
+                raise
+    return json.loads(text)
+
+
+def iter_json_spans(
+    text: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    unclosed: Optional[List[int]] = None,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Find balanced JSON container spans in one lazy pass.
+
+    Quotes are only treated as string delimiters inside a container, so
+    apostrophes and stray quotes in surrounding prose do not derail the scan.
+    A mismatched closer abandons the containers currently open.
+
+    Spans are yielded shallowest first, then in start order, as soon as their
+    top-level container closes, so callers that stop at the first valid
+    candidate never scan the rest of the text.
+
+    Args:
+        text: Text to scan
+        start: Index to start scanning at
+        end: Index to stop scanning at (defaults to the end of text)
+        unclosed: If given, receives the indices of openers that never closed
+            (abandoned on a mismatch or still open at the end), in scan order
+
+    Yields:
+        ``(start, end)`` slices: every ``{...}`` span at any depth, plus
+        top-level ``[...]`` spans whose first element is an object (or that
+        are empty).
+    """
+    pending: List[Tuple[int, int, int]] = []
+    stack: List[Tuple[str, int]] = []
+    in_string = False
+    skip_until = -1
+
+    for match in _STRUCTURAL.finditer(text, start, len(text) if end is None else end):
+        idx = match.start()
+        if idx < skip_until:
+            continue
+        char = match.group()
+
+        if in_string:
+            if char == "\\":
+                skip_until = idx + 2
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == "{" or char == "[":
+            stack.append((char, idx))
+        elif char == '"':
+            if stack:
+                in_string = True
+        elif char in _CLOSERS:
+            if not stack:
+                continue
+            opener, open_idx = stack.pop()
+            if opener != _CLOSERS[char]:
+                if unclosed is not None:
+                    unclosed.append(stack[0][1] if stack else open_idx)
+                stack.clear()
+            elif opener == "{":
+                pending.append((len(stack), open_idx, idx + 1))
+            elif not stack and _ARRAY_OF_OBJECTS.match(text, open_idx + 1):
+                pending.append((0, open_idx, idx + 1))
+
+            if not stack and pending:
+                yield from _by_depth(pending)
+                pending = []
+
+    if unclosed is not None:
+        unclosed.extend(open_idx for _, open_idx in stack)
+
+    # Spans nested in containers that never closed (e.g. a truncated first
+    # attempt followed by the real answer)
+    yield from _by_depth(pending)
+
+
+def _by_depth(spans: List[Tuple[int, int, int]]) -> Iterator[Tuple[int, int]]:
+    """Spans are recorded as they close (inner first); emit shallowest first."""
+    spans.sort()
+    for _, span_start, span_end in spans:
+        yield span_start, span_end
+
+
+def extract_json(text: str) -> Optional[Tuple[str, Any]]:
+    """
+    Find the first valid JSON payload in text.
+
+    Candidates are tried in order: ```json fenced blocks, other fenced
+    blocks, balanced spans from the single-pass scan, then the whole text.
+    Each distinct candidate is decoded at most once.
+
+    A truncated attempt (an opener that never closes, possibly cut inside a
+    string) skews the string state for the rest of the scan. When no span
+    validates, the scan resumes at the next line that starts with an opener
+    after the first failed one, at most ``_MAX_RESYNCS`` times, so the extra
+    passes only cost anything on outputs that would otherwise fail.
+
+    Returns:
+        ``(json_text, decoded_value)`` or None when nothing parses
+    """
+    tried: Set[str] = set()
+
+    def attempt(candidate: str) -> Optional[Tuple[str, Any]]:
+        if candidate in tried:
+            return None
+        tried.add(candidate)
+        try:
+            return candidate, loads(candidate)
+        except (ValueError, RecursionError):
+            return None
+
+    for pattern in (_JSON_FENCE, _ANY_FENCE):
+        for match in pattern.finditer(text):
+            candidate = match.group(1).strip()
+            if candidate and candidate[0] in "{[":
+                result = attempt(candidate)
+                if result is not None:
+                    return result
+
+    start = 0
+    for _ in range(_MAX_RESYNCS + 1):
+        broken: List[int] = []
+        for span_start, span_end in iter_json_spans(text, start, unclosed=broken):
+            result = attempt(text[span_start:span_end])
+            if result is not None:
+                return result
+            broken.append(span_start)
+        if not broken:
+            break
+        resync = _LINE_OPENER.search(text, min(broken) + 1)
+        if resync is None:
+            break
+        start = resync.end() - 1
+
+    return attempt(text)
+
+
+class IncrementalFindingsScanner:
+    """
+    Incremental scanner for a findings payload that arrives in pieces.
+
+    ``feed()`` takes streamed text and returns the finding objects whose JSON
+    closed in that piece: elements of a top-level array, or of an array held
+    directly by the top-level object (``{"findings": [...]}``). Once the
+    top-level value closes and decodes, ``complete`` is set and the rest of the
+    stream can be dropped. Prose before the payload is skipped the same way
+    ``iter_json_spans`` skips it; a top-level span that fails to decode (e.g.
+    ``{mostly}`` in a sentence) does not end the scan.
+    """
+
+    def __init__(self, list_keys: Optional[Iterable[str]] = None):
+        """
+        Args:
+            list_keys: Keys of the top-level object whose arrays hold findings
+                (None accepts any array directly under the top-level object)
+        """
+        self.list_keys = set(list_keys) if list_keys is not None else None
+        self.text = ""
+        self.complete = False
+        self.payload: Any = None
+        self._pos = 0
+        # (opener, index, holds finding items)
+        self._stack: List[Tuple[str, int, bool]] = []
+        self._in_string = False
+        self._string_start = -1
+        self._skip_until = -1
+        self._last_key: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Scan the next piece of text.
+
+        Returns:
+            Decoded finding objects that closed in this piece
+        """
+        if self.complete or not chunk:
+            return []
+        self.text += chunk
+        text = self.text
+        stack = self._stack
+        items: List[Any] = []
+
+        for match in _STRUCTURAL.finditer(text, self._pos):
+            idx = match.start()
+            if idx < self._skip_until:
+                continue
+            char = match.group()
+
+            if self._in_string:
+                if char == "\\":
+                    self._skip_until = idx + 2
+                elif char == '"':
+                    self._in_string = False
+                    if len(stack) == 1 and stack[0][0] == "{":
+                        self._last_key = text[self._string_start + 1 : idx]
+                continue
+
+            if char == '"':
+                if stack:
+                    self._in_string = True
+                    self._string_start = idx
+            elif char == "{" or char == "[":
+                stack.append((char, idx, char == "[" and self._holds_items()))
+            elif char in _CLOSERS:
+                if not stack:
+                    continue
+                opener, open_idx, _ = stack.pop()
+                if opener != _CLOSERS[char]:
+                    stack.clear()
+                    continue
+
+                if stack:
+                    if opener == "{" and stack[-1][2]:
+                        item = self._decode(text[open_idx : idx + 1])
+                        if isinstance(item, dict):
+                            items.append(item)
+                    continue
+
+                # Top-level value closed: done if it decodes, otherwise keep scanning
+                self._last_key = None
+                payload = self._decode(text[open_idx : idx + 1])
+                if payload is not None:
+                    self.complete = True
+                    self.payload = payload
+                    self._pos = idx + 1
+                    return items
+
+        self._pos = len(text)
+        return items
+
+    def _holds_items(self) -> bool:
+        """Whether an array opening now is a findings list."""
+        if not self._stack:
+            return True
+        if len(self._stack) != 1 or self._stack[0][0] != "{":
+            return False
+        return self.list_keys is None or self._last_key in self.list_keys
+
+    @staticmethod
+    def _decode(candidate: str) -> Any:
+        try:
+            return loads(candidate)
+        except (ValueError, RecursionError):
+            return None
@@ -1,15 +1,18 @@
 """JSON findings parser for structured model outputs."""
 
 import json
-import re
 import logging
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 
 from aegis.models.schema import FindingCandidate, ParserResult
 from aegis.models.parsers.base import BaseParser
+from aegis.models.parsers.json_scan import IncrementalFindingsScanner, extract_json
 
 logger = logging.getLogger(__name__)
 
+# Keys models use for the findings list (after "findings" itself)
+ALT_FINDINGS_KEYS = ("vulnerabilities", "issues", "issue", "vulnerability", "finding", "result")
+
 
 class JSONFindingsParser(BaseParser):
     """
@@ -18,7 +21,7 @@ class JSONFindingsParser(BaseParser):
     Handles:
     - Fenced code blocks (```json ... ```)
     - Plain JSON objects
-    - Brace matching for extraction
+    - Single-pass, string-aware brace matching for extraction
     - Size guardrails
     """
 
@@ -78,18 +81,16 @@ class JSONFindingsParser(BaseParser):
             errors.append(f"Output too large (> {max_len} chars)")
             return ParserResult(findings=[], parse_errors=errors, raw_output=raw_text[:1000] + "...")
 
-        # Extract JSON
-        extracted_json = self._extract_json(raw_text)
-        if not extracted_json:
+        # Extract JSON (candidates are validated during extraction)
+        extracted = self._extract_json(raw_text)
+        if extracted is None:
             errors.append("No valid JSON found in output")
             return ParserResult(findings=[], parse_errors=errors, raw_output=raw_output)
 
         # Parse findings
         try:
-            data = json.loads(extracted_json)
+            _, data = extracted
             findings = self._extract_findings(data, context)
-        except json.JSONDecodeError as e:
-            errors.append(f"JSON parse error: {e}")
         except Exception as e:
             errors.append(f"Unexpected error: {e}")
 
@@ -99,72 +100,31 @@ class JSONFindingsParser(BaseParser):
             raw_output=raw_output if errors else None,
         )
 
-    def _extract_json(self, text: str) -> Optional[str]:
+    def _extract_json(self, text: str) -> Optional[Tuple[str, Any]]:
         """
         Extract JSON from text, handling fenced code blocks and plain JSON.
+
+        Returns:
+            ``(json_text, decoded_value)`` for the first candidate that parses
         """
-        # Prefer fenced JSON blocks first
-        json_fence_pattern = r"```json\s*([\s\S]*?)```"
-        for match in re.finditer(json_fence_pattern, text, flags=re.IGNORECASE):
-            candidate = match.group(1).strip()
-            if not candidate:
-                continue
-            if candidate[0] not in "{[":
-                continue
-            try:
-                json.loads(candidate)
-                return candidate
-            except json.JSONDecodeError:
-                continue
+        return extract_json(text)
 
-        # Try any fenced block that looks like JSON
-        fenced_pattern = r"```(?:[a-zA-Z0-9_-]+)?\s*([\s\S]*?)```"
-        for match in re.finditer(fenced_pattern, text):
-            candidate = match.group(1).strip()
-            if not candidate:
-                continue
-            if candidate[0] not in "{[":
-                continue
-            try:
-                json.loads(candidate)
-                return candidate
-            except json.JSONDecodeError:
-                continue
+    def stream_scanner(self) -> IncrementalFindingsScanner:
+        """Scanner that picks finding objects out of a streamed response."""
+        return IncrementalFindingsScanner(("findings",) + ALT_FINDINGS_KEYS)
 
-        # Try to find first balanced braces
-        brace_json = self._extract_balanced_braces(text)
-        if brace_json:
-            return brace_json
+    def parse_items(self, items: List[Any], context: Optional[Dict[str, Any]] = None) -> List[FindingCandidate]:
+        """
+        Normalize already-decoded finding objects (e.g. from a streamed response).
 
-        # Last resort: try the whole text
-        try:
-            json.loads(text)
-            return text
-        except json.JSONDecodeError:
-            pass
-
-        return None
-
-    def _extract_balanced_braces(self, text: str) -> Optional[str]:
-        """Extract first balanced {...} JSON blob."""
-        start_idx = text.find("{")
-        while start_idx != -1:
-            depth = 0
-            for idx in range(start_idx, len(text)):
-                char = text[idx]
-                if char == "{":
-                    depth += 1
-                elif char == "}":
-                    depth -= 1
-                    if depth == 0:
-                        candidate = text[start_idx : idx + 1]
-                        try:
-                            json.loads(candidate)
-                            return candidate
-                        except json.JSONDecodeError:
-                            break
-            start_idx = text.find("{", start_idx + 1)
-        return None
+        Args:
+            items: Finding dicts as they appear in the model's findings list
+            context: Optional context (file_path, snippet, etc.)
+
+        Returns:
+            FindingCandidates for the items that validate
+        """
+        return self._extract_findings(list(items), context or {})
 
     def _extract_findings(self, data: Dict[str, Any], context: Dict[str, Any]) -> List[FindingCandidate]:
         """
@@ -179,7 +139,7 @@ class JSONFindingsParser(BaseParser):
             if "findings" in data:
                 findings_list = data.get("findings")
             else:
-                for key in ("vulnerabilities", "issues", "issue", "vulnerability", "finding", "result"):
+                for key in ALT_FINDINGS_KEYS:
                     if key in data:
                         findings_list = data.get(key)
                         break
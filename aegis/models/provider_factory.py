@@ -1,16 +1,22 @@
 """Factory helpers for creating provider instances based on ModelRecord."""
 
-import asyncio
+import inspect
 import os
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict
 
-from aegis.connectors.ollama_connector import OllamaConnector
-from aegis.connectors.openai_connector import OpenAIConnector
 from aegis.models.schema import ModelRecord, ModelType
 from aegis.models.runtime import RuntimeConfigError, resolve_runtime
-from aegis.providers.hf_local import HFLocalProvider
+from aegis.models.usage import report_usage_dict
 from aegis.providers.tool_provider import ToolProvider
 
+# Provider backends (HTTP clients, transformers/torch, SDKs) are imported when
+# a provider of that type is first created, so startup only pays for the
+# providers a deployment actually uses
+if TYPE_CHECKING:
+    from aegis.connectors.ollama_connector import OllamaConnector
+    from aegis.connectors.openai_connector import OpenAIConnector
+
 
 class ProviderCreationError(RuntimeError):
     """Raised when a provider cannot be instantiated."""
@@ -19,18 +25,29 @@ class ProviderCreationError(RuntimeError):
 class OllamaLocalProvider:
     """Lightweight wrapper around OllamaConnector that returns raw text."""
 
-    def __init__(self, connector: OllamaConnector, model_name: str, settings: Dict[str, Any]):
+    def __init__(self, connector: "OllamaConnector", model_name: str, settings: Dict[str, Any]):
         self.connector = connector
         self.model_name = model_name
         self.settings = settings or {}
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    def _options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         opts = {
             "temperature": self.settings.get("temperature", 0.0),
             "max_tokens": self.settings.get("max_tokens"),
         }
         opts.update(self.settings.get("options", {}))
         opts.update(kwargs)
+        return opts
+
+    @staticmethod
+    def _result_text(result: Any) -> str:
+        if isinstance(result, dict):
+            report_usage_dict(result.get("usage"))
+            return result.get("text") or result.get("response") or ""
+        return str(result)
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        opts = self._options(kwargs)
         result = self.connector.generate(
             prompt=prompt,
             model=self.model_name,
@@ -38,25 +55,49 @@ class OllamaLocalProvider:
             max_tokens=opts.pop("max_tokens", None),
             **opts,
         )
-        if isinstance(result, dict):
-            return result.get("text") or result.get("response") or ""
-        return str(result)
+        return self._result_text(result)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        opts = self._options(kwargs)
+        result = await self.connector.generate_async(
+            prompt=prompt,
+            model=self.model_name,
+            temperature=opts.pop("temperature", 0.0),
+            max_tokens=opts.pop("max_tokens", None),
+            **opts,
+        )
+        return self._result_text(result)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        opts = self._options(kwargs)
+        async for text in self.connector.stream_generate(
+            prompt=prompt,
+            model=self.model_name,
+            temperature=opts.pop("temperature", 0.0),
+            max_tokens=opts.pop("max_tokens", None),
+            **opts,
+        ):
+            yield text
 
 
 class OpenAICompatibleProvider:
     """Wrapper around OpenAIConnector that exposes a generate() method."""
 
-    def __init__(self, connector: OpenAIConnector, model_name: str, settings: Dict[str, Any]):
+    def __init__(self, connector: "OpenAIConnector", model_name: str, settings: Dict[str, Any]):
         self.connector = connector
         self.model_name = model_name
         self.settings = settings or {}
 
-    def generate(self, prompt: str, **kwargs) -> str:
+    def _options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         opts = {
             "temperature": self.settings.get("temperature", 0.0),
             "max_tokens": self.settings.get("max_tokens"),
         }
         opts.update(kwargs)
+        return opts
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        opts = self._options(kwargs)
         result = self.connector.generate(
             prompt=prompt,
             model=self.model_name,
@@ -64,11 +105,40 @@ class OpenAICompatibleProvider:
             max_tokens=opts.pop("max_tokens", None),
             **opts,
         )
-        return result.get("text", "") if isinstance(result, dict) else str(result)
+        return self._result_text(result)
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        opts = self._options(kwargs)
+        result = await self.connector.generate_async(
+            prompt=prompt,
+            model=self.model_name,
+            temperature=opts.pop("temperature", 0.0),
+            max_tokens=opts.pop("max_tokens", None),
+            **opts,
+        )
+        return self._result_text(result)
+
+    async def astream(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        opts = self._options(kwargs)
+        async for text in self.connector.stream_generate(
+            prompt=prompt,
+            model=self.model_name,
+            temperature=opts.pop("temperature", 0.0),
+            max_tokens=opts.pop("max_tokens", None),
+            **opts,
+        ):
+            yield text
+
+    @staticmethod
+    def _result_text(result: Any) -> str:
+        if isinstance(result, dict):
+            report_usage_dict(result.get("usage"))
+            return result.get("text", "")
+        return str(result)
 
 
 class CloudProviderAdapter:
-    """Adapter for cloud API providers (OpenAI, Anthropic, Google) with sync interface."""
+    """Adapter for cloud API providers (OpenAI, Anthropic, Google)."""
 
     def __init__(self, provider: Any, settings: Dict[str, Any]):
         """
@@ -81,9 +151,18 @@ class CloudProviderAdapter:
         self.provider = provider
         self.settings = settings or {}
 
-    def generate(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
+    def _options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        opts = {
+            "temperature": self.settings.get("temperature", 0.1),
+            "max_tokens": self.settings.get("max_tokens", 2048),
+            "top_p": self.settings.get("top_p", 1.0),
+        }
+        opts.update(kwargs)
+        return opts
+
+    async def agenerate(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
         """
-        Generate completion synchronously (wraps async provider).
+        Generate completion on the caller's event loop.
 
         Args:
             prompt: User prompt
@@ -93,31 +172,51 @@ class CloudProviderAdapter:
         Returns:
             Generated text
         """
-        opts = {
-            "temperature": self.settings.get("temperature", 0.1),
-            "max_tokens": self.settings.get("max_tokens", 2048),
-            "top_p": self.settings.get("top_p", 1.0),
-        }
-        opts.update(kwargs)
+        return await self.provider.generate(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            **self._options(kwargs),
+        )
 
-        # Run async generate in sync context
-        # Use a thread pool to avoid "asyncio.run() cannot be called from a running event loop" error
-        # This approach works whether or not an event loop is already running
-        import concurrent.futures
-
-        def _run_async():
-            """Helper to run async code in a fresh event loop."""
-            return asyncio.run(
-                self.provider.generate(
-                    prompt=prompt,
-                    system_prompt=system_prompt,
-                    **opts,
-                )
-            )
+    async def astream(self, prompt: str, system_prompt: str = None, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream completion text chunks on the caller's event loop.
+
+        Closing the iterator early (aclose()) closes the underlying API stream,
+        which stops generation.
+        """
+        stream = self.provider.generate_stream(
+            prompt=prompt,
+            system_prompt=system_prompt,
+            **self._options(kwargs),
+        )
+        try:
+            async for text in stream:
+                yield text
+        finally:
+            await stream.aclose()
+
+    @property
+    def supports_streaming(self) -> bool:
+        return callable(getattr(self.provider, "generate_stream", None))
+
+    def generate(self, prompt: str, system_prompt: str = None, **kwargs) -> str:
+        """
+        Generate completion synchronously.
+
+        Runs agenerate() on the shared model event loop so the async SDK client
+        keeps a single connection pool. Runners should await agenerate() instead.
+        """
+        from aegis.models.event_loop import run_sync
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(_run_async)
-            return future.result()
+        return run_sync(self.agenerate(prompt, system_prompt=system_prompt, **kwargs))
+
+    @property
+    def supports_prompt_cache(self) -> bool:
+        """Whether to send cache hints; disable per model with settings.prompt_cache = false."""
+        if self.settings.get("prompt_cache") is False:
+            return False
+        return bool(getattr(self.provider, "supports_prompt_cache", False))
 
     def close(self):
         """Close provider resources."""
@@ -125,6 +224,66 @@ class CloudProviderAdapter:
             self.provider.close()
 
 
+@dataclass(frozen=True)
+class ProviderCapabilities:
+    """Call styles a provider instance supports, resolved once per runtime."""
+
+    analyze: bool
+    agenerate: bool
+    generate: bool
+    system_prompt: bool
+    prompt_cache: bool = False
+    stream: bool = False
+
+
+def _accepts_system_prompt(method: Any) -> bool:
+    try:
+        params = inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return False
+    return "system_prompt" in params
+
+
+def detect_provider_capabilities(provider: Any) -> ProviderCapabilities:
+    """
+    Inspect a provider instance and record how runners should call it.
+
+    Providers with analyze() (HF, tools) take the prompt plus context.
+    Providers with agenerate() are awaited directly; generate()-only
+    providers are run in a worker thread by the runner. Providers with
+    astream() can also be streamed chunk by chunk.
+    """
+    analyze = callable(getattr(provider, "analyze", None))
+    agenerate = callable(getattr(provider, "agenerate", None))
+    generate = callable(getattr(provider, "generate", None))
+
+    system_prompt = False
+    if agenerate:
+        system_prompt = _accepts_system_prompt(provider.agenerate)
+    elif generate:
+        system_prompt = _accepts_system_prompt(provider.generate)
+
+    return ProviderCapabilities(
+        analyze=analyze,
+        agenerate=agenerate,
+        generate=generate,
+        system_prompt=system_prompt,
+        prompt_cache=bool(getattr(provider, "supports_prompt_cache", False)),
+        stream=callable(getattr(provider, "astream", None))
+        and bool(getattr(provider, "supports_streaming", True)),
+    )
+
+
+# Providers outside the built-in model types (e.g. the deterministic fakes in
+# benchmarks/), looked up by the model's provider_id before its model_type
+PROVIDER_FACTORIES: Dict[str, Callable[[ModelRecord], Any]] = {}
+
+
+def register_provider_factory(provider_id: str, factory: Callable[[ModelRecord], Any]) -> None:
+    """Register a provider factory for models with ``provider_id``."""
+    PROVIDER_FACTORIES[provider_id] = factory
+
+
 def create_provider(model: ModelRecord) -> Any:
     """
     Create a provider instance for a given registered model.
@@ -135,12 +294,23 @@ def create_provider(model: ModelRecord) -> Any:
     settings = model.settings or {}
     provider_cfg = model.provider_config or {}
 
+    factory = PROVIDER_FACTORIES.get(model.provider_id)
+    if factory is not None:
+        try:
+            return factory(model)
+        except Exception as exc:
+            raise ProviderCreationError(str(exc))
+
     if model.model_type == ModelType.OLLAMA_LOCAL:
+        from aegis.connectors.ollama_connector import OllamaConnector
+
         base_url = settings.get("base_url") or provider_cfg.get("base_url") or "http://localhost:11434"
         connector = OllamaConnector(base_url=base_url)
         return OllamaLocalProvider(connector, model.model_name, settings)
 
     if model.model_type == ModelType.HF_LOCAL:
+        from aegis.providers.hf_local import HFLocalProvider
+
         try:
             runtime = resolve_runtime(settings)
             hf_kwargs = dict(settings.get("hf_kwargs", {}) or {})
@@ -203,6 +373,8 @@ def create_provider(model: ModelRecord) -> Any:
         )
         if not api_key:
             raise ProviderCreationError(f"API key missing for provider {model.provider_id}")
+        from aegis.connectors.openai_connector import OpenAIConnector
+
         connector = OpenAIConnector(
             base_url=base_url or "https://api.openai.com/v1",
             api_key=api_key,
@@ -4,11 +4,20 @@ import asyncio
 import logging
 import threading
 import time
-from typing import Dict, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from aegis.models.usage import report_error, report_provider_time, report_queue_wait, track_usage
 
 logger = logging.getLogger(__name__)
 
 
+class RateLimitTimeoutError(asyncio.TimeoutError):
+    """The request or token budget did not free up in time; retried like a 429."""
+
+
 class TokenBucket:
     """Token bucket for rate limiting."""
 
@@ -48,24 +57,28 @@ class TokenBucket:
             asyncio.TimeoutError: If timeout exceeded
         """
         start_time = time.time()
+        # A request larger than the bucket is admitted once the bucket is full
+        # and leaves it in debt, rather than waiting forever
+        needed = min(tokens, self.capacity)
 
         while True:
             with self.lock:
                 self._refill()
-                if self.tokens >= tokens:
+                if self.tokens >= needed:
                     self.tokens -= tokens
                     logger.debug(f"Acquired {tokens} tokens, {self.tokens:.2f} remaining")
                     return True
+                # Exact time until the deficit refills; no fixed polling interval
+                wait_time = (needed - self.tokens) / self.rate
 
             # Check timeout
             if timeout is not None:
                 elapsed = time.time() - start_time
-                if elapsed >= timeout:
+                remaining = timeout - elapsed
+                if remaining <= 0 or wait_time > remaining:
                     logger.warning(f"Rate limit timeout after {elapsed:.2f}s")
                     raise asyncio.TimeoutError(f"Rate limit timeout after {elapsed:.2f}s")
 
-            # Wait before retry (adaptive backoff)
-            wait_time = min(1.0, tokens / self.rate)
             await asyncio.sleep(wait_time)
 
     def try_acquire(self, tokens: float = 1.0) -> bool:
@@ -80,11 +93,296 @@ class TokenBucket:
         """
         with self.lock:
             self._refill()
-            if self.tokens >= tokens:
+            if self.tokens >= min(tokens, self.capacity):
                 self.tokens -= tokens
                 return True
             return False
 
+    def adjust(self, delta: float) -> None:
+        """
+        Return (positive) or charge (negative) tokens after the fact.
+
+        Used to correct an up-front estimate once real usage is known; a
+        charge may push the bucket into debt, delaying later acquisitions.
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class ConcurrencyOutcome(str, Enum):
+    """How a provider call ended, as seen by the concurrency controller."""
+
+    SUCCESS = "success"
+    OVERLOAD = "overload"  # HTTP 429 / provider rate-limit error
+    TIMEOUT = "timeout"
+    ERROR = "error"  # Unrelated failure; does not move the limit
+
+
+def classify_provider_error(exc: BaseException) -> Tuple[ConcurrencyOutcome, Optional[float]]:
+    """
+    Map a provider exception to a controller outcome and optional Retry-After.
+
+    Understands aiohttp ClientResponseError (``status``/``headers``), the
+    OpenAI/Anthropic SDK errors (``status_code``/``response.headers``) and
+    plain timeouts.
+
+    Returns:
+        (outcome, retry_after_seconds)
+    """
+    status = getattr(exc, "status_code", None) or getattr(exc, "status", None)
+    response = getattr(exc, "response", None)
+    headers = getattr(exc, "headers", None) or getattr(response, "headers", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+
+    retry_after = None
+    if headers is not None:
+        try:
+            raw = headers.get("retry-after") or headers.get("Retry-After")
+            retry_after = float(raw) if raw is not None else None
+        except (TypeError, ValueError, AttributeError):
+            retry_after = None
+
+    name = type(exc).__name__
+    if status == 429 or "RateLimit" in name:
+        return ConcurrencyOutcome.OVERLOAD, retry_after
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in name:
+        return ConcurrencyOutcome.TIMEOUT, retry_after
+    if status == 503 and retry_after is not None:
+        return ConcurrencyOutcome.OVERLOAD, retry_after
+    return ConcurrencyOutcome.ERROR, None
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency limit for a single provider key.
+
+    The limit grows by roughly one slot per window of successful calls while
+    latency stays within ``latency_tolerance`` of the observed baseline, and is
+    multiplied by ``backoff_ratio`` on 429s and timeouts (at most once per
+    baseline latency, so one burst of failures counts as one signal). A
+    Retry-After hint pauses new acquisitions until it expires.
+
+    Waiters are parked on futures and woken on release, so callers on
+    different event loops (the shared model loop, ad-hoc asyncio.run calls)
+    can share one limiter.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        adaptive: bool = True,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.2,
+    ):
+        """
+        Initialize limiter.
+
+        Args:
+            initial: Starting concurrency limit
+            min_limit: Floor the limit never drops below
+            max_limit: Ceiling for additive increase (defaults to initial)
+            adaptive: When False the limit stays fixed at ``initial``
+            backoff_ratio: Multiplicative decrease applied on overload/timeout
+            latency_tolerance: Latency/baseline ratio still considered stable
+            smoothing: EWMA weight for the latency estimate
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit or initial))
+        self.adaptive = adaptive
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+        self._baseline_latency: Optional[float] = None
+        self._latency_ewma: Optional[float] = None
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._stats = {"successes": 0, "overloads": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current whole-slot concurrency limit."""
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _wake_waiters_locked(self) -> None:
+        """Wake as many parked waiters as there are free slots."""
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            loop, fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            loop.call_soon_threadsafe(_resolve_waiter, fut)
+            free -= 1
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a free slot.
+
+        Raises:
+            asyncio.TimeoutError: If no slot frees up within ``timeout``
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                pause = self._paused_until - now
+                if pause <= 0 and self._in_flight < self.limit:
+                    self._in_flight += 1
+                    return
+                fut = None
+                if pause <= 0:
+                    fut = loop.create_future()
+                    self._waiters.append((loop, fut))
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                if fut is not None:
+                    self._discard_waiter(fut)
+                raise asyncio.TimeoutError("Timed out waiting for a concurrency slot")
+
+            if fut is None:
+                # Provider asked us to back off; a single timed wait, not a poll
+                await asyncio.sleep(pause if remaining is None else min(pause, remaining))
+                continue
+
+            try:
+                await asyncio.wait_for(fut, remaining)
+            except asyncio.TimeoutError:
+                self._discard_waiter(fut)
+                raise asyncio.TimeoutError("Timed out waiting for a concurrency slot") from None
+            except asyncio.CancelledError:
+                self._discard_waiter(fut)
+                raise
+
+    def _discard_waiter(self, fut: asyncio.Future) -> None:
+        with self._lock:
+            self._waiters = deque((lp, f) for lp, f in self._waiters if f is not fut)
+            # A wake-up may have been spent on us; pass it on
+            self._wake_waiters_locked()
+
+    def release(
+        self,
+        latency: Optional[float] = None,
+        outcome: ConcurrencyOutcome = ConcurrencyOutcome.SUCCESS,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """
+        Return a slot and feed the call result into the controller.
+
+        Args:
+            latency: Wall-clock seconds the call took
+            outcome: How the call ended
+            retry_after: Provider Retry-After hint in seconds
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._observe_locked(latency, outcome, retry_after)
+            self._wake_waiters_locked()
+
+    def observe(self, outcome: ConcurrencyOutcome, retry_after: Optional[float] = None) -> None:
+        """Feed an outcome that did not hold a slot (e.g. a rate-limit wait that timed out)."""
+        with self._lock:
+            self._observe_locked(None, outcome, retry_after)
+            self._wake_waiters_locked()
+
+    def _observe_locked(
+        self,
+        latency: Optional[float],
+        outcome: ConcurrencyOutcome,
+        retry_after: Optional[float],
+    ) -> None:
+        now = time.monotonic()
+        if outcome == ConcurrencyOutcome.SUCCESS:
+            self._stats["successes"] += 1
+            if latency is not None:
+                self._observe_latency_locked(latency)
+            if self.adaptive and self._latency_stable_locked():
+                # Additive increase: ~+1 slot per limit's worth of successes
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / max(self._limit, 1.0))
+        elif outcome in (ConcurrencyOutcome.OVERLOAD, ConcurrencyOutcome.TIMEOUT):
+            key = "overloads" if outcome == ConcurrencyOutcome.OVERLOAD else "timeouts"
+            self._stats[key] += 1
+            cooldown = self._baseline_latency or 1.0
+            if self.adaptive and now - self._last_decrease >= cooldown:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self._last_decrease = now
+                logger.info(f"Concurrency limit cut to {self.limit} after {outcome.value}")
+        else:
+            self._stats["errors"] += 1
+
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def _observe_latency_locked(self, latency: float) -> None:
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma += self.smoothing * (latency - self._latency_ewma)
+        # Baseline tracks the best sustained latency, drifting up slowly so it
+        # can follow a provider that has genuinely become slower
+        if self._baseline_latency is None or self._latency_ewma < self._baseline_latency:
+            self._baseline_latency = self._latency_ewma
+        else:
+            self._baseline_latency += 0.01 * (self._latency_ewma - self._baseline_latency)
+
+    def _latency_stable_locked(self) -> bool:
+        if self._baseline_latency is None or self._latency_ewma is None:
+            return True
+        return self._latency_ewma <= self._baseline_latency * self.latency_tolerance
+
+    @asynccontextmanager
+    async def slot(self, timeout: Optional[float] = None):
+        """Hold a slot for the duration of a provider call, reporting its outcome."""
+        await self.acquire(timeout)
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException as exc:
+            outcome, retry_after = classify_provider_error(exc)
+            self.release(time.monotonic() - start, outcome, retry_after)
+            raise
+        else:
+            self.release(time.monotonic() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Telemetry view of the controller state."""
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "min_limit": self.min_limit,
+                "max_limit": self.max_limit,
+                "adaptive": self.adaptive,
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "latency_ms": int(self._latency_ewma * 1000) if self._latency_ewma is not None else None,
+                "baseline_latency_ms": (
+                    int(self._baseline_latency * 1000) if self._baseline_latency is not None else None
+                ),
+                "paused_for_s": round(max(0.0, self._paused_until - time.monotonic()), 2),
+                **self._stats,
+            }
+
+
+def _resolve_waiter(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
 
 class RateLimiter:
     """Rate limiter manager for multiple providers."""
@@ -92,6 +390,9 @@ class RateLimiter:
     def __init__(self):
         """Initialize rate limiter."""
         self.buckets: Dict[str, TokenBucket] = {}
+        # Second bucket per provider, metered in LLM tokens (TPM) rather than requests
+        self.token_buckets: Dict[str, TokenBucket] = {}
+        self.concurrency: Dict[str, AdaptiveConcurrencyLimiter] = {}
         self.lock = threading.Lock()
 
     def get_bucket(self, provider_key: str, rate: float, capacity: float) -> TokenBucket:
@@ -139,20 +440,204 @@ class RateLimiter:
         bucket = self.buckets[provider_key]
         return await bucket.acquire(tokens, timeout)
 
+    def refund(self, provider_key: str, tokens: float = 1.0) -> None:
+        """Give back request tokens taken by acquire() for a request never sent."""
+        bucket = self.buckets.get(provider_key)
+        if bucket is not None:
+            bucket.adjust(tokens)
+
+    def get_token_bucket(self, provider_key: str, rate: float, capacity: float) -> TokenBucket:
+        """
+        Get or create the tokens-per-minute bucket for provider.
+
+        Args:
+            provider_key: Unique key for provider (e.g., "openai:gpt-4")
+            rate: Refill rate (LLM tokens per second)
+            capacity: Maximum burst in LLM tokens
+
+        Returns:
+            TokenBucket instance
+        """
+        with self.lock:
+            if provider_key not in self.token_buckets:
+                self.token_buckets[provider_key] = TokenBucket(rate, capacity)
+                logger.info(
+                    f"Created token rate limiter: {provider_key} (rate={rate:.1f} tok/s, capacity={capacity:.0f})"
+                )
+            return self.token_buckets[provider_key]
+
+    async def acquire_tokens(
+        self,
+        provider_key: str,
+        tokens: float,
+        timeout: Optional[float] = None
+    ) -> bool:
+        """
+        Reserve estimated LLM tokens (input + expected output) for a request.
+
+        Returns:
+            True if reserved, False if no TPM limit is configured for provider
+
+        Raises:
+            asyncio.TimeoutError: If timeout exceeded
+        """
+        bucket = self.token_buckets.get(provider_key)
+        if bucket is None or tokens <= 0:
+            return False
+        return await bucket.acquire(tokens, timeout)
+
+    def reconcile_tokens(self, provider_key: str, estimated: float, actual: float) -> None:
+        """Correct a reservation made by acquire_tokens() with reported usage."""
+        bucket = self.token_buckets.get(provider_key)
+        if bucket is not None and actual != estimated:
+            bucket.adjust(estimated - actual)
+
+    def get_concurrency_limiter(
+        self,
+        provider_key: str,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        adaptive: bool = True,
+    ) -> AdaptiveConcurrencyLimiter:
+        """
+        Get or create the shared concurrency controller for a provider key.
+
+        All runtimes hitting the same provider/model share one limit, since
+        that is the granularity at which providers throttle.
+        """
+        with self.lock:
+            limiter = self.concurrency.get(provider_key)
+            if limiter is None:
+                limiter = AdaptiveConcurrencyLimiter(
+                    initial, min_limit=min_limit, max_limit=max_limit, adaptive=adaptive
+                )
+                self.concurrency[provider_key] = limiter
+                logger.info(
+                    f"Created concurrency limiter: {provider_key} "
+                    f"(initial={limiter.limit}, max={limiter.max_limit}, adaptive={adaptive})"
+                )
+            return limiter
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Concurrency controller state per provider key."""
+        with self.lock:
+            limiters = dict(self.concurrency)
+        return {key: limiter.snapshot() for key, limiter in limiters.items()}
+
     def clear_bucket(self, provider_key: str):
         """Remove bucket for provider."""
         with self.lock:
             if provider_key in self.buckets:
                 del self.buckets[provider_key]
                 logger.info(f"Cleared rate limiter: {provider_key}")
+            self.token_buckets.pop(provider_key, None)
+            self.concurrency.pop(provider_key, None)
 
     def clear_all(self):
         """Remove all buckets."""
         with self.lock:
             self.buckets.clear()
+            self.token_buckets.clear()
+            self.concurrency.clear()
             logger.info("Cleared all rate limiters")
 
 
+class ProviderThrottle:
+    """
+    Everything a single provider request must pass through, in order:
+    request bucket (RPM), token bucket (TPM) and the concurrency controller.
+
+    The TPM reservation is the prompt estimate plus the configured output
+    budget; once the provider reports real usage the difference is returned
+    to (or charged against) the bucket. A request that cannot get its budget
+    within ``acquire_timeout`` is not sent: it fails with
+    RateLimitTimeoutError, which the concurrency controller and the runtime's
+    retry loop treat as an overload.
+    """
+
+    def __init__(
+        self,
+        provider_key: str,
+        concurrency: AdaptiveConcurrencyLimiter,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_output_tokens: int = 0,
+        acquire_timeout: Optional[float] = 60.0,
+    ):
+        self.provider_key = provider_key
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.max_output_tokens = max_output_tokens
+        self.acquire_timeout = acquire_timeout
+
+    async def _reserve(self, input_tokens: int) -> int:
+        """
+        Take request and token budget; returns the reserved token estimate.
+
+        Raises:
+            RateLimitTimeoutError: If either budget did not free up in time
+        """
+        if self.rate_limiter is None:
+            return 0
+        estimate = input_tokens + self.max_output_tokens
+        request_taken = False
+        try:
+            request_taken = await self.rate_limiter.acquire(
+                self.provider_key, tokens=1.0, timeout=self.acquire_timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise self._budget_timeout("Request", e) from e
+        except ValueError as e:
+            logger.warning(f"Rate limit acquire failed: {e}")
+        try:
+            reserved = await self.rate_limiter.acquire_tokens(
+                self.provider_key, estimate, timeout=self.acquire_timeout
+            )
+        except asyncio.TimeoutError as e:
+            # The request is not sent, so its RPM slot goes back
+            if request_taken:
+                self.rate_limiter.refund(self.provider_key)
+            raise self._budget_timeout("Token", e) from e
+        return estimate if reserved else 0
+
+    def _budget_timeout(self, kind: str, error: BaseException) -> RateLimitTimeoutError:
+        self.concurrency.observe(ConcurrencyOutcome.OVERLOAD)
+        return RateLimitTimeoutError(f"{kind} rate limit for {self.provider_key} timed out: {error}")
+
+    @asynccontextmanager
+    async def call(self, input_tokens: int = 0):
+        """
+        Guard one provider request.
+
+        Args:
+            input_tokens: Estimated prompt tokens for the request
+
+        Yields:
+            TokenUsage populated by the provider, if it reports usage
+        """
+        queued_at = time.monotonic()
+        reserved = 0
+        usage = None
+        try:
+            reserved = await self._reserve(input_tokens)
+            async with self.concurrency.slot():
+                # Reported to the caller's scope, before the per-request one opens
+                started_at = time.monotonic()
+                report_queue_wait((started_at - queued_at) * 1000)
+                try:
+                    with track_usage() as usage:
+                        yield usage
+                finally:
+                    report_provider_time((time.monotonic() - started_at) * 1000)
+        except Exception as e:
+            report_error(e)
+            raise
+        finally:
+            if reserved:
+                actual = usage.total_tokens if usage is not None and usage.reported else reserved
+                self.rate_limiter.reconcile_tokens(self.provider_key, reserved, actual)
+
+
 # Global rate limiter instance
 DEFAULT_RATE_LIMITER = RateLimiter()
 
@@ -181,7 +666,10 @@ def configure_rate_limiter(
     provider_type: str,
     model_name: str,
     rpm: Optional[int] = None,
-    burst_multiplier: float = 1.5
+    burst_multiplier: float = 1.5,
+    tpm: Optional[int] = None,
+    token_burst_seconds: float = 60.0,
+    max_request_tokens: int = 0,
 ):
     """
     Configure rate limiter for provider/model.
@@ -192,6 +680,11 @@ def configure_rate_limiter(
         model_name: Model name
         rpm: Requests per minute (overrides default)
         burst_multiplier: Burst capacity multiplier
+        tpm: Tokens per minute (overrides default; no token bucket if unknown)
+        token_burst_seconds: Seconds of TPM budget that may be spent at once
+            (default: the whole per-minute budget, as providers meter it)
+        max_request_tokens: Output budget reserved per request; the token
+            bucket is never smaller, so a single reservation fits in it
     """
     provider_key = f"{provider_type}:{model_name}"
     limits = PROVIDER_RATE_LIMITS.get(provider_key)
@@ -214,3 +707,10 @@ def configure_rate_limiter(
 
     rate_limiter.get_bucket(provider_key, rate, capacity)
     logger.info(f"Configured rate limiter: {provider_key} (RPM={rpm}, burst={capacity:.2f})")
+
+    tpm = tpm or (limits or {}).get("tpm")
+    if tpm:
+        token_rate = tpm / 60.0
+        token_capacity = max(token_rate * token_burst_seconds, float(max_request_tokens))
+        rate_limiter.get_token_bucket(provider_key, token_rate, token_capacity)
+        logger.info(f"Configured token rate limiter: {provider_key} (TPM={tpm}, burst={token_capacity:.0f})")
@@ -1,9 +1,16 @@
 """Base runner interface for role-based model execution."""
 
+import asyncio
+import functools
+import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 
-from aegis.models.schema import ModelRole, ParserResult
+from aegis.models.provider_factory import ProviderCapabilities, detect_provider_capabilities
+from aegis.models.schema import FindingCandidate, ModelRole, ParserResult
+from aegis.models.usage import estimate_tokens, report_usage, track_usage
+
+logger = logging.getLogger(__name__)
 
 
 class BaseRunner(ABC):
@@ -21,7 +28,8 @@ class BaseRunner(ABC):
         provider: Any,
         parser: Any,
         role: ModelRole,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        capabilities: Optional[ProviderCapabilities] = None,
     ):
         """
         Initialize runner.
@@ -31,11 +39,15 @@ class BaseRunner(ABC):
             parser: Output parser instance
             role: Role this runner fulfills
             config: Optional configuration
+            capabilities: Pre-resolved provider capabilities (detected if omitted)
         """
         self.provider = provider
         self.parser = parser
         self.role = role
         self.config = config or {}
+        self.capabilities = capabilities or detect_provider_capabilities(provider)
+        # Optional ProviderThrottle (rate limits + concurrency), attached by ModelRuntime
+        self.throttle = None
 
     @abstractmethod
     async def run(
@@ -57,6 +69,133 @@ class BaseRunner(ABC):
         """
         pass
 
+    async def _call_provider(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]] = None,
+        system_prompt: Optional[str] = None,
+        cache_prefix: Optional[str] = None,
+        on_finding: Optional[Callable[[FindingCandidate], None]] = None,
+        **kwargs
+    ) -> Any:
+        """
+        Invoke the provider using the call style resolved at construction.
+
+        Args:
+            prompt: Formatted prompt
+            context: Execution context (passed to analyze() providers)
+            system_prompt: System prompt, sent only if the provider accepts one
+            cache_prefix: Static leading part of ``prompt`` that providers with
+                prompt caching may mark as cacheable ("" = system prompt only)
+            on_finding: If set and streaming is possible (see can_stream), the
+                response is streamed and each finding is passed here as soon as
+                its JSON object closes
+            **kwargs: Additional model arguments
+
+        Returns:
+            Raw provider output
+        """
+        if cache_prefix is not None and self.capabilities.prompt_cache:
+            kwargs["cache_prefix"] = cache_prefix
+        if on_finding is not None and self.can_stream:
+            invoke = functools.partial(self._stream_provider, on_finding=on_finding)
+        else:
+            invoke = self._invoke_provider
+        if self.throttle is None:
+            return await invoke(prompt, context, system_prompt, **kwargs)
+        input_tokens = estimate_tokens(prompt) + estimate_tokens(system_prompt)
+        async with self.throttle.call(input_tokens):
+            return await invoke(prompt, context, system_prompt, **kwargs)
+
+    @property
+    def can_stream(self) -> bool:
+        """Whether findings can be emitted while the response is still streaming."""
+        return self.capabilities.stream and callable(getattr(self.parser, "stream_scanner", None))
+
+    async def _stream_provider(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        system_prompt: Optional[str],
+        on_finding: Callable[[FindingCandidate], None],
+        **kwargs
+    ) -> str:
+        """
+        Stream the response through the parser's incremental scanner.
+
+        Generation is cancelled (the stream is closed) once the top-level JSON
+        payload is complete, so trailing tokens are never generated. Returns
+        the text received, which the caller parses as usual.
+        """
+        if system_prompt and self.capabilities.system_prompt:
+            kwargs["system_prompt"] = system_prompt
+
+        scanner = self.parser.stream_scanner()
+        stream = self.provider.astream(prompt, **kwargs)
+        with track_usage() as usage:
+            try:
+                async for text in stream:
+                    items = scanner.feed(text)
+                    if items:
+                        for candidate in self.parser.parse_items(items, context):
+                            try:
+                                on_finding(candidate)
+                            except Exception as e:
+                                logger.warning(f"on_finding callback failed: {e}")
+                    if scanner.complete:
+                        break
+            finally:
+                await stream.aclose()
+
+        if not usage.reported:
+            # Streams closed early never see the provider's final usage block
+            report_usage(estimate_tokens(prompt) + estimate_tokens(system_prompt), estimate_tokens(scanner.text))
+        return scanner.text
+
+    async def _invoke_provider(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        system_prompt: Optional[str],
+        **kwargs
+    ) -> Any:
+        caps = self.capabilities
+        if caps.analyze:
+            return await self.provider.analyze(prompt, context or {}, **kwargs)
+
+        if system_prompt and caps.system_prompt:
+            kwargs["system_prompt"] = system_prompt
+
+        if caps.agenerate:
+            return await self.provider.agenerate(prompt, **kwargs)
+        if caps.generate:
+            # Sync-only provider: keep the event loop free while it blocks
+            return await asyncio.to_thread(self.provider.generate, prompt, **kwargs)
+
+        raise ValueError(f"Provider {self.provider} has no analyze(), agenerate() or generate() method")
+
+    async def parse_output(self, raw_output: Any, context: Optional[Dict[str, Any]] = None) -> ParserResult:
+        """Parse model output; large outputs are parsed in the process pool off the event loop."""
+        from aegis.process_pool import parse_in_pool, should_offload_parse
+
+        if should_offload_parse(raw_output):
+            return await parse_in_pool(self.parser, raw_output, context)
+        return self.parser.parse(raw_output, context)
+
+    def _static_prefix(self, template: str, *variables: str) -> str:
+        """
+        Rendered text of ``template`` before its first variable.
+
+        Templates keep instructions and output schema first and variable
+        content (file path, code, findings) last, so this prefix is identical
+        across requests and can be served from the provider's prompt cache.
+        Rendering goes through _build_prompt so the prefix matches real prompts.
+        """
+        markers = {name: f"\x00{name}\x00" for name in variables}
+        rendered = self._build_prompt(template, **markers)
+        cut = min((rendered.find(m) for m in markers.values() if m in rendered), default=len(rendered))
+        return rendered[:cut]
+
     def _build_prompt(self, template: str, **variables) -> str:
         """
         Build prompt from template and variables.
@@ -1,8 +1,9 @@
 """Explain runner for generating human-readable explanations of findings."""
 
 from typing import Any, Dict, List, Optional
+from aegis.models.provider_factory import ProviderCapabilities
 from aegis.models.runners.base import BaseRunner
-from aegis.models.schema import ParserResult, FindingCandidate
+from aegis.models.schema import ModelRole, ParserResult, FindingCandidate
 
 
 class ExplainRunner(BaseRunner):
@@ -19,18 +20,7 @@ class ExplainRunner(BaseRunner):
     Use case: GPT-4, Claude, or specialized explanation models
     """
 
-    DEFAULT_PROMPT_TEMPLATE = """You are a security expert explaining vulnerabilities to developers. Generate a detailed, educational explanation for the following security finding.
-
-CODE FILE: {file_path}
-
-FINDING:
-- Type: {cwe} - {title}
-- Severity: {severity}
-- Location: Lines {line_start}-{line_end}
-- Description: {description}
-
-CODE CONTEXT:
-{code}
+    DEFAULT_PROMPT_TEMPLATE = """You are a security expert explaining vulnerabilities to developers. Generate a detailed, educational explanation for the security finding given at the end of this message.
 
 Provide a comprehensive explanation including:
 
@@ -56,7 +46,7 @@ Provide a comprehensive explanation including:
 
 Return ONLY a JSON object with this structure:
 {{
-  "finding_id": "{finding_id}",
+  "finding_id": "<ID of the finding below>",
   "explanation": "Detailed explanation text...",
   "attack_scenario": "How an attacker would exploit this...",
   "impact": "Business and technical impact...",
@@ -65,8 +55,35 @@ Return ONLY a JSON object with this structure:
   "cvss_score": 7.5,
   "risk_level": "high"
 }}
+
+CODE FILE: {file_path}
+
+FINDING:
+- ID: {finding_id}
+- Type: {cwe} - {title}
+- Severity: {severity}
+- Location: Lines {line_start}-{line_end}
+- Description: {description}
+
+CODE CONTEXT:
+{code}
 """
 
+    def __init__(
+        self,
+        provider: Any,
+        parser: Any,
+        config: Optional[Dict[str, Any]] = None,
+        capabilities: Optional[ProviderCapabilities] = None,
+    ):
+        """Initialize explain runner."""
+        super().__init__(provider, parser, ModelRole.EXPLAIN, config, capabilities)
+        self.cache_prefix = self._static_prefix(
+            self.DEFAULT_PROMPT_TEMPLATE,
+            "file_path", "finding_id", "cwe", "title", "severity",
+            "line_start", "line_end", "description", "code",
+        )
+
     async def run(
         self,
         prompt: str,
@@ -85,6 +102,7 @@ Return ONLY a JSON object with this structure:
             ParserResult with explanation metadata
         """
         # Build explain prompt with finding context
+        cache_prefix = None
         if context:
             finding = context.get("finding", {})
             code = context.get("code", "")
@@ -101,14 +119,15 @@ Return ONLY a JSON object with this structure:
                 code=code,
                 finding_id=finding.get("id", "unknown")
             )
+            cache_prefix = self.cache_prefix
         else:
             formatted_prompt = prompt
 
         # Call provider (typically a powerful LLM like GPT-4 or Claude)
-        raw_output = await self._call_provider(formatted_prompt, context, **kwargs)
+        raw_output = await self._call_provider(formatted_prompt, context, cache_prefix=cache_prefix, **kwargs)
 
         # Parse response (expects JSON with explanation fields)
-        result = self.parser.parse(raw_output, context)
+        result = await self.parse_output(raw_output, context)
 
         # Attach explanation metadata to findings
         if result.findings and context:
@@ -1,8 +1,9 @@
 """Judge runner for reviewing and scoring findings from other models."""
 
 from typing import Any, Dict, List, Optional
+from aegis.models.provider_factory import ProviderCapabilities
 from aegis.models.runners.base import BaseRunner
-from aegis.models.schema import ParserResult, FindingCandidate
+from aegis.models.schema import ModelRole, ParserResult, FindingCandidate
 
 
 class JudgeRunner(BaseRunner):
@@ -26,16 +27,12 @@ For each finding, determine:
 3. Severity (critical/high/medium/low/info)
 4. Consolidated description
 
-CODE FILE: {file_path}
-
-FINDINGS TO REVIEW:
-{findings_json}
-
 Return ONLY a JSON object with this structure:
 {{
   "findings": [
     {{
       "original_id": "finding_1",
+      "file_path": "app/db.py",
       "is_valid": true,
       "confidence": 0.95,
       "severity": "high",
@@ -50,8 +47,30 @@ Return ONLY a JSON object with this structure:
 }}
 
 Only include findings that are valid (is_valid: true). Be conservative - it's better to reject false positives.
+Findings may come from several files; keep each finding's file_path from its candidates.
+
+CODE FILE(S): {file_path}
+
+FINDINGS TO REVIEW:
+{findings_json}
+
+SOURCE EXCERPTS (numbered lines around each finding):
+{code_context}
 """
 
+    def __init__(
+        self,
+        provider: Any,
+        parser: Any,
+        config: Optional[Dict[str, Any]] = None,
+        capabilities: Optional[ProviderCapabilities] = None,
+    ):
+        """Initialize judge runner."""
+        super().__init__(provider, parser, ModelRole.JUDGE, config, capabilities)
+        self.cache_prefix = self._static_prefix(
+            self.DEFAULT_PROMPT_TEMPLATE, "file_path", "findings_json", "code_context"
+        )
+
     async def run(
         self,
         prompt: str,
@@ -63,29 +82,32 @@ Only include findings that are valid (is_valid: true). Be conservative - it's be
 
         Args:
             prompt: Formatted judge prompt with findings to review
-            context: Additional context (file_path, findings_json, etc.)
+            context: Additional context (file_path, findings_json, code_context, etc.)
             **kwargs: Additional provider-specific arguments
 
         Returns:
             ParserResult with validated findings
         """
         # Build judge prompt with findings context
+        cache_prefix = None
         if context:
             findings_json = context.get("findings_json", "")
             file_path = context.get("file_path", "unknown")
 
             formatted_prompt = self.DEFAULT_PROMPT_TEMPLATE.format(
                 file_path=file_path,
-                findings_json=findings_json
+                findings_json=findings_json,
+                code_context=context.get("code_context") or "(not available)",
             )
+            cache_prefix = self.cache_prefix
         else:
             formatted_prompt = prompt
 
         # Call provider (typically a powerful LLM)
-        raw_output = await self._call_provider(formatted_prompt, context, **kwargs)
+        raw_output = await self._call_provider(formatted_prompt, context, cache_prefix=cache_prefix, **kwargs)
 
         # Parse response (expects JSON with findings array)
-        result = self.parser.parse(raw_output, context)
+        result = await self.parse_output(raw_output, context)
 
         return result
 
@@ -4,6 +4,7 @@ import logging
 from typing import Any, Dict, Optional
 
 from aegis.models.schema import ModelRole, ParserResult
+from aegis.models.provider_factory import ProviderCapabilities
 from aegis.models.runners.base import BaseRunner
 
 logger = logging.getLogger(__name__)
@@ -34,9 +35,15 @@ Your response must match this structure:
 
 Return ONLY the JSON. No explanations or prose."""
 
-    def __init__(self, provider: Any, parser: Any, config: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        provider: Any,
+        parser: Any,
+        config: Optional[Dict[str, Any]] = None,
+        capabilities: Optional[ProviderCapabilities] = None,
+    ):
         """Initialize triage runner."""
-        super().__init__(provider, parser, ModelRole.TRIAGE, config)
+        super().__init__(provider, parser, ModelRole.TRIAGE, config, capabilities)
 
     async def run(
         self,
@@ -62,27 +69,16 @@ Return ONLY the JSON. No explanations or prose."""
             # Execute model
             logger.debug(f"Running triage on {context.get('file_path', 'unknown')}")
 
-            if hasattr(self.provider, 'analyze'):
-                # Async provider (HF)
-                raw_output = await self.provider.analyze(formatted_prompt, context, **kwargs)
-            elif hasattr(self.provider, 'generate'):
-                # Check if provider supports system_prompt (cloud providers)
-                import inspect
-                sig = inspect.signature(self.provider.generate)
-                if 'system_prompt' in sig.parameters:
-                    # Cloud provider - use system prompt for JSON compliance
-                    raw_output = self.provider.generate(
-                        formatted_prompt,
-                        system_prompt=self.DEFAULT_SYSTEM_PROMPT
-                    )
-                else:
-                    # Ollama or other sync provider
-                    raw_output = self.provider.generate(formatted_prompt)
-            else:
-                raise ValueError(f"Provider {self.provider} has no analyze() or generate() method")
+            raw_output = await self._call_provider(
+                formatted_prompt,
+                context,
+                system_prompt=self.DEFAULT_SYSTEM_PROMPT,
+                cache_prefix="",  # Prompt is the raw snippet; only the system prompt is static
+                **kwargs
+            )
 
             # Parse output
-            result = self.parser.parse(raw_output, context)
+            result = await self.parse_output(raw_output, context)
 
             logger.debug(
                 f"Triage complete: {len(result.findings)} findings, "
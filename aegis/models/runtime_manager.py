@@ -6,13 +6,24 @@ import json
 import logging
 import threading
 import time
-from typing import Any, Dict, Optional, List
+from typing import Any, Callable, Dict, Optional, List
 
+from aegis import metrics
+from aegis.models.batch import DEFAULT_BATCH_DIR, BatchError, get_batch_backend, run_offline_batch
 from aegis.models.parser_factory import get_parser
-from aegis.models.provider_factory import ProviderCreationError, create_provider
+from aegis.models.provider_factory import ProviderCreationError, create_provider, detect_provider_capabilities
+from aegis.models.rate_limiter import (
+    DEFAULT_RATE_LIMITER,
+    AdaptiveConcurrencyLimiter,
+    ConcurrencyOutcome,
+    ProviderThrottle,
+    classify_provider_error,
+)
 from aegis.models.runtime import resolve_runtime
 from aegis.models.runners import TriageRunner, DeepScanRunner, JudgeRunner, ExplainRunner
 from aegis.models.schema import ModelRecord, ModelRole, ModelType
+from aegis.models.telemetry import ChunkExecution
+from aegis.models.usage import TokenUsage, estimate_tokens, track_usage
 
 logger = logging.getLogger(__name__)
 
@@ -23,12 +34,16 @@ class ModelRuntime:
     def __init__(self, model: ModelRecord):
         self.model = model
         self.settings = model.settings or {}
-        self.runtime_spec = resolve_runtime(self.settings)
+        # Only local HF models run on a device; skip the torch import for everything else
+        cuda_available = None if model.model_type == ModelType.HF_LOCAL else False
+        self.runtime_spec = resolve_runtime(self.settings, cuda_available=cuda_available)
 
         # Track provider load time for telemetry
         provider_load_start = time.time()
         self.provider = create_provider(model)
         self.provider_load_time_ms = int((time.time() - provider_load_start) * 1000)
+        # Resolve call style once; runners reuse it instead of introspecting per call
+        self.capabilities = detect_provider_capabilities(self.provider)
 
         # Collect provider telemetry if available (for HF models)
         self.telemetry = {}
@@ -47,12 +62,20 @@ class ModelRuntime:
         self.runners: Dict[ModelRole, Any] = {}
         self.keep_alive_seconds = self.runtime_spec.keep_alive_seconds
         self.last_used = time.time()
-        self._semaphore = threading.Semaphore(self.runtime_spec.max_concurrency)
 
         # Rate limiter and cost tracker for cloud providers
+        provider_type = self.model.provider_id or self.model.model_type.value.replace("_cloud", "")
+        self.provider_key = f"{provider_type}:{self.model.model_name}"
         self.rate_limiter = None
         self.cost_tracker = None
         self._setup_cloud_features()
+        self.concurrency = self._setup_concurrency()
+        self.throttle = ProviderThrottle(
+            self.provider_key,
+            self.concurrency,
+            rate_limiter=self.rate_limiter,
+            max_output_tokens=self._max_output_tokens(),
+        )
 
     def _setup_cloud_features(self):
         """Setup rate limiter and cost tracker for cloud providers."""
@@ -65,18 +88,20 @@ class ModelRuntime:
 
         if is_cloud:
             try:
-                from aegis.models.rate_limiter import DEFAULT_RATE_LIMITER, configure_rate_limiter
+                from aegis.models.rate_limiter import configure_rate_limiter
                 from aegis.models.cost_tracker import DEFAULT_COST_TRACKER
 
                 # Configure rate limiter
-                provider_type = self.model.provider_id or self.model.model_type.value.replace("_cloud", "")
-                custom_rpm = self.settings.get("rate_limit", {}).get("rpm")
+                provider_type = self.provider_key.split(":", 1)[0]
+                rate_cfg = self.settings.get("rate_limit", {})
 
                 configure_rate_limiter(
                     DEFAULT_RATE_LIMITER,
                     provider_type,
                     self.model.model_name,
-                    rpm=custom_rpm,
+                    rpm=rate_cfg.get("rpm"),
+                    tpm=rate_cfg.get("tpm"),
+                    max_request_tokens=self._max_output_tokens(),
                 )
 
                 self.rate_limiter = DEFAULT_RATE_LIMITER
@@ -87,17 +112,66 @@ class ModelRuntime:
             except Exception as e:
                 logger.warning(f"Failed to setup cloud features: {e}")
 
+    def _setup_concurrency(self) -> AdaptiveConcurrencyLimiter:
+        """
+        Build the in-flight request limiter for this model.
+
+        Cloud and Ollama models share an AIMD controller per provider key that
+        adapts to latency and 429s; local HF/tool models keep the fixed
+        runtime.max_concurrency. Override with settings.concurrency
+        ({"adaptive": bool, "min": int, "max": int}).
+        """
+        cfg = self.settings.get("concurrency") or {}
+        initial = self.runtime_spec.max_concurrency
+        remote = self.model.model_type in (
+            ModelType.OPENAI_CLOUD,
+            ModelType.ANTHROPIC_CLOUD,
+            ModelType.GOOGLE_CLOUD,
+            ModelType.OLLAMA_LOCAL,
+        )
+        adaptive = bool(cfg.get("adaptive", remote))
+        if not adaptive:
+            return AdaptiveConcurrencyLimiter(initial, adaptive=False)
+
+        is_ollama = self.model.model_type == ModelType.OLLAMA_LOCAL
+        default_max = max(initial, 4 if is_ollama else 32)
+        return DEFAULT_RATE_LIMITER.get_concurrency_limiter(
+            self.provider_key,
+            initial=initial,
+            min_limit=int(cfg.get("min", 1)),
+            max_limit=int(cfg.get("max", default_max)),
+        )
+
+    def _max_output_tokens(self) -> int:
+        """Output budget reserved against TPM before the response arrives."""
+        # Matches CloudProviderAdapter's default max_tokens
+        try:
+            return int(self.settings.get("max_tokens") or 2048)
+        except (TypeError, ValueError):
+            return 2048
+
+    def get_telemetry(self) -> Dict[str, Any]:
+        """Provider load telemetry plus live concurrency controller state."""
+        telemetry = dict(self.telemetry)
+        telemetry["concurrency"] = self.concurrency.snapshot()
+        return telemetry
+
     def touch(self) -> None:
         self.last_used = time.time()
 
     def _build_runner(self, role: ModelRole):
+        runner = self._create_runner(role)
+        runner.throttle = self.throttle
+        return runner
+
+    def _create_runner(self, role: ModelRole):
         if role == ModelRole.TRIAGE:
-            return TriageRunner(self.provider, self.parser, config=self.settings)
+            return TriageRunner(self.provider, self.parser, config=self.settings, capabilities=self.capabilities)
         if role == ModelRole.JUDGE:
-            return JudgeRunner(self.provider, self.parser, config=self.settings)
+            return JudgeRunner(self.provider, self.parser, config=self.settings, capabilities=self.capabilities)
         if role == ModelRole.EXPLAIN:
-            return ExplainRunner(self.provider, self.parser, config=self.settings)
-        return DeepScanRunner(self.provider, self.parser, config=self.settings)
+            return ExplainRunner(self.provider, self.parser, config=self.settings, capabilities=self.capabilities)
+        return DeepScanRunner(self.provider, self.parser, config=self.settings, capabilities=self.capabilities)
 
     def _normalize_role(self, role: Any) -> ModelRole:
         if isinstance(role, ModelRole):
@@ -134,29 +208,24 @@ class ModelRuntime:
         runner = self.get_runner(target_role)
         self.touch()
 
-        # Rate limiting for cloud providers
-        if self.rate_limiter:
-            provider_key = f"{self.model.provider_id}:{self.model.model_name}"
+        # Track start time for cost calculation
+        start_time = time.time()
+
+        # Run the model (the runner passes the provider call through self.throttle)
+        started = time.perf_counter()
+        with track_usage() as usage:
             try:
-                await self.rate_limiter.acquire(provider_key, tokens=1.0, timeout=60.0)
+                result = await runner.run(prompt, context, **kwargs)
             except Exception as e:
-                logger.warning(f"Rate limit acquire failed: {e}")
-
-        await asyncio.to_thread(self._semaphore.acquire)
-        try:
-            # Track start time for cost calculation
-            start_time = time.time()
-
-            # Run the model
-            result = await runner.run(prompt, context, **kwargs)
+                self._record_metrics(None, usage, started, 0, e)
+                raise
+        self._record_metrics(result, usage, started, 0, usage.error)
 
-            # Cost tracking for cloud providers
-            if self.cost_tracker and hasattr(self.provider, "provider"):
-                self._log_api_usage(prompt, result, scan_id, start_time)
+        # Cost tracking for cloud providers
+        if self.cost_tracker and hasattr(self.provider, "provider"):
+            self._log_api_usage(prompt, result, scan_id, start_time, **self._usage_kwargs(usage))
 
-            return result
-        finally:
-            self._semaphore.release()
+        return result
 
     async def run_batch(
         self,
@@ -164,57 +233,267 @@ class ModelRuntime:
         contexts: List[Dict[str, Any]],
         role: Optional[ModelRole] = None,
         scan_id: Optional[str] = None,
+        on_execution: Optional[Callable[[int, ChunkExecution], None]] = None,
+        max_retries: int = 0,
+        retry_delay: float = 0.0,
         **kwargs
     ):
-        """Run a batch of prompts through the provider and parser."""
+        """
+        Run a batch of prompts through the provider and parser.
+
+        Args:
+            prompts: Prompts to run
+            contexts: Parser context per prompt
+            role: Runner role (defaults to the model's first role)
+            scan_id: Scan for cost tracking
+            on_execution: Called with (prompt index, ChunkExecution) as each
+                prompt finishes or fails, for per-chunk telemetry
+            max_retries: Retries per prompt on rate-limit and timeout errors
+            retry_delay: Base delay between retries (doubled each attempt;
+                a provider Retry-After takes precedence)
+        """
         target_role = role or (self.model.roles[0] if self.model.roles else ModelRole.DEEP_SCAN)
         target_role = self._normalize_role(target_role)
         runner = self.get_runner(target_role)
         self.touch()
 
-        # Rate limiting for cloud providers (batch counts as one call)
-        if self.rate_limiter:
-            provider_key = f"{self.model.provider_id}:{self.model.model_name}"
-            try:
-                await self.rate_limiter.acquire(provider_key, tokens=1.0, timeout=60.0)
-            except Exception as e:
-                logger.warning(f"Rate limit acquire failed: {e}")
+        # Track start time for cost calculation
+        start_time = time.time()
+        with track_usage() as usage:
+            results = await self._run_batch(
+                runner, prompts, contexts, on_execution, max_retries, retry_delay, **kwargs
+            )
+
+        # Cost tracking for cloud providers (best-effort)
+        if self.cost_tracker and hasattr(self.provider, "provider"):
+            self._log_api_usage(
+                " ".join(prompts[:1]),
+                results[-1] if results else None,
+                scan_id,
+                start_time,
+                **self._usage_kwargs(usage),
+            )
+
+        return results
+
+    async def _run_batch(
+        self,
+        runner,
+        prompts: List[str],
+        contexts: List[Dict[str, Any]],
+        on_execution: Optional[Callable[[int, ChunkExecution], None]] = None,
+        max_retries: int = 0,
+        retry_delay: float = 0.0,
+        **kwargs
+    ):
+        if hasattr(self.provider, "analyze_batch"):
+            # One provider call for the whole batch, weighted by its full prompt size
+            kwargs.pop("on_finding", None)
+            input_tokens = sum(estimate_tokens(prompt) for prompt in prompts)
+            start = time.perf_counter()
+            with track_usage() as usage:
+                try:
+                    async with self.throttle.call(input_tokens):
+                        raw_outputs = await self.provider.analyze_batch(prompts, contexts, **kwargs)
+                except Exception as e:
+                    for idx, prompt in enumerate(prompts):
+                        self._report_execution(
+                            on_execution, idx, prompt, None, usage, start, 0, e, share=1 / len(prompts)
+                        )
+                    raise
+            results = []
+            for raw_output, context, prompt in zip(raw_outputs, contexts, prompts):
+                if isinstance(context, dict) and "prompt" not in context:
+                    context["prompt"] = prompt
+                results.append(await runner.parse_output(raw_output, context))
+            # The call's latency applies to every chunk; reported tokens are split by prompt size
+            for idx, (prompt, result) in enumerate(zip(prompts, results)):
+                share = estimate_tokens(prompt) / input_tokens if input_tokens else 1 / len(prompts)
+                self._report_execution(on_execution, idx, prompt, result, usage, start, 0, None, share=share)
+            return results
 
-        await asyncio.to_thread(self._semaphore.acquire)
+        async def run_one(idx: int, prompt: str, context: Dict[str, Any]):
+            start = time.perf_counter()
+            attempt = 0
+            with track_usage() as usage:
+                while True:
+                    # Runners return provider failures as parse errors; the
+                    # throttle leaves the exception on this scope
+                    usage.error = None
+                    try:
+                        result = await runner.run(prompt, context, **kwargs)
+                        error = usage.error
+                    except Exception as e:
+                        result, error = None, e
+                    if error is None:
+                        self._report_execution(on_execution, idx, prompt, result, usage, start, attempt, None)
+                        return result
+
+                    outcome, retry_after = classify_provider_error(error)
+                    transient = outcome in (ConcurrencyOutcome.OVERLOAD, ConcurrencyOutcome.TIMEOUT)
+                    if transient and attempt < max_retries:
+                        attempt += 1
+                        await asyncio.sleep(retry_after if retry_after is not None else retry_delay * (2 ** (attempt - 1)))
+                        continue
+                    self._report_execution(on_execution, idx, prompt, result, usage, start, attempt, error)
+                    if result is None:
+                        raise error
+                    return result
+
+        if self.capabilities.agenerate:
+            # Native async providers: issue the whole batch, bounded by the concurrency limiter
+            return list(await asyncio.gather(
+                *(run_one(idx, prompt, context) for idx, (prompt, context) in enumerate(zip(prompts, contexts)))
+            ))
+        results = []
+        for idx, (prompt, context) in enumerate(zip(prompts, contexts)):
+            results.append(await run_one(idx, prompt, context))
+        return results
+
+    def _report_execution(
+        self,
+        on_execution: Optional[Callable[[int, ChunkExecution], None]],
+        idx: int,
+        prompt: str,
+        result: Any,
+        usage: TokenUsage,
+        start: float,
+        retries: int,
+        error: Optional[BaseException],
+        share: float = 1.0,
+    ) -> None:
+        """Build one prompt's ChunkExecution, estimating tokens the provider did not report."""
+        self._record_metrics(result, usage, start, retries, error)
+        if on_execution is None:
+            return
+        if usage.reported:
+            input_tokens = int(round(usage.input_tokens * share))
+            output_tokens = int(round(usage.output_tokens * share))
+            cached_tokens = int(round(usage.cached_tokens * share))
+        else:
+            input_tokens = estimate_tokens(prompt)
+            raw_output = getattr(result, "raw_output", None)
+            output_tokens = estimate_tokens(str(raw_output)) if raw_output else 0
+            cached_tokens = 0
+        execution = ChunkExecution(
+            model_id=self.model.model_id,
+            status="error" if error is not None else "success",
+            latency_ms=(time.perf_counter() - start) * 1000,
+            queue_wait_ms=usage.queue_wait_ms,
+            provider_ms=usage.provider_ms,
+            retry_count=retries,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            estimated=not usage.reported,
+            error=str(error)[:500] if error is not None else None,
+        )
         try:
-            # Track start time for cost calculation
-            start_time = time.time()
-
-            if hasattr(self.provider, "analyze_batch"):
-                raw_outputs = await self.provider.analyze_batch(prompts, contexts, **kwargs)
-                results = []
-                for raw_output, context, prompt in zip(raw_outputs, contexts, prompts):
-                    if isinstance(context, dict) and "prompt" not in context:
-                        context["prompt"] = prompt
-                    results.append(runner.parser.parse(raw_output, context))
-            else:
-                results = []
-                for prompt, context in zip(prompts, contexts):
-                    results.append(await runner.run(prompt, context, **kwargs))
-
-            # Cost tracking for cloud providers (best-effort)
-            if self.cost_tracker and hasattr(self.provider, "provider"):
-                self._log_api_usage(" ".join(prompts[:1]), results[-1] if results else None, scan_id, start_time)
+            on_execution(idx, execution)
+        except Exception as e:
+            logger.warning(f"Execution telemetry callback failed: {e}")
 
-            return results
-        finally:
-            self._semaphore.release()
+    async def run_offline_batch(
+        self,
+        chunks: List[Dict[str, Any]],
+        role: Optional[ModelRole] = None,
+        scan_id: Optional[str] = None,
+        on_status: Optional[Callable[[Any], None]] = None,
+        cancel_check: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Run chunks as a single provider-native batch job (see aegis.models.batch).
+
+        Raises:
+            BatchError: If the model has no batch backend or the job fails
+        """
+        backend = get_batch_backend(self.model, self.provider)
+        if backend is None:
+            raise BatchError(f"Model {self.model.model_id} has no batch backend")
+
+        target_role = role or (self.model.roles[0] if self.model.roles else ModelRole.DEEP_SCAN)
+        runner = self.get_runner(self._normalize_role(target_role))
+        batch_cfg = self.settings.get("batch") or {}
+        self.touch()
 
-    def _log_api_usage(self, prompt: str, result: Any, scan_id: Optional[str], start_time: float):
+        start_time = time.time()
+        with track_usage() as usage:
+            results = await run_offline_batch(
+                backend,
+                runner,
+                self.model,
+                chunks,
+                poll_interval=float(batch_cfg.get("poll_interval", 30.0)),
+                timeout=batch_cfg.get("timeout"),
+                on_status=on_status,
+                cancel_check=cancel_check,
+                work_dir=batch_cfg.get("work_dir") or DEFAULT_BATCH_DIR,
+            )
+
+        if self.cost_tracker and usage.reported:
+            self._log_api_usage(
+                "",
+                None,
+                scan_id,
+                start_time,
+                **self._usage_kwargs(usage),
+                # Provider batch APIs bill at a discount to interactive calls
+                cost_multiplier=float(batch_cfg.get("cost_multiplier", 0.5)),
+            )
+        return results
+
+    def _record_metrics(
+        self,
+        result: Any,
+        usage: TokenUsage,
+        start: float,
+        retries: int,
+        error: Optional[BaseException],
+    ) -> None:
+        """Count one finished prompt in the process metrics."""
+        model_id = self.model.model_id
+        metrics.CHUNKS_PROCESSED.inc(model_id=model_id, status="error" if error is not None else "success")
+        metrics.CHUNK_LATENCY.observe(time.perf_counter() - start, model_id=model_id)
+        metrics.PROVIDER_LATENCY.observe(usage.provider_ms / 1000, model_id=model_id)
+        metrics.RATE_LIMIT_WAIT.observe(usage.queue_wait_ms / 1000, model_id=model_id)
+        if retries:
+            metrics.CHUNK_RETRIES.inc(retries, model_id=model_id)
+        if error is None and getattr(result, "parse_errors", None):
+            metrics.PARSE_ERRORS.inc(model_id=model_id)
+
+    @staticmethod
+    def _usage_kwargs(usage: TokenUsage) -> Dict[str, int]:
+        """Provider-reported token counts for _log_api_usage (empty if none were reported)."""
+        if not usage.reported:
+            return {}
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cached_tokens": usage.cached_tokens,
+            "cache_write_tokens": usage.cache_write_tokens,
+        }
+
+    def _log_api_usage(
+        self,
+        prompt: str,
+        result: Any,
+        scan_id: Optional[str],
+        start_time: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cost_multiplier: float = 1.0,
+        cached_tokens: int = 0,
+        cache_write_tokens: int = 0,
+    ):
         """Log API usage and cost for cloud providers."""
         try:
             # Extract token usage from result metadata if available
-            input_tokens = getattr(result, "input_tokens", 0) or 0
-            output_tokens = getattr(result, "output_tokens", 0) or 0
+            input_tokens = input_tokens or getattr(result, "input_tokens", 0) or 0
+            output_tokens = output_tokens or getattr(result, "output_tokens", 0) or 0
 
             # Estimate tokens if not provided (rough approximation)
             if input_tokens == 0:
-                input_tokens = len(prompt) // 4  # ~4 chars per token
+                input_tokens = estimate_tokens(prompt)
 
             if output_tokens == 0 and hasattr(result, "findings"):
                 # Estimate based on findings
@@ -226,14 +505,24 @@ class ModelRuntime:
 
             if provider_type == "openai":
                 from aegis.providers.openai_provider import calculate_cost
-                cost_usd = calculate_cost(self.model.model_name, input_tokens, output_tokens)
+                cost_usd = calculate_cost(
+                    self.model.model_name, input_tokens, output_tokens, cached_tokens=cached_tokens
+                )
             elif provider_type == "anthropic":
                 from aegis.providers.anthropic_provider import calculate_cost
-                cost_usd = calculate_cost(self.model.model_name, input_tokens, output_tokens)
+                cost_usd = calculate_cost(
+                    self.model.model_name,
+                    input_tokens,
+                    output_tokens,
+                    cached_tokens=cached_tokens,
+                    cache_write_tokens=cache_write_tokens,
+                )
             elif provider_type == "google":
                 from aegis.providers.google_provider import calculate_cost
                 cost_usd = calculate_cost(self.model.model_name, input_tokens, output_tokens)
 
+            cost_usd *= cost_multiplier
+
             # Log to cost tracker
             if cost_usd > 0:
                 self.cost_tracker.log_usage(
@@ -243,6 +532,8 @@ class ModelRuntime:
                     output_tokens=output_tokens,
                     cost_usd=cost_usd,
                     scan_id=scan_id,
+                    cached_tokens=cached_tokens,
+                    cache_write_tokens=cache_write_tokens,
                 )
 
         except Exception as e:
@@ -291,6 +582,7 @@ class ModelRuntimeManager:
             runtime = self._runtimes.pop(key, None)
             if runtime:
                 runtime.close()
+                metrics.RUNTIME_CACHE_EVICTIONS.inc(reason="idle")
 
     def get_runtime(self, model: ModelRecord) -> ModelRuntime:
         key = self._runtime_key(model)
@@ -309,8 +601,12 @@ class ModelRuntimeManager:
                 logger.error("Failed to initialize runtime for %s: %s", model.model_id, exc)
                 raise
             self._runtimes[key] = runtime
+            metrics.RUNTIME_CACHE_LOADS.inc()
             return runtime
 
+    def __len__(self) -> int:
+        return len(self._runtimes)
+
     def clear_model(self, model_id: str) -> None:
         with self._lock:
             keys = [k for k in self._runtimes.keys() if k.startswith(f"{model_id}:")]
@@ -318,12 +614,15 @@ class ModelRuntimeManager:
                 runtime = self._runtimes.pop(key, None)
                 if runtime:
                     runtime.close()
+                    metrics.RUNTIME_CACHE_EVICTIONS.inc(reason="cleared")
 
     def clear_all(self) -> None:
         with self._lock:
             for runtime in self._runtimes.values():
                 runtime.close()
+            metrics.RUNTIME_CACHE_EVICTIONS.inc(len(self._runtimes), reason="cleared")
             self._runtimes.clear()
 
 
 DEFAULT_RUNTIME_MANAGER = ModelRuntimeManager()
+metrics.RUNTIME_CACHE_SIZE.set_function(lambda: len(DEFAULT_RUNTIME_MANAGER))
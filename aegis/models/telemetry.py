@@ -0,0 +1,231 @@
+"""Per-chunk model execution telemetry.
+
+Every chunk a model runs on produces one ``ChunkExecution``: latency, time
+spent queued by the provider throttle, retries, token counts (provider
+reported, or estimated when the provider reports nothing) and status. An
+``ExecutionRecorder`` collects the executions of one model in one scan, keeps
+running totals for the ``model_completed`` event and hands each row to the
+shared ``TelemetryWriter``, which buffers rows and writes them to the
+``model_executions`` table in batches from a background thread, so chunk
+workers never wait on SQLite.
+"""
+
+import logging
+import math
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, ContextManager, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_FLUSH_SIZE = 200
+# Rows kept when the database is unavailable; older rows are dropped first
+MAX_BUFFERED_ROWS = 50_000
+
+
+def _utc_timestamp() -> str:
+    # Same layout as SQLite CURRENT_TIMESTAMP, with milliseconds
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+@dataclass
+class ChunkExecution:
+    """One model call on one chunk."""
+
+    model_id: str
+    file_path: Optional[str] = None
+    chunk_index: Optional[int] = None
+    status: str = "success"  # 'success' or 'error'
+    latency_ms: float = 0.0
+    queue_wait_ms: float = 0.0
+    # Time inside the provider call (not persisted; feeds scan profiles)
+    provider_ms: float = 0.0
+    retry_count: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    # True when token counts are estimates rather than provider-reported
+    estimated: bool = False
+    error: Optional[str] = None
+    finished_at: str = field(default_factory=_utc_timestamp)
+
+    def token_usage(self) -> Dict[str, Any]:
+        return {
+            "prompt_tokens": self.input_tokens,
+            "completion_tokens": self.output_tokens,
+            "total_tokens": self.input_tokens + self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "estimated": self.estimated,
+        }
+
+
+class TelemetryWriter:
+    """Buffer ChunkExecution rows and write them to model_executions in batches."""
+
+    def __init__(
+        self,
+        repository: Any = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+    ):
+        """
+        Args:
+            repository: Object with ``record_executions(scan_id, executions)``
+                (defaults to a TelemetryRepository)
+            flush_interval: Seconds between background flushes
+            flush_size: Buffered rows that trigger an early flush
+        """
+        if repository is None:
+            from aegis.database.repositories import TelemetryRepository
+
+            repository = TelemetryRepository()
+        self.repository = repository
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._buffer: List[tuple] = []
+        self._lock = threading.Lock()
+        # Serializes database writes so flush() returns only after earlier rows landed
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._written = 0
+        self._dropped = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="aegis-telemetry-writer", daemon=True)
+            self._thread.start()
+
+    def record(self, scan_id: str, execution: ChunkExecution) -> None:
+        """Queue one execution row; never blocks on the database."""
+        with self._lock:
+            self._buffer.append((scan_id, execution))
+            if len(self._buffer) > MAX_BUFFERED_ROWS:
+                overflow = len(self._buffer) - MAX_BUFFERED_ROWS
+                del self._buffer[:overflow]
+                self._dropped += overflow
+            full = len(self._buffer) >= self.flush_size
+            self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written."""
+        with self._write_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            by_scan: Dict[str, List[ChunkExecution]] = {}
+            for scan_id, execution in rows:
+                by_scan.setdefault(scan_id, []).append(execution)
+            try:
+                for scan_id, executions in by_scan.items():
+                    self.repository.record_executions(scan_id, executions)
+            except Exception as e:
+                # Keep the rows for the next attempt
+                logger.warning(f"Failed to write model telemetry: {e}")
+                with self._lock:
+                    self._buffer[:0] = rows
+                return 0
+            self._written += len(rows)
+            return len(rows)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._buffer)
+        return {"pending": pending, "written": self._written, "dropped": self._dropped}
+
+
+_writer: Optional[TelemetryWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_telemetry_writer() -> TelemetryWriter:
+    """Get the global telemetry writer (singleton)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = TelemetryWriter()
+        return _writer
+
+
+class ExecutionRecorder:
+    """Collect the chunk executions of one model in one scan."""
+
+    def __init__(
+        self,
+        scan_id: Optional[str],
+        model_id: str,
+        writer: Optional[TelemetryWriter] = None,
+        profile: Any = None,
+    ):
+        """
+        Args:
+            scan_id: Scan the executions belong to (None keeps totals only)
+            model_id: Model being executed
+            writer: Row sink (defaults to the global TelemetryWriter)
+            profile: ScanProfile that receives queue, provider and parsing time
+        """
+        self.scan_id = scan_id
+        self.model_id = model_id
+        self.profile = profile
+        self.writer = writer if writer is not None or scan_id is None else get_telemetry_writer()
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.errors = 0
+        self.retries = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latency_ms = 0.0
+
+    def record(self, execution: ChunkExecution) -> None:
+        with self._lock:
+            self.executions += 1
+            self.errors += execution.status != "success"
+            self.retries += execution.retry_count
+            self.input_tokens += execution.input_tokens
+            self.output_tokens += execution.output_tokens
+            self.latency_ms += execution.latency_ms
+        if self.profile is not None:
+            # Whatever the call spent outside the queue and the provider is
+            # the runner's own work: output parsing (and retry backoff)
+            other_ms = execution.latency_ms - execution.queue_wait_ms - execution.provider_ms
+            self.profile.add("queue_wait", execution.queue_wait_ms / 1000, label=self.model_id)
+            self.profile.add("provider", execution.provider_ms / 1000, label=self.model_id)
+            self.profile.add("parsing", max(0.0, other_ms) / 1000, label=self.model_id)
+        if self.writer is not None and self.scan_id:
+            self.writer.record(self.scan_id, execution)
+
+    def span(self, stage: str) -> ContextManager:
+        """Time a block as a profile stage for this model (no-op without a profile)."""
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.span(stage, label=self.model_id)
+
+    @property
+    def tokens_per_sec(self) -> float:
+        """Output tokens per second of model call time."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return round(self.output_tokens / (self.latency_ms / 1000.0), 2)
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (0-100) of an ascending sequence."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low, high = math.floor(rank), math.ceil(rank)
+    if low == high:
+        return float(sorted_values[low])
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
@@ -0,0 +1,123 @@
+"""Per-call token usage reporting from providers back to the runtime.
+
+Providers return plain text, so real token counts travel out of band: the
+runtime opens a ``track_usage()`` scope around each provider call and the
+provider calls ``report_usage()`` once the API response arrives. The scope is
+a context variable, so concurrent calls on the same event loop (or pushed to
+threads via ``asyncio.to_thread``) each see their own accumulator. Scopes
+nest: usage reported inside an inner scope is also added to the enclosing
+ones, so a per-request throttle and a per-run cost tracker can both observe it.
+The throttle reports the time a call spent queued for rate-limit budget and a
+concurrency slot, the time it then spent in the provider, and the exception of
+a failed call, the same way, for per-chunk telemetry and retries.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class TokenUsage:
+    """
+    Token counts reported for one provider call.
+
+    ``input_tokens`` is the full prompt size; ``cached_tokens`` (read from the
+    provider's prompt cache) and ``cache_write_tokens`` (written to it) are
+    subsets of it.
+    """
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    reported: bool = False
+    # Time spent waiting for rate-limit budget and a concurrency slot
+    queue_wait_ms: float = 0.0
+    # Time spent inside the provider call, once a slot was granted
+    provider_ms: float = 0.0
+    # Last exception raised by a provider call directly inside this scope;
+    # runners turn provider failures into parse errors, callers look here
+    error: Optional[BaseException] = field(default=None, repr=False, compare=False)
+    parent: Optional["TokenUsage"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_current_usage: contextvars.ContextVar[Optional[TokenUsage]] = contextvars.ContextVar(
+    "aegis_token_usage", default=None
+)
+
+
+@contextmanager
+def track_usage() -> Iterator[TokenUsage]:
+    """Collect usage reported by providers for the duration of the block."""
+    usage = TokenUsage(parent=_current_usage.get())
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def report_usage(
+    input_tokens: Any = 0,
+    output_tokens: Any = 0,
+    cached_tokens: Any = 0,
+    cache_write_tokens: Any = 0,
+) -> None:
+    """Record usage from an API response; a no-op outside ``track_usage()``."""
+    usage = _current_usage.get()
+    while usage is not None:
+        usage.input_tokens += int(input_tokens or 0)
+        usage.output_tokens += int(output_tokens or 0)
+        usage.cached_tokens += int(cached_tokens or 0)
+        usage.cache_write_tokens += int(cache_write_tokens or 0)
+        usage.reported = True
+        usage = usage.parent
+
+
+def report_queue_wait(wait_ms: float) -> None:
+    """Record time a call spent queued by the throttle; a no-op outside ``track_usage()``."""
+    usage = _current_usage.get()
+    while usage is not None:
+        usage.queue_wait_ms += wait_ms
+        usage = usage.parent
+
+
+def report_provider_time(provider_ms: float) -> None:
+    """Record time a call spent in the provider; a no-op outside ``track_usage()``."""
+    usage = _current_usage.get()
+    while usage is not None:
+        usage.provider_ms += provider_ms
+        usage = usage.parent
+
+
+def report_error(exc: BaseException) -> None:
+    """Record a failed provider call on the innermost ``track_usage()`` scope."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.error = exc
+
+
+def report_usage_dict(usage: Any) -> None:
+    """Record an OpenAI-style ``{"prompt_tokens", "completion_tokens"}`` dict."""
+    if isinstance(usage, dict) and usage:
+        details = usage.get("prompt_tokens_details") or {}
+        report_usage(
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens"),
+            cached_tokens=details.get("cached_tokens"),
+        )
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Rough token estimate (~4 characters per token)."""
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
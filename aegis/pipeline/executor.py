@@ -25,6 +25,7 @@ from aegis.consensus.engine import ConsensusEngine
 from aegis.data_models import ModelResponse, Finding
 from aegis.events import EventEmitter
 from aegis.models.engine import ModelExecutionEngine
+from aegis.models.telemetry import ExecutionRecorder
 from aegis.utils import chunk_file_lines
 
 
@@ -60,6 +61,7 @@ class PipelineExecutor:
         scan_id: Optional[str] = None,
         language_hints: Optional[List[str]] = None,
         chunk_size: int = 1000,
+        profile: Optional[Any] = None,
     ) -> PipelineExecutionContext:
         """
         Execute a pipeline.
@@ -70,12 +72,16 @@ class PipelineExecutor:
             scan_id: Optional scan ID (generated if not provided)
             language_hints: Optional language hints for detection
             chunk_size: Lines per chunk for processing
+            profile: Optional ScanProfile recording stage spans (the caller
+                starts and finishes its capture)
 
         Returns:
             PipelineExecutionContext with results
         """
         scan_id = scan_id or str(uuid.uuid4())
-        emitter = EventEmitter(scan_id)
+        emitter = EventEmitter(scan_id, profile=profile)
+        if profile is not None:
+            profile.scan_id = scan_id
 
         # Initialize execution context
         context = PipelineExecutionContext(
@@ -367,11 +373,24 @@ class PipelineExecutor:
 
         collected: List[Finding] = []
 
+        # settings.stream: emit findings while the response streams
+        streamed: set = set()
+
+        def emit_streamed(candidate: FindingCandidate) -> None:
+            finding = self._candidate_to_finding(candidate)
+            if finding.fingerprint in streamed:
+                return  # Re-streamed by a retry after a partial failure
+            streamed.add(finding.fingerprint)
+            emitter.finding_emitted(finding.to_dict(), step_id)
+
+        on_finding = emit_streamed if settings.get("stream") else None
+
         # Emit model_started event with telemetry (only once per model)
         model_start_time = time.time()
+        recorder = ExecutionRecorder(emitter.scan_id, model.model_id, profile=emitter.profile)
         try:
             runtime = self.execution_engine.runtime_manager.get_runtime(model)
-            telemetry = runtime.telemetry or {}
+            telemetry = runtime.get_telemetry()
 
             # Determine model type for display
             model_type = "unknown"
@@ -391,6 +410,7 @@ class PipelineExecutor:
                 load_time_ms=telemetry.get("load_time_ms", 0),
                 quantization=telemetry.get("quantization"),
                 precision=telemetry.get("precision"),
+                concurrency_limit=telemetry.get("concurrency", {}).get("limit"),
             )
         except Exception as e:
             # Don't fail if telemetry fails
@@ -398,14 +418,18 @@ class PipelineExecutor:
 
         for file_path, content in source_files.items():
             chunks: List[Dict[str, Any]] = []
-            for chunk_content, line_start, line_end in chunk_file_lines(content, chunk_size):
-                chunks.append({
-                    "code": chunk_content,
-                    "file_path": file_path,
-                    "line_start": line_start,
-                    "line_end": line_end,
-                    "snippet": chunk_content,
-                })
+            with emitter.span("chunking"):
+                for chunk_index, (chunk_content, line_start, line_end) in enumerate(
+                    chunk_file_lines(content, chunk_size)
+                ):
+                    chunks.append({
+                        "code": chunk_content,
+                        "file_path": file_path,
+                        "line_start": line_start,
+                        "line_end": line_end,
+                        "snippet": chunk_content,
+                        "chunk_index": chunk_index,
+                    })
 
             if not chunks:
                 continue
@@ -418,6 +442,8 @@ class PipelineExecutor:
                         model,
                         batch,
                         role_enum,
+                        on_finding,
+                        recorder,
                     )
                     for batch in batches
                 ]
@@ -450,20 +476,21 @@ class PipelineExecutor:
                         chunk_findings = [self._candidate_to_finding(c) for c in result.findings]
                         collected.extend(chunk_findings)
                         for finding in chunk_findings:
+                            if finding.fingerprint in streamed:
+                                continue
                             emitter.finding_emitted(finding.to_dict(), step_id)
 
         # Emit model_completed event with metrics
         model_latency_ms = int((time.time() - model_start_time) * 1000)
         try:
-            # TODO: For now, we don't have token tracking for HF models
-            # This will be implemented when we add tokenizer-based tracking
+            # Provider-reported tokens where available, estimates otherwise
             emitter.model_completed(
                 model_id=model.model_id,
                 findings_count=len(collected),
                 latency_ms=model_latency_ms,
-                input_tokens=0,  # TODO: Track input tokens
-                output_tokens=0,  # TODO: Track output tokens
-                tokens_per_sec=0.0,  # TODO: Calculate tokens/sec
+                input_tokens=recorder.input_tokens,
+                output_tokens=recorder.output_tokens,
+                tokens_per_sec=recorder.tokens_per_sec,
             )
         except Exception as e:
             # Don't fail if event emission fails
@@ -478,8 +505,8 @@ class PipelineExecutor:
         emitter: EventEmitter,
     ) -> Dict[str, Any]:
         """Execute a consensus step."""
-        # Collect findings from source steps
-        all_findings: List[Finding] = []
+        # Collect findings from source steps; each source votes as one model
+        source_responses: List[ModelResponse] = []
         source_metadata: Dict[str, Any] = {}
 
         for source_id in step.sources:
@@ -487,38 +514,49 @@ class PipelineExecutor:
             if source_output:
                 findings_dicts = source_output.get("findings", [])
                 # Convert dicts back to Finding objects
-                for f_dict in findings_dicts:
-                    all_findings.append(Finding(**f_dict))
+                source_responses.append(
+                    ModelResponse(
+                        model_id=source_id,
+                        findings=[Finding(**f_dict) for f_dict in findings_dicts],
+                        usage={},
+                    )
+                )
                 source_metadata[source_id] = source_output.get("metadata", {})
 
-        if not all_findings:
+        if not any(response.findings for response in source_responses):
             return {"findings": [], "metadata": {"strategy": step.strategy.value, "sources": step.sources}}
 
-        # Create mock ModelResponse objects for consensus engine
-        mock_responses = [
-            ModelResponse(
-                model_id="consensus_source",
-                findings=all_findings,
-                usage={},
-            )
-        ]
-
         # Apply consensus strategy
-        if step.strategy == ConsensusStrategy.UNION:
-            merged = self.consensus_engine.merge(mock_responses, strategy="union")
-        elif step.strategy == ConsensusStrategy.MAJORITY:
-            merged = self.consensus_engine.merge(mock_responses, strategy="majority")
-        elif step.strategy == ConsensusStrategy.WEIGHTED:
-            merged = self.consensus_engine.merge(mock_responses, strategy="weighted")
-        elif step.strategy == ConsensusStrategy.JUDGE:
+        engine_strategy = {
+            ConsensusStrategy.UNION: "union",
+            ConsensusStrategy.MAJORITY: "majority_vote",
+            ConsensusStrategy.WEIGHTED: "weighted_vote",
+        }.get(step.strategy)
+        if step.strategy == ConsensusStrategy.JUDGE:
             # Judge strategy deferred to Week 3
             emitter.warning(f"Judge consensus not yet implemented, using majority", {"step_id": step.id})
-            merged = self.consensus_engine.merge(mock_responses, strategy="majority")
+            engine_strategy = "majority_vote"
+
+        if engine_strategy:
+            with emitter.span("consensus", step.id):
+                merged = self.consensus_engine.merge(
+                    source_responses,
+                    strategy=engine_strategy,
+                    similarity_threshold=step.similarity_threshold,
+                )
+            stats = self.consensus_engine.last_merge_stats
         else:
-            merged = all_findings  # Default to union
+            merged = [f for response in source_responses for f in response.findings]  # Default to union
+            stats = {}
 
         # Emit findings merged event
-        emitter.findings_merged(step.strategy.value, len(merged))
+        emitter.findings_merged(
+            step.strategy.value,
+            len(merged),
+            clusters=stats.get("clusters"),
+            input_findings=stats.get("input_findings"),
+            similarity_merges=stats.get("similarity_merges"),
+        )
 
         return {
             "findings": [f.__dict__ for f in merged],
@@ -608,7 +646,11 @@ class PipelineExecutor:
         if not tool:
             raise ValueError(f"Tool '{step.tool_id}' not found")
 
-        result = tool.analyze_project(source_files, step.tool_config or {})
+        from aegis.process_pool import run_tool
+
+        # Sharded across worker processes for large projects
+        with emitter.span("tool", step.tool_id):
+            result = run_tool(tool, source_files, step.tool_config or {})
         if not isinstance(result, ParserResult):
             raise ValueError(f"Tool '{step.tool_id}' returned unsupported result type")
 
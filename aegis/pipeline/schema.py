@@ -90,6 +90,12 @@ class PipelineStep(BaseModel):
     # Consensus step (kind=consensus)
     strategy: Optional[ConsensusStrategy] = Field(None, description="Consensus strategy")
     sources: Optional[List[str]] = Field(None, description="Step IDs to merge findings from")
+    similarity_threshold: Optional[float] = Field(
+        None,
+        ge=0,
+        le=1,
+        description="Message similarity for treating findings as one issue (0 disables, None uses the engine default)",
+    )
 
     # Gating step (kind=gate)
     condition: Optional[GatingCondition] = Field(None, description="Condition to evaluate")
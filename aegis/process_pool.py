@@ -0,0 +1,247 @@
+"""Process pool for CPU-bound scan work that should not hold the GIL.
+
+Two kinds of work leave the scan threads:
+
+- Tool steps: ``run_tool`` shards a project's files across worker processes
+  by size. The source text is written once into a shared-memory segment;
+  each task carries only the segment name and its files' (path, offset,
+  length) entries, and the worker decodes its slices from the segment.
+- Model output parsing: ``parse_in_pool`` parses large responses in a
+  worker process while the shared model event loop keeps serving other
+  chunks.
+
+Workers are started with ``spawn`` (the server has threads, so forking is
+unsafe) and reused for the life of the process. Small inputs stay in
+process, where pickling and IPC would cost more than the work. Failing to
+use the pool falls back to running in process; a pool broken by a dead
+worker is discarded, so the next call starts a fresh one.
+
+Environment:
+    AEGIS_PROCESS_WORKERS: worker processes (default: CPU count; 0 or 1 disables)
+    AEGIS_TOOL_PROCESS_MIN_BYTES: smallest project sent to the pool (default 2 MiB)
+    AEGIS_PARSE_OFFLOAD_CHARS: smallest model output parsed in the pool (default 32768; 0 disables)
+"""
+
+import asyncio
+import heapq
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aegis.models.schema import ParserResult
+
+logger = logging.getLogger(__name__)
+
+PROCESS_WORKERS = int(os.environ.get("AEGIS_PROCESS_WORKERS") or os.cpu_count() or 1)
+TOOL_PROCESS_MIN_BYTES = int(os.environ.get("AEGIS_TOOL_PROCESS_MIN_BYTES") or 2 * 1024 * 1024)
+PARSE_OFFLOAD_CHARS = int(os.environ.get("AEGIS_PARSE_OFFLOAD_CHARS") or 32768)
+# Shards per worker, so one slow shard does not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+# (file path, byte offset, byte length) in a SourceBlob
+BlobEntry = Tuple[str, int, int]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> Optional[Executor]:
+    """The shared worker pool, or None when process offloading is disabled."""
+    global _pool
+    if PROCESS_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.debug(f"Started process pool with {PROCESS_WORKERS} workers")
+        return _pool
+
+
+def _discard_broken_pool(pool: Executor) -> None:
+    """Drop ``pool`` after a worker died, unless another call already replaced it."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    logger.warning("Process pool broken by a dead worker; starting a new one on next use")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_process_pool() -> None:
+    """Stop the worker processes (a later call to get_process_pool starts new ones)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+class SourceBlob:
+    """Source files packed into one shared-memory segment."""
+
+    def __init__(self, source_files: Dict[str, str]):
+        encoded = [(path, content.encode("utf-8")) for path, content in source_files.items()]
+        size = sum(len(data) for _, data in encoded)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        self.name = self._shm.name
+        self.entries: List[BlobEntry] = []
+        offset = 0
+        for path, data in encoded:
+            self._shm.buf[offset:offset + len(data)] = data
+            self.entries.append((path, offset, len(data)))
+            offset += len(data)
+        self.size = size
+
+    def close(self) -> None:
+        """Release and remove the segment."""
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SourceBlob":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_blob(name: str, entries: Sequence[BlobEntry]) -> Dict[str, str]:
+    """Decode files from a SourceBlob segment (in a worker process)."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return {path: bytes(shm.buf[offset:offset + length]).decode("utf-8") for path, offset, length in entries}
+    finally:
+        shm.close()
+
+
+def shard_entries(entries: Sequence[BlobEntry], shards: int) -> List[List[BlobEntry]]:
+    """Split blob entries into up to ``shards`` groups of similar total size."""
+    shards = max(1, min(shards, len(entries)))
+    heap = [(0, index) for index in range(shards)]
+    groups: List[List[BlobEntry]] = [[] for _ in range(shards)]
+    for entry in sorted(entries, key=lambda entry: entry[2], reverse=True):
+        size, index = heapq.heappop(heap)
+        groups[index].append(entry)
+        heapq.heappush(heap, (size + entry[2], index))
+    return [group for group in groups if group]
+
+
+def _tool_spec(tool: Any) -> Tuple[str, str]:
+    cls = type(tool)
+    return cls.__module__, cls.__qualname__
+
+
+def _analyze_shard(
+    spec: Tuple[str, str],
+    tool_config: Dict[str, Any],
+    config: Dict[str, Any],
+    blob_name: str,
+    entries: List[BlobEntry],
+) -> ParserResult:
+    """Worker: rebuild the tool and run it over one shard of the blob."""
+    module_path, class_name = spec
+    tool_cls = getattr(importlib.import_module(module_path), class_name)
+    tool = tool_cls(tool_config)
+    return tool.analyze_project(read_blob(blob_name, entries), config)
+
+
+def run_tool(tool: Any, source_files: Dict[str, str], config: Optional[Dict[str, Any]] = None) -> ParserResult:
+    """
+    Run ``tool.analyze_project`` over a project, sharded across worker processes.
+
+    Findings come back in the order of ``source_files``, as from an in-process
+    run. Tools run in process unless they set ``process_pool = True``, as do
+    projects below ``AEGIS_TOOL_PROCESS_MIN_BYTES`` and tool classes a worker
+    cannot import.
+
+    Args:
+        tool: ToolPlugin instance (rebuilt in workers from its class and config)
+        source_files: Mapping of file path -> content
+        config: Step configuration passed to analyze_project
+
+    Returns:
+        Merged ParserResult
+    """
+    config = config or {}
+    pool = get_process_pool()
+    if (
+        pool is None
+        or not getattr(tool, "process_pool", False)
+        or len(source_files) < 2
+        or type(tool).__module__ == "__main__"
+        or sum(len(content) for content in source_files.values()) < TOOL_PROCESS_MIN_BYTES
+    ):
+        return tool.analyze_project(source_files, config)
+
+    try:
+        with SourceBlob(source_files) as blob:
+            shards = shard_entries(blob.entries, PROCESS_WORKERS * SHARDS_PER_WORKER)
+            futures = [
+                pool.submit(_analyze_shard, _tool_spec(tool), dict(tool.config or {}), config, blob.name, shard)
+                for shard in shards
+            ]
+            results = [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        _discard_broken_pool(pool)
+        logger.warning(f"Process pool failed for tool {getattr(tool, 'tool_id', tool)}, running in process: {e}")
+        return tool.analyze_project(source_files, config)
+    except Exception as e:
+        logger.warning(f"Process pool failed for tool {getattr(tool, 'tool_id', tool)}, running in process: {e}")
+        return tool.analyze_project(source_files, config)
+
+    order = {path: index for index, path in enumerate(source_files)}
+    findings = [finding for result in results for finding in result.findings]
+    findings.sort(key=lambda finding: order.get(finding.file_path, len(order)))
+    parse_errors = [error for result in results for error in result.parse_errors]
+    return ParserResult(findings=findings, parse_errors=parse_errors)
+
+
+def _parse_output(parser: Any, raw_output: Any, context: Dict[str, Any]) -> ParserResult:
+    """Worker: run a parser."""
+    return parser.parse(raw_output, context)
+
+
+def should_offload_parse(raw_output: Any) -> bool:
+    """True for model outputs large enough to parse in the pool."""
+    return (
+        PARSE_OFFLOAD_CHARS > 0
+        and isinstance(raw_output, str)
+        and len(raw_output) >= PARSE_OFFLOAD_CHARS
+        and get_process_pool() is not None
+    )
+
+
+async def parse_in_pool(parser: Any, raw_output: Any, context: Optional[Dict[str, Any]] = None) -> ParserResult:
+    """
+    Parse a model output in a worker process without blocking the event loop.
+
+    Falls back to parsing in process if the parser cannot be sent to a worker
+    or the pool is broken; errors raised by the parser itself propagate.
+    """
+    context = context or {}
+    pool = get_process_pool()
+    if pool is None:
+        return parser.parse(raw_output, context)
+    try:
+        return await asyncio.wrap_future(pool.submit(_parse_output, parser, raw_output, context))
+    except BrokenProcessPool as e:
+        _discard_broken_pool(pool)
+        logger.warning(f"Process pool parse failed, parsing in process: {e}")
+        return parser.parse(raw_output, context)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        # Parser or context could not be pickled for the worker
+        logger.warning(f"Process pool parse failed, parsing in process: {e}")
+        return parser.parse(raw_output, context)
@@ -0,0 +1,240 @@
+"""Opt-in scan profiling: per-stage time spans and worker thread capture.
+
+A ``ScanProfile`` is attached to a scan's EventEmitter when the scan is
+submitted with ``profile=true``. Code on the scan path wraps each stage in
+``emitter.span(stage)``; per-chunk model stages (queue wait, provider call,
+parsing) come from the chunk telemetry instead, so nothing on the model
+event loop needs the emitter. Spans record wall time and the CPU time of the
+thread that ran them. Stages that run concurrently (chunks of one model) are
+summed, so a stage's total can exceed the scan's wall time.
+
+Optionally the scan worker thread is captured as a whole:
+
+- ``stack``: built-in sampler of the worker thread's Python stack, exported
+  as folded stacks (flamegraph.pl, speedscope, inferno)
+- ``cprofile``: cProfile on the worker thread, exported as a pstats file
+  (snakeviz, flameprof)
+- ``pyinstrument``: pyinstrument on the worker thread, exported as a
+  speedscope profile (requires pyinstrument)
+
+Without a sampler the flame graph is built from the stage spans.
+"""
+
+import cProfile
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    from pyinstrument import Profiler as _PyinstrumentProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer as _SpeedscopeRenderer
+except ImportError:  # Optional: pyinstrument sampler
+    _PyinstrumentProfiler = None
+    _SpeedscopeRenderer = None
+
+logger = logging.getLogger(__name__)
+
+STAGES = (
+    "extraction",
+    "chunking",
+    "tool",
+    "prompt_build",
+    "queue_wait",
+    "provider",
+    "parsing",
+    "consensus",
+    "db_write",
+)
+SAMPLERS = ("stack", "cprofile", "pyinstrument")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+class _StackSampler:
+    """Sample one thread's Python stack on a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="aegis-profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ScanProfile:
+    """Stage timings and optional thread capture for one scan."""
+
+    def __init__(
+        self,
+        scan_id: Optional[str] = None,
+        sampler: Optional[str] = None,
+        sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+    ):
+        """
+        Args:
+            scan_id: Scan being profiled (may be set once it is known)
+            sampler: "stack", "cprofile", "pyinstrument" or None (spans only)
+
+        Raises:
+            ValueError: If the sampler is unknown
+        """
+        if sampler is not None and sampler not in SAMPLERS:
+            raise ValueError(f"Unknown profile sampler: {sampler} (expected one of {', '.join(SAMPLERS)})")
+        if sampler == "pyinstrument" and _PyinstrumentProfiler is None:
+            logger.warning("pyinstrument not installed; profiling with the stack sampler")
+            sampler = "stack"
+        self.scan_id = scan_id
+        self.sampler = sampler
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        # (stage, label) -> [count, wall seconds, cpu seconds]
+        self._spans: Dict[Tuple[str, str], list] = {}
+        self._started_at = time.perf_counter()
+        self._finished_at: Optional[float] = None
+        self._capture: Any = None
+        # Sampler output, set by finish()
+        self.capture_data: Optional[bytes] = None
+
+    @contextmanager
+    def span(self, stage: str, label: Optional[str] = None) -> Iterator[None]:
+        """Time a block as ``stage`` (CPU time is the current thread's)."""
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - wall_start, time.thread_time() - cpu_start, label=label)
+
+    def add(
+        self,
+        stage: str,
+        wall_seconds: float,
+        cpu_seconds: float = 0.0,
+        count: int = 1,
+        label: Optional[str] = None,
+    ) -> None:
+        """Add time measured elsewhere (e.g. chunk telemetry) to a stage."""
+        with self._lock:
+            entry = self._spans.setdefault((stage, label or ""), [0, 0.0, 0.0])
+            entry[0] += count
+            entry[1] += max(0.0, wall_seconds)
+            entry[2] += max(0.0, cpu_seconds)
+
+    def start_capture(self) -> None:
+        """Start the configured sampler on the calling (worker) thread."""
+        if self.sampler == "stack":
+            self._capture = _StackSampler(threading.get_ident(), self.sample_interval)
+            self._capture.start()
+        elif self.sampler == "cprofile":
+            self._capture = cProfile.Profile()
+            self._capture.enable()
+        elif self.sampler == "pyinstrument":
+            self._capture = _PyinstrumentProfiler(interval=self.sample_interval)
+            self._capture.start()
+
+    def finish(self) -> None:
+        """Stop the sampler (on the thread that started it) and freeze the totals."""
+        capture, self._capture = self._capture, None
+        self._finished_at = time.perf_counter()
+        if capture is None:
+            return
+        try:
+            if self.sampler == "stack":
+                capture.stop()
+                self.capture_data = capture.folded().encode("utf-8")
+            elif self.sampler == "cprofile":
+                capture.disable()
+                capture.create_stats()
+                self.capture_data = marshal.dumps(capture.stats)
+            elif self.sampler == "pyinstrument":
+                capture.stop()
+                self.capture_data = capture.output(_SpeedscopeRenderer()).encode("utf-8")
+        except Exception as e:
+            logger.warning(f"Failed to collect {self.sampler} profile: {e}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-stage totals (milliseconds) and per-label breakdowns."""
+        end = self._finished_at if self._finished_at is not None else time.perf_counter()
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            spans = sorted(self._spans.items())
+        for (stage, label), (count, wall, cpu) in spans:
+            entry = stages.setdefault(stage, {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "by_label": {}})
+            entry["count"] += count
+            entry["wall_ms"] += wall * 1000
+            entry["cpu_ms"] += cpu * 1000
+            if label:
+                entry["by_label"][label] = {"count": count, "wall_ms": round(wall * 1000, 2), "cpu_ms": round(cpu * 1000, 2)}
+        for entry in stages.values():
+            entry["wall_ms"] = round(entry["wall_ms"], 2)
+            entry["cpu_ms"] = round(entry["cpu_ms"], 2)
+            if not entry["by_label"]:
+                del entry["by_label"]
+        ordered = {stage: stages[stage] for stage in STAGES if stage in stages}
+        ordered.update({stage: entry for stage, entry in stages.items() if stage not in ordered})
+        return {
+            "scan_id": self.scan_id,
+            "finished": self._finished_at is not None,
+            "wall_ms": round((end - self._started_at) * 1000, 2),
+            "sampler": self.sampler,
+            "stages": ordered,
+        }
+
+    def folded_spans(self) -> str:
+        """Stage spans as folded stacks weighted by wall milliseconds."""
+        lines = []
+        with self._lock:
+            spans = sorted(self._spans.items())
+        for (stage, label), (_, wall, _) in spans:
+            weight = int(round(wall * 1000))
+            if weight:
+                path = f"scan;{stage};{label}" if label else f"scan;{stage}"
+                lines.append(f"{path} {weight}\n")
+        return "".join(lines)
+
+    def flamegraph(self) -> Tuple[bytes, str, str]:
+        """
+        Flame-graph-compatible export.
+
+        Returns:
+            (data, mimetype, file extension)
+        """
+        return export_flamegraph(self.sampler, self.capture_data, self.folded_spans())
+
+
+def export_flamegraph(sampler: Optional[str], capture: Optional[bytes], folded_spans: str) -> Tuple[bytes, str, str]:
+    """Pick the download format for a stored profile (see ScanProfile.flamegraph)."""
+    if capture and sampler == "cprofile":
+        return capture, "application/octet-stream", "prof"
+    if capture and sampler == "pyinstrument":
+        return capture, "application/json", "speedscope.json"
+    if capture and sampler == "stack":
+        return capture, "text/plain", "folded"
+    return folded_spans.encode("utf-8"), "text/plain", "folded"
@@ -5,12 +5,17 @@ import logging
 import os
 from typing import Any, AsyncIterator, Dict, Optional
 
+from aegis.models.usage import report_usage
+
 logger = logging.getLogger(__name__)
 
 
 class AnthropicProvider:
     """Provider for Anthropic API (Claude 3 Opus, Sonnet, Haiku)."""
 
+    # Prompt caching via cache_control breakpoints on system / prompt prefix
+    supports_prompt_cache = True
+
     def __init__(
         self,
         model_name: str,
@@ -63,6 +68,7 @@ class AnthropicProvider:
         max_tokens: int = 4096,
         top_p: float = 1.0,
         stream: bool = False,
+        cache_prefix: Optional[str] = None,
         **kwargs,
     ) -> str:
         """
@@ -75,6 +81,9 @@ class AnthropicProvider:
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
             stream: Enable streaming (not yet implemented)
+            cache_prefix: Static leading part of ``prompt``. When not None,
+                cache_control breakpoints are placed after the system prompt
+                and after this prefix ("" caches the system prompt only)
             **kwargs: Additional Anthropic API parameters
 
         Returns:
@@ -84,7 +93,7 @@ class AnthropicProvider:
             # Anthropic uses system parameter separately
             create_params = {
                 "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": [{"role": "user", "content": build_cached_content(prompt, cache_prefix)}],
                 "temperature": temperature,
                 "max_tokens": max_tokens,
                 "top_p": top_p,
@@ -92,7 +101,12 @@ class AnthropicProvider:
             }
 
             if system_prompt:
-                create_params["system"] = system_prompt
+                if cache_prefix is not None:
+                    create_params["system"] = [
+                        {"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}
+                    ]
+                else:
+                    create_params["system"] = system_prompt
 
             response = await self.client.messages.create(**create_params)
 
@@ -105,6 +119,7 @@ class AnthropicProvider:
                 f"input_tokens={usage.input_tokens}, "
                 f"output_tokens={usage.output_tokens}"
             )
+            self._report_usage(usage)
 
             return content
 
@@ -121,6 +136,18 @@ class AnthropicProvider:
             logger.error(f"Anthropic provider error: {e}")
             raise
 
+    @staticmethod
+    def _report_usage(usage: Any) -> None:
+        # input_tokens excludes cache reads/writes; report the full prompt size
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        report_usage(
+            usage.input_tokens + cache_read + cache_write,
+            usage.output_tokens,
+            cached_tokens=cache_read,
+            cache_write_tokens=cache_write,
+        )
+
     async def generate_stream(
         self,
         prompt: str,
@@ -128,6 +155,7 @@ class AnthropicProvider:
         temperature: float = 0.1,
         max_tokens: int = 4096,
         top_p: float = 1.0,
+        cache_prefix: Optional[str] = None,
         **kwargs,
     ) -> AsyncIterator[str]:
         """
@@ -139,6 +167,7 @@ class AnthropicProvider:
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
+            cache_prefix: Static prompt prefix to cache (see generate())
             **kwargs: Additional Anthropic API parameters
 
         Yields:
@@ -147,7 +176,7 @@ class AnthropicProvider:
         try:
             create_params = {
                 "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": [{"role": "user", "content": build_cached_content(prompt, cache_prefix)}],
                 "temperature": temperature,
                 "max_tokens": max_tokens,
                 "top_p": top_p,
@@ -155,11 +184,19 @@ class AnthropicProvider:
             }
 
             if system_prompt:
-                create_params["system"] = system_prompt
+                if cache_prefix is not None:
+                    create_params["system"] = [
+                        {"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}
+                    ]
+                else:
+                    create_params["system"] = system_prompt
 
             async with self.client.messages.stream(**create_params) as stream:
                 async for text in stream.text_stream:
                     yield text
+                # Only reached when the caller consumed the whole stream
+                message = await stream.get_final_message()
+                self._report_usage(message.usage)
 
         except Exception as e:
             logger.error(f"Anthropic streaming error: {e}")
@@ -206,14 +243,43 @@ ANTHROPIC_PRICING = {
 }
 
 
-def calculate_cost(model_name: str, input_tokens: int, output_tokens: int) -> float:
+# Prompt cache pricing relative to the base input price
+ANTHROPIC_CACHE_READ_MULTIPLIER = 0.1
+ANTHROPIC_CACHE_WRITE_MULTIPLIER = 1.25
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def build_cached_content(prompt: str, cache_prefix: Optional[str]) -> Any:
+    """
+    Split a user prompt into a cached static block and a variable block.
+
+    Returns the plain string when there is no usable prefix.
+    """
+    if not cache_prefix or not prompt.startswith(cache_prefix) or len(cache_prefix) == len(prompt):
+        return prompt
+    return [
+        {"type": "text", "text": cache_prefix, "cache_control": CACHE_CONTROL},
+        {"type": "text", "text": prompt[len(cache_prefix):]},
+    ]
+
+
+def calculate_cost(
+    model_name: str,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0,
+    cache_write_tokens: int = 0,
+) -> float:
     """
     Calculate cost for Anthropic API call.
 
     Args:
         model_name: Anthropic model name
-        input_tokens: Number of input tokens
+        input_tokens: Number of input tokens (including cache reads/writes)
         output_tokens: Number of output tokens
+        cached_tokens: Input tokens read from the prompt cache
+        cache_write_tokens: Input tokens written to the prompt cache
 
     Returns:
         Cost in USD
@@ -223,6 +289,9 @@ def calculate_cost(model_name: str, input_tokens: int, output_tokens: int) -> fl
         logger.warning(f"No pricing data for model: {model_name}")
         return 0.0
 
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
+    uncached = max(0, input_tokens - cached_tokens - cache_write_tokens)
+    input_cost = (uncached / 1_000_000) * pricing["input"]
+    input_cost += (cached_tokens / 1_000_000) * pricing["input"] * ANTHROPIC_CACHE_READ_MULTIPLIER
+    input_cost += (cache_write_tokens / 1_000_000) * pricing["input"] * ANTHROPIC_CACHE_WRITE_MULTIPLIER
     output_cost = (output_tokens / 1_000_000) * pricing["output"]
     return input_cost + output_cost
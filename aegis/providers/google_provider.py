@@ -5,6 +5,8 @@ import logging
 import os
 from typing import Any, AsyncIterator, Dict, Optional
 
+from aegis.models.usage import report_usage
+
 logger = logging.getLogger(__name__)
 
 
@@ -105,6 +107,7 @@ class GoogleProvider:
                     f"candidates_tokens={usage.candidates_token_count}, "
                     f"total_tokens={usage.total_token_count}"
                 )
+                report_usage(usage.prompt_token_count, usage.candidates_token_count)
 
             return content
 
@@ -150,7 +153,8 @@ class GoogleProvider:
                 **kwargs,
             )
 
-            # Run sync streaming in executor
+            # The SDK stream is blocking: start it and pull every chunk in a
+            # worker thread so the shared model event loop keeps serving others
             response = await asyncio.to_thread(
                 self.model.generate_content,
                 full_prompt,
@@ -158,9 +162,17 @@ class GoogleProvider:
                 stream=True,
             )
 
-            for chunk in response:
-                if chunk.text:
-                    yield chunk.text
+            chunks = iter(response)
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                    if chunk is None:
+                        break
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                # Closed early (aclose()): cancel the underlying gRPC stream
+                _cancel_stream(response)
 
         except Exception as e:
             logger.error(f"Google streaming error: {e}")
@@ -185,6 +197,18 @@ class GoogleProvider:
         pass
 
 
+def _cancel_stream(response: Any) -> None:
+    """Best-effort stop of a streaming GenerateContentResponse."""
+    for target in (getattr(response, "_iterator", None), response):
+        cancel = getattr(target, "cancel", None) or getattr(target, "close", None)
+        if callable(cancel):
+            try:
+                cancel()
+            except Exception as e:
+                logger.debug(f"Could not cancel Google stream: {e}")
+            return
+
+
 # Model pricing (USD per 1M tokens) - Updated 2025-01
 # Note: Gemini pricing varies by context length
 GOOGLE_PRICING = {
@@ -4,11 +4,15 @@ import logging
 import os
 from typing import Any, Dict, Optional, List
 import asyncio
+import threading
 from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
-# Lazy imports for transformers/torch
+# transformers/torch and friends are imported on first use (a provider being
+# created); importing this module stays cheap for Ollama/cloud-only setups
+_backend_lock = threading.Lock()
+_backend_loaded = False
 _transformers_available = False
 _pipeline = None
 _torch = None
@@ -21,50 +25,70 @@ _AutoModelForCausalLM = None
 _PeftModel = None
 _PeftConfig = None
 
-# Force transformers to prefer PyTorch; avoid pulling in TF/Keras when not needed
-os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
-
-try:
-    from transformers import pipeline as _hf_pipeline
-    from transformers import AutoTokenizer as _auto_tok
-    from transformers import AutoModelForCausalLM as _auto_causal
-    import torch as _torch_module
-    _transformers_available = True
-    _pipeline = _hf_pipeline
-    _AutoTokenizer = _auto_tok
-    _AutoModelForCausalLM = _auto_causal
-    _torch = _torch_module
-    try:
-        _torch_cuda_available = bool(
-            hasattr(_torch, "cuda")
-            and hasattr(_torch.cuda, "is_available")
-            and _torch.cuda.is_available()
-        )
-    except Exception:
-        _torch_cuda_available = False
-    try:
-        import accelerate  # noqa: F401
-        _accelerate_available = True
-    except Exception:
-        _accelerate_available = False
-    try:
-        import bitsandbytes  # noqa: F401
-        _bitsandbytes_available = True
-    except Exception:
-        _bitsandbytes_available = False
-    try:
-        from peft import PeftModel as _peft_model, PeftConfig as _peft_config
-        _peft_available = True
-        _PeftModel = _peft_model
-        _PeftConfig = _peft_config
-    except Exception:
-        _peft_available = False
-except ImportError:
-    logger.warning(
-        "transformers or torch not installed. "
-        "HuggingFace models will not be available. "
-        "Install with: pip install transformers torch"
-    )
+
+def _load_hf_backend() -> bool:
+    """
+    Import transformers, torch and the optional accelerate/bitsandbytes/peft once.
+
+    Returns:
+        True if transformers and torch are available
+    """
+    global _backend_loaded, _transformers_available, _pipeline, _torch, _torch_cuda_available
+    global _accelerate_available, _bitsandbytes_available, _peft_available
+    global _AutoTokenizer, _AutoModelForCausalLM, _PeftModel, _PeftConfig
+
+    with _backend_lock:
+        if _backend_loaded:
+            return _transformers_available
+        _backend_loaded = True
+
+        # Force transformers to prefer PyTorch; avoid pulling in TF/Keras when not needed
+        os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
+
+        try:
+            from transformers import pipeline as _hf_pipeline
+            from transformers import AutoTokenizer as _auto_tok
+            from transformers import AutoModelForCausalLM as _auto_causal
+            import torch as _torch_module
+        except ImportError:
+            logger.warning(
+                "transformers or torch not installed. "
+                "HuggingFace models will not be available. "
+                "Install with: pip install transformers torch"
+            )
+            return False
+
+        _transformers_available = True
+        _pipeline = _hf_pipeline
+        _AutoTokenizer = _auto_tok
+        _AutoModelForCausalLM = _auto_causal
+        _torch = _torch_module
+        try:
+            _torch_cuda_available = bool(
+                hasattr(_torch, "cuda")
+                and hasattr(_torch.cuda, "is_available")
+                and _torch.cuda.is_available()
+            )
+        except Exception:
+            _torch_cuda_available = False
+        try:
+            import accelerate  # noqa: F401
+            _accelerate_available = True
+        except Exception:
+            _accelerate_available = False
+        try:
+            import bitsandbytes  # noqa: F401
+            _bitsandbytes_available = True
+        except Exception:
+            _bitsandbytes_available = False
+        try:
+            from peft import PeftModel as _peft_model, PeftConfig as _peft_config
+            _peft_available = True
+            _PeftModel = _peft_model
+            _PeftConfig = _peft_config
+        except Exception:
+            _peft_available = False
+        return True
 
 
 class HFLocalProvider:
@@ -96,6 +120,7 @@ class HFLocalProvider:
             device: Device to run on ('cpu', 'cuda', or None for auto)
             **kwargs: Additional arguments for pipeline
         """
+        _load_hf_backend()
         self.model_id = model_id
         self.task_type = task_type
         self.device = device or ("cuda" if _transformers_available and _torch_cuda_available else "cpu")
@@ -1,16 +1,23 @@
 """OpenAI API provider for GPT models."""
 
 import asyncio
+import hashlib
 import logging
 import os
 from typing import Any, AsyncIterator, Dict, Optional
 
+from aegis.models.usage import report_usage
+
 logger = logging.getLogger(__name__)
 
 
 class OpenAIProvider:
     """Provider for OpenAI API (GPT-3.5, GPT-4, GPT-4-Turbo)."""
 
+    # OpenAI caches identical prompt prefixes automatically; callers opt in by
+    # passing cache_prefix so requests sharing a prefix are routed together.
+    supports_prompt_cache = True
+
     def __init__(
         self,
         model_name: str,
@@ -67,6 +74,7 @@ class OpenAIProvider:
         max_tokens: int = 2048,
         top_p: float = 1.0,
         stream: bool = False,
+        cache_prefix: Optional[str] = None,
         **kwargs,
     ) -> str:
         """
@@ -79,6 +87,8 @@ class OpenAIProvider:
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
             stream: Enable streaming (not yet implemented)
+            cache_prefix: Static leading part of ``prompt``; when set, a
+                prompt_cache_key derived from it and the system prompt is sent
             **kwargs: Additional OpenAI API parameters
 
         Returns:
@@ -89,6 +99,11 @@ class OpenAIProvider:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        if cache_prefix is not None:
+            extra_body = dict(kwargs.pop("extra_body", None) or {})
+            extra_body.setdefault("prompt_cache_key", prompt_cache_key(self.model_name, system_prompt, cache_prefix))
+            kwargs["extra_body"] = extra_body
+
         try:
             response = await self.client.chat.completions.create(
                 model=self.model_name,
@@ -109,6 +124,12 @@ class OpenAIProvider:
                 f"completion_tokens={usage.completion_tokens}, "
                 f"total_tokens={usage.total_tokens}"
             )
+            details = getattr(usage, "prompt_tokens_details", None)
+            report_usage(
+                usage.prompt_tokens,
+                usage.completion_tokens,
+                cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+            )
 
             return content
 
@@ -132,17 +153,22 @@ class OpenAIProvider:
         temperature: float = 0.1,
         max_tokens: int = 2048,
         top_p: float = 1.0,
+        cache_prefix: Optional[str] = None,
         **kwargs,
     ) -> AsyncIterator[str]:
         """
         Generate streaming completion from OpenAI API.
 
+        Usage is requested in the final chunk and reported when the stream is
+        consumed to the end; a stream closed early reports nothing.
+
         Args:
             prompt: User prompt
             system_prompt: Optional system prompt
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
+            cache_prefix: Static leading part of ``prompt`` (see generate())
             **kwargs: Additional OpenAI API parameters
 
         Yields:
@@ -153,6 +179,12 @@ class OpenAIProvider:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        if cache_prefix is not None:
+            extra_body = dict(kwargs.pop("extra_body", None) or {})
+            extra_body.setdefault("prompt_cache_key", prompt_cache_key(self.model_name, system_prompt, cache_prefix))
+            kwargs["extra_body"] = extra_body
+        kwargs.setdefault("stream_options", {"include_usage": True})
+
         try:
             stream = await self.client.chat.completions.create(
                 model=self.model_name,
@@ -165,8 +197,16 @@ class OpenAIProvider:
             )
 
             async for chunk in stream:
-                if chunk.choices[0].delta.content:
+                if chunk.choices and chunk.choices[0].delta.content:
                     yield chunk.choices[0].delta.content
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    details = getattr(usage, "prompt_tokens_details", None)
+                    report_usage(
+                        usage.prompt_tokens,
+                        usage.completion_tokens,
+                        cached_tokens=getattr(details, "cached_tokens", 0) or 0,
+                    )
 
         except Exception as e:
             logger.error(f"OpenAI streaming error: {e}")
@@ -214,14 +254,30 @@ OPENAI_PRICING = {
 }
 
 
-def calculate_cost(model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
+# Cached prompt tokens are billed at this fraction of the input price
+OPENAI_CACHED_INPUT_MULTIPLIER = 0.5
+
+
+def prompt_cache_key(model_name: str, system_prompt: Optional[str], cache_prefix: str) -> str:
+    """Stable routing key for requests that share a system prompt and prompt prefix."""
+    digest = hashlib.sha1(f"{model_name}\0{system_prompt or ''}\0{cache_prefix}".encode("utf-8"))
+    return f"aegis-{digest.hexdigest()[:16]}"
+
+
+def calculate_cost(
+    model_name: str,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cached_tokens: int = 0,
+) -> float:
     """
     Calculate cost for OpenAI API call.
 
     Args:
         model_name: OpenAI model name
-        prompt_tokens: Number of input tokens
+        prompt_tokens: Number of input tokens (including cached)
         completion_tokens: Number of output tokens
+        cached_tokens: Input tokens served from the prompt cache
 
     Returns:
         Cost in USD
@@ -231,6 +287,8 @@ def calculate_cost(model_name: str, prompt_tokens: int, completion_tokens: int)
         logger.warning(f"No pricing data for model: {model_name}")
         return 0.0
 
-    input_cost = (prompt_tokens / 1000) * pricing["input"]
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    input_cost = ((prompt_tokens - cached_tokens) / 1000) * pricing["input"]
+    input_cost += (cached_tokens / 1000) * pricing["input"] * OPENAI_CACHED_INPUT_MULTIPLIER
     output_cost = (completion_tokens / 1000) * pricing["output"]
     return input_cost + output_cost
@@ -3,6 +3,7 @@ import os
 import json
 import uuid
 import threading
+from contextlib import nullcontext
 from typing import Any, Dict, List
 from flask import (
     Blueprint,
@@ -24,7 +25,7 @@ from aegis.data_models import ScanResult, Finding
 from aegis.models.registry import ModelRegistryV2 as NewModelRegistry
 from aegis.models.schema import ModelStatus
 from aegis.services.scan_service import ScanService, ScanState
-from aegis.services.scan_worker import ScanJob
+from aegis.services.scan_worker import ScanJob, resolve_priority
 
 main_bp = Blueprint("main", __name__)
 
@@ -70,6 +71,10 @@ def init_scan_worker(app) -> None:
             scan_service=_scan_service,
             use_v2=_use_v2,
             get_v2_repositories=get_v2_repositories,
+            workers=app.config.get("SCAN_WORKERS", 4),
+            model_slots=app.config.get("SCAN_MODEL_SLOTS", 1),
+            lease_seconds=app.config.get("SCAN_JOB_LEASE_SECONDS", 60),
+            max_attempts=app.config.get("SCAN_JOB_MAX_ATTEMPTS", 3),
         )
         _scan_worker.start(app)
         _scan_worker.requeue_pending()
@@ -127,6 +132,24 @@ def settings_page() -> str:
     return redirect(url_for("main.models_page"))
 
 
+def _profile_from_form(data: Dict[str, str]) -> Any:
+    """
+    Build a ScanProfile from ``profile``/``profile_sampler`` form fields.
+
+    Returns:
+        ScanProfile, or None when profiling was not requested
+
+    Raises:
+        ValueError: If profile_sampler is unknown
+    """
+    sampler = data.get("profile_sampler") or None
+    if str(data.get("profile", "")).lower() not in ("1", "true", "yes") and not sampler:
+        return None
+    from aegis.profiling import ScanProfile
+
+    return ScanProfile(sampler=sampler)
+
+
 # API Routes
 # All model management endpoints moved to aegis/api/routes_models.py
 @main_bp.route("/api/scan", methods=["POST"])
@@ -145,6 +168,14 @@ def create_scan() -> Any:
     # CWE IDs are auto-selected by language, no need for user input
     consensus_strategy = data.get("consensus_strategy", "union")
     judge_model_id = data.get("judge_model_id")
+    scan_mode = data.get("scan_mode", "interactive")
+    if scan_mode not in ("interactive", "batch"):
+        return jsonify({"error": f"Invalid scan_mode: {scan_mode}"}), 400
+    try:
+        profile = _profile_from_form(data)
+        priority = resolve_priority(data.get("priority"), scan_mode)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     filepath = None
     try:
@@ -159,7 +190,8 @@ def create_scan() -> Any:
         debug_scan_log(f"[scan-debug] upload saved: {filepath} size={file_size}")
 
         # Extract source files
-        source_files = extract_source_files(filepath)
+        with profile.span("extraction", "upload") if profile is not None else nullcontext():
+            source_files = extract_source_files(filepath)
         debug_scan_log(f"[scan-debug] source files extracted: {len(source_files)}")
 
         # Validate selected models against new registry
@@ -178,6 +210,9 @@ def create_scan() -> Any:
         # Generate scan ID
         scan_id = str(uuid.uuid4())
         _scan_status[scan_id] = "pending"
+        if profile is not None:
+            profile.scan_id = scan_id
+            _scan_state.profiles[scan_id] = profile
 
         # Create cancel event for this scan
         _scan_cancel_events[scan_id] = threading.Event()
@@ -194,6 +229,14 @@ def create_scan() -> Any:
                 }
                 if judge_model_id:
                     pipeline_config["judge_model_id"] = judge_model_id
+                if scan_mode != "interactive":
+                    pipeline_config["scan_mode"] = scan_mode
+                if data.get("priority"):
+                    pipeline_config["priority"] = priority
+                if profile is not None:
+                    pipeline_config["profile"] = True
+                    if profile.sampler:
+                        pipeline_config["profile_sampler"] = profile.sampler
 
                 scan_repo.create(
                     scan_id=scan_id,
@@ -202,15 +245,16 @@ def create_scan() -> Any:
                     upload_filename=filename
                 )
 
-                for file_path, content in source_files.items():
-                    language = detect_language(file_path)
-                    scan_repo.add_file(scan_id, file_path, content, language)
+                with profile.span("db_write", "upload") if profile is not None else nullcontext():
+                    for file_path, content in source_files.items():
+                        language = detect_language(file_path)
+                        scan_repo.add_file(scan_id, file_path, content, language)
 
-                scan_repo.update_progress(
-                    scan_id,
-                    total_files=len(source_files),
-                    processed_files=0
-                )
+                    scan_repo.update_progress(
+                        scan_id,
+                        total_files=len(source_files),
+                        processed_files=0
+                    )
             except Exception as e:
                 print(f"Warning: Failed to create scan record: {e}")
 
@@ -229,6 +273,9 @@ def create_scan() -> Any:
             model_ids=valid_model_ids,
             consensus_strategy=consensus_strategy,
             judge_model_id=judge_model_id,
+            scan_mode=scan_mode,
+            profile=profile,
+            priority=priority,
         ))
         debug_scan_log(f"[scan-debug] scan enqueued: {scan_id}")
 
@@ -420,6 +467,8 @@ def retry_scan(scan_id: str) -> Any:
                 model_ids=model_ids,
                 consensus_strategy=consensus_strategy,
                 judge_model_id=judge_model_id,
+                scan_mode=pipeline_config.get("scan_mode", "interactive"),
+                priority=pipeline_config.get("priority"),
             ))
 
             return jsonify({
@@ -531,6 +580,15 @@ def clear_all_scans() -> Any:
     })
 
 
+@main_bp.route("/api/scans/queue", methods=["GET"])
+def get_scan_queue() -> Any:
+    """Pending and running scans on the scan worker pool."""
+    worker = get_scan_worker()
+    if worker is None:
+        return jsonify({"workers": 0, "pending": [], "running": [], "model_slots_in_use": {}})
+    return jsonify(worker.stats())
+
+
 @main_bp.route("/api/scan/<scan_id>", methods=["GET"])
 def get_scan(scan_id: str) -> Any:
     """Get scan results."""
@@ -591,37 +649,58 @@ def stream_scan_progress(scan_id: str) -> Any:
     - step_start: Pipeline step started
     - progress: Task progress update
     - finding: New finding discovered
+    - findings_batch: Several findings at once ({"findings": [...], "count": n})
     - step_completed: Pipeline step completed
     - completed: Scan completed
     - error: Error occurred
     - cancelled: Scan cancelled
+    - lagging: Client fell too far behind and is disconnected; EventSource
+      reconnects with Last-Event-ID and the stream resumes from history
+    - resync: Events after Last-Event-ID are no longer in history; refetch
+      the scan's results (GET /api/scan/<scan_id>)
     """
-    from aegis.sse.stream import SSEManager, format_sse_message, format_keepalive
+    from aegis.sse.stream import (
+        SSEManager,
+        format_keepalive,
+        format_sse_message,
+        history_events,
+        parse_last_event_id,
+    )
     from aegis.events import get_event_bus  # Import EventBus
 
+    # Browsers send the last id they saw when EventSource reconnects
+    last_event_id = parse_last_event_id(request.headers.get("Last-Event-ID"), request.args.get("last_event_id"))
+
+    # Hand the stream to the asyncio SSE server when it is running and has a
+    # public URL, so no WSGI thread is held for the length of the scan
+    public_url = current_app.config.get("SSE_PUBLIC_URL")
+    if public_url and current_app.config.get("SSE_SERVER_ACTIVE_PORT"):
+        query = f"?last_event_id={last_event_id}" if last_event_id else ""
+        return redirect(f"{public_url.rstrip('/')}/api/scan/{scan_id}/stream{query}", code=307)
+
     # Get or create SSE manager instance
     if not hasattr(current_app, 'sse_manager'):
         current_app.sse_manager = SSEManager()
 
     sse_manager = current_app.sse_manager
     event_bus = get_event_bus()  # Get event bus instance
+    event_bus.attach_sse_manager(sse_manager)
 
-    # Connect client
-    connection = sse_manager.connect(scan_id=scan_id)
+    # Connect client (before reading history, so no event falls in between)
+    connection = sse_manager.connect(scan_id=scan_id, last_event_id=last_event_id)
 
     def event_stream():
         """Generate SSE events."""
         try:
-            # 1. Replay history first
-            history = event_bus.get_history(scan_id=scan_id)
+            # 1. Replay history the client has not seen yet
+            history = history_events(event_bus, scan_id, last_event_id)
+            if history:
+                connection.mark_replayed(history[-1]["id"])
             for event in history:
-                # Map event type to SSE event name
-                sse_event_type = event_bus._map_event_to_sse(event.type)
-                msg = format_sse_message(
-                    event_type=sse_event_type,
-                    data=event.data
-                )
-                yield msg
+                yield format_sse_message(event_type=event['event'], data=event['data'], event_id=event['id'])
+                if event['event'] in ['completed', 'error', 'cancelled']:
+                    # Scan already finished
+                    return
 
             # 2. Stream new events
             while True:
@@ -633,12 +712,14 @@ def stream_scan_progress(scan_id: str) -> Any:
                     for event in events:
                         msg = format_sse_message(
                             event_type=event['event'],
-                            data=event['data']
+                            data=event['data'],
+                            event_id=event.get('id'),
                         )
                         yield msg
 
-                        # Check for terminal events
-                        if event['event'] in ['completed', 'error', 'cancelled']:
+                        # Check for terminal events (a lagging client reconnects
+                        # and resumes from history)
+                        if event['event'] in ['completed', 'error', 'cancelled', 'lagging']:
                             # Send one last event and close
                             return
                 else:
@@ -647,10 +728,11 @@ def stream_scan_progress(scan_id: str) -> Any:
 
         except GeneratorExit:
             # Client disconnected
-            sse_manager.disconnect(scan_id=scan_id, client_id=connection.client_id)
+            pass
         except Exception as e:
             logger = current_app.logger
             logger.error(f"SSE stream error for scan {scan_id}: {e}")
+        finally:
             sse_manager.disconnect(scan_id=scan_id, client_id=connection.client_id)
 
     return Response(
@@ -664,6 +746,78 @@ def stream_scan_progress(scan_id: str) -> Any:
     )
 
 
+@main_bp.route("/api/scan/<scan_id>/telemetry", methods=["GET"])
+def get_scan_telemetry(scan_id: str) -> Any:
+    """Per-model latency percentiles and throughput from chunk telemetry."""
+    from aegis.database.repositories import TelemetryRepository
+    from aegis.models.telemetry import get_telemetry_writer
+
+    try:
+        # Include rows still buffered by a running scan
+        get_telemetry_writer().flush()
+        models = TelemetryRepository().get_latency_stats(scan_id)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        "scan_id": scan_id,
+        "status": _scan_status.get(scan_id),
+        "models": models,
+    })
+
+
+@main_bp.route("/api/scan/<scan_id>/profile", methods=["GET"])
+def get_scan_profile(scan_id: str) -> Any:
+    """Per-stage wall/CPU times of a scan submitted with profile=true."""
+    profile = _scan_state.profiles.get(scan_id)
+    if profile is not None:
+        return jsonify(profile.summary())
+
+    stored = _get_stored_profile(scan_id)
+    if stored is None:
+        return jsonify({"error": "No profile for this scan"}), 404
+    return jsonify(stored["summary"])
+
+
+@main_bp.route("/api/scan/<scan_id>/profile/flamegraph", methods=["GET"])
+def download_scan_profile(scan_id: str) -> Any:
+    """
+    Download a scan profile in a flame-graph-compatible format.
+
+    Folded stacks (flamegraph.pl, speedscope) for span-only and stack-sampled
+    profiles, a pstats file for cProfile, speedscope JSON for pyinstrument.
+    """
+    from aegis.profiling import export_flamegraph
+
+    profile = _scan_state.profiles.get(scan_id)
+    if profile is not None:
+        data, mimetype, extension = profile.flamegraph()
+    else:
+        stored = _get_stored_profile(scan_id)
+        if stored is None:
+            return jsonify({"error": "No profile for this scan"}), 404
+        data, mimetype, extension = export_flamegraph(
+            stored["sampler"], stored["capture_data"], stored["folded_spans"] or ""
+        )
+
+    return Response(
+        data,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename=aegis_profile_{scan_id}.{extension}"},
+    )
+
+
+def _get_stored_profile(scan_id: str) -> Any:
+    if not _use_v2:
+        return None
+    scan_repo, _ = get_v2_repositories()
+    try:
+        return scan_repo.get_profile(scan_id)
+    except Exception as e:
+        print(f"Warning: Failed to load scan profile: {e}")
+        return None
+
+
 @main_bp.route("/api/scan/<scan_id>/file/<path:file_path>", methods=["GET"])
 def get_scan_file(scan_id: str, file_path: str) -> Any:
     """Get source code content for a file in a scan."""
@@ -804,6 +958,10 @@ def create_pipeline_scan() -> Any:
 
     data = request.form.to_dict()
     pipeline_name = data.get("pipeline", "classic")  # Default to classic
+    try:
+        profile = _profile_from_form(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     filepath = None
     try:
@@ -824,8 +982,13 @@ def create_pipeline_scan() -> Any:
         filepath = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
         file.save(filepath)
 
+        # Pipeline scans run on this request thread, so it is the one captured
+        if profile is not None:
+            profile.start_capture()
+
         # Extract source files
-        source_files = extract_source_files(filepath)
+        with profile.span("extraction", "upload") if profile is not None else nullcontext():
+            source_files = extract_source_files(filepath)
 
         # Execute pipeline
         executor = PipelineExecutor()
@@ -835,6 +998,7 @@ def create_pipeline_scan() -> Any:
             pipeline=pipeline,
             source_files=source_files,
             scan_id=scan_id,
+            profile=profile,
         )
 
         # Get final findings
@@ -860,30 +1024,36 @@ def create_pipeline_scan() -> Any:
         if _use_v2:
             scan_repo, finding_repo = get_v2_repositories()
             try:
-                # Create scan record with pipeline config
-                scan_repo.create(
-                    scan_id=scan_id,
-                    pipeline_config={
-                        "pipeline_name": pipeline.name,
-                        "pipeline_version": pipeline.version,
-                        "steps": len(pipeline.steps),
-                    },
-                    consensus_strategy=pipeline.name,
-                )
-
-                # Store consensus findings
-                for finding in consensus_findings:
-                    finding_repo.create_consensus_finding(
+                with profile.span("db_write", "findings") if profile is not None else nullcontext():
+                    # Create scan record with pipeline config
+                    scan_repo.create(
                         scan_id=scan_id,
-                        finding=finding,
+                        pipeline_config={
+                            "pipeline_name": pipeline.name,
+                            "pipeline_version": pipeline.version,
+                            "steps": len(pipeline.steps),
+                        },
+                        consensus_strategy=pipeline.name,
                     )
 
-                # Mark scan as completed
-                scan_repo.update_status(scan_id, "completed")
+                    # Store consensus findings
+                    for finding in consensus_findings:
+                        finding_repo.create_consensus_finding(
+                            scan_id=scan_id,
+                            finding=finding,
+                        )
+
+                    # Mark scan as completed
+                    scan_repo.update_status(scan_id, "completed")
 
             except Exception as e:
                 current_app.logger.error(f"Failed to persist pipeline scan to database: {e}")
 
+        if profile is not None:
+            profile.finish()
+            _scan_state.profiles[scan_id] = profile
+            _scan_service.save_profile(scan_id, profile)
+
         # Cleanup
         if filepath and os.path.exists(filepath):
             os.remove(filepath)
@@ -897,6 +1067,8 @@ def create_pipeline_scan() -> Any:
         })
 
     except Exception as e:
+        if profile is not None:
+            profile.finish()
         if filepath and os.path.exists(filepath):
             os.remove(filepath)
         current_app.logger.error(f"Pipeline scan failed: {e}")
@@ -1000,3 +1172,11 @@ def list_scans() -> Any:
 def health_check() -> Any:
     """Health check endpoint."""
     return "OK", 200
+
+
+@main_bp.route("/metrics")
+def metrics_endpoint() -> Any:
+    """Prometheus metrics (scan throughput, model runtimes, queues, SSE, DB)."""
+    from aegis.metrics import CONTENT_TYPE, render_metrics
+
+    return Response(render_metrics(), mimetype=None, content_type=CONTENT_TYPE)
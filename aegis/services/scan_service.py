@@ -1,17 +1,18 @@
 """Scan orchestration service for background execution."""
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Callable, Any, Optional, Iterable
+from typing import Dict, List, Callable, Any, Optional, Iterable, Set
 
 from aegis.consensus.engine import ConsensusEngine
 from aegis.data_models import ScanResult, ModelResponse, Finding
 from aegis.events import EventEmitter
 from aegis.models.engine import ModelExecutionEngine, _candidate_to_finding
 from aegis.models.registry import ModelRegistryV2
+from aegis.models.telemetry import ExecutionRecorder
 from aegis.utils import chunk_file_lines, debug_scan_log
 
 
@@ -21,6 +22,10 @@ class ScanState:
     results: Dict[str, ScanResult]
     status: Dict[str, str]
     cancel_events: Dict[str, threading.Event]
+    # scan_id -> ScanProfile for scans submitted with profiling on
+    profiles: Dict[str, Any] = field(default_factory=dict)
+    # Scans stopped here after their lease passed to another worker; not persisted
+    abandoned: Set[str] = field(default_factory=set)
 
 
 class ScanService:
@@ -48,6 +53,24 @@ class ScanService:
         for i in range(0, len(chunks), batch_size):
             yield chunks[i:i + batch_size]
 
+    def save_profile(self, scan_id: str, profile: Any) -> None:
+        """Store a finished scan profile; it stays in memory if the database is off or fails."""
+        if not self.use_v2:
+            return
+        scan_repo, _ = self.get_v2_repositories()
+        try:
+            scan_repo.save_profile(
+                scan_id,
+                profile.sampler,
+                profile.summary(),
+                profile.folded_spans(),
+                profile.capture_data,
+            )
+        except Exception as e:
+            print(f"Warning: Failed to persist scan profile: {e}")
+            return
+        self.scan_state.profiles.pop(scan_id, None)
+
     def run_background(
         self,
         scan_id: str,
@@ -57,10 +80,31 @@ class ScanService:
         app,
         judge_model_id: Optional[str] = None,
         chunk_size: int = 800,
+        scan_mode: str = "interactive",
+        profile: Optional[Any] = None,
+        model_share: Optional[Callable[[str, int], int]] = None,
     ) -> None:
-        """Execute scan work inside a background thread."""
+        """
+        Execute scan work inside a background thread.
+
+        scan_mode "batch" submits each model's chunks as one provider batch job
+        (offline, cheaper, slower); models without a batch backend fall back to
+        interactive calls.
+
+        With ``profile`` (a ScanProfile), stage spans are recorded and the
+        profile's sampler captures this thread; the profile is stored with the
+        scan when it ends.
+
+        ``model_share(model_id, chunk_workers)`` is asked before each file how
+        many of the model's chunk workers this scan may use; the scan worker
+        pool uses it to split a model fairly between scans running on it.
+        """
         with app.app_context():
-            emitter = EventEmitter(scan_id)
+            emitter = EventEmitter(scan_id, profile=profile)
+            if profile is not None:
+                profile.scan_id = scan_id
+                self.scan_state.profiles[scan_id] = profile
+                profile.start_capture()
             try:
                 processed_files: set[str] = set()
                 cancel_requested = False
@@ -88,6 +132,99 @@ class ScanService:
                 total_work_items = len(model_ids) * len(source_files)
                 processed_items = 0
 
+                def file_chunks(file_path: str, content: str) -> List[Dict[str, Any]]:
+                    with emitter.span("chunking"):
+                        return [
+                            {
+                                "code": chunk_content,
+                                "file_path": file_path,
+                                "line_start": line_start,
+                                "line_end": line_end,
+                                "snippet": chunk_content,
+                                "chunk_index": chunk_index,
+                            }
+                            for chunk_index, (chunk_content, line_start, line_end)
+                            in enumerate(chunk_file_lines(content, chunk_size))
+                        ]
+
+                def record_results(
+                    model_id: str,
+                    batch_results: List[Any],
+                    batch: List[Dict[str, Any]],
+                    already_emitted: Optional[set] = None,
+                ) -> None:
+                    for result, chunk in zip(batch_results, batch):
+                        if result.parse_errors:
+                            raw_snippet = None
+                            if result.raw_output:
+                                raw_snippet = str(result.raw_output)
+                                if len(raw_snippet) > 800:
+                                    raw_snippet = raw_snippet[:800] + "..."
+                            emitter.warning(
+                                "Model parse errors",
+                                {
+                                    "model_id": model_id,
+                                    "file_path": chunk.get("file_path"),
+                                    "line_start": chunk.get("line_start"),
+                                    "line_end": chunk.get("line_end"),
+                                    "errors": result.parse_errors,
+                                    "raw_snippet": raw_snippet,
+                                },
+                            )
+                            debug_scan_log(
+                                f"[scan-debug] parse errors: model={model_id} file={chunk.get('file_path')} "
+                                f"errors={result.parse_errors}"
+                            )
+                        chunk_findings = [_candidate_to_finding(c) for c in result.findings]
+                        per_model_findings[model_id].extend(chunk_findings)
+                        for finding in chunk_findings:
+                            if already_emitted and finding.fingerprint in already_emitted:
+                                continue
+                            emitter.finding_emitted(finding.to_dict(), model_id)
+
+                def run_offline_batch(model: Any, model_id: str, model_name: str) -> None:
+                    nonlocal processed_items
+                    all_chunks: List[Dict[str, Any]] = []
+                    for file_path, content in source_files.items():
+                        processed_files.add(file_path)
+                        all_chunks.extend(file_chunks(file_path, content))
+                    debug_scan_log(
+                        f"[scan-debug] offline batch: {len(all_chunks)} chunks (scan={scan_id}, model={model_id})"
+                    )
+                    base_items = processed_items
+
+                    def on_status(status: Any) -> None:
+                        done = status.completed + status.failed
+                        share = done / status.total if status.total else 0.0
+                        current = base_items + int(share * len(source_files))
+                        emitter.progress_update(
+                            progress_pct=int((current / total_work_items) * 100),
+                            current=current,
+                            total=total_work_items,
+                            message=f"Batch {status.job_id} {status.state} ({done}/{status.total}) [{model_name}]",
+                        )
+
+                    results = engine.run_model_offline_batch_sync(
+                        model,
+                        all_chunks,
+                        model.roles[0] if model.roles else None,
+                        scan_id=scan_id,
+                        on_status=on_status,
+                        cancel_check=lambda: self._is_cancelled(scan_id),
+                    )
+                    processed_items = base_items + len(source_files)
+                    record_results(model_id, results, all_chunks)
+
+                def emit_merged(strategy: str, merged: List[Finding]) -> None:
+                    stats = consensus.last_merge_stats
+                    emitter.findings_merged(
+                        strategy,
+                        len(merged),
+                        clusters=stats.get("clusters"),
+                        input_findings=stats.get("input_findings"),
+                        similarity_merges=stats.get("similarity_merges"),
+                    )
+
                 def finalize_scan(status: str, strategy_override: Optional[str] = None) -> None:
                     nonlocal processed_files, model_responses
                     effective_strategy = strategy_override or (consensus_strategy or "union")
@@ -95,10 +232,12 @@ class ScanService:
                         effective_strategy = "union"
 
                     try:
-                        consensus_findings = consensus.merge(
-                            model_responses,
-                            strategy=effective_strategy,
-                        )
+                        with emitter.span("consensus", effective_strategy):
+                            consensus_findings = consensus.merge(
+                                model_responses,
+                                strategy=effective_strategy,
+                            )
+                        emit_merged(effective_strategy, consensus_findings)
                     except Exception as e:
                         emitter.warning("Consensus failed", {"error": str(e)})
                         consensus_findings = []
@@ -122,28 +261,29 @@ class ScanService:
                     self.scan_state.results[scan_id] = scan_result
                     self.scan_state.status[scan_id] = status
 
-                    if self.use_v2:
+                    if self.use_v2 and scan_id not in self.scan_state.abandoned:
                         scan_repo, finding_repo = self.get_v2_repositories()
                         try:
-                            scan_repo.update_status(scan_id, status)
-                            scan_repo.update_progress(
-                                scan_id,
-                                total_files=len(source_files),
-                                processed_files=len(processed_files) or len(source_files),
-                            )
+                            with emitter.span("db_write", "findings"):
+                                scan_repo.update_status(scan_id, status)
+                                scan_repo.update_progress(
+                                    scan_id,
+                                    total_files=len(source_files),
+                                    processed_files=len(processed_files) or len(source_files),
+                                )
 
-                            finding_repo.create_batch(
-                                scan_result.consensus_findings,
-                                scan_id,
-                                is_consensus=True,
-                            )
-                            for model_id, findings in scan_result.per_model_findings.items():
                                 finding_repo.create_batch(
-                                    findings,
+                                    scan_result.consensus_findings,
                                     scan_id,
-                                    model_id=model_id,
-                                    is_consensus=False,
+                                    is_consensus=True,
                                 )
+                                for model_id, findings in scan_result.per_model_findings.items():
+                                    finding_repo.create_batch(
+                                        findings,
+                                        scan_id,
+                                        model_id=model_id,
+                                        is_consensus=False,
+                                    )
                         except Exception as e:
                             print(f"Warning: Failed to persist scan to database: {e}")
 
@@ -187,8 +327,45 @@ class ScanService:
                         device=device,
                     )
                     model_start_time = time.time()
+                    recorder = ExecutionRecorder(scan_id, model_id, profile=profile)
+
+                    # settings.stream: emit findings while the response streams
+                    # (providers that cannot stream ignore the callback)
+                    streamed: set = set()
+
+                    def emit_streamed(candidate: Any, model_id: str = model_id) -> None:
+                        finding = _candidate_to_finding(candidate)
+                        if finding.fingerprint in streamed:
+                            return  # Re-streamed by a retry after a partial failure
+                        streamed.add(finding.fingerprint)
+                        emitter.finding_emitted(finding.to_dict(), model_id)
+
+                    on_finding = emit_streamed if settings.get("stream") else None
+
+                    if scan_mode == "batch":
+                        if engine.supports_offline_batch(model):
+                            try:
+                                run_offline_batch(model, model_id, model_name)
+                            except Exception as e:
+                                if self._is_cancelled(scan_id):
+                                    cancel_requested = True
+                                else:
+                                    emitter.warning(
+                                        f"Offline batch failed for model {model_id}: {e}",
+                                        {"model_id": model_id},
+                                    )
+                                    debug_scan_log(f"[scan-debug] offline batch failed: {model_id} error={e}")
+                            source_iter = {}
+                        else:
+                            emitter.warning(
+                                f"Model {model_id} has no batch backend; running interactively",
+                                {"model_id": model_id},
+                            )
+                            source_iter = source_files
+                    else:
+                        source_iter = source_files
 
-                    for file_path, content in source_files.items():
+                    for file_path, content in source_iter.items():
                         if cancel_requested or self._is_cancelled(scan_id):
                             cancel_requested = True
                             break
@@ -205,15 +382,7 @@ class ScanService:
                             message=f"Scanning {file_name} [{model_name}]"
                         )
 
-                        chunks: List[Dict[str, Any]] = []
-                        for chunk_content, line_start, line_end in chunk_file_lines(content, chunk_size):
-                            chunks.append({
-                                "code": chunk_content,
-                                "file_path": file_path,
-                                "line_start": line_start,
-                                "line_end": line_end,
-                                "snippet": chunk_content,
-                            })
+                        chunks = file_chunks(file_path, content)
 
                         if not chunks:
                             debug_scan_log(f"[scan-debug] no chunks for {file_path} (scan={scan_id})")
@@ -223,7 +392,11 @@ class ScanService:
                             f"(scan={scan_id}, model={model_id})"
                         )
 
-                        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        file_workers = max_workers
+                        if model_share is not None:
+                            file_workers = max(1, min(max_workers, model_share(model_id, max_workers)))
+
+                        with ThreadPoolExecutor(max_workers=file_workers) as executor:
                             batches = list(self._chunk_batches(chunks, batch_size))
                             debug_scan_log(
                                 f"[scan-debug] submitting {len(batches)} batches "
@@ -235,6 +408,9 @@ class ScanService:
                                     model,
                                     batch,
                                     model.roles[0] if model.roles else None,
+                                    on_finding,
+                                    recorder,
+                                    lambda: self._is_cancelled(scan_id),
                                 )
                                 for batch in batches
                             ]
@@ -250,32 +426,7 @@ class ScanService:
                                     debug_scan_log(f"[scan-debug] batch failed: {model_id} error={e}")
                                     continue
 
-                                for result, chunk in zip(batch_results, batch):
-                                    if result.parse_errors:
-                                        raw_snippet = None
-                                        if result.raw_output:
-                                            raw_snippet = str(result.raw_output)
-                                            if len(raw_snippet) > 800:
-                                                raw_snippet = raw_snippet[:800] + "..."
-                                        emitter.warning(
-                                            "Model parse errors",
-                                            {
-                                                "model_id": model_id,
-                                                "file_path": chunk.get("file_path"),
-                                                "line_start": chunk.get("line_start"),
-                                                "line_end": chunk.get("line_end"),
-                                                "errors": result.parse_errors,
-                                                "raw_snippet": raw_snippet,
-                                            },
-                                        )
-                                        debug_scan_log(
-                                            f"[scan-debug] parse errors: model={model_id} file={chunk.get('file_path')} "
-                                            f"errors={result.parse_errors}"
-                                        )
-                                    chunk_findings = [_candidate_to_finding(c) for c in result.findings]
-                                    per_model_findings[model_id].extend(chunk_findings)
-                                    for finding in chunk_findings:
-                                        emitter.finding_emitted(finding.to_dict(), model_id)
+                                record_results(model_id, batch_results, batch, streamed)
 
                         if cancel_requested:
                             break
@@ -288,6 +439,9 @@ class ScanService:
                         model_id=model_id,
                         findings_count=model_findings_count,
                         latency_ms=model_duration_ms,
+                        input_tokens=recorder.input_tokens,
+                        output_tokens=recorder.output_tokens,
+                        tokens_per_sec=recorder.tokens_per_sec,
                     )
                     emitter.step_completed(
                         step_id=model_id,
@@ -299,7 +453,10 @@ class ScanService:
                         ModelResponse(
                             model_id=model_id,
                             findings=per_model_findings[model_id],
-                            usage={},
+                            usage={
+                                "input_tokens": recorder.input_tokens,
+                                "output_tokens": recorder.output_tokens,
+                            },
                         )
                     )
 
@@ -326,11 +483,14 @@ class ScanService:
                         )
                         consensus_strategy = "union"
 
-                consensus_findings = consensus.merge(
-                    model_responses,
-                    strategy=consensus_strategy or "union",
-                    judge_model=judge_model,
-                )
+                with emitter.span("consensus", consensus_strategy or "union"):
+                    consensus_findings = consensus.merge(
+                        model_responses,
+                        strategy=consensus_strategy or "union",
+                        judge_model=judge_model,
+                        judge_request_params={"scan_id": scan_id, "source_files": source_files},
+                    )
+                emit_merged(consensus_strategy or "union", consensus_findings)
 
                 scan_result = ScanResult(
                     scan_id=scan_id,
@@ -341,6 +501,7 @@ class ScanService:
                         "strategy": consensus_strategy,
                         "files_scanned": len(source_files),
                         "total_findings": len(consensus_findings),
+                        "scan_mode": scan_mode,
                     },
                     source_files=source_files,
                 )
@@ -360,25 +521,26 @@ class ScanService:
                 if self.use_v2:
                     scan_repo, finding_repo = self.get_v2_repositories()
                     try:
-                        scan_repo.update_status(scan_id, "completed")
-                        scan_repo.update_progress(
-                            scan_id,
-                            total_files=len(source_files),
-                            processed_files=len(source_files),
-                        )
+                        with emitter.span("db_write", "findings"):
+                            scan_repo.update_status(scan_id, "completed")
+                            scan_repo.update_progress(
+                                scan_id,
+                                total_files=len(source_files),
+                                processed_files=len(source_files),
+                            )
 
-                        finding_repo.create_batch(
-                            scan_result.consensus_findings,
-                            scan_id,
-                            is_consensus=True,
-                        )
-                        for model_id, findings in scan_result.per_model_findings.items():
                             finding_repo.create_batch(
-                                findings,
+                                scan_result.consensus_findings,
                                 scan_id,
-                                model_id=model_id,
-                                is_consensus=False,
+                                is_consensus=True,
                             )
+                            for model_id, findings in scan_result.per_model_findings.items():
+                                finding_repo.create_batch(
+                                    findings,
+                                    scan_id,
+                                    model_id=model_id,
+                                    is_consensus=False,
+                                )
                     except Exception as e:
                         print(f"Warning: Failed to persist scan to database: {e}")
 
@@ -396,3 +558,6 @@ class ScanService:
                         print(f"Warning: Failed to mark scan failed in database: {err}")
             finally:
                 self.scan_state.cancel_events.pop(scan_id, None)
+                if profile is not None:
+                    profile.finish()
+                    self.save_profile(scan_id, profile)
@@ -1,13 +1,78 @@
-"""Background scan worker with persistent queue support."""
+"""Background scan worker pool with per-model capacity and priorities.
 
+Jobs wait in one pending list ordered by priority (lower runs first;
+interactive uploads before batch scans) and submission order. A worker
+thread takes the first job whose models all have a free scan slot, so scans
+that share no saturated model run concurrently. A job that is blocked keeps
+its models reserved: later jobs may not overtake it on those models, so a
+scan over several busy models is not starved by a stream of smaller ones.
+
+Each model allows ``settings["scan_slots"]`` concurrent scans (default
+``Config.SCAN_MODEL_SLOTS``). Scans sharing a model split its chunk workers
+evenly (see ``ModelCapacity.fair_share``). Slots are counted per process.
+
+With the v2 database the pending list is the durable ``scan_jobs`` table.
+A worker claims a job by taking a lease on it and renews the lease from a
+heartbeat thread while the scan runs. If the worker dies, the lease runs out
+(the visibility timeout) and any worker thread or process on the same
+database claims the job again, up to ``max_attempts`` claims. Jobs that
+cannot be written to the database wait in memory instead.
+"""
+
+from contextlib import nullcontext
 from dataclasses import dataclass
-import queue
+import bisect
+import itertools
+import os
+import socket
 import threading
-from typing import Dict, List, Optional, Any
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Any, Sequence, Tuple
 
+from aegis import metrics
 from aegis.models.registry import ModelRegistryV2
 from aegis.utils import debug_scan_log
 
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "batch": PRIORITY_BATCH}
+
+DEFAULT_WORKERS = 4
+DEFAULT_MODEL_SLOTS = 1
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 5.0
+# Claimable durable jobs looked at per scheduling pass
+CLAIM_WINDOW = 50
+
+# Scan status -> final durable job status
+_JOB_STATUS = {"completed": "done", "failed": "failed", "cancelled": "cancelled"}
+
+
+def resolve_priority(value: Any, scan_mode: str = "interactive") -> int:
+    """
+    Turn a submitted priority ("interactive", "batch" or an integer) into a number.
+
+    Args:
+        value: Requested priority, or None to derive it from the scan mode
+        scan_mode: "interactive" or "batch"
+
+    Returns:
+        Priority (lower runs first)
+
+    Raises:
+        ValueError: If the priority is neither a known name nor an integer
+    """
+    if value is None or value == "":
+        return PRIORITIES.get(scan_mode, PRIORITY_INTERACTIVE)
+    if isinstance(value, str) and value in PRIORITIES:
+        return PRIORITIES[value]
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid priority: {value} (expected interactive, batch or an integer)")
+
 
 @dataclass
 class ScanJob:
@@ -16,55 +81,305 @@ class ScanJob:
     model_ids: List[str]
     consensus_strategy: str
     judge_model_id: Optional[str] = None
+    scan_mode: str = "interactive"
+    # ScanProfile when the scan was submitted with profiling on
+    profile: Optional[Any] = None
+    # Lower runs first; None derives it from scan_mode
+    priority: Optional[int] = None
+    # Set when the job was claimed from the durable queue
+    durable: bool = False
+    attempts: int = 0
+    # Set when a heartbeat found the lease held by another worker
+    lease_lost: bool = False
+
+
+def _job_payload(job: ScanJob) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "models": job.model_ids,
+        "consensus_strategy": job.consensus_strategy,
+        "judge_model_id": job.judge_model_id,
+        "scan_mode": job.scan_mode,
+    }
+    if job.profile is not None:
+        payload["profile"] = True
+        payload["profile_sampler"] = job.profile.sampler
+    return payload
+
+
+def _job_from_row(row: Dict[str, Any]) -> Optional[ScanJob]:
+    payload = row.get("payload") or {}
+    if not payload.get("models"):
+        return None
+    profile = None
+    if payload.get("profile"):
+        # The original capture stayed with the submitting process; profile from here
+        from aegis.profiling import ScanProfile
+
+        profile = ScanProfile(row["scan_id"], sampler=payload.get("profile_sampler"))
+    return ScanJob(
+        scan_id=row["scan_id"],
+        source_files=None,
+        model_ids=list(payload["models"]),
+        consensus_strategy=payload.get("consensus_strategy", "union"),
+        judge_model_id=payload.get("judge_model_id"),
+        scan_mode=payload.get("scan_mode", "interactive"),
+        profile=profile,
+        priority=row.get("priority"),
+        attempts=int(row.get("attempts") or 0),
+    )
+
+
+class ModelCapacity:
+    """Concurrent-scan slots per model, shared by the worker pool."""
+
+    def __init__(self, default_slots: int = DEFAULT_MODEL_SLOTS, slots_for: Optional[Callable[[str], Optional[int]]] = None):
+        """
+        Args:
+            default_slots: Slots for models without their own setting
+            slots_for: Returns a model's configured slots (None for the default)
+        """
+        self.default_slots = max(1, int(default_slots))
+        self._slots_for = slots_for
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def slots(self, model_id: str) -> int:
+        configured = None
+        if self._slots_for is not None:
+            try:
+                configured = self._slots_for(model_id)
+            except Exception as e:
+                print(f"Warning: Failed to read scan slots for model {model_id}: {e}")
+        return max(1, int(configured)) if configured else self.default_slots
+
+    def active(self, model_id: str) -> int:
+        with self._lock:
+            return self._active.get(model_id, 0)
+
+    def is_free(self, model_id: str) -> bool:
+        return self.active(model_id) < self.slots(model_id)
+
+    def acquire(self, model_ids: Sequence[str]) -> None:
+        with self._lock:
+            for model_id in set(model_ids):
+                self._active[model_id] = self._active.get(model_id, 0) + 1
+
+    def release(self, model_ids: Sequence[str]) -> None:
+        with self._lock:
+            for model_id in set(model_ids):
+                remaining = self._active.get(model_id, 0) - 1
+                if remaining > 0:
+                    self._active[model_id] = remaining
+                else:
+                    self._active.pop(model_id, None)
+
+    def fair_share(self, model_id: str, workers: int) -> int:
+        """This scan's share of a model's chunk workers while others use it too."""
+        return max(1, workers // max(1, self.active(model_id)))
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._active)
+
+
+def _model_scan_slots(model_id: str) -> Optional[int]:
+    model = ModelRegistryV2().get_model(model_id)
+    if model is None:
+        return None
+    return (model.settings or {}).get("scan_slots")
 
 
 class ScanWorker:
-    """Single-threaded background worker for scan jobs."""
+    """Pool of background worker threads for scan jobs."""
 
-    def __init__(self, scan_service: Any, use_v2: bool, get_v2_repositories: Any):
+    def __init__(
+        self,
+        scan_service: Any,
+        use_v2: bool,
+        get_v2_repositories: Any,
+        workers: int = DEFAULT_WORKERS,
+        model_slots: int = DEFAULT_MODEL_SLOTS,
+        capacity: Optional[ModelCapacity] = None,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        job_repo: Optional[Any] = None,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Args:
+            scan_service: ScanService that runs the scans
+            use_v2: Whether scans are persisted in the v2 database
+            get_v2_repositories: Returns (scan_repo, finding_repo)
+            workers: Worker threads (scans that can run at once)
+            model_slots: Default concurrent scans per model
+            capacity: Capacity tracker (default: reads ``scan_slots`` from the registry)
+            lease_seconds: Visibility timeout of a claimed job without heartbeats
+            max_attempts: Claims per job before it is failed
+            job_repo: Durable queue (default: ScanJobRepository when use_v2)
+            poll_interval: Seconds between checks for jobs queued by other processes
+        """
         self.scan_service = scan_service
         self.use_v2 = use_v2
         self.get_v2_repositories = get_v2_repositories
-        self._queue: "queue.Queue[ScanJob]" = queue.Queue()
-        self._thread: Optional[threading.Thread] = None
+        self.workers = max(1, int(workers))
+        self.capacity = capacity or ModelCapacity(model_slots, slots_for=_model_scan_slots)
+        self.lease_seconds = max(1.0, float(lease_seconds))
+        self.max_attempts = max(1, int(max_attempts))
+        self.poll_interval = poll_interval
+        # Identifies this worker pool's leases
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        if job_repo is None and use_v2:
+            from aegis.database.repositories import ScanJobRepository
+
+            job_repo = ScanJobRepository()
+        self.job_repo = job_repo
+        # In-memory jobs: (priority, enqueued_at, sequence, job), kept sorted
+        self._pending: List[Tuple[int, float, int, ScanJob]] = []
+        self._sequence = itertools.count()
+        # Durable jobs enqueued by this process, kept for their source files and profile
+        self._local: Dict[str, ScanJob] = {}
+        self._running: Dict[str, ScanJob] = {}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
         self._stop_event = threading.Event()
         self._app = None
 
     def start(self, app) -> None:
-        if self._thread:
+        if self._threads:
             return
         self._app = app
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._thread.start()
-        debug_scan_log("[scan-debug] ScanWorker started")
+        metrics.SCAN_QUEUE_DEPTH.set_function(self.pending_count)
+        metrics.SCANS_RUNNING.set_function(self.running_count)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"aegis-scan-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.job_repo is not None:
+            thread = threading.Thread(target=self._heartbeat_loop, name="aegis-scan-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        debug_scan_log(f"[scan-debug] ScanWorker started (workers={self.workers} owner={self.owner})")
 
     def stop(self) -> None:
         self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
 
     def enqueue(self, job: ScanJob) -> None:
         self._ensure_scan_state(job.scan_id)
-        self._queue.put(job)
-        debug_scan_log(f"[scan-debug] enqueued scan {job.scan_id} (models={len(job.model_ids)})")
+        if job.priority is None:
+            job.priority = resolve_priority(None, job.scan_mode)
+        durable = False
+        if self.job_repo is not None:
+            try:
+                self.job_repo.enqueue(job.scan_id, _job_payload(job), job.priority, self.max_attempts)
+                durable = True
+            except Exception as e:
+                print(f"Warning: Failed to persist scan job {job.scan_id}, queueing in memory: {e}")
+        with self._condition:
+            if durable:
+                self._local[job.scan_id] = job
+            else:
+                bisect.insort(self._pending, (job.priority, time.time(), next(self._sequence), job))
+            self._condition.notify()
+        debug_scan_log(
+            f"[scan-debug] enqueued scan {job.scan_id} (models={len(job.model_ids)} "
+            f"priority={job.priority} durable={durable})"
+        )
+
+    def pending_count(self) -> int:
+        count = len(self._pending)
+        if self.job_repo is not None:
+            try:
+                count += self.job_repo.count_by_status("queued")
+            except Exception:
+                pass
+        return count
+
+    def running_count(self) -> int:
+        return len(self._running)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pending, running and leased scans and per-model slot usage."""
+        with self._condition:
+            pending = [
+                {"scan_id": job.scan_id, "priority": priority, "model_ids": job.model_ids, "durable": False}
+                for priority, _, _, job in self._pending
+            ]
+            running = list(self._running)
+        leased = []
+        if self.job_repo is not None:
+            try:
+                for row in self.job_repo.list_by_statuses(["queued", "leased"], limit=CLAIM_WINDOW):
+                    if row["status"] == "queued":
+                        pending.append({
+                            "scan_id": row["scan_id"],
+                            "priority": row["priority"],
+                            "model_ids": row["payload"].get("models", []),
+                            "durable": True,
+                            "attempts": row["attempts"],
+                        })
+                    else:
+                        leased.append({
+                            "scan_id": row["scan_id"],
+                            "owner": row["lease_owner"],
+                            "attempts": row["attempts"],
+                            "lease_expires_at": row["lease_expires_at"],
+                        })
+            except Exception as e:
+                print(f"Warning: Failed to read scan job queue: {e}")
+        return {
+            "owner": self.owner,
+            "workers": self.workers,
+            "pending": pending,
+            "running": running,
+            "leased": leased,
+            "model_slots_in_use": self.capacity.snapshot(),
+        }
 
     def requeue_pending(self) -> None:
-        """Requeue scans that were pending/running when the server restarted."""
+        """
+        Queue scans left pending/running without a durable job.
+
+        Scans queued through ``scan_jobs`` need nothing here: their leases
+        expire and they are claimed again. This covers databases from before
+        the job table and jobs that only ever waited in memory.
+        """
         if not self.use_v2:
             return
         scan_repo, _ = self.get_v2_repositories()
         try:
-            pending = scan_repo.list_by_statuses(["pending", "running"], limit=100)
+            pending = scan_repo.list_by_statuses(["pending", "running"], limit=1000)
         except Exception:
             return
-        debug_scan_log(f"[scan-debug] requeue pending scans: {len(pending)}")
 
-        for scan_data in pending:
+        requeued = 0
+        # Oldest first, so submission order survives the restart
+        for scan_data in reversed(pending):
             scan_id = scan_data.get("scan_id")
             if not scan_id:
                 continue
+            if self.job_repo is not None:
+                try:
+                    if self.job_repo.get(scan_id) is not None:
+                        continue
+                except Exception:
+                    pass
             pipeline_config = scan_data.get("pipeline_config", {}) or {}
             model_ids = pipeline_config.get("models", []) or []
             consensus_strategy = scan_data.get("consensus_strategy", "union")
             judge_model_id = pipeline_config.get("judge_model_id")
+            scan_mode = pipeline_config.get("scan_mode", "interactive")
+            try:
+                priority = resolve_priority(pipeline_config.get("priority"), scan_mode)
+            except ValueError:
+                priority = None
+            profile = None
+            if pipeline_config.get("profile"):
+                # The original capture is lost; profile the rerun from here
+                from aegis.profiling import ScanProfile
+
+                profile = ScanProfile(scan_id, sampler=pipeline_config.get("profile_sampler"))
 
             if not model_ids:
                 registry = ModelRegistryV2()
@@ -78,7 +393,12 @@ class ScanWorker:
                 model_ids=model_ids,
                 consensus_strategy=consensus_strategy,
                 judge_model_id=judge_model_id,
+                scan_mode=scan_mode,
+                profile=profile,
+                priority=priority,
             ))
+            requeued += 1
+        debug_scan_log(f"[scan-debug] requeued scans without a durable job: {requeued}")
 
     def _ensure_scan_state(self, scan_id: str) -> None:
         state = self.scan_service.scan_state
@@ -106,38 +426,225 @@ class ScanWorker:
         debug_scan_log(f"[scan-debug] loaded {len(source_files)} files for scan {scan_id}")
         return source_files
 
-    def _run(self) -> None:
+    def _claimable_rows(self) -> List[Dict[str, Any]]:
+        """Durable jobs ready to claim; read without holding the condition."""
+        if self.job_repo is None:
+            return []
+        try:
+            return self.job_repo.list_claimable(limit=CLAIM_WINDOW)
+        except Exception as e:
+            print(f"Warning: Failed to read scan job queue: {e}")
+            return []
+
+    def _candidates(self, rows: List[Dict[str, Any]]) -> List[Tuple[int, float, ScanJob, Optional[tuple]]]:
+        """In-memory and claimable durable jobs in run order (condition held)."""
+        candidates = [(entry[0], entry[1], entry[3], entry) for entry in self._pending]
+        for row in rows:
+            if row["scan_id"] in self._running:
+                continue
+            job = self._local.get(row["scan_id"]) or _job_from_row(row)
+            if job is None:
+                continue
+            job.attempts = int(row.get("attempts") or 0)
+            candidates.append((row["priority"], row["enqueued_at"], job, None))
+        candidates.sort(key=lambda candidate: candidate[:2])
+        return candidates
+
+    def _reserve_runnable(self, rows: List[Dict[str, Any]]) -> Tuple[Optional[ScanJob], bool]:
+        """
+        Reserve the first pending job whose models all have a free slot (condition held).
+
+        In-memory jobs are taken off the queue here; durable ones still have
+        to be claimed in the database, which the caller does outside the lock.
+        Returns the job and whether it still needs that claim.
+        """
+        reserved: set = set()
+        for _, _, job, entry in self._candidates(rows):
+            models = set(job.model_ids)
+            if not (models & reserved) and all(self.capacity.is_free(model_id) for model_id in models):
+                if entry is not None:
+                    self._pending.remove(entry)
+                self.capacity.acquire(job.model_ids)
+                self._running[job.scan_id] = job
+                return job, entry is None
+            # Blocked: keep its models for it so later jobs cannot overtake it there
+            reserved |= models
+        return None, False
+
+    def _claim(self, job: ScanJob) -> bool:
+        """Claim a reserved durable job, giving its slots back if that fails."""
+        try:
+            claimed = self.job_repo.claim(job.scan_id, self.owner, self.lease_seconds)
+        except Exception as e:
+            print(f"Warning: Failed to claim scan job {job.scan_id}: {e}")
+            claimed = False
+        with self._condition:
+            if not claimed:
+                # Another worker claimed it first
+                self._running.pop(job.scan_id, None)
+                self.capacity.release(job.model_ids)
+                self._condition.notify_all()
+                return False
+            self._local.pop(job.scan_id, None)
+            job.durable = True
+            job.attempts += 1
+        return True
+
+    def _next_job(self) -> Optional[ScanJob]:
         while not self._stop_event.is_set():
+            rows = self._claimable_rows()
+            with self._condition:
+                job, needs_claim = self._reserve_runnable(rows)
+                if job is None:
+                    self._condition.wait(timeout=self.poll_interval)
+                    continue
+                if not needs_claim:
+                    return job
+            if self._claim(job):
+                return job
+        return None
+
+    def _finish_job(self, job: ScanJob, error: Optional[Exception] = None) -> None:
+        if job.lease_lost:
+            # The new lease holder settles the job; let a later claim run it here again
+            state = self.scan_service.scan_state
+            state.abandoned.discard(job.scan_id)
+            event = state.cancel_events.get(job.scan_id)
+            if event is not None:
+                event.clear()
+        elif job.durable:
+            try:
+                self._settle_durable_job(job, error)
+            except Exception as e:
+                print(f"Warning: Failed to update scan job {job.scan_id}: {e}")
+        with self._condition:
+            self._running.pop(job.scan_id, None)
+            self.capacity.release(job.model_ids)
+            self._condition.notify_all()
+
+    def _settle_durable_job(self, job: ScanJob, error: Optional[Exception]) -> None:
+        if error is None:
+            status = self.scan_service.scan_state.status.get(job.scan_id)
+            self.job_repo.complete(job.scan_id, self.owner, _JOB_STATUS.get(status, "done"))
+            return
+        outcome = self.job_repo.retry(
+            job.scan_id, self.owner, str(error), delay_seconds=RETRY_DELAY_SECONDS * job.attempts,
+        )
+        if outcome == "failed":
+            self._mark_scan_failed(job.scan_id, f"Scan job failed after {job.attempts} attempts: {error}")
+        elif outcome == "queued":
+            self.scan_service.scan_state.status[job.scan_id] = "pending"
+
+    def _mark_scan_failed(self, scan_id: str, message: str) -> None:
+        self.scan_service.scan_state.status[scan_id] = "failed"
+        metrics.SCANS_FINISHED.inc(status="failed")
+        if self.use_v2:
+            scan_repo, _ = self.get_v2_repositories()
             try:
-                job = self._queue.get(timeout=1.0)
-            except queue.Empty:
+                scan_repo.update_status(scan_id, "failed", error=message)
+            except Exception as e:
+                print(f"Warning: Failed to mark scan failed in database: {e}")
+
+    def _heartbeat_loop(self) -> None:
+        """Renew leases of running jobs and clean up the durable queue."""
+        interval = self.lease_seconds / 3
+        while not self._stop_event.wait(interval):
+            try:
+                self._renew_leases()
+                self._sweep_queue()
+            except Exception as e:
+                print(f"Warning: Scan job heartbeat failed: {e}")
+
+    def _renew_leases(self) -> None:
+        scan_repo = self.get_v2_repositories()[0] if self.use_v2 else None
+        for scan_id, job in list(self._running.items()):
+            if not job.durable:
                 continue
+            if job.lease_lost:
+                continue
+            if not self.job_repo.heartbeat(scan_id, self.owner, self.lease_seconds):
+                print(f"Warning: Lost the lease on scan job {scan_id}; stopping it so another worker can rerun it")
+                self._abandon(job)
+                continue
+            # Cancellation requested through another process
+            scan = scan_repo.get_by_scan_id(scan_id) if scan_repo is not None else None
+            if scan and scan.get("status") == "cancelled":
+                event = self.scan_service.scan_state.cancel_events.get(scan_id)
+                if event is not None:
+                    event.set()
+
+    def _abandon(self, job: ScanJob) -> None:
+        """Stop a scan whose lease expired without persisting its partial results."""
+        job.lease_lost = True
+        state = self.scan_service.scan_state
+        state.abandoned.add(job.scan_id)
+        event = state.cancel_events.get(job.scan_id)
+        if event is not None:
+            event.set()
 
-            if not job:
-                self._queue.task_done()
+    def _sweep_queue(self) -> None:
+        for scan_id in self.job_repo.fail_expired():
+            self._mark_scan_failed(scan_id, "Scan job lease expired after the last attempt")
+        # Forget local copies of jobs that another worker has claimed or that were removed
+        for scan_id in list(self._local):
+            row = self.job_repo.get(scan_id)
+            if row is None or row["status"] != "queued":
+                with self._condition:
+                    self._local.pop(scan_id, None)
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            job = self._next_job()
+            if job is None:
                 continue
+            error = None
+            try:
+                self._run_job(job)
+            except Exception as e:
+                error = e
+                print(f"Warning: Scan worker failed on scan {job.scan_id}: {e}")
+            finally:
+                self._finish_job(job, error)
 
-            if job.source_files is None:
+    def _run_job(self, job: ScanJob) -> None:
+        self._ensure_scan_state(job.scan_id)
+        if job.durable and self.use_v2:
+            scan_repo, _ = self.get_v2_repositories()
+            scan = scan_repo.get_by_scan_id(job.scan_id)
+            if scan and scan.get("status") in ("cancelled", "completed"):
+                # Cancelled while queued, or finished by an earlier attempt
+                self.scan_service.scan_state.status[job.scan_id] = scan["status"]
+                return
+
+        if job.source_files is None:
+            profile = job.profile
+            with profile.span("extraction", "database") if profile is not None else nullcontext():
                 job.source_files = self._load_source_files(job.scan_id)
 
-            if not job.source_files:
-                debug_scan_log(f"[scan-debug] no source files for scan {job.scan_id}")
-                if self.use_v2:
-                    scan_repo, _ = self.get_v2_repositories()
-                    try:
-                        scan_repo.update_status(job.scan_id, "failed", error="No source files found")
-                    except Exception:
-                        pass
-                self._queue.task_done()
-                continue
+        if not job.source_files:
+            debug_scan_log(f"[scan-debug] no source files for scan {job.scan_id}")
+            self.scan_service.scan_state.status[job.scan_id] = "failed"
+            if self.use_v2:
+                scan_repo, _ = self.get_v2_repositories()
+                try:
+                    scan_repo.update_status(job.scan_id, "failed", error="No source files found")
+                except Exception:
+                    pass
+            metrics.SCANS_FINISHED.inc(status="failed")
+            return
 
-            self.scan_service.run_background(
-                scan_id=job.scan_id,
-                source_files=job.source_files,
-                model_ids=job.model_ids,
-                consensus_strategy=job.consensus_strategy,
-                judge_model_id=job.judge_model_id,
-                app=self._app,
-            )
-            debug_scan_log(f"[scan-debug] scan completed: {job.scan_id}")
-            self._queue.task_done()
+        started = time.perf_counter()
+        self.scan_service.run_background(
+            scan_id=job.scan_id,
+            source_files=job.source_files,
+            model_ids=job.model_ids,
+            consensus_strategy=job.consensus_strategy,
+            judge_model_id=job.judge_model_id,
+            scan_mode=job.scan_mode,
+            profile=job.profile,
+            model_share=self.capacity.fair_share,
+            app=self._app,
+        )
+        metrics.SCAN_DURATION.observe(time.perf_counter() - started)
+        metrics.SCANS_FINISHED.inc(status=self.scan_service.scan_state.status.get(job.scan_id, "unknown"))
+        debug_scan_log(f"[scan-debug] scan completed: {job.scan_id}")
@@ -0,0 +1,288 @@
+"""Asyncio SSE server for scan progress streams.
+
+The Flask SSE route holds a WSGI worker thread for as long as a viewer keeps
+the progress page open. This server serves ``/api/scan/<scan_id>/stream``
+from a single asyncio event loop on its own thread instead, so thousands of
+idle viewers cost one thread and a few kilobytes each.
+
+It is fed by the EventBus through a batch subscription: each dispatcher
+batch is handed to the loop in one ``call_soon_threadsafe`` and fanned out to
+the connected clients. Per-client queueing (bounded queues, coalesced
+progress, findings_batch, lagging disconnects, Last-Event-ID resume) is the
+same SSEConnection logic the Flask route uses.
+
+Started by ``start_sse_server()`` alongside the Flask app; the Flask route
+then redirects EventSource clients here.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set
+from urllib.parse import urlsplit
+
+from aegis.events import Event, EventBus, get_event_bus
+from aegis.sse.stream import (
+    LAGGING_EVENT,
+    TERMINAL_EVENTS,
+    SSEManager,
+    format_keepalive,
+    format_sse_message,
+    history_events,
+    parse_last_event_id,
+)
+
+try:
+    from aiohttp import web
+except ImportError:  # Optional: without aiohttp streams stay on the Flask route
+    web = None
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15.0
+
+
+class AsyncSSEServer:
+    """Serve scan SSE streams from one asyncio loop on a daemon thread."""
+
+    def __init__(
+        self,
+        event_bus: Optional[EventBus] = None,
+        host: str = "127.0.0.1",
+        port: int = 5001,
+        sse_manager: Optional[SSEManager] = None,
+        allowed_origins: Optional[Sequence[str]] = None,
+    ):
+        """
+        Args:
+            event_bus: EventBus to stream from (defaults to the global bus)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            sse_manager: Connection registry (a new one by default)
+            allowed_origins: Page origins allowed to open streams ("*" for
+                any); by default only pages served from the same host
+        """
+        if web is None:
+            raise RuntimeError("aiohttp is required for the async SSE server")
+        self.event_bus = event_bus or get_event_bus()
+        self.host = host
+        self.port = port
+        self.manager = sse_manager or SSEManager()
+        self.allowed_origins = {origin.strip().rstrip("/") for origin in allowed_origins or () if origin.strip()}
+        self._wakers: Dict[str, Dict[str, asyncio.Event]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runner: Optional["web.AppRunner"] = None
+        self._started = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def build_app(self) -> "web.Application":
+        app = web.Application()
+        app.router.add_get("/api/scan/{scan_id}/stream", self.handle_stream)
+        return app
+
+    def start(self, timeout: float = 10.0) -> "AsyncSSEServer":
+        """Start the server thread and wait until it is listening."""
+        self._thread = threading.Thread(target=self._serve, name="aegis-sse-server", daemon=True)
+        self._thread.start()
+        if not self._started.wait(timeout):
+            raise RuntimeError("Async SSE server did not start in time")
+        if self._error is not None:
+            raise RuntimeError(f"Async SSE server failed to start: {self._error}") from self._error
+        self.event_bus.subscribe_batch(self._on_events)
+        logger.info(f"Async SSE server listening on http://{self.host}:{self.port}")
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop accepting connections and shut the loop down."""
+        self.event_bus.unsubscribe(None, self._on_events)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), loop)
+        try:
+            future.result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread:
+                self._thread.join(timeout)
+
+    def _serve(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        try:
+            loop.run_until_complete(self._startup())
+        except BaseException as e:
+            self._error = e
+            self._started.set()
+            loop.close()
+            return
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    async def _startup(self) -> None:
+        self._runner = web.AppRunner(self.build_app(), handle_signals=False)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port and self._runner.addresses:
+            self.port = self._runner.addresses[0][1]
+
+    async def _shutdown(self) -> None:
+        for scan_id in list(self._wakers):
+            for connection in self.manager.get_connections(scan_id):
+                connection.close()
+            self._wake(scan_id)
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def _on_events(self, events: List[Event]) -> None:
+        """EventBus batch subscriber; runs on the dispatcher thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._wakers:
+            return
+        try:
+            loop.call_soon_threadsafe(self._fan_out, events)
+        except RuntimeError:
+            pass  # Loop shutting down
+
+    def _fan_out(self, events: List[Event]) -> None:
+        touched: Set[str] = set()
+        for event in events:
+            if event.scan_id not in self._wakers:
+                continue
+            self.manager.broadcast(
+                scan_id=event.scan_id,
+                event_type=self.event_bus._map_event_to_sse(event.type),
+                data=event.data,
+                event_id=event.id,
+            )
+            touched.add(event.scan_id)
+        for scan_id in touched:
+            self._wake(scan_id)
+
+    def _wake(self, scan_id: str) -> None:
+        for waker in self._wakers.get(scan_id, {}).values():
+            waker.set()
+
+    def _origin_allowed(self, request: "web.Request", origin: str) -> bool:
+        if self.allowed_origins:
+            return "*" in self.allowed_origins or origin.rstrip("/") in self.allowed_origins
+        # The Flask app: same host, another port
+        return urlsplit(origin).hostname == request.url.host
+
+    async def handle_stream(self, request: "web.Request") -> "web.StreamResponse":
+        """Stream one scan's events to one client."""
+        scan_id = request.match_info["scan_id"]
+        last_event_id = parse_last_event_id(
+            request.headers.get("Last-Event-ID"), request.query.get("last_event_id")
+        )
+
+        headers = {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        }
+        origin = request.headers.get("Origin")
+        if origin:
+            if not self._origin_allowed(request, origin):
+                raise web.HTTPForbidden(text="Origin not allowed")
+            # The page is served by the Flask app on another port
+            headers["Access-Control-Allow-Origin"] = origin
+            headers["Vary"] = "Origin"
+        response = web.StreamResponse(headers=headers)
+        await response.prepare(request)
+
+        connection = self.manager.connect(scan_id=scan_id, last_event_id=last_event_id)
+        waker = asyncio.Event()
+        self._wakers.setdefault(scan_id, {})[connection.client_id] = waker
+        try:
+            history = history_events(self.event_bus, scan_id, last_event_id)
+            if history:
+                connection.mark_replayed(history[-1]["id"])
+            if await self._write(response, history):
+                return response
+            # The "connected" greeting is already queued
+            if await self._write(response, connection.get_events(timeout=0)):
+                return response
+
+            while True:
+                try:
+                    await asyncio.wait_for(waker.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    await response.write(format_keepalive().encode("utf-8"))
+                    continue
+                waker.clear()
+                if await self._write(response, connection.get_events(timeout=0)):
+                    return response
+                if connection.closed:
+                    return response
+        except (ConnectionResetError, asyncio.CancelledError):
+            # Client went away
+            return response
+        finally:
+            self.manager.disconnect(scan_id=scan_id, client_id=connection.client_id)
+            wakers = self._wakers.get(scan_id, {})
+            wakers.pop(connection.client_id, None)
+            if not wakers:
+                self._wakers.pop(scan_id, None)
+
+    @staticmethod
+    async def _write(response: "web.StreamResponse", events: List[Dict[str, Any]]) -> bool:
+        """Write events; True once a terminal or lagging event has been sent."""
+        if not events:
+            return False
+        payload = []
+        done = False
+        for event in events:
+            payload.append(format_sse_message(event["event"], event["data"], event_id=event.get("id")))
+            if event["event"] in TERMINAL_EVENTS or event["event"] == LAGGING_EVENT:
+                done = True
+                break
+        await response.write("".join(payload).encode("utf-8"))
+        return done
+
+
+_server: Optional[AsyncSSEServer] = None
+_server_lock = threading.Lock()
+
+
+def start_sse_server(app: Any, host: Optional[str] = None, port: Optional[int] = None) -> Optional[AsyncSSEServer]:
+    """
+    Start the shared async SSE server.
+
+    The Flask stream route redirects to it only when SSE_PUBLIC_URL says
+    where browsers can reach it.
+
+    Args:
+        app: Flask app; SSE_SERVER_ACTIVE_PORT is set to the listening port,
+            SSE_ALLOWED_ORIGINS limits the pages that may open streams
+        host: Interface to listen on (default SSE_SERVER_HOST or 127.0.0.1)
+        port: Port to listen on (default SSE_SERVER_PORT or 5001)
+
+    Returns:
+        The running server, or None if aiohttp is missing or it failed to
+        start (the Flask route keeps serving streams)
+    """
+    global _server
+    if web is None:
+        logger.warning("aiohttp not installed; SSE streams stay on the Flask route")
+        return None
+
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = AsyncSSEServer(
+                    host=host or app.config.get("SSE_SERVER_HOST") or "127.0.0.1",
+                    port=int(port if port is not None else app.config.get("SSE_SERVER_PORT") or 5001),
+                    allowed_origins=(app.config.get("SSE_ALLOWED_ORIGINS") or "").split(","),
+                ).start()
+            except Exception as e:
+                logger.warning(f"Async SSE server not started, using the Flask route: {e}")
+                return None
+        app.config["SSE_SERVER_ACTIVE_PORT"] = _server.port
+    return _server
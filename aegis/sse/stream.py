@@ -1,33 +1,69 @@
 """Server-Sent Events (SSE) manager for real-time progress updates.
 
 Provides:
-- SSEConnection: Individual SSE connection to a client
+- SSEConnection: Individual SSE connection to a client, with a bounded queue
 - SSEManager: Manages multiple connections and broadcasts events
 - Thread-safe event broadcasting
-- Automatic connection cleanup
+- Automatic connection cleanup, including clients that fall too far behind
 """
 
+import itertools
 import json
 import logging
 import threading
 import time
-from typing import Any, Dict, List, Optional, Set
+import weakref
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
 from dataclasses import dataclass, field
-from queue import Queue, Empty
 from datetime import datetime
 
+from aegis import metrics
+
 logger = logging.getLogger(__name__)
 
 
+# Pending events per connection before a client counts as too far behind
+DEFAULT_MAX_QUEUE = 2000
+# Findings packed into one findings_batch event
+FINDINGS_BATCH_SIZE = 100
+
+# SSE names of events that are coalesced or batched per connection
+PROGRESS_EVENT = "progress"
+FINDING_EVENT = "finding"
+FINDINGS_BATCH_EVENT = "findings_batch"
+TERMINAL_EVENTS = frozenset({"completed", "error", "cancelled"})
+# Sent before a lagging client is disconnected; it should reconnect with
+# Last-Event-ID to resume from history
+LAGGING_EVENT = "lagging"
+# Sent on resume when events after Last-Event-ID already left the history;
+# the client refetches the scan's results instead
+RESYNC_EVENT = "resync"
+
+
 @dataclass(eq=True, frozen=False)
 class SSEConnection:
-    """Individual SSE connection to a client."""
+    """
+    Individual SSE connection to a client.
+
+    Pending events are bounded: progress updates are coalesced into the
+    latest one, consecutive findings are delivered as ``findings_batch``
+    events, and a client with more than ``max_queue`` other events pending
+    is marked lagging and disconnected.
+    """
 
     scan_id: str
     client_id: str
-    queue: Queue = field(default_factory=Queue, compare=False, hash=False)
+    max_queue: int = field(default=DEFAULT_MAX_QUEUE, compare=False)
     connected_at: str = field(default_factory=lambda: datetime.utcnow().isoformat(), compare=False)
     last_activity: str = field(default_factory=lambda: datetime.utcnow().isoformat(), compare=False)
+    closed: bool = field(default=False, compare=False)
+    lagging: bool = field(default=False, compare=False)
+    # Highest event id delivered (or replayed) to this client
+    last_event_id: int = field(default=0, compare=False)
+    _events: Deque[Dict[str, Any]] = field(default_factory=deque, compare=False, repr=False)
+    _progress: Optional[Dict[str, Any]] = field(default=None, compare=False, repr=False)
+    _cond: threading.Condition = field(default_factory=threading.Condition, compare=False, repr=False)
 
     def __hash__(self):
         """Make connection hashable based on scan_id + client_id."""
@@ -39,54 +75,131 @@ class SSEConnection:
             return False
         return self.scan_id == other.scan_id and self.client_id == other.client_id
 
-    def send_event(self, event_type: str, data: Dict[str, Any]) -> None:
+    def send_event(self, event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> bool:
         """
         Send an event to this connection.
 
         Args:
             event_type: Type of event (e.g., 'step_start', 'progress')
             data: Event data payload
+            event_id: EventBus id, sent as the SSE ``id:`` for resuming
+
+        Returns:
+            False if the connection is closed or just fell too far behind
         """
         event = {
             "event": event_type,
             "data": data,
+            "id": event_id,
             "timestamp": datetime.utcnow().isoformat(),
         }
-        self.queue.put(event)
-        self.last_activity = datetime.utcnow().isoformat()
+        with self._cond:
+            if self.closed:
+                return False
+            if event_id is not None and event_id <= self.last_event_id:
+                return True  # Already replayed from history
+            if event_type == PROGRESS_EVENT:
+                self._progress = event
+            elif len(self._events) >= self.max_queue:
+                self.lagging = True
+                self.closed = True
+                self._events.clear()
+                self._progress = None
+            else:
+                self._events.append(event)
+            self.last_activity = event["timestamp"]
+            self._cond.notify()
+            return not self.closed
+
+    def mark_replayed(self, event_id: int) -> None:
+        """Record that events up to ``event_id`` were sent from history."""
+        with self._cond:
+            self.last_event_id = max(self.last_event_id, event_id)
+
+    def close(self) -> None:
+        """Stop accepting events and wake any waiting reader."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def pending_count(self) -> int:
+        """Events waiting to be read (a coalesced progress update counts once)."""
+        with self._cond:
+            return len(self._events) + (1 if self._progress is not None else 0)
 
     def get_events(self, timeout: float = 30.0) -> List[Dict[str, Any]]:
         """
-        Get pending events from queue.
+        Get pending events, waiting up to ``timeout`` for the first one.
+
+        Runs of consecutive findings are returned as ``findings_batch``
+        events. A lagging connection gets a single ``lagging`` event.
 
         Args:
             timeout: Maximum time to wait for events (seconds)
 
         Returns:
-            List of events
+            List of events (empty on timeout, so the caller can send a keepalive)
         """
-        events = []
-        deadline = time.time() + timeout
-
-        try:
-            # Wait for first event (with timeout for keepalive)
-            wait_time = min(timeout, 15.0)  # Max 15s between keepalives
-            event = self.queue.get(timeout=wait_time)
-            events.append(event)
-
-            # Drain remaining events (non-blocking)
-            while time.time() < deadline:
-                try:
-                    event = self.queue.get_nowait()
-                    events.append(event)
-                except Empty:
-                    break
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._events or self._progress is not None or self.closed,
+                timeout=min(timeout, 15.0),  # Max 15s between keepalives
+            )
+            if self.lagging:
+                self.lagging = False
+                return [{
+                    "event": LAGGING_EVENT,
+                    "data": {
+                        "message": "Client fell behind; reconnect to resume",
+                        "last_event_id": self.last_event_id,
+                    },
+                    "id": None,
+                    "timestamp": datetime.utcnow().isoformat(),
+                }]
+            pending = list(self._events)
+            self._events.clear()
+            if self._progress is not None:
+                # Latest progress goes ahead of any terminal event
+                position = next(
+                    (idx for idx, event in enumerate(pending) if event["event"] in TERMINAL_EVENTS),
+                    len(pending),
+                )
+                pending.insert(position, self._progress)
+                self._progress = None
+
+        # Skip anything the client already got from the history replay
+        pending = [e for e in pending if e.get("id") is None or e["id"] > self.last_event_id]
+        events = batch_findings(pending)
+        ids = [event["id"] for event in events if event.get("id") is not None]
+        if ids:
+            self.last_event_id = max(self.last_event_id, max(ids))
+        return events
 
-        except Empty:
-            # Timeout - send keepalive comment
-            pass
 
-        return events
+def batch_findings(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace runs of consecutive finding events with findings_batch events."""
+    batched: List[Dict[str, Any]] = []
+    run: List[Dict[str, Any]] = []
+
+    def flush_run() -> None:
+        for start in range(0, len(run), FINDINGS_BATCH_SIZE):
+            part = run[start : start + FINDINGS_BATCH_SIZE]
+            batched.append({
+                "event": FINDINGS_BATCH_EVENT,
+                "data": {"findings": [event["data"] for event in part], "count": len(part)},
+                "id": part[-1].get("id"),
+                "timestamp": part[-1]["timestamp"],
+            })
+        run.clear()
+
+    for event in events:
+        if event["event"] == FINDING_EVENT:
+            run.append(event)
+            continue
+        flush_run()
+        batched.append(event)
+    flush_run()
+    return batched
 
 
 class SSEManager:
@@ -109,32 +222,53 @@ class SSEManager:
         manager.disconnect(scan_id="scan-123", client_id="client-1")
     """
 
-    def __init__(self):
-        """Initialize SSE manager."""
+    def __init__(self, max_queue: int = DEFAULT_MAX_QUEUE):
+        """
+        Initialize SSE manager.
+
+        Args:
+            max_queue: Pending events per connection before it is dropped
+        """
         # scan_id -> set of SSEConnection objects
         self._connections: Dict[str, Set[SSEConnection]] = {}
         self._lock = threading.RLock()
-
-    def connect(self, scan_id: str, client_id: Optional[str] = None) -> SSEConnection:
+        self._client_ids = itertools.count(1)
+        self.max_queue = max_queue
+        _managers.add(self)
+
+    def connect(
+        self,
+        scan_id: str,
+        client_id: Optional[str] = None,
+        last_event_id: int = 0,
+    ) -> SSEConnection:
         """
         Register a new SSE connection.
 
         Args:
             scan_id: Scan ID to connect to
             client_id: Optional client identifier (auto-generated if not provided)
+            last_event_id: Events up to this id were already sent (e.g. replayed
+                from history) and are skipped if broadcast again
 
         Returns:
             SSEConnection object
         """
         if client_id is None:
-            client_id = f"client-{int(time.time() * 1000)}"
+            client_id = f"client-{int(time.time() * 1000)}-{next(self._client_ids)}"
 
-        connection = SSEConnection(scan_id=scan_id, client_id=client_id)
+        connection = SSEConnection(
+            scan_id=scan_id,
+            client_id=client_id,
+            max_queue=self.max_queue,
+            last_event_id=last_event_id,
+        )
 
         with self._lock:
             if scan_id not in self._connections:
                 self._connections[scan_id] = set()
             self._connections[scan_id].add(connection)
+        metrics.SSE_CONNECTIONS_OPENED.inc()
 
         logger.info(f"SSE connection established: scan_id={scan_id}, client_id={client_id}")
 
@@ -158,10 +292,13 @@ class SSEManager:
         with self._lock:
             if scan_id in self._connections:
                 # Find and remove connection
-                self._connections[scan_id] = {
-                    conn for conn in self._connections[scan_id]
-                    if conn.client_id != client_id
-                }
+                remaining = set()
+                for conn in self._connections[scan_id]:
+                    if conn.client_id == client_id:
+                        conn.close()
+                    else:
+                        remaining.add(conn)
+                self._connections[scan_id] = remaining
 
                 # Clean up empty scan entries
                 if not self._connections[scan_id]:
@@ -169,30 +306,55 @@ class SSEManager:
 
         logger.info(f"SSE connection closed: scan_id={scan_id}, client_id={client_id}")
 
-    def broadcast(self, scan_id: str, event_type: str, data: Dict[str, Any]) -> int:
+    def broadcast(
+        self,
+        scan_id: str,
+        event_type: str,
+        data: Dict[str, Any],
+        event_id: Optional[int] = None,
+    ) -> int:
         """
         Broadcast an event to all connections for a scan.
 
+        Connections that have fallen too far behind are removed; their reader
+        receives a ``lagging`` event and closes the stream.
+
         Args:
             scan_id: Scan ID
             event_type: Type of event (e.g., 'step_start', 'progress')
             data: Event data payload
+            event_id: EventBus id of the event, for Last-Event-ID resume
 
         Returns:
             Number of connections that received the event
         """
         count = 0
+        lagging = []
 
         with self._lock:
             connections = self._connections.get(scan_id, set())
 
             for connection in connections:
                 try:
-                    connection.send_event(event_type, data)
-                    count += 1
+                    if connection.send_event(event_type, data, event_id):
+                        count += 1
+                    else:
+                        lagging.append(connection)
                 except Exception as e:
                     logger.error(f"Failed to send event to {connection.client_id}: {e}")
 
+            if lagging:
+                connections.difference_update(lagging)
+                if not connections:
+                    self._connections.pop(scan_id, None)
+
+        if lagging:
+            metrics.SSE_LAGGING_DISCONNECTS.inc(len(lagging))
+        for connection in lagging:
+            logger.warning(
+                f"SSE client fell behind, disconnecting: scan_id={scan_id}, client_id={connection.client_id}"
+            )
+
         if count > 0:
             logger.debug(f"Broadcasted {event_type} to {count} client(s) for scan {scan_id}")
 
@@ -211,6 +373,11 @@ class SSEManager:
         with self._lock:
             return list(self._connections.get(scan_id, set()))
 
+    def get_total_connection_count(self) -> int:
+        """Number of active connections across all scans."""
+        with self._lock:
+            return sum(len(connections) for connections in self._connections.values())
+
     def get_connection_count(self, scan_id: str) -> int:
         """
         Get number of active connections for a scan.
@@ -249,6 +416,8 @@ class SSEManager:
                         stale.add(conn)
 
                 if stale:
+                    for conn in stale:
+                        conn.close()
                     self._connections[scan_id] -= stale
                     removed += len(stale)
 
@@ -262,18 +431,68 @@ class SSEManager:
         return removed
 
 
-def format_sse_message(event_type: str, data: Dict[str, Any]) -> str:
+# Live managers, for the open-connections gauge
+_managers: "weakref.WeakSet[SSEManager]" = weakref.WeakSet()
+metrics.SSE_CONNECTIONS.set_function(lambda: sum(m.get_total_connection_count() for m in list(_managers)))
+
+
+def parse_last_event_id(*values: Optional[str]) -> int:
+    """First usable Last-Event-ID value (header, query parameter), or 0."""
+    for value in values:
+        if value:
+            try:
+                return max(0, int(value))
+            except ValueError:
+                continue
+    return 0
+
+
+def history_events(event_bus: Any, scan_id: str, last_event_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    EventBus history for a scan newer than ``last_event_id``, as SSE events.
+
+    Findings are already packed into findings_batch events. When the client
+    resumes from an event older than the history still holds, a resync event
+    comes first, since the missing events cannot be replayed.
+    """
+    events = batch_findings([
+        {
+            "event": event_bus._map_event_to_sse(event.type),
+            "data": event.data,
+            "id": event.id,
+            "timestamp": event.timestamp,
+        }
+        for event in event_bus.get_history(scan_id=scan_id)
+        if event.id > last_event_id
+    ])
+    evicted = event_bus.evicted_through(scan_id) if last_event_id else 0
+    if evicted > last_event_id:
+        logger.info(f"SSE resume for scan {scan_id} from {last_event_id} is past the history; sending resync")
+        events.insert(0, {
+            "event": RESYNC_EVENT,
+            "data": {"scan_id": scan_id, "missed_through": evicted},
+            "id": evicted,
+            "timestamp": datetime.utcnow().isoformat(),
+        })
+    return events
+
+
+def format_sse_message(event_type: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
     """
     Format data as SSE message.
 
     Args:
         event_type: Event type
         data: Event data
+        event_id: Optional id; browsers send the last one back as
+            Last-Event-ID when they reconnect
 
     Returns:
         SSE-formatted message string
     """
     lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
     lines.append(f"event: {event_type}")
     lines.append(f"data: {json.dumps(data)}")
     lines.append("")  # Empty line to end message
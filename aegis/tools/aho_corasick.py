@@ -0,0 +1,112 @@
+"""Aho-Corasick multi-literal search.
+
+Finds which of many literals occur in a text in one pass, however many
+literals there are. Uses the ``pyahocorasick`` C extension when it is
+installed; otherwise a pure-Python automaton whose tables pickle, so a
+built automaton can be cached on disk with the rule pack it indexes.
+"""
+
+from collections import deque
+from typing import Dict, List, Sequence, Set, Tuple
+
+try:
+    import ahocorasick
+    PYAHOCORASICK_AVAILABLE = True
+except ImportError:
+    ahocorasick = None
+    PYAHOCORASICK_AVAILABLE = False
+
+
+class AhoCorasick:
+    """Automaton over a fixed list of literals."""
+
+    def __init__(self, words: Sequence[str]):
+        """
+        Args:
+            words: Literals to find (empty strings never match)
+        """
+        self.words = list(words)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Indexes of the words ending at each state, including via fail links
+        self._out: List[Tuple[int, ...]] = [()]
+        self._native = None
+        if PYAHOCORASICK_AVAILABLE:
+            self._native = self._build_native()
+        else:
+            self._build()
+
+    def _build_native(self):
+        automaton = ahocorasick.Automaton()
+        for index, word in enumerate(self.words):
+            if word:
+                indexes = automaton.get(word, ())
+                automaton.add_word(word, indexes + (index,))
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _build(self) -> None:
+        goto, out = self._goto, [[]]
+        for index, word in enumerate(self.words):
+            if not word:
+                continue
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(index)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                back = fail[state]
+                while back and ch not in goto[back]:
+                    back = fail[back]
+                fail[nxt] = goto[back].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+        self._fail = fail
+        self._out = [tuple(words) for words in out]
+
+    def search(self, text: str) -> Set[int]:
+        """Indexes of the words that occur in ``text``."""
+        found: Set[int] = set()
+        if self._native is not None:
+            for _end, indexes in self._native.iter(text):
+                found.update(indexes)
+            return found
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            nxt = goto[state].get(ch)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(ch)
+            state = nxt if nxt is not None else 0
+            if out[state]:
+                found.update(out[state])
+        return found
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # The C automaton is rebuilt from the words on load
+        state["_native"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if PYAHOCORASICK_AVAILABLE:
+            self._native = self._build_native()
+        elif len(self._goto) == 1 and any(self.words):
+            # Pickled where the C extension was used; build the Python tables
+            self._build()
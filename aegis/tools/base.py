@@ -12,6 +12,10 @@ class ToolPlugin(ABC):
     tool_id: str = "tool"
     name: str = "Tool"
     description: str = ""
+    # Whether analyze_project may run in worker processes (aegis.process_pool).
+    # The tool is rebuilt there from its class and config, so only tools whose
+    # results depend on nothing else should set this to True.
+    process_pool: bool = False
 
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
@@ -0,0 +1,245 @@
+"""Compiled multi-pattern matcher for regex tools.
+
+A ``PatternSet`` compiles a rule set once (sets are cached by their pattern
+strings) and finds the matches of every rule in a file, exactly as
+``re.finditer`` would per rule, without one scan per rule where that is
+avoidable:
+
+- With the optional ``hyperscan`` package installed, one Hyperscan pass
+  over the file reports which rules match; only those are run with ``re``.
+- Otherwise rules that start with the same zero-width anchor (``\\b``,
+  ``^``, ...) share one alternation. ``re`` rejects most positions for all of
+  them at once there, while a separate search per rule has no prefix to skip
+  ahead with. Matches of the alternation are attributed to rules by
+  descending a tree of smaller alternations (compiled on first use), at
+  matched positions only, and only rules found this way are run on their
+  own. Every position a rule can match at lies in a span the alternation
+  reports, so overlapping matches of another rule never hide it.
+- Rules with a literal prefix or any other start are searched on their own:
+  ``re`` already skips ahead to their first character, which an alternation
+  cannot. Rules with their own named groups or backreferences cannot share
+  an alternation either, nor can rules with inline global flags.
+
+Alternatives are non-capturing; a named group per rule would identify it
+directly but stops ``re`` from rejecting positions early.
+
+Line numbers come from a sorted index of newline offsets (``LineIndex``)
+instead of counting newlines before every match.
+"""
+
+import logging
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    hyperscan = None
+    HYPERSCAN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Compiled sets kept in memory (keyed by the rules' pattern strings)
+CACHE_SIZE = 32
+# Children per node of the attribution tree
+TREE_FANOUT = 8
+
+# Zero-width anchors that let an alternation reject positions cheaply
+_LEADING_ANCHOR = re.compile(r"^(?:\\b|\\B|\\A|\^)")
+# Backreferences and inline global flags change meaning inside an alternation
+_UNSHAREABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?[aiLmsux]+\)")
+
+# (rule index, match start, match end)
+PatternMatch = Tuple[int, int, int]
+
+
+class LineIndex:
+    """Maps string offsets to 0-based line numbers and line text."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.newlines = [match.start() for match in re.finditer("\n", text)]
+
+    def line_of(self, offset: int) -> int:
+        """Number of newlines before ``offset``."""
+        return bisect_left(self.newlines, offset)
+
+    def line_text(self, line: int) -> str:
+        start = self.newlines[line - 1] + 1 if line > 0 else 0
+        end = self.newlines[line] if line < len(self.newlines) else len(self.text)
+        return self.text[start:end]
+
+
+class _Node:
+    """Alternation over a range of rules, with children over sub-ranges."""
+
+    def __init__(self, pattern_set: "PatternSet", indexes: List[int]):
+        self.pattern_set = pattern_set
+        self.indexes = indexes
+        self._regex: Optional[re.Pattern] = None
+        self._children: Optional[List["_Node"]] = None
+        self._compiled = False
+
+    @property
+    def regex(self) -> Optional[re.Pattern]:
+        """The node's alternation; None if it does not compile as one."""
+        if not self._compiled:
+            if len(self.indexes) == 1:
+                regex = self.pattern_set.compiled[self.indexes[0]]
+            else:
+                source = "|".join(f"(?:{self.pattern_set.patterns[index]})" for index in self.indexes)
+                try:
+                    regex = re.compile(source, self.pattern_set.flags)
+                except re.error:
+                    regex = None
+            self._regex = regex
+            self._compiled = True
+        return self._regex
+
+    @property
+    def children(self) -> List["_Node"]:
+        if self._children is None:
+            size = -(-len(self.indexes) // TREE_FANOUT)
+            self._children = [
+                _Node(self.pattern_set, self.indexes[start:start + size])
+                for start in range(0, len(self.indexes), size)
+            ] if len(self.indexes) > 1 else []
+        return self._children
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """Sorted spans found by scanning with this node (its children if it does not compile)."""
+        if self.regex is not None:
+            return [match.span() for match in self.regex.finditer(text)]
+        return sorted(span for child in self.children for span in child.spans(text))
+
+    def rules_at(self, text: str, position: int, found: Set[int]) -> None:
+        """Add every rule under this node that matches at ``position``."""
+        regex = self.regex
+        if regex is not None and not regex.match(text, position):
+            return
+        if not self.children:
+            if regex is not None:
+                found.add(self.indexes[0])
+            return
+        for child in self.children:
+            child.rules_at(text, position, found)
+
+    def occurring(self, text: str, found: Set[int]) -> None:
+        """Add every rule under this node that matches somewhere in ``text``."""
+        checked = -1
+        for start, end in self.spans(text):
+            for position in range(max(start, checked + 1), max(end, start + 1)):
+                self.rules_at(text, position, found)
+                checked = position
+
+
+class PatternSet:
+    """A rule set compiled for single-pass matching."""
+
+    def __init__(self, patterns: Sequence[str], flags: int = re.MULTILINE):
+        """
+        Args:
+            patterns: Regex per rule; empty or invalid rules never match
+            flags: Flags for every rule
+        """
+        self.patterns = list(patterns)
+        self.flags = flags
+        self.compiled: List[Optional[re.Pattern]] = []
+        anchored: Dict[str, List[int]] = {}
+        self.standalone: Set[int] = set()
+        for index, pattern in enumerate(self.patterns):
+            compiled = None
+            if pattern:
+                try:
+                    compiled = re.compile(pattern, flags)
+                except re.error as e:
+                    logger.warning(f"Skipping invalid pattern {pattern!r}: {e}")
+            self.compiled.append(compiled)
+            if compiled is None:
+                continue
+            anchor = _LEADING_ANCHOR.match(pattern)
+            if anchor is None or compiled.groupindex or _UNSHAREABLE.search(pattern):
+                self.standalone.add(index)
+            else:
+                anchored.setdefault(anchor.group(0), []).append(index)
+
+        self._groups: List[_Node] = []
+        for indexes in anchored.values():
+            if len(indexes) == 1:
+                self.standalone.update(indexes)
+            else:
+                self._groups.append(_Node(self, indexes))
+        self._hyperscan = self._compile_hyperscan() if HYPERSCAN_AVAILABLE else None
+
+    def _compile_hyperscan(self):
+        indexes = [index for index, compiled in enumerate(self.compiled) if compiled is not None]
+        if not indexes:
+            return None
+        flags = hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP | hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_PREFILTER
+        if self.flags & re.MULTILINE:
+            flags |= hyperscan.HS_FLAG_MULTILINE
+        if self.flags & re.DOTALL:
+            flags |= hyperscan.HS_FLAG_DOTALL
+        if self.flags & re.IGNORECASE:
+            flags |= hyperscan.HS_FLAG_CASELESS
+        try:
+            database = hyperscan.Database()
+            database.compile(
+                expressions=[self.patterns[index].encode("utf-8") for index in indexes],
+                ids=indexes,
+                elements=len(indexes),
+                flags=[flags] * len(indexes),
+            )
+            return database
+        except Exception as e:
+            logger.debug(f"Hyperscan cannot compile this rule set, using re: {e}")
+            return None
+
+    def _hyperscan_candidates(self, text: str) -> Optional[Set[int]]:
+        """Rules Hyperscan reports for ``text`` (a superset: prefilter mode), or None."""
+        candidates: Set[int] = set()
+
+        def on_match(rule_id, start, end, flags, context):
+            candidates.add(rule_id)
+
+        try:
+            self._hyperscan.scan(text.encode("utf-8"), match_event_handler=on_match)
+        except Exception as e:
+            logger.debug(f"Hyperscan scan failed, using re: {e}")
+            return None
+        return candidates
+
+    def finditer(self, text: str) -> Iterator[PatternMatch]:
+        """Every match of every rule, grouped by rule and in ``re.finditer`` order."""
+        candidates = self._hyperscan_candidates(text) if self._hyperscan is not None else None
+        if candidates is None:
+            candidates = set(self.standalone)
+            for group in self._groups:
+                group.occurring(text, candidates)
+        for index in sorted(candidates):
+            for match in self.compiled[index].finditer(text):
+                yield index, match.start(), match.end()
+
+
+_cache: "OrderedDict[Tuple[Tuple[str, ...], int], PatternSet]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_patterns(patterns: Sequence[str], flags: int = re.MULTILINE) -> PatternSet:
+    """A PatternSet for ``patterns``, reused while it stays in the cache."""
+    key = (tuple(pattern or "" for pattern in patterns), flags)
+    with _cache_lock:
+        pattern_set = _cache.get(key)
+        if pattern_set is not None:
+            _cache.move_to_end(key)
+            return pattern_set
+    pattern_set = PatternSet(key[0], flags)
+    with _cache_lock:
+        _cache[key] = pattern_set
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return pattern_set
@@ -1,10 +1,10 @@
 """Simple regex-based tool plugin (example)."""
 
-import re
 from typing import Dict, Any, Optional, List
 
 from aegis.models.schema import FindingCandidate, ParserResult
 from aegis.tools.base import ToolPlugin
+from aegis.tools.builtin.pattern_set import LineIndex, compile_patterns
 
 
 DEFAULT_PATTERNS = [
@@ -33,6 +33,7 @@ class RegexTool(ToolPlugin):
     tool_id = "regex_basic"
     name = "Regex Scanner"
     description = "Simple regex-based scanner (example tool plugin)."
+    process_pool = True
 
     def analyze_snippet(
         self,
@@ -47,34 +48,37 @@ class RegexTool(ToolPlugin):
         patterns = cfg.get("patterns") or DEFAULT_PATTERNS
         file_path = context.get("file_path", "unknown")
         base_line = int(context.get("line_start") or 1)
-        lines = code.splitlines() or [""]
+
+        # Compiled once per rule set; one pass over the code finds the rules
+        # that occur, and only their matches are built into findings
+        pattern_set = compile_patterns([entry.get("pattern") or "" for entry in patterns])
+        line_index: Optional[LineIndex] = None
 
         findings: List[FindingCandidate] = []
-        for entry in patterns:
+        for index, start, _end in pattern_set.finditer(code):
+            entry = patterns[index]
             try:
-                pattern = entry.get("pattern")
-                if not pattern:
-                    continue
-                for match in re.finditer(pattern, code, re.MULTILINE):
-                    line_offset = code[:match.start()].count("\n")
-                    line_start = base_line + line_offset
-                    line_text = lines[line_offset] if line_offset < len(lines) else ""
-                    findings.append(
-                        FindingCandidate(
-                            file_path=file_path,
-                            line_start=line_start,
-                            line_end=line_start,
-                            snippet=line_text.strip() or line_text,
-                            title=entry.get("name") or "Pattern match",
-                            category=entry.get("category") or "pattern_match",
-                            cwe=entry.get("cwe"),
-                            severity=entry.get("severity") or "medium",
-                            description=entry.get("description") or "Pattern match detected.",
-                            recommendation=entry.get("recommendation"),
-                            confidence=float(entry.get("confidence", 0.5)),
-                            metadata={"pattern": pattern},
-                        )
+                if line_index is None:
+                    line_index = LineIndex(code)
+                line_offset = line_index.line_of(start)
+                line_start = base_line + line_offset
+                line_text = line_index.line_text(line_offset)
+                findings.append(
+                    FindingCandidate(
+                        file_path=file_path,
+                        line_start=line_start,
+                        line_end=line_start,
+                        snippet=line_text.strip() or line_text,
+                        title=entry.get("name") or "Pattern match",
+                        category=entry.get("category") or "pattern_match",
+                        cwe=entry.get("cwe"),
+                        severity=entry.get("severity") or "medium",
+                        description=entry.get("description") or "Pattern match detected.",
+                        recommendation=entry.get("recommendation"),
+                        confidence=float(entry.get("confidence", 0.5)),
+                        metadata={"pattern": entry.get("pattern")},
                     )
+                )
             except Exception:
                 continue
 
@@ -0,0 +1,65 @@
+"""Rule pack scanner: Semgrep-style YAML regex rules as a pre-LLM pass."""
+
+from typing import Dict, Any, Optional, List
+
+from aegis.models.schema import FindingCandidate, ParserResult
+from aegis.tools.base import ToolPlugin
+from aegis.tools.builtin.pattern_set import LineIndex
+from aegis.tools.rulepack import RULE_PACK_CACHE_DIR, get_rule_pack
+
+
+class RulePackTool(ToolPlugin):
+    tool_id = "rule_pack"
+    name = "Rule Pack Scanner"
+    description = "Regex rules from YAML rule packs, prefiltered by required literals."
+    process_pool = True
+
+    def analyze_snippet(
+        self,
+        code: str,
+        context: Dict[str, Any],
+        config: Optional[Dict[str, Any]] = None,
+    ) -> ParserResult:
+        """
+        Config:
+            paths: Rule directories or files (default: AEGIS_RULE_PACKS)
+            cache_dir: Compiled pack cache (default: AEGIS_RULE_PACK_CACHE)
+        """
+        cfg = {}
+        cfg.update(self.config or {})
+        cfg.update(config or {})
+
+        paths = cfg.get("paths")
+        if isinstance(paths, str):
+            paths = [paths]
+        pack = get_rule_pack(paths, cfg.get("cache_dir", RULE_PACK_CACHE_DIR))
+
+        file_path = context.get("file_path", "unknown")
+        base_line = int(context.get("line_start") or 1)
+        line_index: Optional[LineIndex] = None
+
+        findings: List[FindingCandidate] = []
+        for rule, start, _end in pack.matches(file_path, code):
+            if line_index is None:
+                line_index = LineIndex(code)
+            line_offset = line_index.line_of(start)
+            line_start = base_line + line_offset
+            line_text = line_index.line_text(line_offset)
+            findings.append(
+                FindingCandidate(
+                    file_path=file_path,
+                    line_start=line_start,
+                    line_end=line_start,
+                    snippet=line_text.strip() or line_text,
+                    title=rule.title or rule.rule_id,
+                    category=rule.category,
+                    cwe=rule.cwe,
+                    severity=rule.severity,
+                    description=rule.message,
+                    recommendation=rule.recommendation,
+                    confidence=rule.confidence,
+                    metadata={"rule_id": rule.rule_id, "rule_source": rule.source},
+                )
+            )
+
+        return ParserResult(findings=findings)
@@ -50,8 +50,10 @@ DEFAULT_TOOL_REGISTRY = ToolRegistry()
 
 def register_builtin_tools(registry: ToolRegistry = DEFAULT_TOOL_REGISTRY) -> None:
     from aegis.tools.builtin.regex_tool import RegexTool
+    from aegis.tools.builtin.rulepack_tool import RulePackTool
 
     registry.register_class(RegexTool)
+    registry.register_class(RulePackTool)
 
 
 register_builtin_tools()
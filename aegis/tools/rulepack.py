@@ -0,0 +1,451 @@
+"""Regex rule packs (Semgrep-style YAML) with a literal prefilter.
+
+A rule pack is every ``*.yaml``/``*.yml`` file under a set of directories.
+Each file holds Semgrep-style rules; those matched by ``pattern-regex`` (or
+a ``pattern-either`` of them) are loaded, others (structural ``pattern``
+rules) are skipped:
+
+    rules:
+      - id: python-eval
+        message: Use of eval() can lead to code execution.
+        severity: ERROR            # ERROR/WARNING/INFO or critical..info
+        languages: [python]        # generic, regex or none: every file
+        pattern-regex: '\\beval\\s*\\('
+        fix: Use ast.literal_eval or explicit parsing.
+        metadata:
+          cwe: "CWE-95: Eval Injection"
+          vulnerability_class: [Code Injection]
+          confidence: HIGH
+
+Every regex is indexed by literals a match must contain (one of a set, for
+alternations). One Aho-Corasick pass over a file finds which literals
+occur, and only regexes whose literals occur are run; regexes without a
+usable literal go through a PatternSet. Literals are matched case-folded,
+so the prefilter never drops a rule a case-insensitive regex would match.
+
+Built packs are pickled under the cache directory, keyed by the files'
+paths, sizes and modification times, so a process loads an unchanged pack
+without parsing YAML or regexes; each regex is compiled when a file first
+needs it. Packs are loaded once per process: restart to pick up changes.
+
+Environment:
+    AEGIS_RULE_PACKS: rule directories, separated by os.pathsep (default: config/rules)
+    AEGIS_RULE_PACK_CACHE: cache directory (default: data/rule_cache)
+"""
+
+import glob
+import hashlib
+import logging
+import os
+import pickle
+import re
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from aegis.tools.aho_corasick import AhoCorasick
+from aegis.tools.builtin.pattern_set import PatternSet
+from aegis.utils import detect_language
+
+try:
+    from re import _parser as _sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+RULE_PACK_DIRS = [
+    path for path in (os.environ.get("AEGIS_RULE_PACKS") or os.path.join(PROJECT_ROOT, "config", "rules")).split(os.pathsep)
+    if path
+]
+RULE_PACK_CACHE_DIR = os.environ.get("AEGIS_RULE_PACK_CACHE") or os.path.join(PROJECT_ROOT, "data", "rule_cache")
+# Bump when the pickled layout or literal extraction changes
+CACHE_VERSION = 1
+# Shorter literals occur in too many files to filter anything
+MIN_LITERAL_LENGTH = 3
+# Flags every rule regex is compiled with (Semgrep's pattern-regex is multiline)
+RULE_FLAGS = re.MULTILINE
+
+_SEVERITIES = {"critical", "high", "medium", "low", "info"}
+_SEMGREP_SEVERITIES = {"ERROR": "high", "WARNING": "medium", "INFO": "low"}
+_CONFIDENCE = {"HIGH": 0.8, "MEDIUM": 0.6, "LOW": 0.4}
+_CWE = re.compile(r"CWE-\d+", re.IGNORECASE)
+# Semgrep language names that differ from aegis.utils.detect_language
+_LANGUAGE_ALIASES = {
+    "py": "python", "js": "javascript", "ts": "typescript", "c#": "csharp",
+    "golang": "go", "sh": "bash", "shell": "bash", "rb": "ruby", "kt": "kotlin",
+}
+_ANY_LANGUAGE = {"generic", "regex", "none"}
+
+
+@dataclass
+class Rule:
+    """One rule of a pack."""
+
+    rule_id: str
+    patterns: List[str]
+    message: str
+    severity: str = "medium"
+    title: Optional[str] = None
+    category: str = "pattern_match"
+    cwe: Optional[str] = None
+    recommendation: Optional[str] = None
+    confidence: float = 0.5
+    # Languages the rule applies to (empty: every file)
+    languages: List[str] = field(default_factory=list)
+    source: str = ""
+
+    def applies_to(self, language: str) -> bool:
+        return not self.languages or language in self.languages
+
+
+# Literal extraction
+
+
+def _better(current: Optional[Set[str]], candidate: Optional[Set[str]]) -> Optional[Set[str]]:
+    """The more selective of two required-literal sets (longest shortest literal)."""
+    if not candidate:
+        return current
+    if not current:
+        return candidate
+    current_key = (min(len(word) for word in current), -len(current))
+    candidate_key = (min(len(word) for word in candidate), -len(candidate))
+    return candidate if candidate_key > current_key else current
+
+
+def _required(items) -> Optional[Set[str]]:
+    """Literals of which every match of the parsed sequence contains at least one."""
+    best: Optional[Set[str]] = None
+    run: List[str] = []
+    for op, av in items:
+        name = op.name
+        if name == "LITERAL":
+            run.append(chr(av))
+            continue
+        if run:
+            best = _better(best, {"".join(run)})
+            run = []
+        if name == "SUBPATTERN":
+            best = _better(best, _required(av[-1]))
+        elif name == "ATOMIC_GROUP":
+            best = _better(best, _required(av))
+        elif name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+            low, _high, inner = av
+            if low >= 1:
+                best = _better(best, _required(inner))
+        elif name == "BRANCH":
+            alternatives = [_required(alternative) for alternative in av[1]]
+            if all(alternatives):
+                best = _better(best, set().union(*alternatives))
+    if run:
+        best = _better(best, {"".join(run)})
+    return best
+
+
+def required_literals(pattern: str, flags: int = RULE_FLAGS) -> Optional[List[str]]:
+    """
+    Case-folded literals of which every match of ``pattern`` contains one.
+
+    Returns:
+        Sorted literals, or None when no literal of at least
+        MIN_LITERAL_LENGTH characters is required
+    """
+    literals = _required(_sre_parse.parse(pattern, flags))
+    if not literals:
+        return None
+    folded = {word.casefold() for word in literals}
+    if min(len(word) for word in folded) < MIN_LITERAL_LENGTH:
+        return None
+    return sorted(folded)
+
+
+# Rule parsing
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _rule_patterns(raw: Dict[str, Any]) -> List[str]:
+    if raw.get("pattern-regex"):
+        return [str(raw["pattern-regex"])]
+    either = raw.get("pattern-either") or []
+    return [str(item["pattern-regex"]) for item in either if isinstance(item, dict) and item.get("pattern-regex")]
+
+
+def _parse_rule(raw: Dict[str, Any], source: str, index: int) -> Optional[Rule]:
+    patterns = _rule_patterns(raw)
+    if not patterns:
+        return None
+    metadata = raw.get("metadata") or {}
+
+    severity = str(raw.get("severity") or "medium")
+    severity = _SEMGREP_SEVERITIES.get(severity.upper(), severity.lower())
+    if severity not in _SEVERITIES:
+        severity = "medium"
+
+    cwe_match = _CWE.search(str(_first(metadata.get("cwe")) or ""))
+    vulnerability_class = _first(metadata.get("vulnerability_class"))
+    category = raw.get("category") or (
+        re.sub(r"\W+", "_", str(vulnerability_class).strip().lower()) if vulnerability_class else "pattern_match"
+    )
+
+    confidence = metadata.get("confidence", 0.5)
+    if isinstance(confidence, str):
+        confidence = _CONFIDENCE.get(confidence.upper(), 0.5)
+
+    languages = {_LANGUAGE_ALIASES.get(str(lang).lower(), str(lang).lower()) for lang in raw.get("languages") or []}
+    message = str(raw.get("message") or "Pattern match detected.").strip()
+    return Rule(
+        rule_id=str(raw.get("id") or f"{os.path.basename(source)}#{index}"),
+        patterns=patterns,
+        message=message,
+        severity=severity,
+        title=metadata.get("title") or raw.get("id"),
+        category=str(category),
+        cwe=cwe_match.group(0).upper() if cwe_match else None,
+        recommendation=raw.get("fix") or metadata.get("recommendation"),
+        confidence=float(confidence),
+        languages=[] if languages & _ANY_LANGUAGE else sorted(languages),
+        source=source,
+    )
+
+
+def _load_rules(path: str) -> Tuple[List[Rule], int]:
+    """Rules from one YAML file, and how many were skipped."""
+    with open(path, "r", encoding="utf-8") as handle:
+        document = yaml.safe_load(handle) or {}
+    raw_rules = document.get("rules") if isinstance(document, dict) else None
+    rules, skipped = [], 0
+    for index, raw in enumerate(raw_rules or []):
+        rule = _parse_rule(raw, path, index) if isinstance(raw, dict) else None
+        if rule is None:
+            skipped += 1
+        else:
+            rules.append(rule)
+    return rules, skipped
+
+
+class RulePack:
+    """Rules indexed for prefiltered matching."""
+
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        # One entry per regex: (rule index, pattern)
+        self.regexes: List[Tuple[int, str]] = []
+        literal_ids: Dict[str, int] = {}
+        # Literal index -> regexes requiring it (one of their set)
+        self._literal_regexes: List[List[int]] = []
+        unfiltered: List[int] = []
+        invalid = 0
+        for rule_index, rule in enumerate(rules):
+            for pattern in rule.patterns:
+                try:
+                    literals = required_literals(pattern)
+                except Exception as e:
+                    logger.warning(f"Skipping invalid regex in rule {rule.rule_id}: {e}")
+                    invalid += 1
+                    continue
+                regex_index = len(self.regexes)
+                self.regexes.append((rule_index, pattern))
+                if literals is None:
+                    unfiltered.append(regex_index)
+                    continue
+                for literal in literals:
+                    literal_index = literal_ids.setdefault(literal, len(literal_ids))
+                    if literal_index == len(self._literal_regexes):
+                        self._literal_regexes.append([])
+                    self._literal_regexes[literal_index].append(regex_index)
+        self.unfiltered = unfiltered
+        self.invalid = invalid
+        self._prefilter = AhoCorasick(list(literal_ids))
+        self._init_runtime()
+
+    def _init_runtime(self) -> None:
+        self._compiled: Dict[int, Optional[re.Pattern]] = {}
+        self._compile_lock = threading.Lock()
+        self._unfiltered_set: Optional[PatternSet] = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for key in ("_compiled", "_compile_lock", "_unfiltered_set"):
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_runtime()
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rules": len(self.rules),
+            "regexes": len(self.regexes),
+            "literals": len(self._prefilter.words),
+            "unfiltered_regexes": len(self.unfiltered),
+            "invalid_regexes": self.invalid,
+        }
+
+    def _regex(self, regex_index: int) -> Optional[re.Pattern]:
+        compiled = self._compiled.get(regex_index, False)
+        if compiled is False:
+            try:
+                compiled = re.compile(self.regexes[regex_index][1], RULE_FLAGS)
+            except re.error as e:
+                rule = self.rules[self.regexes[regex_index][0]]
+                logger.warning(f"Skipping invalid regex in rule {rule.rule_id}: {e}")
+                compiled = None
+            with self._compile_lock:
+                self._compiled[regex_index] = compiled
+        return compiled
+
+    def _unfiltered_patterns(self) -> PatternSet:
+        if self._unfiltered_set is None:
+            self._unfiltered_set = PatternSet([self.regexes[index][1] for index in self.unfiltered], RULE_FLAGS)
+        return self._unfiltered_set
+
+    def candidates(self, text: str) -> List[int]:
+        """Regexes whose required literals occur in ``text`` (sorted)."""
+        found: Set[int] = set()
+        for literal_index in self._prefilter.search(text.casefold()):
+            found.update(self._literal_regexes[literal_index])
+        return sorted(found)
+
+    def matches(self, file_path: str, text: str) -> Iterator[Tuple[Rule, int, int]]:
+        """(rule, start, end) for every match of a rule that applies to ``file_path``."""
+        language = detect_language(file_path)
+        for regex_index in self.candidates(text):
+            rule = self.rules[self.regexes[regex_index][0]]
+            if not rule.applies_to(language):
+                continue
+            compiled = self._regex(regex_index)
+            if compiled is None:
+                continue
+            for match in compiled.finditer(text):
+                yield rule, match.start(), match.end()
+        if self.unfiltered:
+            for position, start, end in self._unfiltered_patterns().finditer(text):
+                rule = self.rules[self.regexes[self.unfiltered[position]][0]]
+                if rule.applies_to(language):
+                    yield rule, start, end
+
+
+def rule_files(paths: Sequence[str]) -> List[str]:
+    """YAML files under ``paths`` (directories are searched recursively), sorted."""
+    files: Set[str] = set()
+    for path in paths:
+        if os.path.isfile(path):
+            files.add(os.path.abspath(path))
+        elif os.path.isdir(path):
+            for pattern in ("*.yaml", "*.yml"):
+                files.update(os.path.abspath(found) for found in glob.glob(os.path.join(path, "**", pattern), recursive=True))
+    return sorted(files)
+
+
+def _signature(files: List[str]) -> str:
+    digest = hashlib.sha256(f"{CACHE_VERSION}:{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    for path in files:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def _cache_prefix(paths: Sequence[str]) -> str:
+    key = "\n".join(sorted(os.path.abspath(path) for path in paths))
+    return "rulepack-" + hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def build_rule_pack(files: Sequence[str]) -> RulePack:
+    """Parse rule files into a RulePack (no caching)."""
+    rules: List[Rule] = []
+    for path in files:
+        try:
+            loaded, skipped = _load_rules(path)
+        except Exception as e:
+            logger.warning(f"Failed to load rule file {path}: {e}")
+            continue
+        rules.extend(loaded)
+        if skipped:
+            logger.info(f"Skipped {skipped} rules without pattern-regex in {path}")
+    return RulePack(rules)
+
+
+def load_rule_pack(paths: Sequence[str], cache_dir: Optional[str] = RULE_PACK_CACHE_DIR) -> RulePack:
+    """
+    Load the rules under ``paths``, from the on-disk cache when it is current.
+
+    Args:
+        paths: Rule directories or files
+        cache_dir: Where built packs are cached (None: no caching)
+
+    Returns:
+        RulePack (empty when no rule files exist)
+    """
+    start = time.perf_counter()
+    files = rule_files(paths)
+    if not files:
+        return RulePack([])
+
+    cache_path = None
+    if cache_dir:
+        prefix = _cache_prefix(paths)
+        cache_path = os.path.join(cache_dir, f"{prefix}-{_signature(files)}.pickle")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as handle:
+                    pack = pickle.load(handle)
+                logger.info(
+                    f"Loaded {len(pack)} rules from {cache_path} in {(time.perf_counter() - start) * 1000:.0f} ms"
+                )
+                return pack
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable rule pack cache {cache_path}: {e}")
+
+    pack = build_rule_pack(files)
+    logger.info(f"Built rule pack from {len(files)} files in {time.perf_counter() - start:.2f}s: {pack.stats()}")
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile("wb", dir=cache_dir, suffix=".tmp", delete=False) as handle:
+                pickle.dump(pack, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(handle.name, cache_path)
+            # Older builds of the same directories
+            for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.pickle")):
+                if stale != cache_path:
+                    os.remove(stale)
+        except OSError as e:
+            logger.warning(f"Failed to cache rule pack in {cache_dir}: {e}")
+    return pack
+
+
+_packs: Dict[Tuple[Tuple[str, ...], Optional[str]], RulePack] = {}
+_packs_lock = threading.Lock()
+
+
+def get_rule_pack(paths: Optional[Sequence[str]] = None, cache_dir: Optional[str] = RULE_PACK_CACHE_DIR) -> RulePack:
+    """The pack for ``paths`` (default: AEGIS_RULE_PACKS), loaded once per process."""
+    key = (tuple(paths or RULE_PACK_DIRS), cache_dir)
+    with _packs_lock:
+        pack = _packs.get(key)
+        if pack is None:
+            pack = load_rule_pack(key[0], cache_dir)
+            _packs[key] = pack
+        return pack
+
+
+def init_rule_packs(app) -> None:
+    """Load the default rule packs in the background when ``RULE_PACK_PRELOAD`` is set."""
+    if not app.config.get("RULE_PACK_PRELOAD") or not rule_files(RULE_PACK_DIRS):
+        return
+    threading.Thread(target=get_rule_pack, name="aegis-rule-pack-preload", daemon=True).start()
@@ -39,6 +39,15 @@ if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     debug = os.environ.get("FLASK_ENV") == "development"
 
+    # Serve progress streams from the asyncio SSE server so viewers don't hold
+    # Flask threads (in debug, only in the reloader's serving process)
+    if app.config.get("SSE_SERVER_ENABLED") and (not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        from aegis.sse.server import start_sse_server
+
+        sse_server = start_sse_server(app, host=app.config.get("SSE_SERVER_HOST") or host)
+        if sse_server:
+            print(f"Progress streams on http://{sse_server.host}:{sse_server.port}")
+
     print(f"Starting aegis on http://{host}:{port}")
     print("Upload your source code ZIP files for security analysis")
     print("Press CTRL+C to stop the server")
@@ -0,0 +1 @@
+"""Offline benchmarks for the scan pipeline (fake providers, synthetic repos)."""
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Local multi-process harness for coordinator mode.
+
+Runs a coordinator (the worker API on a local port) in this process and
+starts ``--nodes`` worker processes, each with its own temporary database
+and the same deterministic FakeProvider models, standing in for GPU hosts.
+A scan then runs through ScanService.run_background, so every chunk batch
+becomes a work unit served by the nodes. With ``--kill-after`` one node is
+SIGKILLed mid-scan to exercise heartbeat loss and re-dispatch.
+
+After the distributed scan the nodes are stopped and the same files are
+scanned again locally; the two runs must produce the same findings.
+
+Usage:
+    python -m benchmarks.distributed_harness --nodes 3 --files 200
+    python -m benchmarks.distributed_harness --nodes 2 --kill-after 1.5 --latency-ms 50
+"""
+
+import argparse
+import json
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Set, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.run_scan_bench import _install_timed_database, _register_models  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate remote scan workers on this host")
+    parser.add_argument("--nodes", type=int, default=3, help="Worker processes to start")
+    parser.add_argument("--node-slots", type=int, default=2, help="Units each node runs at once")
+    parser.add_argument("--files", type=int, default=200, help="Synthetic files to scan")
+    parser.add_argument("--models", type=int, default=2, help="Fake models per scan")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Median fake latency per call")
+    parser.add_argument("--chunk-size", type=int, default=800, help="Lines per chunk")
+    parser.add_argument("--kill-after", type=float, default=0.0, help="SIGKILL one node this many seconds into the scan (0: never)")
+    parser.add_argument("--heartbeat-timeout", type=float, default=3.0, help="Coordinator heartbeat timeout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--node", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--coordinator", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-id", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--token", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def _model_args(args: argparse.Namespace) -> argparse.Namespace:
+    """The fake model settings _register_models expects, identical on every node."""
+    return argparse.Namespace(
+        models=args.models,
+        chunk_workers=args.node_slots,
+        latency_ms=args.latency_ms,
+        latency_dist="lognormal",
+        latency_sigma=0.5,
+        error_rate=0.0,
+        error_kind="error",
+        findings_per_chunk=1.0,
+        output_padding=0,
+    )
+
+
+def run_node(args: argparse.Namespace) -> int:
+    """Worker process: serve the fake models to the coordinator until SIGTERM."""
+    work_dir = tempfile.mkdtemp(prefix="aegis-node-")
+    _install_timed_database(os.path.join(work_dir, "node.db"))
+
+    from aegis.distributed.worker import RemoteWorker
+    from benchmarks.fake_provider import register_fake_provider
+
+    register_fake_provider()
+    model_ids = _register_models(_model_args(args))
+    worker = RemoteWorker(
+        args.coordinator,
+        model_ids=model_ids,
+        slots=args.node_slots,
+        worker_id=args.worker_id,
+        token=args.token,
+        heartbeat_interval=1.0,
+        pull_wait=2.0,
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    worker.run()
+    return 0
+
+
+def _start_coordinator(args: argparse.Namespace, token: str) -> Tuple[Any, str]:
+    from flask import Flask
+    from werkzeug.serving import make_server
+
+    from aegis.api.routes_workers import workers_bp
+    from aegis.distributed.coordinator import init_coordinator
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    app = Flask("aegis-harness")
+    app.config.update(
+        COORDINATOR_ENABLED=True,
+        WORKER_TOKEN=token,
+        WORKER_HEARTBEAT_TIMEOUT=args.heartbeat_timeout,
+        WORKER_UNIT_TIMEOUT=60.0,
+    )
+    app.register_blueprint(workers_bp)
+    coordinator = init_coordinator(app)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="aegis-harness-http", daemon=True).start()
+    return coordinator, f"http://127.0.0.1:{server.server_port}"
+
+
+def _start_nodes(args: argparse.Namespace, url: str, token: str) -> List[subprocess.Popen]:
+    nodes = []
+    for idx in range(args.nodes):
+        cmd = [
+            sys.executable, "-m", "benchmarks.distributed_harness", "--node",
+            "--coordinator", url,
+            "--worker-id", f"node-{idx}",
+            "--token", token,
+            "--node-slots", str(args.node_slots),
+            "--models", str(args.models),
+            "--latency-ms", str(args.latency_ms),
+        ]
+        nodes.append(subprocess.Popen(cmd, cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    return nodes
+
+
+def _wait_for_workers(coordinator, count: int, timeout: float = 60.0) -> bool:
+    """Wait until exactly ``count`` workers are registered."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if len(coordinator.stats()["workers"]) == count:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def _scan(files: Dict[str, str], model_ids: List[str], args: argparse.Namespace) -> Dict[str, Any]:
+    from flask import Flask
+
+    from aegis.database.repositories import FindingRepository, ScanRepository
+    from aegis.services.scan_service import ScanService, ScanState
+
+    scan_id = str(uuid.uuid4())
+    scan_repo, finding_repo = ScanRepository(), FindingRepository()
+    state = ScanState(results={}, status={}, cancel_events={scan_id: threading.Event()})
+    service = ScanService(state, use_v2=True, get_v2_repositories=lambda: (scan_repo, finding_repo))
+    scan_repo.create(scan_id=scan_id, pipeline_config={"models": model_ids}, consensus_strategy="majority_vote")
+    for file_path, content in files.items():
+        scan_repo.add_file(scan_id, file_path, content, None)
+
+    start = time.perf_counter()
+    service.run_background(scan_id, files, model_ids, "majority_vote", Flask("aegis-harness"), chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    result = state.results.get(scan_id)
+    findings = result.consensus_findings if result else []
+    return {
+        "status": state.status.get(scan_id),
+        "seconds": round(elapsed, 3),
+        "findings": len(findings),
+        "fingerprints": _fingerprints(findings),
+    }
+
+
+def _fingerprints(findings) -> Set[str]:
+    return {finding.fingerprint for finding in findings}
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.node:
+        return run_node(args)
+
+    work_dir = tempfile.mkdtemp(prefix="aegis-harness-")
+    _install_timed_database(os.path.join(work_dir, "coordinator.db"))
+
+    from benchmarks.fake_provider import register_fake_provider
+    from benchmarks.synthetic_repo import generate_repo
+
+    register_fake_provider()
+    model_ids = _register_models(_model_args(args))
+    files = generate_repo(args.files, seed=args.seed)
+
+    token = secrets.token_hex(16)
+    coordinator, url = _start_coordinator(args, token)
+    nodes = _start_nodes(args, url, token)
+    killed = None
+    try:
+        if not _wait_for_workers(coordinator, args.nodes):
+            print(f"Only {len(coordinator.stats()['workers'])} of {args.nodes} nodes registered", file=sys.stderr)
+            return 1
+
+        if args.kill_after > 0 and nodes:
+            def _kill() -> None:
+                nonlocal killed
+                killed = nodes[0]
+                killed.send_signal(signal.SIGKILL)
+                print(f"Killed node-0 after {args.kill_after}s", file=sys.stderr)
+
+            timer = threading.Timer(args.kill_after, _kill)
+            timer.daemon = True
+            timer.start()
+
+        print(f"Distributed scan of {len(files)} files on {args.nodes} nodes ...", file=sys.stderr)
+        distributed = _scan(files, model_ids, args)
+        stats = coordinator.stats()
+    finally:
+        for node in nodes:
+            if node is not killed:
+                node.terminate()
+        for node in nodes:
+            try:
+                node.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                node.kill()
+
+    # Nodes unregistered on SIGTERM, so this scan runs on local models
+    _wait_for_workers(coordinator, 0, timeout=args.heartbeat_timeout * 3)
+    print("Local reference scan ...", file=sys.stderr)
+    local = _scan(files, model_ids, args)
+
+    same_findings = distributed.pop("fingerprints") == local.pop("fingerprints")
+    remote_units = sum(worker["completed_units"] for worker in stats["workers"])
+    report = {
+        "benchmark": "distributed_scan",
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "node", "coordinator", "worker_id", "token")},
+        "distributed": distributed,
+        "local": local,
+        "same_findings": same_findings,
+        "workers": stats["workers"],
+        "remote_units": remote_units,
+        "redispatched_units": stats["redispatched_units"],
+        "failed_units": stats["failed_units"],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    ok = (
+        distributed["status"] == "completed"
+        and same_findings
+        and remote_units > 0
+        and stats["failed_units"] == 0
+    )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""Deterministic fake model provider for offline benchmarks.
+
+``FakeProvider`` behaves like a remote model behind ``agenerate()``: it sleeps
+for a latency drawn from a configurable distribution, fails at a configurable
+rate, reports token usage and returns JSON findings of a configurable size.
+Every draw is seeded from the prompt, so the same repository produces the
+same latencies, failures and findings on every run.
+
+Models use it by registering with ``provider_id="fake"`` (see
+``register_fake_provider``); their ``settings["fake"]`` holds the
+FakeProviderConfig fields.
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import zlib
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List
+
+from aegis.models.provider_factory import register_provider_factory
+from aegis.models.schema import ModelRecord
+from aegis.models.usage import estimate_tokens, report_usage
+
+FAKE_PROVIDER_ID = "fake"
+
+_CATEGORIES = [
+    ("sql_injection", "CWE-89"),
+    ("xss", "CWE-79"),
+    ("command_injection", "CWE-78"),
+    ("path_traversal", "CWE-22"),
+    ("hardcoded_secret", "CWE-798"),
+]
+
+
+class FakeProviderError(RuntimeError):
+    """Injected provider failure."""
+
+
+class FakeRateLimitError(FakeProviderError):
+    """Injected 429; classified as overload, so chunks are retried."""
+
+    status_code = 429
+
+
+@dataclass
+class FakeProviderConfig:
+    """Behaviour of one fake model."""
+
+    # Median latency per call
+    latency_ms: float = 20.0
+    # "fixed", "uniform" (0..2x median) or "lognormal"
+    latency_dist: str = "lognormal"
+    # Spread of the lognormal distribution (sigma of the underlying normal)
+    latency_sigma: float = 0.5
+    # Fraction of calls that fail
+    error_rate: float = 0.0
+    # "error" (not retried) or "rate_limit" (429, retried by the engine)
+    error_kind: str = "error"
+    # Findings per response (uniformly 0..2x this value)
+    findings_per_chunk: float = 1.0
+    # Extra characters of prose around the JSON, to model verbose outputs
+    output_padding: int = 0
+    # Varies findings between fake models on the same prompt
+    seed: int = 0
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "FakeProviderConfig":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in (settings or {}).items() if k in known})
+
+
+class FakeProvider:
+    """Async provider with seeded latency, failures and JSON findings."""
+
+    def __init__(self, config: FakeProviderConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self._attempts: Dict[int, int] = {}
+
+    def _rng(self, key: int, attempt: int = 0) -> random.Random:
+        return random.Random(key ^ (self.config.seed * 0x9E3779B1) ^ (attempt * 0x85EBCA6B))
+
+    def _latency(self, rng: random.Random) -> float:
+        median = max(0.0, self.config.latency_ms) / 1000.0
+        if self.config.latency_dist == "fixed":
+            return median
+        if self.config.latency_dist == "uniform":
+            return rng.uniform(0.0, 2.0 * median)
+        return median * math.exp(rng.gauss(0.0, self.config.latency_sigma))
+
+    def _findings(self, rng: random.Random) -> List[Dict[str, Any]]:
+        count = int(rng.uniform(0.0, 2.0 * self.config.findings_per_chunk) + 0.5)
+        findings = []
+        for _ in range(count):
+            category, cwe = rng.choice(_CATEGORIES)
+            line = rng.randint(1, 40)
+            findings.append({
+                "line_start": line,
+                "line_end": line + rng.randint(0, 3),
+                "category": category,
+                "cwe": cwe,
+                "severity": rng.choice(["critical", "high", "medium", "low"]),
+                "description": f"Untrusted input reaches a {category.replace('_', ' ')} sink.",
+                "confidence": round(rng.uniform(0.4, 1.0), 2),
+            })
+        return findings
+
+    async def agenerate(self, prompt: str, **kwargs) -> str:
+        key = zlib.crc32(prompt.encode("utf-8"))
+        with self._lock:
+            self.calls += 1
+            # Retries of the same prompt draw new latency and failure values
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        rng = self._rng(key, attempt)
+        await asyncio.sleep(self._latency(rng))
+        if rng.random() < self.config.error_rate:
+            with self._lock:
+                self.failures += 1
+            if self.config.error_kind == "rate_limit":
+                raise FakeRateLimitError("fake provider: rate limited")
+            raise FakeProviderError("fake provider: injected failure")
+
+        output = json.dumps({"findings": self._findings(self._rng(key))})
+        if self.config.output_padding:
+            output = "Analysis notes. " * (self.config.output_padding // 16) + "\n" + output
+        report_usage(estimate_tokens(prompt), estimate_tokens(output))
+        return output
+
+
+_providers: List[FakeProvider] = []
+_providers_lock = threading.Lock()
+
+
+def _create_fake_provider(model: ModelRecord) -> FakeProvider:
+    provider = FakeProvider(FakeProviderConfig.from_settings((model.settings or {}).get("fake")))
+    with _providers_lock:
+        _providers.append(provider)
+    return provider
+
+
+def register_fake_provider() -> None:
+    """Make ``create_provider`` build FakeProviders for provider_id "fake"."""
+    register_provider_factory(FAKE_PROVIDER_ID, _create_fake_provider)
+
+
+def provider_counters() -> Dict[str, int]:
+    """Calls and injected failures across all fake providers created so far."""
+    with _providers_lock:
+        return {
+            "calls": sum(p.calls for p in _providers),
+            "failures": sum(p.failures for p in _providers),
+        }
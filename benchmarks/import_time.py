@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Startup import-time benchmark and regression guard.
+
+Runs ``python -X importtime`` on ``from aegis import create_app; create_app()``
+in fresh interpreters and reports the slowest imports, the total import time
+of the ``aegis`` package and the wall time to a ready app. Fails (exit 1) when
+startup exceeds the budget or when a heavy optional dependency (torch,
+transformers, provider SDKs, HTTP clients, cryptography) is imported eagerly;
+those belong behind the first use of the provider that needs them.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 5 --budget-ms 1000 --top 30 --output imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Top-level modules that must not be imported just by starting the app
+DEFERRED_MODULES = (
+    "torch",
+    "transformers",
+    "accelerate",
+    "bitsandbytes",
+    "peft",
+    "openai",
+    "anthropic",
+    "google.generativeai",
+    "cryptography",
+    "aiohttp",
+    "requests",
+    "httpx",
+)
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from aegis import create_app
+imported = time.perf_counter()
+create_app()
+ready = time.perf_counter()
+json.dump({
+    "import_ms": (imported - start) * 1000,
+    "ready_ms": (ready - start) * 1000,
+    "modules": sorted(sys.modules),
+}, open(sys.argv[1], "w"))
+"""
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure aegis startup import time")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to measure (median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Fail if median time to a ready app exceeds this")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list")
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout)")
+    return parser.parse_args(argv)
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` lines into {module, self_us, cumulative_us, depth}."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def measure_once() -> Dict[str, Any]:
+    """Start the app in a fresh interpreter and collect its import timings."""
+    with tempfile.TemporaryDirectory(prefix="aegis-imports-") as work_dir:
+        result_path = os.path.join(work_dir, "result.json")
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+        # Keep the scan worker from requeueing scans out of the local database
+        env["AEGIS_USE_V2"] = "false"
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD, result_path],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "startup failed")
+        with open(result_path, "r", encoding="utf-8") as handle:
+            result = json.load(handle)
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    runs = [measure_once() for _ in range(max(1, args.runs))]
+
+    ready_ms = statistics.median(run["ready_ms"] for run in runs)
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    last = runs[-1]
+    aegis_us = next((row["cumulative_us"] for row in last["imports"] if row["module"] == "aegis"), None)
+    slowest = sorted(last["imports"], key=lambda row: row["self_us"], reverse=True)[: args.top]
+    modules = set(last["modules"])
+    eager = [name for name in DEFERRED_MODULES if name in modules]
+
+    report = {
+        "benchmark": "startup_imports",
+        "python": sys.version.split()[0],
+        "runs": len(runs),
+        "import_ms": round(import_ms, 1),
+        "ready_ms": round(ready_ms, 1),
+        "aegis_cumulative_ms": round(aegis_us / 1000, 1) if aegis_us is not None else None,
+        "modules_loaded": len(modules),
+        "budget_ms": args.budget_ms,
+        "eager_heavy_imports": eager,
+        "slowest_imports": [
+            {"module": row["module"], "self_ms": round(row["self_us"] / 1000, 2),
+             "cumulative_ms": round(row["cumulative_us"] / 1000, 2)}
+            for row in slowest
+        ],
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+
+    failures = []
+    if ready_ms > args.budget_ms:
+        failures.append(f"startup took {ready_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
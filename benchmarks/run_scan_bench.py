@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+End-to-end scan benchmark with fake providers and synthetic repositories.
+
+Drives ScanService.run_background and PipelineExecutor.execute over generated
+trees (small=100, medium=10k, large=100k files, or any file count) with
+deterministic FakeProvider models, so changes to chunking, consensus or
+scheduling can be measured without Ollama or cloud APIs.
+
+Each (target, size) scenario runs in a fresh subprocess against its own
+temporary SQLite database, so peak RSS and DB timings are per scenario.
+Reported per scenario: end-to-end seconds, chunks per second, provider calls
+and injected failures, findings, peak RSS, and time spent in database
+connections that wrote (setup excluded).
+
+Usage:
+    python -m benchmarks.run_scan_bench --sizes small,medium --output bench.json
+    python -m benchmarks.run_scan_bench --sizes 2000 --latency-ms 50 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic_repo import PRESETS  # noqa: E402
+
+TARGETS = ("scan_service", "pipeline")
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the scan pipeline with fake providers")
+    parser.add_argument("--sizes", default="small,medium", help="Comma-separated presets (small, medium, large) or file counts")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="Comma-separated: scan_service, pipeline")
+    parser.add_argument("--models", type=int, default=2, help="Fake models per scan")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Median fake latency per call")
+    parser.add_argument("--latency-dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal spread")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake calls that fail")
+    parser.add_argument("--error-kind", default="error", choices=["error", "rate_limit"])
+    parser.add_argument("--findings-per-chunk", type=float, default=1.0)
+    parser.add_argument("--output-padding", type=int, default=0, help="Extra characters per model output")
+    parser.add_argument("--chunk-size", type=int, default=800, help="Lines per chunk")
+    parser.add_argument("--chunk-workers", type=int, default=8, help="Concurrent chunks per model")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--scenario", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--scenario-output", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def _file_count(size: str) -> int:
+    return PRESETS[size] if size in PRESETS else int(size)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _install_timed_database(db_path: str):
+    """Point the global database at ``db_path``, timing every connection."""
+    import aegis.database as database
+
+    class TimedDatabase(database.Database):
+        def __init__(self, path: str):
+            self._timing_lock = threading.Lock()
+            self.write_seconds = 0.0
+            self.read_seconds = 0.0
+            self.write_connections = 0
+            super().__init__(path)
+
+        @contextmanager
+        def get_connection(self):
+            start = time.perf_counter()
+            with super().get_connection() as conn:
+                try:
+                    yield conn
+                finally:
+                    elapsed = time.perf_counter() - start
+                    with self._timing_lock:
+                        if conn.total_changes:
+                            self.write_seconds += elapsed
+                            self.write_connections += 1
+                        else:
+                            self.read_seconds += elapsed
+
+        def reset(self) -> None:
+            with self._timing_lock:
+                self.write_seconds = self.read_seconds = 0.0
+                self.write_connections = 0
+
+    db = TimedDatabase(db_path)
+    database._db_instance = db
+    return db
+
+
+def _register_models(args: argparse.Namespace) -> List[str]:
+    from aegis.models.registry import ModelRegistryV2
+    from aegis.models.schema import ModelRole, ModelType
+    from benchmarks.fake_provider import FAKE_PROVIDER_ID
+
+    registry = ModelRegistryV2()
+    model_ids = []
+    for idx in range(args.models):
+        model_id = f"fake:bench-{idx}"
+        registry.register_model(
+            model_id=model_id,
+            model_type=ModelType.OPENAI_COMPATIBLE,
+            provider_id=FAKE_PROVIDER_ID,
+            model_name=f"bench-{idx}",
+            display_name=f"Fake bench model {idx}",
+            roles=[ModelRole.DEEP_SCAN],
+            parser_id="json_schema",
+            settings={
+                "chunk_workers": args.chunk_workers,
+                "runtime": {"max_concurrency": args.chunk_workers},
+                "fake": {
+                    "latency_ms": args.latency_ms,
+                    "latency_dist": args.latency_dist,
+                    "latency_sigma": args.latency_sigma,
+                    "error_rate": args.error_rate,
+                    "error_kind": args.error_kind,
+                    "findings_per_chunk": args.findings_per_chunk,
+                    "output_padding": args.output_padding,
+                    "seed": idx,
+                },
+            },
+        )
+        model_ids.append(model_id)
+    return model_ids
+
+
+def _run_scan_service(scan_id: str, files: Dict[str, str], model_ids: List[str], args, db) -> Dict[str, Any]:
+    from flask import Flask
+
+    from aegis.database.repositories import FindingRepository, ScanRepository
+    from aegis.services.scan_service import ScanService, ScanState
+
+    scan_repo, finding_repo = ScanRepository(), FindingRepository()
+    state = ScanState(results={}, status={}, cancel_events={scan_id: threading.Event()})
+    service = ScanService(state, use_v2=True, get_v2_repositories=lambda: (scan_repo, finding_repo))
+
+    # Upload-time work (scan row and stored sources) is timed separately
+    setup_start = time.perf_counter()
+    scan_repo.create(scan_id=scan_id, pipeline_config={"models": model_ids}, consensus_strategy="majority_vote")
+    for file_path, content in files.items():
+        scan_repo.add_file(scan_id, file_path, content, None)
+    setup_seconds = time.perf_counter() - setup_start
+    db.reset()
+
+    start = time.perf_counter()
+    service.run_background(
+        scan_id, files, model_ids, "majority_vote", Flask("aegis-bench"), chunk_size=args.chunk_size
+    )
+    elapsed = time.perf_counter() - start
+    result = state.results.get(scan_id)
+    return {
+        "status": state.status.get(scan_id),
+        "seconds": elapsed,
+        "setup_seconds": round(setup_seconds, 3),
+        "findings": len(result.consensus_findings) if result else 0,
+    }
+
+
+def _run_pipeline(scan_id: str, files: Dict[str, str], model_ids: List[str], args, db) -> Dict[str, Any]:
+    from aegis.pipeline import ConsensusStrategy, PipelineConfig, PipelineExecutor, PipelineStep, StepKind
+
+    steps = [PipelineStep(id=f"scan_{idx}", kind=StepKind.MODEL, models=[model_id]) for idx, model_id in enumerate(model_ids)]
+    steps.append(PipelineStep(
+        id="consensus",
+        kind=StepKind.CONSENSUS,
+        strategy=ConsensusStrategy.MAJORITY,
+        sources=[step.id for step in steps],
+    ))
+    pipeline = PipelineConfig(name="benchmark", steps=steps)
+    executor = PipelineExecutor(max_workers=args.chunk_workers)
+    db.reset()
+
+    start = time.perf_counter()
+    context = executor.execute(pipeline, files, scan_id=scan_id, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    consensus = context.step_outputs.get("consensus") or {}
+    return {
+        "status": "failed" if context.failed_steps else "completed",
+        "seconds": elapsed,
+        "findings": len(consensus.get("findings") or []),
+    }
+
+
+def run_scenario(target: str, size: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one scenario in this process and return its measurements."""
+    work_dir = tempfile.mkdtemp(prefix="aegis-bench-")
+    db = _install_timed_database(os.path.join(work_dir, "bench.db"))
+
+    from aegis.models.telemetry import get_telemetry_writer
+    from aegis.utils import chunk_file_lines
+    from benchmarks.fake_provider import provider_counters, register_fake_provider
+    from benchmarks.synthetic_repo import generate_repo
+
+    register_fake_provider()
+    model_ids = _register_models(args)
+    files = generate_repo(_file_count(size), seed=args.seed)
+    chunks = sum(1 for content in files.values() for _ in chunk_file_lines(content, args.chunk_size)) * len(model_ids)
+
+    scan_id = str(uuid.uuid4())
+    runner = _run_scan_service if target == "scan_service" else _run_pipeline
+    measured = runner(scan_id, files, model_ids, args, db)
+    # Telemetry rows still buffered belong to this scan's database time
+    flush_start = time.perf_counter()
+    get_telemetry_writer().flush()
+    seconds = measured.pop("seconds") + (time.perf_counter() - flush_start)
+
+    counters = provider_counters()
+    return {
+        "target": target,
+        "size": size,
+        "files": len(files),
+        "models": len(model_ids),
+        "chunks": chunks,
+        **measured,
+        "end_to_end_seconds": round(seconds, 3),
+        "chunks_per_sec": round(chunks / seconds, 1) if seconds > 0 else None,
+        "provider_calls": counters["calls"],
+        "provider_failures": counters["failures"],
+        "peak_rss_mb": _peak_rss_mb(),
+        "db_write_seconds": round(db.write_seconds, 3),
+        "db_write_connections": db.write_connections,
+        "db_read_seconds": round(db.read_seconds, 3),
+    }
+
+
+def _run_subprocess(target: str, size: str, argv: List[str]) -> Dict[str, Any]:
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+        output_path = handle.name
+    try:
+        cmd = [sys.executable, "-m", "benchmarks.run_scan_bench", *argv,
+               "--scenario", f"{target}:{size}", "--scenario-output", output_path]
+        proc = subprocess.run(
+            cmd,
+            cwd=os.path.abspath(os.path.join(os.path.dirname(__file__), "..")),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if proc.returncode != 0:
+            return {"target": target, "size": size, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+        with open(output_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+    finally:
+        os.unlink(output_path)
+
+
+def _strip_output_args(argv: List[str]) -> List[str]:
+    stripped, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg == "--output":
+            skip = True
+            continue
+        if arg.startswith("--output="):
+            continue
+        stripped.append(arg)
+    return stripped
+
+
+def main(argv=None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    args = _parse_args(argv)
+
+    if args.scenario:
+        target, size = args.scenario.split(":", 1)
+        result = run_scenario(target, size, args)
+        with open(args.scenario_output, "w", encoding="utf-8") as handle:
+            json.dump(result, handle)
+        return 0
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        print(f"Unknown targets: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    child_argv = _strip_output_args(argv)
+    results = []
+    for size in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        for target in targets:
+            print(f"Running {target} on {size} ...", file=sys.stderr)
+            results.append(_run_subprocess(target, size, child_argv))
+
+    report = {
+        "benchmark": "scan_pipeline",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "scenario", "scenario_output")},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""Synthetic source trees for benchmarks.
+
+Files are generated in memory from a seed: a mix of Python, JavaScript and
+Java modules of varying length, some containing the kinds of lines scanners
+flag (string-built SQL, shell calls, hardcoded keys). The same seed and size
+always produce the same tree.
+"""
+
+import random
+from typing import Dict
+
+PRESETS = {
+    "small": 100,
+    "medium": 10_000,
+    "large": 100_000,
+}
+
+_PY_LINES = [
+    "def handler_{n}(request):",
+    "    user_id = request.args.get('id')",
+    "    query = \"SELECT * FROM users WHERE id = '%s'\" % user_id",
+    "    rows = db.execute(query).fetchall()",
+    "    os.system('convert ' + request.args.get('file'))",
+    "    API_KEY = 'sk-live-0123456789abcdef'",
+    "    total = sum(row['amount'] for row in rows)",
+    "    logger.info('processed %d rows', len(rows))",
+    "    return jsonify(total=total)",
+    "",
+]
+_JS_LINES = [
+    "function render{n}(req, res) {{",
+    "  const name = req.query.name;",
+    "  res.send('<h1>Hello ' + name + '</h1>');",
+    "  const items = data.filter((item) => item.active);",
+    "  exec('ls ' + req.query.dir, callback);",
+    "  return items.length;",
+    "}}",
+    "",
+]
+_JAVA_LINES = [
+    "  public List<User> find{n}(String id) {{",
+    "    String sql = \"SELECT * FROM users WHERE id = \" + id;",
+    "    Statement stmt = connection.createStatement();",
+    "    ResultSet rs = stmt.executeQuery(sql);",
+    "    List<User> users = mapper.map(rs);",
+    "    return users;",
+    "  }}",
+    "",
+]
+_LANGUAGES = [
+    (".py", "import os\n\n", _PY_LINES, ""),
+    (".js", "'use strict';\n\n", _JS_LINES, ""),
+    (".java", "public class Module {{\n", _JAVA_LINES, "}\n"),
+]
+
+
+def generate_repo(file_count: int, seed: int = 42, min_lines: int = 20, max_lines: int = 120) -> Dict[str, str]:
+    """
+    Generate ``file_count`` source files.
+
+    Args:
+        file_count: Number of files
+        seed: Random seed
+        min_lines: Shortest file, in lines
+        max_lines: Longest file, in lines
+
+    Returns:
+        Dict of file path -> content, like extract_source_files()
+    """
+    rng = random.Random(seed)
+    files: Dict[str, str] = {}
+    for idx in range(file_count):
+        ext, header, body, footer = _LANGUAGES[idx % len(_LANGUAGES)]
+        target = rng.randint(min_lines, max_lines)
+        lines = [header.format()]
+        block = 0
+        while len(lines) < target:
+            lines.extend(line.format(n=block) for line in body)
+            block += 1
+        lines.append(footer)
+        path = f"pkg{idx // 1000:03d}/module_{idx:06d}{ext}"
+        files[path] = "\n".join(lines[:target] + [footer])
+    return files
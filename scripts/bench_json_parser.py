@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for JSONFindingsParser extraction throughput.
+
+Runs the parser over a corpus of raw model outputs and reports outputs/s and
+MB/s for the single-pass extractor (with and without orjson) against the
+previous multi-strategy extractor.
+
+Corpus: pass --corpus DIR with one raw model output per file (*.txt, *.json,
+*.md; e.g. ParserResult.raw_output dumps from failed or debug scans). Without
+--corpus a synthetic corpus of typical output shapes is used: fenced JSON,
+JSON wrapped in prose, echoed broken attempts, and long noisy outputs close to
+the parser's 100k max_length.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aegis.models.parsers import json_scan  # noqa: E402
+from aegis.models.parsers.json_schema import JSONFindingsParser  # noqa: E402
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark JSON findings extraction")
+    parser.add_argument("--corpus", default=None, help="Directory of raw model outputs")
+    parser.add_argument("--iterations", type=int, default=5, help="Passes over the corpus per variant")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the synthetic corpus")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args()
+
+
+def _finding(rng: random.Random, idx: int) -> Dict[str, object]:
+    return {
+        "file_path": f"src/module_{idx % 7}.py",
+        "line_start": rng.randint(1, 400),
+        "line_end": rng.randint(400, 420),
+        "snippet": 'query = "SELECT * FROM t WHERE id = {}".format(uid)',
+        "category": rng.choice(["sql_injection", "xss", "path_traversal", "ssrf"]),
+        "cwe": rng.choice(["CWE-89", "CWE-79", "CWE-22", "CWE-918"]),
+        "severity": rng.choice(["critical", "high", "medium", "low"]),
+        "description": "User input {uid} reaches a sink; braces } and quotes \" appear in strings.",
+        "confidence": round(rng.random(), 2),
+    }
+
+
+def synthetic_corpus(seed: int) -> List[str]:
+    """Build representative raw outputs covering the shapes models produce."""
+    rng = random.Random(seed)
+    corpus: List[str] = []
+    for idx in range(40):
+        payload = json.dumps({"findings": [_finding(rng, idx + n) for n in range(rng.randint(0, 6))]}, indent=2)
+        shape = idx % 4
+        if shape == 0:
+            corpus.append(f"```json\n{payload}\n```")
+        elif shape == 1:
+            corpus.append(f"Here is my analysis of the file. It's {{mostly}} fine.\n\n{payload}\n\nLet me know!")
+        elif shape == 2:
+            broken = payload[: len(payload) // 2]
+            corpus.append(f"First attempt: {broken}\n\nCorrected output:\n{payload}")
+        else:
+            corpus.append(payload)
+
+    # Long, noisy outputs near the max_length guardrail
+    for idx in range(4):
+        noise_parts = []
+        size = 0
+        while size < 90_000:
+            part = rng.choice([
+                "The function uses {config} and [items] heavily. ",
+                "Example: {key: 'value', n: [1, 2, 3]} ",
+                "if (x) { y(); } else { z(); }\n",
+                "Unclosed { brace in reasoning. ",
+            ])
+            noise_parts.append(part)
+            size += len(part)
+        payload = json.dumps({"findings": [_finding(rng, idx)]})
+        corpus.append("".join(noise_parts) + "\nFinal answer:\n" + payload)
+    return corpus
+
+
+def load_corpus(path: str) -> List[str]:
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        if not name.endswith((".txt", ".json", ".md")):
+            continue
+        with open(os.path.join(path, name), "r", encoding="utf-8", errors="replace") as handle:
+            corpus.append(handle.read())
+    return corpus
+
+
+def legacy_extract_json(text: str) -> Optional[str]:
+    """The previous extractor (fence regexes, re-scan from every brace, json.loads)."""
+    for pattern, flags in ((r"```json\s*([\s\S]*?)```", re.IGNORECASE), (r"```(?:[a-zA-Z0-9_-]+)?\s*([\s\S]*?)```", 0)):
+        for match in re.finditer(pattern, text, flags=flags):
+            candidate = match.group(1).strip()
+            if not candidate or candidate[0] not in "{[":
+                continue
+            try:
+                json.loads(candidate)
+                return candidate
+            except json.JSONDecodeError:
+                continue
+
+    start_idx = text.find("{")
+    while start_idx != -1:
+        depth = 0
+        for idx in range(start_idx, len(text)):
+            char = text[idx]
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    candidate = text[start_idx : idx + 1]
+                    try:
+                        json.loads(candidate)
+                        return candidate
+                    except json.JSONDecodeError:
+                        break
+        start_idx = text.find("{", start_idx + 1)
+
+    try:
+        json.loads(text)
+        return text
+    except json.JSONDecodeError:
+        return None
+
+
+def _time(fn: Callable[[str], object], corpus: List[str], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    args = _parse_args()
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.seed)
+    if not corpus:
+        print("Corpus is empty", file=sys.stderr)
+        return 1
+
+    total_bytes = sum(len(text.encode("utf-8")) for text in corpus) * args.iterations
+    total_outputs = len(corpus) * args.iterations
+    parser = JSONFindingsParser({"max_length": max(len(text) for text in corpus) + 1})
+    has_orjson = json_scan.orjson is not None
+
+    variants: Dict[str, Callable[[str], object]] = {"legacy_extract": legacy_extract_json}
+    if has_orjson:
+        variants["single_pass_extract[orjson]"] = json_scan.extract_json
+        variants["parser.parse[orjson]"] = parser.parse
+
+    def stdlib(fn: Callable[[str], object]) -> Callable[[str], object]:
+        def wrapped(text: str) -> object:
+            saved, json_scan.orjson = json_scan.orjson, None
+            try:
+                return fn(text)
+            finally:
+                json_scan.orjson = saved
+        return wrapped
+
+    variants["single_pass_extract[json]"] = stdlib(json_scan.extract_json)
+    variants["parser.parse[json]"] = stdlib(parser.parse)
+
+    results = {}
+    for name, fn in variants.items():
+        elapsed = _time(fn, corpus, args.iterations)
+        results[name] = {
+            "seconds": round(elapsed, 4),
+            "outputs_per_s": round(total_outputs / elapsed, 1),
+            "mb_per_s": round(total_bytes / elapsed / 1_000_000, 2),
+        }
+
+    report = {
+        "corpus": args.corpus or "synthetic",
+        "outputs": len(corpus),
+        "iterations": args.iterations,
+        "orjson": has_orjson,
+        "results": results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Corpus: {report['corpus']} ({len(corpus)} outputs x {args.iterations}), orjson={has_orjson}")
+        for name, row in results.items():
+            print(f"  {name:<30} {row['outputs_per_s']:>10} outputs/s {row['mb_per_s']:>8} MB/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())